@@ -0,0 +1,293 @@
+# admission.py
+"""
+准入控制：按工具与数据源分组限制访问上游的并发数，超出时有界排队、限时等待，过载时立即拒绝。
+
+- 每个工具、每个数据源分组（eastmoney、sina 等）各有一个并发上限；调用需同时取得两者的名额
+- 名额已满时进入等待队列；队列已满，或按近期平均占用时间估算的等待时间超过截止时间时立即拒绝，
+  等待超过截止时间也拒绝。拒绝时返回结构化的 overloaded 错误与建议的重试秒数（retry_after）
+- 只作用于需要访问上游的执行（tool_executor 的慢速池）；缓存命中在快速池返回，不受限制，也不会被拒绝
+- 工具线程中的同步代码（如批量工具逐个代码访问上游）通过 Gate.hold() 经事件循环取得名额
+
+所有状态只在事件循环线程中访问，不需要加锁。
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+
+# 平均占用时间的平滑系数
+_EWMA_ALPHA = 0.2
+
+
+class Overloaded(Exception):
+    """
+    调用被准入控制拒绝。
+
+    Args:
+        limiter: 达到上限的限制器名称，如 tool:stock_zh_a_hist、source:eastmoney
+        reason: 拒绝原因
+        retry_after: 建议的重试等待秒数
+    """
+
+    def __init__(self, limiter: str, reason: str, retry_after: float) -> None:
+        self.limiter = limiter
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"overloaded ({limiter}: {reason}), retry after {self.retry_after}s")
+
+    def response(self) -> dict:
+        """MCP 工具返回的结构化错误。"""
+        return {
+            "success": False,
+            "message": f"Error: {self}",
+            "error": "overloaded",
+            "limiter": self.limiter,
+            "retry_after": self.retry_after,
+            "rows": 0,
+            "columns": [],
+            "data": [],
+        }
+
+
+# 当前工具调用所在的事件循环，由 ToolExecutor 设置并随 contextvars 带到工具线程，供 Gate.hold() 使用
+_loop: ContextVar[Optional[asyncio.AbstractEventLoop]] = ContextVar("admission_loop", default=None)
+
+
+@contextmanager
+def loop_bound(loop: asyncio.AbstractEventLoop) -> Iterator[None]:
+    """在 with 块内（及由此复制 contextvars 的工具线程中）允许 Gate.hold() 经 loop 取得名额。"""
+    token = _loop.set(loop)
+    try:
+        yield
+    finally:
+        _loop.reset(token)
+
+
+def parse_limits(raw: str) -> Dict[str, int]:
+    """
+    解析并发上限覆盖配置，如 "stock_zh_a_hist=2,eastmoney=6"（键为工具名或数据源分组）。
+
+    Raises:
+        ValueError: 格式不正确
+    """
+    limits: Dict[str, int] = {}
+    for item in raw.split(","):
+        if not item.strip():
+            continue
+        name, sep, value = item.partition("=")
+        if not sep or not name.strip():
+            raise ValueError(f"invalid concurrency limit {item!r}, expected name=N")
+        limits[name.strip()] = int(value)
+    return limits
+
+
+class Limiter:
+    """
+    有界等待队列的并发限制器（先到先得，释放时把名额直接交给队首等待者）。
+
+    Args:
+        name: 名称（用于错误信息与统计）
+        limit: 并发上限
+        max_queue: 最多排队的调用数
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int) -> None:
+        self.name = name
+        self.limit = max(1, int(limit))
+        self.max_queue = max(0, int(max_queue))
+        self.active = 0
+        self.avg_hold: Optional[float] = None
+        self.rejected = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    def estimated_wait(self) -> float:
+        """新到达的调用预计等待的秒数（尚无占用时间样本时为 0）。"""
+        if self.active < self.limit and not self._waiters:
+            return 0.0
+        return (len(self._waiters) + 1) / self.limit * (self.avg_hold or 0.0)
+
+    def _reject(self, reason: str, retry_after: float) -> Overloaded:
+        self.rejected += 1
+        return Overloaded(self.name, reason, retry_after)
+
+    async def acquire(self, deadline: float) -> None:
+        """
+        取得一个名额，最晚等到 deadline（time.monotonic() 时刻）。
+
+        Raises:
+            Overloaded: 队列已满、预计等待超过截止时间或等待超时
+        """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        remaining = deadline - time.monotonic()
+        estimate = self.estimated_wait()
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject(f"queue full ({self.max_queue} waiting)", estimate or remaining)
+        if estimate > remaining:
+            raise self._reject(f"estimated wait {estimate:.1f}s exceeds deadline", estimate)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), max(0.0, remaining))
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # 超时的同时已被交到名额：归还
+                self.release()
+            else:
+                waiter.cancel()
+                self._remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._reject("timed out waiting for a slot", self.estimated_wait() or remaining) from None
+
+    def _remove(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self, held_seconds: Optional[float] = None) -> None:
+        """归还名额；held_seconds 为本次占用时间，用于估算等待。"""
+        if held_seconds is not None:
+            self.avg_hold = (
+                held_seconds if self.avg_hold is None else self.avg_hold + _EWMA_ALPHA * (held_seconds - self.avg_hold)
+            )
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "rejected": self.rejected,
+            "avg_hold_ms": None if self.avg_hold is None else round(self.avg_hold * 1000, 1),
+        }
+
+
+class Gate:
+    """一次调用需要同时取得的限制器（工具、数据源分组），按固定顺序获取，避免相互等待。"""
+
+    def __init__(self, limiters: List[Limiter], timeout: float) -> None:
+        self.limiters = limiters
+        self.timeout = timeout
+
+    async def acquire(self) -> List[Limiter]:
+        """
+        按顺序取得全部名额，返回已取得的限制器（交给 release 归还）。
+
+        Raises:
+            Overloaded: 任一限制器拒绝（已取得的名额会先归还）
+        """
+        deadline = time.monotonic() + self.timeout
+        held: List[Limiter] = []
+        try:
+            for limiter in self.limiters:
+                await limiter.acquire(deadline)
+                held.append(limiter)
+        except BaseException:
+            for limiter in reversed(held):
+                limiter.release()
+            raise
+        return held
+
+    @staticmethod
+    def release(held: List[Limiter], held_seconds: Optional[float] = None) -> None:
+        """归还 acquire 取得的名额（须在事件循环线程中调用）。"""
+        for limiter in reversed(held):
+            limiter.release(held_seconds)
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """
+        取得全部名额后执行，退出时归还。
+
+        Raises:
+            Overloaded: 任一限制器拒绝
+        """
+        held = await self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(held, time.monotonic() - started)
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        """
+        在工具线程中（同步代码）取得全部名额后执行，退出时归还。
+
+        经由 ToolExecutor 执行时通过调用方的事件循环排队；不在其中（直接调用、预取、测试）时不限制。
+
+        Raises:
+            Overloaded: 任一限制器拒绝
+        """
+        loop = _loop.get()
+        if loop is None:
+            yield
+            return
+        held = asyncio.run_coroutine_threadsafe(self.acquire(), loop).result()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            loop.call_soon_threadsafe(self.release, held, time.monotonic() - started)
+
+
+class AdmissionController:
+    """
+    按工具与数据源分组创建限制器。
+
+    Args:
+        tool_limit: 每个工具访问上游的并发上限
+        source_limit: 每个数据源分组访问上游的并发上限
+        max_queue: 每个限制器最多排队的调用数
+        timeout: 等待名额的最长秒数
+        overrides: 按工具名或数据源分组覆盖并发上限（见 parse_limits）
+    """
+
+    def __init__(
+        self,
+        tool_limit: int = 4,
+        source_limit: int = 8,
+        max_queue: int = 32,
+        timeout: float = 15.0,
+        overrides: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self.tool_limit = tool_limit
+        self.source_limit = source_limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.overrides = dict(overrides or {})
+        self._limiters: Dict[Tuple[str, str], Limiter] = {}
+
+    def _limiter(self, kind: str, name: str, default: int) -> Limiter:
+        key = (kind, name)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limit = self.overrides.get(name, default)
+            limiter = self._limiters[key] = Limiter(f"{kind}:{name}", limit, self.max_queue)
+        return limiter
+
+    def gate(self, tool: str, source: str = "") -> Gate:
+        """工具（及其数据源分组）的准入门。"""
+        limiters = [self._limiter("tool", tool, self.tool_limit)]
+        if source:
+            limiters.append(self._limiter("source", source, self.source_limit))
+        return Gate(limiters, self.timeout)
+
+    def stats(self) -> Dict[str, dict]:
+        """各限制器的上限、占用、排队与拒绝次数（只列出有过调用的）。"""
+        return {
+            limiter.name: limiter.stats()
+            for limiter in self._limiters.values()
+            if limiter.active or limiter.avg_hold is not None or limiter.rejected
+        }
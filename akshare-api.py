@@ -8,6 +8,7 @@ AKShare API调用 - 完整股票数据接口汇总
 import requests
 import pandas as pd
 from akshare_client import call_aktools_api
+from spot_views import board_spot
 
 
 # =============================================================================
@@ -65,17 +66,17 @@ def stock_zh_a_spot_em():
 
 def stock_sh_a_spot_em():
     """获取沪A股实时行情-东方财富"""
-    return call_aktools_api("/api/public/stock_sh_a_spot_em")
+    return board_spot("sh")
 
 
 def stock_sz_a_spot_em():
     """获取深A股实时行情-东方财富"""
-    return call_aktools_api("/api/public/stock_sz_a_spot_em")
+    return board_spot("sz")
 
 
 def stock_bj_a_spot_em():
     """获取京A股实时行情-东方财富"""
-    return call_aktools_api("/api/public/stock_bj_a_spot_em")
+    return board_spot("bj")
 
 
 def stock_new_a_spot_em():
@@ -85,12 +86,12 @@ def stock_new_a_spot_em():
 
 def stock_cy_a_spot_em():
     """获取创业板实时行情-东方财富"""
-    return call_aktools_api("/api/public/stock_cy_a_spot_em")
+    return board_spot("cy")
 
 
 def stock_kc_a_spot_em():
     """获取科创板实时行情-东方财富"""
-    return call_aktools_api("/api/public/stock_kc_a_spot_em")
+    return board_spot("kc")
 
 
 def stock_zh_ab_comparison_em():
@@ -4,9 +4,16 @@ AKShare API 客户端
 统一管理 AKTools API 的调用
 """
 import os
+import time
 import requests
 import pandas as pd
 
+import debug_timing
+import file_cache
+import frame_cache
+import metrics
+import tool_executor
+
 
 def get_aktools_base_url():
     """获取 AKTools 基础 URL，优先使用环境变量"""
@@ -23,15 +30,47 @@ def call_aktools_api(endpoint, params=None):
 
     Returns:
         pandas.DataFrame: 返回的数据
+
+    设置 CACHE_DIR 时按接口与参数缓存返回的 DataFrame（见 frame_cache）；未命中时再查 MCP 服务中同名工具
+    以相同参数写入的文件缓存（file_cache.endpoint_result），MCP 服务与直接调用共用同一份缓存。
     """
+    cache_dir = frame_cache.cache_root()
+    ttl = frame_cache.ttl_for(frame_cache.endpoint_name(endpoint)) if cache_dir is not None else 0
+    if ttl > 0:
+        cached = frame_cache.get(cache_dir, endpoint, params)
+        if cached is not None:
+            return cached
+        if not frame_cache.is_covered(endpoint):
+            # MCP 工具已缓存的同参数结果（MCP 请求不写 DataFrame 缓存，两者经此共用）
+            result = file_cache.endpoint_result(cache_dir, frame_cache.endpoint_name(endpoint), params)
+            if result is not None:
+                return pd.DataFrame(result["data"], columns=result["columns"])
+
+    tool_executor.require_upstream()
     base_url = get_aktools_base_url()
     url = f"{base_url}{endpoint}"
 
+    fetched_at = time.time()
+    started = time.perf_counter()
     try:
         response = requests.get(url, params=params)
+        elapsed = time.perf_counter() - started
+        metrics.observe("aktools_request_seconds", elapsed, endpoint=endpoint)
+        metrics.add_phase("upstream", elapsed)
+        debug_timing.upstream(endpoint, response.status_code, elapsed)
         response.raise_for_status()
-        data = response.json()
-        return pd.DataFrame(data)
+        with metrics.timed_phase("decode"):
+            with debug_timing.timed("json_decode"):
+                data = response.json()
+            with debug_timing.timed("dataframe"):
+                df = pd.DataFrame(data)
+        if ttl > 0 and not frame_cache.is_covered(endpoint):
+            frame_cache.set(cache_dir, endpoint, params, df, ttl, created_at=fetched_at)
+        return df
     except requests.exceptions.RequestException as e:
+        if not isinstance(e, requests.exceptions.HTTPError):
+            metrics.add_phase("upstream", time.perf_counter() - started)
+            debug_timing.upstream(endpoint, type(e).__name__, time.perf_counter() - started)
+        metrics.inc("aktools_errors_total", endpoint=endpoint)
         print(f"请求失败: {e}")
         return pd.DataFrame()
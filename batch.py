@@ -0,0 +1,171 @@
+# batch.py
+"""
+批量查询：一次调用查询多个股票代码，结果按代码返回。
+
+- 每个代码仍按单个查询的参数读写缓存，与逐个调用共用同一份缓存条目
+- 先逐个以探测方式读取缓存（tool_executor.probe），全部命中时不访问上游，可在快速池直接返回
+- 未命中的代码在 BatchRunner 自有的常驻线程池中并发请求上游（全部批量调用共用，并发数为 concurrency），
+  每次请求前从令牌桶取令牌，并取得单个查询工具的准入名额（与逐个调用共用工具与数据源分组的并发上限），
+  批量查询不会冲击数据源
+- 单个代码失败不影响其他代码，失败原因在 errors 中按代码返回
+- 全部代码的结果合计受返回行数与字节数上限（mcp_utils.response_limits）约束：按代码顺序加入结果，
+  超出后其余代码列在 pending 中（已写入缓存），以 symbols=pending 再次调用即可取得
+- 每完成一个未命中代码的请求发送一次进度通知（progress.report：已完成代码数 / 代码总数）
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import copy_context
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import progress
+import tool_executor
+from admission import Gate, Overloaded
+from mcp_utils import estimate_bytes, format_error_response, response_limits
+from rate_limit import TokenBucket
+from tool_executor import UpstreamRequired
+
+logger = logging.getLogger(__name__)
+
+
+def parse_symbols(symbols: Union[str, Sequence[str]], max_symbols: int) -> List[str]:
+    """
+    规范化代码列表：支持列表或逗号分隔的字符串，去空白、去重并保持顺序。
+
+    Raises:
+        ValueError: 代码列表为空或超过 max_symbols
+    """
+    if isinstance(symbols, str):
+        symbols = symbols.split(",")
+    names = list(dict.fromkeys(str(s).strip() for s in symbols if str(s).strip()))
+    if not names:
+        raise ValueError("symbols must not be empty")
+    if len(names) > max_symbols:
+        raise ValueError(f"at most {max_symbols} symbols per call, got {len(names)}")
+    return names
+
+
+class BatchRunner:
+    """
+    批量查询执行器。
+
+    Args:
+        max_symbols: 单次最多代码数
+        concurrency: 并发请求上游的线程数（常驻线程池，全部批量调用共用）
+        rate_per_second: 访问上游的令牌桶速率，<= 0 表示不限流
+        burst: 令牌桶容量
+        acquire_timeout: 等待令牌的最长秒数，超时的代码记为失败
+    """
+
+    def __init__(
+        self,
+        max_symbols: int = 50,
+        concurrency: int = 4,
+        rate_per_second: float = 5.0,
+        burst: int = 4,
+        acquire_timeout: float = 60.0,
+    ) -> None:
+        self.max_symbols = max(1, int(max_symbols))
+        self.concurrency = max(1, int(concurrency))
+        self.bucket = TokenBucket(rate_per_second, burst=burst)
+        self.acquire_timeout = acquire_timeout
+        self._pool = ThreadPoolExecutor(self.concurrency, thread_name_prefix="mcp-batch")
+
+    def _fetch(self, f: Callable[..., dict], symbol: str, kwargs: Dict[str, Any], gate: Optional[Gate]) -> dict:
+        if not self.bucket.acquire(timeout=self.acquire_timeout):
+            return format_error_response(TimeoutError(f"rate limited, no upstream slot within {self.acquire_timeout}s"))
+        if gate is None:
+            return f(symbol, **kwargs)
+        try:
+            with gate.hold():
+                return f(symbol, **kwargs)
+        except Overloaded as e:
+            return e.response()
+
+    def run(
+        self,
+        f: Callable[..., dict],
+        symbols: Union[str, Sequence[str]],
+        *,
+        gate: Optional[Gate] = None,
+        **kwargs: Any,
+    ) -> dict:
+        """
+        对每个代码调用 f(symbol, **kwargs)，合并为一个结果。
+
+        Args:
+            f: 单个代码的工具函数（带缓存），第一个参数为代码
+            symbols: 代码列表或逗号分隔的字符串
+            gate: 单个查询工具的准入门，每个未命中的代码访问上游前取得名额；为 None 表示不限制
+            kwargs: 其余参数，对所有代码相同
+
+        Returns:
+            dict: success、symbols（代码总数）、cached（缓存命中数）、results（代码 -> 单个查询结果）、
+            errors（代码 -> 失败原因）。合计超过返回上限时另附 truncated、pending（未返回结果的代码）与 message
+        """
+        names = parse_symbols(symbols, self.max_symbols)
+        results: Dict[str, dict] = {}
+        misses: List[str] = []
+        for symbol in names:
+            try:
+                results[symbol] = tool_executor.probe(f, symbol, **kwargs)
+            except UpstreamRequired:
+                misses.append(symbol)
+        cached = len(results)
+        if misses:
+            # 在快速池中执行时，这里放弃本次执行，整个批量改到慢速池重新执行（命中的代码再读一次缓存）
+            tool_executor.require_upstream()
+            progress.report(cached, len(names), f"{cached} cached")
+            # 带上调用方的 contextvars（debug_timing、准入控制的事件循环等按调用收集的信息）
+            futures = {
+                self._pool.submit(copy_context().run, self._fetch, f, symbol, kwargs, gate): symbol for symbol in misses
+            }
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    results[symbol] = future.result()
+                except Exception as e:
+                    logger.error(f"{getattr(f, '__name__', f)}({symbol}) 执行失败: {e}")
+                    results[symbol] = format_error_response(e)
+                progress.report(len(results), len(names), symbol)
+        ordered = {symbol: results[symbol] for symbol in names}
+        errors = {
+            symbol: result.get("message", "unknown error")
+            for symbol, result in ordered.items()
+            if not result or result.get("success") is not True
+        }
+        returned, pending = self._within_budget({s: r for s, r in ordered.items() if s not in errors})
+        response = {
+            "success": len(errors) < len(names),
+            "symbols": len(names),
+            "cached": cached,
+            "results": returned,
+            "errors": errors,
+        }
+        if pending:
+            response["truncated"] = True
+            response["pending"] = pending
+            response["message"] = (
+                f"Result too large: returned {len(returned)} of {len(returned) + len(pending)} symbols. "
+                "Call again with symbols=pending for the rest (they are cached now)."
+            )
+        return response
+
+    @staticmethod
+    def _within_budget(results: Dict[str, dict]) -> Tuple[Dict[str, dict], List[str]]:
+        """按顺序保留合计不超过返回上限的结果（至少一个），返回 (保留的结果, 其余代码)。"""
+        limits = response_limits()
+        max_rows, max_bytes = limits["max_rows"], limits["max_bytes"]
+        returned: Dict[str, dict] = {}
+        pending: List[str] = []
+        rows = size = 0
+        for symbol, result in results.items():
+            data = result.get("data")
+            data = data if isinstance(data, list) else []
+            rows += len(data)
+            size += estimate_bytes(data)
+            over = (max_rows > 0 and rows > max_rows) or (max_bytes > 0 and size > max_bytes)
+            if pending or (returned and over):
+                pending.append(symbol)
+            else:
+                returned[symbol] = result
+        return returned, pending
@@ -0,0 +1,201 @@
+# cache_cleaner.py
+"""
+增量缓存清理：把对整个缓存目录的扫描拆成许多小片，每片只占用有限时间，避免大缓存目录
+一次性全量扫描时长时间占用磁盘 I/O 与 GIL、拖慢交互式请求。
+
+- 游标：遍历位置在两次 tick 之间保留，下一片从上次停下的位置继续
+- 时间片：每个 tick 最多处理 batch_size 个文件、最多运行 budget_seconds 秒
+- 一轮扫描完成后，等到距本轮开始满 interval_seconds 才开始下一轮；interval_seconds <= 0 时只扫描一轮
+- 启动后第一轮扫描同样在后台线程中按时间片执行，扫描时顺带把旧版未分片的文件迁移到分片目录，不阻塞服务启动
+- 清理线程在 Linux 上降低自身调度优先级（nice 19）与 I/O 优先级（ionice 尽力而为级别 7，
+  只在 BFQ / CFQ 等支持 I/O 优先级的调度器上生效；没有 ionice 命令时跳过）
+"""
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Tuple
+
+import cache_namespace
+import file_cache
+import frame_cache
+import shm_cache
+
+logger = logging.getLogger(__name__)
+
+# 单个文件的清理函数：(路径, 当前时间, 工具名, 失效规则) -> 是否删除
+Cleaner = Callable[[Path, float, str, dict], bool]
+
+
+def _list_dir(path: Path) -> list:
+    """列出目录项；scandir 不跨 tick 保持打开，避免长期占用文件描述符。"""
+    try:
+        with os.scandir(path) as it:
+            return list(it)
+    except OSError:
+        return []
+
+
+def iter_cache_files(cache_dir: Path) -> Iterator[Tuple[Path, str, Cleaner]]:
+    """
+    惰性遍历缓存目录下的全部条目文件。
+
+    Yields:
+        (文件路径, 工具名, 对应缓存层的单文件清理函数)
+    """
+    for tool_dir in _list_dir(cache_dir):
+        if not tool_dir.is_dir():
+            continue
+        if tool_dir.name == frame_cache.FRAMES_DIR:
+            for endpoint_dir in _list_dir(Path(tool_dir.path)):
+                if not endpoint_dir.is_dir():
+                    continue
+                for shard in _list_dir(Path(endpoint_dir.path)):
+                    if not shard.is_dir():
+                        continue
+                    for entry in _list_dir(Path(shard.path)):
+                        if entry.name.endswith((frame_cache.FRAME_SUFFIX, frame_cache.LEGACY_SUFFIX)):
+                            yield Path(entry.path), endpoint_dir.name, frame_cache._clean_file
+            continue
+        if tool_dir.name.startswith("_"):
+            continue
+        for child in _list_dir(Path(tool_dir.path)):
+            if child.is_dir():
+                for entry in _list_dir(Path(child.path)):
+                    if entry.name.endswith(".json"):
+                        yield Path(entry.path), tool_dir.name, file_cache._clean_file
+            elif child.name.endswith(".json"):
+                # 旧版未分片文件：清理的同时迁移到分片目录
+                yield Path(child.path), tool_dir.name, file_cache._clean_legacy_file
+
+
+class IncrementalCleaner:
+    """
+    可分片执行的缓存清理器。
+
+    Args:
+        cache_dir: 缓存根目录
+        interval_seconds: 两轮完整扫描的间隔（从上一轮开始算起）
+        budget_seconds: 每个 tick 最多运行的秒数
+        batch_size: 每个 tick 最多检查的文件数
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        interval_seconds: float,
+        budget_seconds: float = 0.05,
+        batch_size: int = 500,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.interval_seconds = float(interval_seconds)
+        self.budget_seconds = float(budget_seconds)
+        self.batch_size = max(1, int(batch_size))
+        self._cursor: Optional[Iterator[Tuple[Path, str, Cleaner]]] = None
+        self._pass_started = 0.0
+        self._pass_removed = 0
+        self._pass_scanned = 0
+        self.passes = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def tick(self, now: Optional[float] = None) -> int:
+        """
+        处理一个时间片；需要时开始新一轮扫描。
+
+        Returns:
+            本片删除的文件数
+        """
+        now = time.time() if now is None else now
+        if self._cursor is None:
+            if self._pass_started and now - self._pass_started < self.interval_seconds:
+                return 0
+            self._cursor = iter_cache_files(self.cache_dir)
+            self._pass_started = now
+            self._pass_removed = self._pass_scanned = 0
+        rules = cache_namespace.load_rules(self.cache_dir)
+        deadline = time.perf_counter() + self.budget_seconds
+        removed = 0
+        for _ in range(self.batch_size):
+            item = next(self._cursor, None)
+            if item is None:
+                self._finish_pass()
+                break
+            path, name, clean = item
+            self._pass_scanned += 1
+            if clean(path, now, name, rules):
+                removed += 1
+                self._pass_removed += 1
+            if time.perf_counter() >= deadline:
+                break
+        return removed
+
+    def _finish_pass(self) -> None:
+        self._cursor = None
+        self.passes += 1
+        try:
+            # 本轮开始前登记的失效规则所覆盖的条目已全部删除，供 cache_namespace 删除过旧的规则
+            cache_namespace.mark_swept(self.cache_dir, self._pass_started)
+        except OSError as e:
+            logger.debug("cache cleaner mark_swept: %s", e)
+        swept = shm_cache.sweep(self.cache_dir) if shm_cache.enabled() else 0
+        logger.info(
+            "cache cleaner pass done: %s files scanned, %s removed, %s shm segments removed, %.1fs",
+            self._pass_scanned,
+            self._pass_removed,
+            swept,
+            time.time() - self._pass_started,
+        )
+
+    def run_pass(self) -> int:
+        """同步完成一整轮扫描（不受时间片限制），返回删除的文件数。"""
+        self._cursor = None
+        self._pass_started = 0.0
+        removed = self.tick()
+        while self._cursor is not None:
+            removed += self.tick()
+        return removed
+
+    def start(self, tick_seconds: float = 1.0) -> None:
+        """启动后台清理线程：每 tick_seconds 执行一个时间片；interval_seconds <= 0 时完成一轮后退出。"""
+
+        def _worker() -> None:
+            _lower_thread_priority()
+            while not self._stop_event.wait(tick_seconds):
+                try:
+                    self.tick()
+                except Exception as e:
+                    logger.warning("cache cleaner error: %s", e)
+                    self._cursor = None
+                if self.interval_seconds <= 0 and self.passes and self._cursor is None:
+                    return
+
+        self._thread = threading.Thread(target=_worker, name="file-cache-cleaner", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+def _lower_thread_priority() -> None:
+    """Linux 上线程即调度实体，可单独调低当前线程的 CPU 与 I/O 优先级；其他平台忽略。"""
+    if not sys.platform.startswith("linux"):
+        return
+    tid = threading.get_native_id()
+    try:
+        os.setpriority(os.PRIO_PROCESS, tid, 19)
+    except OSError as e:
+        logger.debug("cache cleaner setpriority: %s", e)
+    # os 模块没有 ioprio_set，借助 util-linux 的 ionice 设置本线程的 I/O 优先级
+    ionice = shutil.which("ionice")
+    if ionice is None:
+        logger.debug("cache cleaner: ionice not found, I/O priority unchanged")
+        return
+    try:
+        subprocess.run([ionice, "-c", "2", "-n", "7", "-p", str(tid)], check=True, capture_output=True, timeout=5)
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug("cache cleaner ionice: %s", e)
@@ -0,0 +1,243 @@
+# cache_namespace.py
+"""
+缓存命名空间与批量失效。
+
+失效规则保存在 CACHE_DIR/_namespaces.json 中，每条规则只记录一个失效时间戳：
+获取时间（created_at：开始请求上游的时间，而非写入时间）早于（或等于）该时间戳、且匹配规则的缓存条目一律视为未命中；
+请求期间登记的失效规则因此同样覆盖请求结束后才写入的结果。
+因此失效是 O(1) 的"命名空间版本号递增"，不需要遍历目录；旧数据由清理任务按规则惰性删除。
+读取时按分区值的各级前缀查找前缀规则，耗时与分区值长度成正比，不随规则数增长。
+
+规则不会一直累积：清理任务每完成一轮扫描就在 _namespaces.swept 中记下该轮的开始时间，
+登记新规则时删除早于"该时间 - max_age"的规则。max_age 取有限 TTL 中的最大值：此时规则覆盖的条目
+要么已经过期，要么（永不过期的历史段）已在那一轮扫描中被删除。
+
+规则维度：
+- all: 全部工具
+- tools: 按工具名
+- prefixes: 按分区值前缀（分区值为调用的第一个参数，如股票代码、日期），作用于全部工具
+- tool_prefixes: 工具名 + 分区值前缀
+- schemas: 按条目写入时的 schema 版本（"工具名@版本" 或 "*@版本"）
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows 无 fcntl，退化为进程内加锁
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE_FILE = "_namespaces.json"
+SWEPT_FILE = "_namespaces.swept"
+DEFAULT_SCHEMA = "1"
+
+_lock = threading.Lock()
+# cache_dir -> (文件版本标识, 规则)
+_loaded: Dict[Path, tuple] = {}
+
+
+def _empty_rules() -> Dict[str, Any]:
+    return {"all": 0.0, "tools": {}, "prefixes": {}, "tool_prefixes": {}, "schemas": {}}
+
+
+def load_rules(cache_dir: Path) -> Dict[str, Any]:
+    """
+    读取失效规则；按规则文件版本缓存在内存中，其他进程修改后自动重新加载。
+
+    Args:
+        cache_dir: 缓存根目录
+
+    Returns:
+        规则字典（只读，不要修改）
+    """
+    path = cache_dir / NAMESPACE_FILE
+    current = version(cache_dir)
+    if not current:
+        return _empty_rules()
+    cached = _loaded.get(cache_dir)
+    if cached is not None and cached[0] == current:
+        return cached[1]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        rules = _empty_rules()
+        if isinstance(raw, dict):
+            rules.update({k: raw[k] for k in rules if k in raw})
+    except (OSError, ValueError) as e:
+        logger.warning("cache namespace file %s invalid: %s", path, e)
+        rules = _empty_rules()
+    with _lock:
+        _loaded[cache_dir] = (current, rules)
+    return rules
+
+
+def version(cache_dir: Path) -> tuple:
+    """
+    返回规则文件的版本标识，供内存缓存层判断是否需要整体丢弃。
+    规则文件通过 os.replace 原子替换，inode 与 mtime 任一变化即视为新版本；文件不存在返回空元组。
+    """
+    try:
+        st = (cache_dir / NAMESPACE_FILE).stat()
+    except OSError:
+        return ()
+    return (st.st_ino, st.st_mtime_ns)
+
+
+def invalidated_at(rules: Dict[str, Any], tool: str, partition: Optional[str], schema: str) -> float:
+    """返回适用于该条目的最晚失效时间戳（无适用规则返回 0）。"""
+    ts = max(
+        float(rules["all"] or 0),
+        float(rules["tools"].get(tool, 0)),
+        float(rules["schemas"].get(f"{tool}@{schema}", 0)),
+        float(rules["schemas"].get(f"*@{schema}", 0)),
+    )
+    if partition:
+        prefixes = rules["prefixes"]
+        tool_prefixes = rules["tool_prefixes"].get(tool, {})
+        if prefixes or tool_prefixes:
+            for end in range(1, len(partition) + 1):
+                prefix = partition[:end]
+                ts = max(ts, float(prefixes.get(prefix, 0)), float(tool_prefixes.get(prefix, 0)))
+    return ts
+
+
+def is_invalidated(rules: Dict[str, Any], tool: str, entry: Dict[str, Any]) -> bool:
+    """判断缓存条目是否被失效规则覆盖（旧条目缺少 created_at 时视为最早写入）。"""
+    partition = entry.get("partition")
+    ts = invalidated_at(
+        rules, tool, partition if isinstance(partition, str) else None, str(entry.get("schema", DEFAULT_SCHEMA))
+    )
+    return ts > 0 and float(entry.get("created_at") or 0) <= ts
+
+
+@contextmanager
+def _file_lock(cache_dir: Path):
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        lock_path = cache_dir / f"{NAMESPACE_FILE}.lock"
+        with open(lock_path, "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _write_atomic(cache_dir: Path, name: str, text: str) -> None:
+    with tempfile.NamedTemporaryFile(
+        mode="w", encoding="utf-8", dir=cache_dir, prefix=f"{name}.", suffix=".tmp", delete=False
+    ) as f:
+        f.write(text)
+        tmp_name = f.name
+    os.replace(tmp_name, cache_dir / name)
+
+
+def mark_swept(cache_dir: Path, started_at: float) -> None:
+    """
+    记录一轮完整清理扫描的开始时间（由清理任务在一轮扫描结束时调用）。
+
+    单独保存在 SWEPT_FILE 中，不改变规则文件的版本，内存缓存层不会因此整体丢弃。
+    """
+    _write_atomic(cache_dir, SWEPT_FILE, str(float(started_at)))
+
+
+def swept_at(cache_dir: Path) -> float:
+    """最近一轮完整清理扫描的开始时间（从未完成过返回 0）。"""
+    try:
+        return float((cache_dir / SWEPT_FILE).read_text(encoding="utf-8").strip())
+    except (OSError, ValueError):
+        return 0.0
+
+
+def _prune(rules: Dict[str, Any], before: float) -> int:
+    """删除早于 before 的工具、前缀与 schema 规则，返回删除的条数。"""
+    removed = 0
+    for kind in ("tools", "prefixes", "schemas"):
+        stale = [key for key, ts in rules[kind].items() if ts < before]
+        for key in stale:
+            del rules[kind][key]
+        removed += len(stale)
+    for tool in list(rules["tool_prefixes"]):
+        prefixes = rules["tool_prefixes"][tool]
+        stale = [key for key, ts in prefixes.items() if ts < before]
+        for key in stale:
+            del prefixes[key]
+        removed += len(stale)
+        if not prefixes:
+            del rules["tool_prefixes"][tool]
+    return removed
+
+
+def invalidate(
+    cache_dir: Path,
+    tool: str = "",
+    prefix: str = "",
+    schema: str = "",
+    everything: bool = False,
+    max_age: float = 0,
+) -> Dict[str, Any]:
+    """
+    登记一条失效规则（O(1)，不遍历缓存目录）。
+
+    Args:
+        cache_dir: 缓存根目录
+        tool: 工具名；单独使用时使该工具全部缓存失效
+        prefix: 分区值前缀（如股票代码）；可与 tool 组合
+        schema: schema 版本；使该版本写入的条目失效，可与 tool 组合
+        everything: 使全部缓存失效
+        max_age: 有限 TTL 中的最大值；> 0 时顺带删除早于"最近一轮完整清理扫描开始时间 - max_age"的规则
+
+    Returns:
+        {"rule": 规则描述, "invalidated_at": 时间戳}
+
+    Raises:
+        ValueError: 未指定任何失效维度
+    """
+    if not (tool or prefix or schema or everything):
+        raise ValueError("specify tool, prefix, schema or everything")
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_dir / NAMESPACE_FILE
+    with _file_lock(cache_dir):
+        rules = _empty_rules()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            if isinstance(raw, dict):
+                rules.update({k: raw[k] for k in rules if k in raw})
+        except (OSError, ValueError):
+            pass
+        now = time.time()
+        if everything:
+            rule = "all"
+            rules["all"] = now
+        elif schema:
+            rule = f"schema {tool or '*'}@{schema}"
+            rules["schemas"][f"{tool or '*'}@{schema}"] = now
+        elif tool and prefix:
+            rule = f"tool_prefix {tool}:{prefix}"
+            rules["tool_prefixes"].setdefault(tool, {})[prefix] = now
+        elif prefix:
+            rule = f"prefix {prefix}"
+            rules["prefixes"][prefix] = now
+        else:
+            rule = f"tool {tool}"
+            rules["tools"][tool] = now
+        swept = swept_at(cache_dir)
+        if max_age > 0 and swept > 0:
+            pruned = _prune(rules, swept - max_age)
+            if pruned:
+                logger.info("cache namespace pruned %s outdated rules", pruned)
+        _write_atomic(cache_dir, NAMESPACE_FILE, json.dumps(rules, ensure_ascii=False, indent=2))
+    logger.info("cache namespace invalidated: %s", rule)
+    return {"rule": rule, "invalidated_at": now}
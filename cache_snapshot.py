@@ -0,0 +1,252 @@
+# cache_snapshot.py
+"""
+缓存快照导出 / 导入：把一个实例中未过期的缓存条目打包为 tar.gz，导入到新部署或新副本，
+避免冷启动时所有请求同时打到 AKTools。
+
+- 只导出未过期、未被失效规则覆盖的条目；条目文件原样打包，过期时间（绝对时间戳）随之保留
+- 导出与导入都是流式的：逐个文件写入 / 读出归档，不需要把整个归档放进内存
+- 导入时逐个校验成员路径与条目头部，已过期的条目与比本地更旧的条目跳过
+- 默认不包含 DataFrame 缓存（_frames，TTL 很短，新实例很快就会重新生成）；include_frames=True / --frames 时包含，
+  旧版 pickle 条目任何时候都不导出也不导入
+- 导入只通过命令行由运维执行（可读取本地文件或 URL），不作为 MCP 工具开放；
+  MCP 工具 cache_export 只写入 CACHE_DIR/_snapshots/，GET /cache/snapshot 需设置 MCP_CACHE_SNAPSHOT_HTTP=1 才开放
+
+命令行用法：
+
+    CACHE_DIR=./.cache/akshare-mcp python -m cache_snapshot export snapshot.tar.gz
+    CACHE_DIR=./.cache/akshare-mcp python -m cache_snapshot import snapshot.tar.gz
+    CACHE_DIR=./.cache/akshare-mcp python -m cache_snapshot import http://旧实例:8000/cache/snapshot
+"""
+import logging
+import os
+import re
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional
+
+import cache_namespace
+import file_cache
+import frame_cache
+from cache_cleaner import iter_cache_files
+
+logger = logging.getLogger(__name__)
+
+# cache_export 工具写入快照的目录（CACHE_DIR 下，不参与缓存清理与导出）
+SNAPSHOTS_DIR = "_snapshots"
+
+# 归档成员路径：工具名/分片/key.json 或 _frames/接口名/分片/key.json
+_MEMBER = re.compile(
+    r"^(?:(?P<tool>[A-Za-z0-9][A-Za-z0-9_]*)/[0-9a-f]{2}/[0-9a-f]{32}\.json"
+    r"|_frames/(?P<endpoint>[A-Za-z0-9][A-Za-z0-9_]*)/[0-9a-f]{2}/[0-9a-f]{32}\.json)$"
+)
+
+
+def _read_header(path: Path, is_frame: bool) -> Dict[str, Any]:
+    if is_frame:
+        with open(path, "rb") as f:
+            return frame_cache._read_header(f)
+    return file_cache._load_header(path)
+
+
+def _is_live(header: Dict[str, Any], name: str, rules: Dict[str, Any], now: float) -> bool:
+    expires_at = header.get("expires_at")
+    if expires_at is not None and now > float(expires_at):
+        return False
+    return not cache_namespace.is_invalidated(rules, name, header)
+
+
+def _arcname(path: Path, name: str, is_frame: bool) -> str:
+    """归档内路径统一为分片布局（旧版未分片文件也按分片路径导出）。"""
+    key = path.stem
+    shard = key[: file_cache._SHARD_WIDTH]
+    if is_frame:
+        return f"{frame_cache.FRAMES_DIR}/{name}/{shard}/{key}{frame_cache.FRAME_SUFFIX}"
+    return f"{name}/{shard}/{key}.json"
+
+
+def export_snapshot(cache_dir: Path, fileobj: BinaryIO, include_frames: bool = False) -> Dict[str, int]:
+    """
+    将未过期的缓存条目流式写入 tar.gz。
+
+    Args:
+        cache_dir: 缓存根目录
+        fileobj: 可写的二进制文件对象（不需要支持 seek）
+        include_frames: 是否包含 DataFrame 缓存
+
+    Returns:
+        {"entries": 导出条目数, "bytes": 条目原始字节数}
+    """
+    file_cache.flush_write_behind()
+    rules = cache_namespace.load_rules(cache_dir)
+    now = time.time()
+    entries = 0
+    nbytes = 0
+    with tarfile.open(fileobj=fileobj, mode="w|gz") as tar:
+        for path, name, cleaner in iter_cache_files(cache_dir):
+            is_frame = cleaner is frame_cache._clean_file
+            if is_frame and (not include_frames or path.suffix == frame_cache.LEGACY_SUFFIX):
+                continue
+            try:
+                if not _is_live(_read_header(path, is_frame), name, rules, now):
+                    continue
+                # 先打开再取大小：条目被并发替换时仍读取同一个 inode，大小与内容一致
+                with open(path, "rb") as f:
+                    info = tar.gettarinfo(arcname=_arcname(path, name, is_frame), fileobj=f)
+                    info.uid = info.gid = 0
+                    info.uname = info.gname = ""
+                    tar.addfile(info, f)
+            except (OSError, ValueError) as e:
+                logger.debug("cache_snapshot export %s: %s", path, e)
+                continue
+            entries += 1
+            nbytes += info.size
+    logger.info("cache_snapshot export: %s entries, %s bytes", entries, nbytes)
+    return {"entries": entries, "bytes": nbytes}
+
+
+def import_snapshot(cache_dir: Path, fileobj: BinaryIO, include_frames: bool = False) -> Dict[str, int]:
+    """
+    从 tar.gz 流式导入缓存条目（逐个成员写入临时文件后原子替换）。
+
+    Args:
+        cache_dir: 缓存根目录
+        fileobj: 可读的二进制文件对象（不需要支持 seek）
+        include_frames: 是否导入 DataFrame 缓存
+
+    Returns:
+        {"imported": 导入条目数, "skipped": 跳过的成员数, "bytes": 导入字节数}
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    rules = cache_namespace.load_rules(cache_dir)
+    imported = skipped = nbytes = 0
+    with tarfile.open(fileobj=fileobj, mode="r|gz") as tar:
+        for member in tar:
+            match = _MEMBER.match(member.name)
+            is_frame = match is not None and match.group("endpoint") is not None
+            if not member.isfile() or match is None or (is_frame and not include_frames):
+                skipped += 1
+                continue
+            name = match.group("endpoint") if is_frame else match.group("tool")
+            if _import_member(cache_dir, tar, member, name, is_frame, rules):
+                imported += 1
+                nbytes += member.size
+            else:
+                skipped += 1
+    logger.info("cache_snapshot import: %s entries imported, %s skipped", imported, skipped)
+    return {"imported": imported, "skipped": skipped, "bytes": nbytes}
+
+
+def _import_member(
+    cache_dir: Path,
+    tar: tarfile.TarFile,
+    member: tarfile.TarInfo,
+    name: str,
+    is_frame: bool,
+    rules: Dict[str, Any],
+) -> bool:
+    target = cache_dir / member.name
+    source = tar.extractfile(member)
+    if source is None:
+        return False
+    tmp_name: Optional[str] = None
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            mode="wb", dir=target.parent, prefix=f"{target.stem}.", suffix=".tmp", delete=False
+        ) as f:
+            tmp_name = f.name
+            shutil.copyfileobj(source, f)
+        header = _read_header(Path(tmp_name), is_frame)
+        if not _is_live(header, name, rules, time.time()):
+            return False
+        try:
+            existing = _read_header(target, is_frame)
+            if float(existing.get("created_at") or 0) >= float(header.get("created_at") or 0):
+                return False
+        except (OSError, ValueError):
+            pass
+        os.replace(tmp_name, target)
+        tmp_name = None
+        return True
+    except (OSError, ValueError) as e:
+        logger.debug("cache_snapshot import %s: %s", member.name, e)
+        return False
+    finally:
+        if tmp_name is not None:
+            Path(tmp_name).unlink(missing_ok=True)
+
+
+def prune_snapshots(directory: Path, keep: int) -> int:
+    """
+    只保留最新的 keep 份快照归档（按文件名中的时间排序），删除其余的。
+
+    Args:
+        directory: 快照目录（CACHE_DIR/_snapshots）
+        keep: 保留份数，<= 0 表示不删除
+
+    Returns:
+        删除的归档数
+    """
+    if keep <= 0:
+        return 0
+    removed = 0
+    for path in sorted(directory.glob("cache-*.tar.gz"), reverse=True)[keep:]:
+        try:
+            path.unlink()
+        except OSError as e:
+            logger.debug("cache_snapshot prune %s: %s", path, e)
+            continue
+        removed += 1
+    return removed
+
+
+def open_source(source: str):
+    """导入来源：文件路径、"-"（标准输入）或 http(s) URL（流式下载）。"""
+    if source == "-":
+        return sys.stdin.buffer
+    if source.startswith(("http://", "https://")):
+        import requests
+
+        response = requests.get(source, stream=True, timeout=60)
+        response.raise_for_status()
+        return response.raw
+    return open(source, "rb")
+
+
+def main(argv: Optional[list] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m cache_snapshot", description="缓存快照导出 / 导入")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("path", help='归档路径；"-" 表示标准输入 / 输出；导入时也可以是 http(s) URL')
+    parser.add_argument("--frames", action="store_true", help="同时导出 / 导入 DataFrame 缓存（_frames）")
+    args = parser.parse_args(argv)
+
+    cache_dir_raw = os.getenv("CACHE_DIR", "").strip()
+    if not cache_dir_raw:
+        print("CACHE_DIR is not set", file=sys.stderr)
+        return 1
+    cache_dir = Path(cache_dir_raw)
+    if args.action == "export":
+        if args.path == "-":
+            outcome = export_snapshot(cache_dir, sys.stdout.buffer, include_frames=args.frames)
+        else:
+            with open(args.path, "wb") as f:
+                outcome = export_snapshot(cache_dir, f, include_frames=args.frames)
+    else:
+        source = open_source(args.path)
+        try:
+            outcome = import_snapshot(cache_dir, source, include_frames=args.frames)
+        finally:
+            if source is not sys.stdin.buffer:
+                source.close()
+    print(outcome, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,132 @@
+# cache_stats.py
+"""
+缓存统计：按工具累计命中、未命中、过期、读写字节数与读写/上游耗时，用于依据数据调优 TTL。
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import debug_timing
+
+# 计数字段
+_COUNTERS = (
+    "hits",
+    "misses",
+    "expired",
+    "bytes_read",
+    "bytes_written",
+    "gets",
+    "get_seconds",
+    "sets",
+    "set_seconds",
+    "upstream_calls",
+    "upstream_seconds",
+    "upstream_errors",
+    "coalesced",
+    "shm_hits",
+)
+
+_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = {}
+_started_at = time.time()
+# 暂存中的 record 调用（见 deferred）
+_deferred: ContextVar[Optional[List[Tuple[str, Dict[str, float]]]]] = ContextVar("cache_stats_deferred", default=None)
+
+
+def record(tool: str, **increments: float) -> None:
+    """
+    累加某个工具的统计计数。
+
+    Args:
+        tool: 工具名
+        **increments: 字段名 -> 增量，字段须在 _COUNTERS 中
+    """
+    pending = _deferred.get()
+    if pending is not None:
+        pending.append((tool, increments))
+        return
+    debug_timing.cache_event(tool, increments)
+    with _lock:
+        _apply(tool, increments)
+
+
+def _apply(tool: str, increments: Dict[str, float]) -> None:
+    entry = _stats.get(tool)
+    if entry is None:
+        entry = _stats[tool] = dict.fromkeys(_COUNTERS, 0)
+    for field, value in increments.items():
+        entry[field] += value
+
+
+@contextmanager
+def deferred() -> Iterator[List[Tuple[str, Dict[str, float]]]]:
+    """
+    暂存当前上下文内的 record 调用，不计入统计；需要计入时在退出前调用 commit(暂存列表)。
+    用于可能被放弃并重新执行的调用（如 tool_executor 的缓存探测），避免重复计数。
+    """
+    pending: List[Tuple[str, Dict[str, float]]] = []
+    token = _deferred.set(pending)
+    try:
+        yield pending
+    finally:
+        _deferred.reset(token)
+
+
+def commit(pending: List[Tuple[str, Dict[str, float]]]) -> None:
+    """把 deferred() 暂存的调用计入统计；外层仍有 deferred() 时并入外层的暂存列表。"""
+    items = list(pending)
+    pending.clear()
+    outer = _deferred.get()
+    if outer is not None:
+        outer.extend(items)
+        return
+    for tool, increments in items:
+        debug_timing.cache_event(tool, increments)
+    with _lock:
+        for tool, increments in items:
+            _apply(tool, increments)
+
+
+def _derive(entry: Dict[str, float]) -> Dict[str, Any]:
+    lookups = entry["hits"] + entry["misses"]
+    out: Dict[str, Any] = dict(entry)
+    out["hit_ratio"] = round(entry["hits"] / lookups, 4) if lookups else None
+    out["avg_get_ms"] = round(entry["get_seconds"] * 1000 / entry["gets"], 3) if entry["gets"] else None
+    out["avg_set_ms"] = round(entry["set_seconds"] * 1000 / entry["sets"], 3) if entry["sets"] else None
+    out["avg_upstream_ms"] = (
+        round(entry["upstream_seconds"] * 1000 / entry["upstream_calls"], 3) if entry["upstream_calls"] else None
+    )
+    return out
+
+
+def snapshot(tool: str = "") -> Dict[str, Any]:
+    """
+    返回统计快照。
+
+    Args:
+        tool: 只返回指定工具；为空返回全部工具及汇总
+
+    Returns:
+        {"since": 起始时间戳, "tools": {工具名: 统计}, "total": 汇总统计}
+    """
+    with _lock:
+        items = {name: dict(entry) for name, entry in _stats.items() if not tool or name == tool}
+    total = dict.fromkeys(_COUNTERS, 0)
+    for entry in items.values():
+        for field in _COUNTERS:
+            total[field] += entry[field]
+    return {
+        "since": _started_at,
+        "tools": {name: _derive(entry) for name, entry in sorted(items.items())},
+        "total": _derive(total),
+    }
+
+
+def reset() -> None:
+    """清空统计。"""
+    global _started_at
+    with _lock:
+        _stats.clear()
+        _started_at = time.time()
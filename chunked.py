@@ -0,0 +1,182 @@
+# chunked.py
+"""
+分段查询：长日期区间按自然月切成多个窗口逐段请求，每次调用只返回一段结果与继续查询的游标（next_cursor）。
+
+- 每个窗口经单个查询的工具函数读写各自的缓存条目；按自然月对齐，不同区间的查询可复用相同月份的缓存
+- 每次调用最多返回 max_rows 行，客户端很快拿到前面的行，服务端也不需要一次持有整个区间的结果
+- 游标是自包含的（参数、窗口序号与窗口内偏移量的 base64 编码），服务端不保存状态，多 worker 部署下可由任一 worker 继续
+- 每完成一个窗口发送一次进度通知（progress.report：已完成窗口数 / 窗口总数）
+- 单个窗口失败不影响其他窗口，失败原因在 errors 中按窗口返回
+"""
+import base64
+import binascii
+import json
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import progress
+from mcp_utils import format_error_response
+
+logger = logging.getLogger(__name__)
+
+_DATE_FORMAT = "%Y%m%d"
+
+
+def _parse_date(value: str, name: str) -> date:
+    try:
+        return datetime.strptime(str(value), _DATE_FORMAT).date()
+    except ValueError:
+        raise ValueError(f"{name} must be YYYYMMDD, got {value!r}") from None
+
+
+def month_windows(start_date: str, end_date: str) -> List[Tuple[str, str]]:
+    """
+    把 [start_date, end_date] 按自然月切分（首尾窗口截取到区间内）。
+
+    Raises:
+        ValueError: 日期格式不是 YYYYMMDD，或 start_date 晚于 end_date
+    """
+    start = _parse_date(start_date, "start_date")
+    end = _parse_date(end_date, "end_date")
+    if start > end:
+        raise ValueError(f"start_date {start_date} is after end_date {end_date}")
+    windows = []
+    while start <= end:
+        month_end = (start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        stop = min(month_end, end)
+        windows.append((start.strftime(_DATE_FORMAT), stop.strftime(_DATE_FORMAT)))
+        start = stop + timedelta(days=1)
+    return windows
+
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    raw = json.dumps(state, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, tool: str) -> Dict[str, Any]:
+    """
+    解析游标。
+
+    Raises:
+        ValueError: 游标无法解析或不属于该工具
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise ValueError("invalid cursor") from None
+    if not isinstance(state, dict) or state.get("tool") != tool:
+        raise ValueError(f"cursor does not belong to {tool}")
+    return state
+
+
+class ChunkedFetch:
+    """
+    分段查询执行器。
+
+    Args:
+        max_rows: 单次调用最多返回的行数
+    """
+
+    def __init__(self, max_rows: int = 2000) -> None:
+        self.max_rows = max(1, int(max_rows))
+
+    def run(
+        self,
+        f: Callable[..., dict],
+        tool: str,
+        start_date: str,
+        end_date: str,
+        cursor: Optional[str] = None,
+        **params: Any,
+    ) -> dict:
+        """
+        从游标位置（或区间开头）起逐个窗口调用 f，凑满 max_rows 行或到达区间末尾为止。
+
+        Args:
+            f: 单个查询的工具函数（带缓存与分页参数 limit / offset）
+            tool: 工具名（写入游标，防止游标用在其他工具上）
+            start_date: 区间开始日期
+            end_date: 区间结束日期
+            cursor: 上次调用返回的 next_cursor；提供时忽略其他参数，按游标中的参数继续
+            params: 其余参数，对所有窗口相同
+
+        Returns:
+            dict: success、rows、columns、data、range（本次覆盖的日期区间）、progress（已完成 / 全部窗口数）、
+            next_cursor（区间已查完时为 None）与 errors（窗口 -> 失败原因）
+
+        Raises:
+            ValueError: 日期或游标非法
+        """
+        index, offset = 0, 0
+        if cursor:
+            state = decode_cursor(cursor, tool)
+            try:
+                start_date, end_date = state["start_date"], state["end_date"]
+                params, index, offset = dict(state["params"]), int(state["window"]), int(state["offset"])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError("invalid cursor") from None
+        windows = month_windows(start_date, end_date)
+        if not 0 <= index < len(windows) or offset < 0:
+            raise ValueError("invalid cursor")
+        first = index
+        data: List[Any] = []
+        columns: List[str] = []
+        errors: Dict[str, str] = {}
+        last_end = windows[first][0]
+        while index < len(windows) and len(data) < self.max_rows:
+            window_start, window_end = windows[index]
+            label = f"{window_start}-{window_end}"
+            last_end = window_end
+            try:
+                result = f(
+                    start_date=window_start,
+                    end_date=window_end,
+                    offset=offset,
+                    limit=self.max_rows - len(data),
+                    **params,
+                )
+            except Exception as e:
+                logger.error(f"{tool}({label}) 执行失败: {e}")
+                result = format_error_response(e)
+            if result.get("success") is not True:
+                errors[label] = result.get("message", "unknown error")
+                index, offset = index + 1, 0
+            else:
+                data.extend(result["data"])
+                columns += [name for name in result.get("columns", []) if name not in columns]
+                consumed = result.get("offset", offset) + result["rows"]
+                if consumed < result.get("total_rows", consumed):
+                    offset = consumed
+                else:
+                    index, offset = index + 1, 0
+            progress.report(index, len(windows), label)
+        next_cursor = None
+        if index < len(windows):
+            next_cursor = encode_cursor(
+                {
+                    "tool": tool,
+                    "start_date": start_date,
+                    "end_date": end_date,
+                    "params": params,
+                    "window": index,
+                    "offset": offset,
+                }
+            )
+        response = {
+            "success": bool(data) or not errors or next_cursor is not None,
+            "rows": len(data),
+            "columns": columns,
+            "data": data,
+            "range": {"start_date": windows[first][0], "end_date": last_end},
+            "progress": {"done": index, "total": len(windows)},
+            "next_cursor": next_cursor,
+            "errors": errors,
+        }
+        if next_cursor is not None:
+            response["message"] = f"Returned {len(data)} rows; call again with cursor=next_cursor for the next chunk."
+        elif errors and not data:
+            response["message"] = "Error: " + "; ".join(f"{label}: {message}" for label, message in errors.items())
+        return response
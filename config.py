@@ -14,6 +14,46 @@ MCP_SERVER_VERSION = "1.0.0"
 MCP_SERVER_HOST = os.getenv("MCP_SERVER_HOST", "0.0.0.0")
 MCP_SERVER_PORT = int(os.getenv("MCP_SERVER_PORT", "8000"))
 
+# worker 进程数：大于 1 时由监督进程启动多个 worker 共用同一端口与 CACHE_DIR（无状态 HTTP），
+# 其中一个 worker 通过 CACHE_DIR/.leader.lock 当选，负责缓存清理与预取
+MCP_WORKERS = int(os.getenv("MCP_WORKERS", "1"))
+
+# 工具执行线程池：先在快速池中只读缓存，需要访问上游时改到慢速池执行，慢请求不会占满快速池
+MCP_FAST_WORKERS = int(os.getenv("MCP_FAST_WORKERS", "16"))
+MCP_SLOW_WORKERS = int(os.getenv("MCP_SLOW_WORKERS", "8"))
+
+# 准入控制：每个工具、每个数据源分组访问上游的并发上限，每个上限的排队长度与最长等待秒数；
+# 过载时立即返回 overloaded 错误与 retry_after。MCP_CONCURRENCY_LIMITS 按工具名或数据源分组覆盖上限，
+# 如 "stock_zh_a_hist=2,eastmoney=6"
+MCP_TOOL_CONCURRENCY = int(os.getenv("MCP_TOOL_CONCURRENCY", "4"))
+MCP_SOURCE_CONCURRENCY = int(os.getenv("MCP_SOURCE_CONCURRENCY", "8"))
+MCP_ADMISSION_QUEUE = int(os.getenv("MCP_ADMISSION_QUEUE", "32"))
+MCP_ADMISSION_TIMEOUT_SECONDS = float(os.getenv("MCP_ADMISSION_TIMEOUT_SECONDS", "15"))
+MCP_CONCURRENCY_LIMITS = os.getenv("MCP_CONCURRENCY_LIMITS", "")
+
+# 单次返回的行数与 data 字节数上限，超过时只返回前面的行、逐列汇总统计与 next_offset（<= 0 表示不限制）
+MCP_MAX_RESPONSE_ROWS = int(os.getenv("MCP_MAX_RESPONSE_ROWS", "10000"))
+MCP_MAX_RESPONSE_BYTES = int(os.getenv("MCP_MAX_RESPONSE_BYTES", str(4 << 20)))
+
+# Prometheus 指标：在 /metrics 输出工具请求数、错误数、分阶段耗时直方图、缓存命中率与 AKTools 接口耗时
+MCP_METRICS = os.getenv("MCP_METRICS", "1").strip().lower() in ("1", "true", "yes", "on")
+
+# 批量工具（*_batch）：单次最多代码数、并发访问上游的线程数，以及访问上游的令牌桶限流（每秒请求数 / 突发数，<= 0 不限流）
+MCP_BATCH_MAX_SYMBOLS = int(os.getenv("MCP_BATCH_MAX_SYMBOLS", "50"))
+MCP_BATCH_CONCURRENCY = int(os.getenv("MCP_BATCH_CONCURRENCY", "4"))
+MCP_BATCH_RATE_PER_SECOND = float(os.getenv("MCP_BATCH_RATE_PER_SECOND", "5"))
+MCP_BATCH_BURST = int(os.getenv("MCP_BATCH_BURST", "4"))
+
+# 分段工具（*_chunked）：长日期区间按月分段查询，单次调用最多返回的行数
+MCP_CHUNK_ROWS = int(os.getenv("MCP_CHUNK_ROWS", "2000"))
+
+# HTTP 缓存快照下载（GET /cache/snapshot，供新实例 python -m cache_snapshot import URL 预热），
+# 没有鉴权，默认关闭；只在内网部署时开启
+MCP_CACHE_SNAPSHOT_HTTP = os.getenv("MCP_CACHE_SNAPSHOT_HTTP", "0").strip().lower() in ("1", "true", "yes", "on")
+
+# cache_export 工具在 CACHE_DIR/_snapshots 下保留的快照份数（每次导出后删除更早的归档），<= 0 表示不删除
+CACHE_SNAPSHOT_KEEP = int(os.getenv("CACHE_SNAPSHOT_KEEP", "5"))
+
 # 日志配置
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
@@ -33,5 +73,48 @@ CACHE_TTL_DAILY = int(os.getenv("CACHE_TTL_DAILY", "1800"))
 CACHE_TTL_STATIC = int(os.getenv("CACHE_TTL_STATIC", "3600"))
 
 # 文件缓存后台清理周期（秒）
-# <= 0 表示仅启动时清理一次
+# <= 0 表示启动后只在后台清理一轮
 CACHE_CLEAN_INTERVAL_SECONDS = int(os.getenv("CACHE_CLEAN_INTERVAL_SECONDS", "3600"))
+# 后台清理按时间片增量执行：每 CACHE_CLEAN_TICK_SECONDS 秒处理一片，
+# 每片最多 CACHE_CLEAN_BATCH_SIZE 个文件、最多 CACHE_CLEAN_BUDGET_MS 毫秒，下一片从上次位置继续
+CACHE_CLEAN_TICK_SECONDS = float(os.getenv("CACHE_CLEAN_TICK_SECONDS", "1"))
+CACHE_CLEAN_BUDGET_MS = int(os.getenv("CACHE_CLEAN_BUDGET_MS", "50"))
+CACHE_CLEAN_BATCH_SIZE = int(os.getenv("CACHE_CLEAN_BATCH_SIZE", "500"))
+
+# 历史 K 线分段缓存（已收盘的历史日线视为不可变，永不过期）
+# 尾部段（今日；复权数据为最近 N 天）使用短 TTL，刷新时只重新拉取尾部
+CACHE_TTL_HISTORY_TAIL = int(os.getenv("CACHE_TTL_HISTORY_TAIL", "180"))
+CACHE_HISTORY_ADJUSTED_TAIL_DAYS = int(os.getenv("CACHE_HISTORY_ADJUSTED_TAIL_DAYS", "5"))
+# 前复权（qfq）在除权后会改写全部历史价格，历史段只能有限期缓存
+CACHE_TTL_HISTORY_QFQ = int(os.getenv("CACHE_TTL_HISTORY_QFQ", "43200"))
+
+# 有限 TTL 中的最大值（历史 K 线滚动段最长保留到次日，按 1 天计）：
+# 缓存失效规则早于最近一轮完整清理扫描开始时间减去该值后删除
+CACHE_MAX_FINITE_TTL = max(
+    CACHE_DEFAULT_TTL, CACHE_TTL_REALTIME, CACHE_TTL_DAILY, CACHE_TTL_STATIC,
+    CACHE_TTL_HISTORY_TAIL, CACHE_TTL_HISTORY_QFQ, 86400,
+)
+
+# 缓存预热与预取调度配置文件（JSON），为空则不启用
+_CACHE_PREFETCH_CONFIG_RAW = os.getenv("CACHE_PREFETCH_CONFIG", "").strip()
+CACHE_PREFETCH_CONFIG = Path(_CACHE_PREFETCH_CONFIG_RAW) if _CACHE_PREFETCH_CONFIG_RAW else None
+
+# 写回缓存：未命中时结果先入队，由后台线程序列化落盘，不阻塞响应
+# 队列满时退化为同步写入（背压）；进程退出时自动落盘
+CACHE_WRITE_BEHIND = os.getenv("CACHE_WRITE_BEHIND", "0").strip().lower() in ("1", "true", "yes", "on")
+CACHE_WRITE_BEHIND_MAX_PENDING = int(os.getenv("CACHE_WRITE_BEHIND_MAX_PENDING", "64"))
+
+# 盘中高频接口（分时、盘前、雪球个股快照）的秒级内存缓存，不落盘
+# 相同请求并发访问上游时合并为一次；TTL <= 0 时只合并、不保留结果
+CACHE_TTL_MICRO = float(os.getenv("CACHE_TTL_MICRO", "2"))
+CACHE_MICRO_MAX_ENTRIES = int(os.getenv("CACHE_MICRO_MAX_ENTRIES", "1024"))
+
+# 共享内存缓存层：多个 worker 进程共享全市场快照等热点结果，每个进程只解码一次
+CACHE_SHARED_MEMORY = os.getenv("CACHE_SHARED_MEMORY", "0").strip().lower() in ("1", "true", "yes", "on")
+CACHE_SHARED_MEMORY_MAX_BYTES = int(os.getenv("CACHE_SHARED_MEMORY_MAX_BYTES", str(64 << 20)))
+
+# DataFrame 缓存：在 call_aktools_api 层按接口与参数缓存（需设置 CACHE_DIR），MCP 服务与直接调用共用
+CACHE_FRAMES = os.getenv("CACHE_FRAMES", "1").strip().lower() in ("1", "true", "yes", "on")
+
+# 沪A / 深A / 京A / 创业板 / 科创板行情从全市场快照按代码前缀派生（需启用 DataFrame 缓存），五次上游请求合并为一次
+CACHE_DERIVED_SPOT_VIEWS = os.getenv("CACHE_DERIVED_SPOT_VIEWS", "1").strip().lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,154 @@
+# debug_timing.py
+"""
+单次调用的耗时分解（调试用）：调用 MCP 工具时传 debug_timing=true，返回结果附带 _timings。
+
+- phases_ms：各阶段耗时，见 PHASES；同一阶段多次出现时累加（如批量工具的多次上游请求）
+- cache：本次调用计入缓存统计的命中 / 未命中 / 过期 / 上游请求次数（按缓存统计名称，与 cache_stats 一致）
+- upstream：每次 AKTools 请求的接口、HTTP 状态（请求失败时为错误类型）与耗时
+- pool / fallback：在哪个线程池完成，是否由快速池探测回退到慢速池
+
+收集器存放在 ContextVar 中，由 ToolExecutor 复制到工具线程；未开启时各处的 add() / timed() 只做一次 ContextVar 读取。
+"""
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# 阶段（按调用顺序）：
+# admission_wait 等待准入名额；probe 被放弃的快速池探测；cache_get / cache_set 读写缓存（含解码）；
+# upstream AKTools HTTP 请求；json_decode 解析上游 JSON；dataframe 构建 DataFrame；
+# to_records DataFrame 转记录；nan_cleanup 把 NaN 替换为 null；view 分页、排序、选列与大小限制
+PHASES = (
+    "admission_wait",
+    "probe",
+    "cache_get",
+    "upstream",
+    "json_decode",
+    "dataframe",
+    "to_records",
+    "nan_cleanup",
+    "cache_set",
+    "view",
+)
+
+# 计入 _timings.cache 的缓存统计字段
+_CACHE_FIELDS = ("hits", "misses", "expired", "coalesced", "shm_hits", "upstream_calls", "upstream_errors")
+
+
+class Timings:
+    """一次工具调用的耗时与缓存、上游记录（工具线程与批量线程可并发写入）。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.phases: Dict[str, float] = {}
+        self.cache: Dict[str, Dict[str, int]] = {}
+        self.upstream: List[Dict[str, Any]] = []
+        self.info: Dict[str, Any] = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def cache_event(self, tool: str, increments: Dict[str, float]) -> None:
+        with self._lock:
+            for field, phase in (("get_seconds", "cache_get"), ("set_seconds", "cache_set")):
+                if increments.get(field):
+                    self.phases[phase] = self.phases.get(phase, 0.0) + increments[field]
+            counts = {field: int(increments[field]) for field in _CACHE_FIELDS if increments.get(field)}
+            if counts:
+                entry = self.cache.setdefault(tool, {})
+                for field, value in counts.items():
+                    entry[field] = entry.get(field, 0) + value
+
+    def report(self, total_seconds: float) -> Dict[str, Any]:
+        with self._lock:
+            phases = {phase: round(self.phases[phase] * 1000, 3) for phase in PHASES if phase in self.phases}
+            report = {
+                "total_ms": round(total_seconds * 1000, 3),
+                **self.info,
+                "phases_ms": phases,
+                # 未归入任何阶段的时间：线程池排队与切换、缓存键计算、工具函数自身逻辑等
+                "other_ms": round(max(0.0, total_seconds * 1000 - sum(phases.values())), 3),
+                "cache": {tool: dict(counts) for tool, counts in self.cache.items()},
+                "upstream": list(self.upstream),
+            }
+        return report
+
+
+_current: ContextVar[Optional[Timings]] = ContextVar("debug_timing", default=None)
+
+
+def add(phase: str, seconds: float) -> None:
+    """把一段耗时计入当前调用的 phase 阶段；未开启 debug_timing 时忽略。"""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(phase, seconds)
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """计时一段代码并计入当前调用的 phase 阶段。"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - started)
+
+
+def cache_event(tool: str, increments: Dict[str, float]) -> None:
+    """记录一次计入缓存统计的事件（由 cache_stats 调用）。"""
+    timings = _current.get()
+    if timings is not None:
+        timings.cache_event(tool, increments)
+
+
+def upstream(endpoint: str, status: Any, seconds: float) -> None:
+    """记录一次 AKTools 请求及其耗时（计入 upstream 阶段）。"""
+    timings = _current.get()
+    if timings is not None:
+        timings.add("upstream", seconds)
+        with timings._lock:
+            timings.upstream.append({"endpoint": endpoint, "status": status, "ms": round(seconds * 1000, 3)})
+
+
+def annotate(**info: Any) -> None:
+    """附加调用信息（如执行的线程池）。"""
+    timings = _current.get()
+    if timings is not None:
+        with timings._lock:
+            timings.info.update(info)
+
+
+def with_timings(handler: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    包装异步工具处理函数：增加 debug_timing 参数，为 True 时在返回的字典中附加 _timings。
+    """
+    signature = inspect.signature(handler)
+    flag = inspect.Parameter("debug_timing", inspect.Parameter.KEYWORD_ONLY, default=False, annotation=bool)
+
+    @wraps(handler)
+    async def wrapper(*args: Any, debug_timing: bool = False, **kwargs: Any) -> Any:
+        if not debug_timing:
+            return await handler(*args, **kwargs)
+        timings = Timings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            result = await handler(*args, **kwargs)
+        finally:
+            _current.reset(token)
+        if isinstance(result, dict):
+            # 结果可能是缓存中的共享对象，复制后再附加
+            result = {**result, "_timings": timings.report(time.perf_counter() - started)}
+        return result
+
+    wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), flag])
+    wrapper.__annotations__ = {**getattr(handler, "__annotations__", {}), "debug_timing": bool}
+    return wrapper
@@ -1,40 +1,177 @@
 # file_cache.py
 """
 文件缓存：按 TTL 缓存 MCP 工具返回的 JSON 结果，不占用内存，适合低内存服务器。
+
+缓存文件有两种格式：
+- 普通条目：整个文件是一个 JSON 对象（单行）
+- 大条目（data 序列化后不小于 LARGE_ENTRY_BYTES）：首行为 JSON 头（过期时间、result 中 data 以外的字段、
+  稀疏行偏移索引），其后为 data 数组，每行一条记录。读取时用 mmap 映射，先只解析头部做过期校验，
+  分页读取（get_slice）只解码所需字节范围；多线程重复读取共享操作系统页缓存
+
+两种格式中，记录的键与 columns 一致时都按列式存储（layout="columnar"：每条记录为值数组），读取时还原为字典。
 """
+import atexit
 import hashlib
 import inspect
 import json
 import logging
+import math
+import mmap
 import os
+import queue
 import tempfile
+import threading
 import time
+from contextlib import contextmanager
 from functools import wraps
 from pathlib import Path
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import cache_namespace
+import cache_stats
+import frame_cache
+import metrics
+import shm_cache
+import tool_executor
+from cache_namespace import DEFAULT_SCHEMA
 
 logger = logging.getLogger(__name__)
 
+# 永不过期的 TTL（用于已收盘的历史数据等不可变内容）
+TTL_FOREVER = math.inf
+
+# 分片目录名取 key 的前几位十六进制字符（2 位即 256 个分片）
+_SHARD_WIDTH = 2
 
-def _cache_key(name: str, args: tuple, kwargs: dict) -> str:
-    """根据工具名与参数生成稳定缓存 key（哈希）。"""
+# data 序列化后达到该字节数的条目按"头部 + 逐行记录"格式写入，读取时走 mmap
+LARGE_ENTRY_BYTES = 256 << 10
+# 大条目头部的格式标识
+_ROWS_FORMAT = "rows"
+# data 按列式存储的标识：每条记录存为与 result["columns"] 对应的值数组，读取时还原为字典
+_COLUMNAR_LAYOUT = "columnar"
+# 稀疏行索引步长：每隔多少行记录一次字节偏移
+_INDEX_STRIDE = 64
+
+
+def _cache_key(name: str, args: tuple, kwargs: dict, schema: str = DEFAULT_SCHEMA) -> str:
+    """根据工具名、参数与 schema 版本生成稳定缓存 key（哈希）。默认 schema 不参与哈希，兼容旧 key。"""
     payload = {
         "n": name,
         "a": list(args),
         "k": sorted((k, v) for k, v in kwargs.items()),
     }
+    if schema != DEFAULT_SCHEMA:
+        payload["s"] = schema
     raw = json.dumps(payload, sort_keys=True, default=str)
     return hashlib.sha256(raw.encode()).hexdigest()[:32]
 
 
+def _partition(args: tuple, kwargs: dict) -> Optional[str]:
+    """分区值：调用的第一个参数（如股票代码、日期），用于按前缀批量失效。"""
+    if args:
+        first = args[0]
+    elif kwargs:
+        first = next(iter(kwargs.values()))
+    else:
+        return None
+    return first if isinstance(first, str) else None
+
+
+# 工具名 -> 当前代码声明的 schema 版本（由 file_cached 登记，清理时删除旧版本条目）
+_schemas: dict = {}
+# 结果为同名 AKTools 接口 DataFrame 直接转换的工具：工具名 -> (签名, TTL, schema)（由 file_cached(endpoint=True) 登记）
+_endpoint_tools: Dict[str, Tuple[inspect.Signature, float, str]] = {}
+
+
 def _cache_path(cache_dir: Path, name: str, key: str) -> Path:
-    """缓存文件路径：cache_dir/工具名/key.json"""
+    """缓存文件路径：cache_dir/工具名/key 前两位/key.json（按哈希前缀分片，单目录文件数可控）"""
+    return cache_dir / name / key[:_SHARD_WIDTH] / f"{key}.json"
+
+
+def _legacy_cache_path(cache_dir: Path, name: str, key: str) -> Path:
+    """旧版未分片的缓存文件路径：cache_dir/工具名/key.json"""
     return cache_dir / name / f"{key}.json"
 
 
-def get(cache_dir: Path, name: str, args: tuple, kwargs: dict, ttl_seconds: float) -> Optional[dict]:
+def _locate(cache_dir: Path, name: str, key: str) -> Path:
+    """返回分片路径；若只存在旧版未分片文件，先将其迁移到分片路径。"""
+    path = _cache_path(cache_dir, name, key)
+    if path.exists():
+        return path
+    legacy = _legacy_cache_path(cache_dir, name, key)
+    if legacy.is_file():
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(legacy, path)
+        except OSError as e:
+            logger.debug("file_cache migrate %s: %s", legacy, e)
+            return legacy
+    return path
+
+
+def _clean_legacy_file(path: Path, now: float, name: str, rules: dict) -> bool:
+    """
+    旧版未分片文件（cache_dir/工具名/key.json）：与 _clean_file 相同的条件下删除，否则迁移到分片路径。
+    分片路径已有条目时旧文件是过时的副本，直接删除。返回是否删除。
+    """
+    if _clean_file(path, now, name, rules):
+        return True
+    target = _cache_path(path.parent.parent, name, path.stem)
+    try:
+        if target.exists():
+            path.unlink()
+            return True
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(path, target)
+    except OSError as e:
+        logger.debug("file_cache migrate %s: %s", path, e)
+    return False
+
+
+def migrate_layout(cache_dir: Path) -> int:
+    """
+    将旧版未分片的缓存文件（cache_dir/工具名/key.json）迁移到分片目录。
+
+    Args:
+        cache_dir: 缓存根目录
+
+    Returns:
+        迁移的文件数量
+    """
+    if not cache_dir.is_dir():
+        return 0
+    moved = 0
+    try:
+        for tool_dir in cache_dir.iterdir():
+            # 以下划线开头的目录属于其他缓存层（如 DataFrame 缓存），不是工具目录
+            if not tool_dir.is_dir() or tool_dir.name.startswith("_"):
+                continue
+            with os.scandir(tool_dir) as it:
+                legacy = [e.name for e in it if e.is_file() and e.name.endswith(".json")]
+            for filename in legacy:
+                key = filename[: -len(".json")]
+                target = _cache_path(cache_dir, tool_dir.name, key)
+                try:
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(tool_dir / filename, target)
+                    moved += 1
+                except OSError as e:
+                    logger.debug("file_cache migrate %s: %s", tool_dir / filename, e)
+    except OSError as e:
+        logger.warning("file_cache migrate_layout: %s", e)
+    return moved
+
+
+def get(
+    cache_dir: Path,
+    name: str,
+    args: tuple,
+    kwargs: dict,
+    ttl_seconds: float,
+    schema: str = DEFAULT_SCHEMA,
+) -> Optional[dict]:
     """
-    从文件缓存读取结果。若不存在或已过期则返回 None。
+    从文件缓存读取结果。若不存在、已过期或已被失效规则覆盖则返回 None。
 
     Args:
         cache_dir: 缓存根目录
@@ -42,42 +179,195 @@ def get(cache_dir: Path, name: str, args: tuple, kwargs: dict, ttl_seconds: floa
         args: 位置参数元组
         kwargs: 关键字参数字典
         ttl_seconds: 有效秒数，过期则视为未命中
+        schema: 结果结构版本，不同版本互不命中
 
     Returns:
         缓存的 result 字典，或 None
     """
+    return _get(cache_dir, name, args, kwargs, ttl_seconds, schema, None)
+
+
+def get_slice(
+    cache_dir: Path,
+    name: str,
+    args: tuple,
+    kwargs: dict,
+    ttl_seconds: float,
+    offset: int,
+    limit: Optional[int],
+    schema: str = DEFAULT_SCHEMA,
+) -> Optional[dict]:
+    """
+    分页读取缓存结果：返回的 result 中 data 只包含 [offset, offset + limit) 范围的记录，
+    另附 total_rows 为完整记录数。大条目只解码所需记录对应的字节范围。
+
+    Args:
+        cache_dir: 缓存根目录
+        name: 工具名
+        args: 位置参数元组
+        kwargs: 关键字参数字典
+        ttl_seconds: 有效秒数
+        offset: 起始记录下标
+        limit: 最多返回的记录数，None 表示到末尾
+        schema: 结果结构版本
+
+    Returns:
+        分页后的 result 字典，或 None
+    """
+    return _get(cache_dir, name, args, kwargs, ttl_seconds, schema, (max(0, offset), limit))
+
+
+def _get(
+    cache_dir: Path,
+    name: str,
+    args: tuple,
+    kwargs: dict,
+    ttl_seconds: float,
+    schema: str,
+    window: Optional[Tuple[int, Optional[int]]],
+) -> Optional[dict]:
     if ttl_seconds <= 0:
         return None
+    started = time.perf_counter()
+    result, nbytes, expired = _read(cache_dir, name, args, kwargs, schema, window)
+    elapsed = time.perf_counter() - started
+    metrics.add_phase("decode", elapsed)
+    cache_stats.record(
+        name,
+        gets=1,
+        get_seconds=elapsed,
+        bytes_read=nbytes,
+        hits=result is not None,
+        misses=result is None,
+        expired=expired,
+    )
+    return result
+
+
+def _check_entry(entry: Any, name: str, rules: dict) -> Tuple[Optional[dict], bool]:
+    """校验缓存条目，返回 (有效的 result 或 None, 是否已过期或失效)；格式非法抛 ValueError。"""
+    if cache_namespace.is_invalidated(rules, name, entry):
+        return None, True
+    expires_at = entry.get("expires_at")
+    if expires_at is not None:
+        try:
+            expires_at = float(expires_at)
+        except (TypeError, ValueError):
+            raise ValueError("invalid expires_at")
+    if expires_at is not None and time.time() > expires_at:
+        return None, True
+    result = entry.get("result")
+    if not isinstance(result, dict):
+        raise ValueError("invalid result")
+    return result, False
+
+
+def _slice_result(result: dict, window: Optional[Tuple[int, Optional[int]]]) -> dict:
+    if window is None:
+        return result
+    data = result.get("data")
+    if not isinstance(data, list):
+        return result
+    start, limit = window
+    stop = len(data) if limit is None else start + max(0, limit)
+    return {**result, "data": data[start:stop], "total_rows": len(data)}
+
+
+def _row_start(buf: Any, body: int, header: dict, i: int) -> int:
+    """返回第 i 行记录在 buf 中的起始偏移（先查稀疏索引，再向后数换行）。"""
+    pos = body + header["index"][i // _INDEX_STRIDE]
+    for _ in range(i % _INDEX_STRIDE):
+        pos = buf.find(b"\n", pos) + 1
+    return pos
+
+
+def _decode_rows(buf: Any, body: int, header: dict, window: Optional[Tuple[int, Optional[int]]]) -> list:
+    """解码大条目的 data 数组；指定 window 时只解码对应记录的字节范围。"""
+    if window is None:
+        return json.loads(buf[body:])
+    total = int(header["total_rows"])
+    start, limit = window
+    stop = total if limit is None else min(total, start + max(0, limit))
+    if start >= stop:
+        return []
+    begin = _row_start(buf, body, header, start)
+    # 记录之间以 ",\n" 分隔，数组以 "]" 结尾
+    end = len(buf) - 1 if stop >= total else _row_start(buf, body, header, stop) - 2
+    return json.loads(b"[" + buf[begin:end] + b"]")
+
+
+def _decode_entry(
+    buf: Any, name: str, rules: dict, window: Optional[Tuple[int, Optional[int]]]
+) -> Tuple[Optional[dict], bool]:
+    """解析缓存文件内容（bytes 或 mmap），返回 (result 或 None, 是否已过期或失效)。"""
+    newline = buf.find(b"\n")
+    if newline < 0:
+        entry = json.loads(buf[:])
+        result, expired = _check_entry(entry, name, rules)
+        if result is None:
+            return None, expired
+        result = _slice_result(result, window)
+        if entry.get("layout") == _COLUMNAR_LAYOUT:
+            result = {**result, "data": _unpack_rows(result["columns"], result["data"])}
+        return result, expired
+    header = json.loads(buf[:newline])
+    if header.get("format") != _ROWS_FORMAT:
+        raise ValueError("unknown cache entry format")
+    meta, expired = _check_entry(header, name, rules)
+    if meta is None:
+        return None, expired
+    result = dict(meta)
+    rows = _decode_rows(buf, newline + 1, header, window)
+    result["data"] = _unpack_rows(meta["columns"], rows) if header.get("layout") == _COLUMNAR_LAYOUT else rows
+    if window is not None:
+        result["total_rows"] = int(header["total_rows"])
+    return result, False
+
+
+def _read(
+    cache_dir: Path,
+    name: str,
+    args: tuple,
+    kwargs: dict,
+    schema: str,
+    window: Optional[Tuple[int, Optional[int]]] = None,
+) -> Tuple[Optional[dict], int, bool]:
+    """读取缓存条目，返回 (result 或 None, 读取字节数, 是否因过期或失效未命中)。"""
+    nbytes = 0
+    path = None
     try:
-        key = _cache_key(name, args, kwargs)
+        key = _cache_key(name, args, kwargs, schema)
         path = _cache_path(cache_dir, name, key)
+        rules = cache_namespace.load_rules(cache_dir)
+        writer = _write_behind
+        pending = writer.lookup(path) if writer is not None else None
+        if pending is not None:
+            result, expired = _check_entry(pending, name, rules)
+            return (None if result is None else _slice_result(result, window)), 0, expired
+        path = _locate(cache_dir, name, key)
         if not path.exists():
-            return None
-        with open(path, "r", encoding="utf-8") as f:
-            entry = json.load(f)
-        expires_at = entry.get("expires_at")
-        if expires_at is not None:
-            try:
-                expires_at = float(expires_at)
-            except (TypeError, ValueError):
-                raise ValueError("invalid expires_at")
-        if expires_at is not None and time.time() > expires_at:
+            return None, 0, False
+        with open(path, "rb") as f:
+            nbytes = os.fstat(f.fileno()).st_size
+            if nbytes >= LARGE_ENTRY_BYTES:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    result, expired = _decode_entry(buf, name, rules, window)
+            else:
+                result, expired = _decode_entry(f.read(), name, rules, window)
+        if expired:
             try:
                 path.unlink()
             except OSError:
                 pass
-            return None
-        result = entry.get("result")
-        if not isinstance(result, dict):
-            raise ValueError("invalid result")
-        return result
-    except (json.JSONDecodeError, OSError, TypeError, ValueError) as e:
+        return result, nbytes, expired
+    except (json.JSONDecodeError, UnicodeDecodeError, OSError, TypeError, ValueError, AttributeError) as e:
         logger.debug("file_cache get %s: %s", path, e)
         try:
-            path.unlink(missing_ok=True)
+            if path is not None:
+                path.unlink(missing_ok=True)
         except OSError:
             pass
-        return None
+        return None, nbytes, False
 
 
 def set(
@@ -87,32 +377,119 @@ def set(
     kwargs: dict,
     ttl_seconds: float,
     result: dict,
+    schema: str = DEFAULT_SCHEMA,
+    shared: bool = False,
+    created_at: Optional[float] = None,
 ) -> None:
     """
-    将结果写入文件缓存。
+    将结果写入文件缓存。启用写回队列时仅入队，由后台线程序列化并落盘。
 
     Args:
         cache_dir: 缓存根目录
         name: 工具名
         args: 位置参数元组
         kwargs: 关键字参数字典
-        ttl_seconds: 有效秒数
-        result: 要缓存的 result 字典（可 JSON 序列化）
+        ttl_seconds: 有效秒数，TTL_FOREVER 表示永不过期
+        result: 要缓存的 result 字典（可 JSON 序列化，入队后调用方不应再修改）
+        schema: 结果结构版本
+        shared: 同时写入共享内存层，供其他 worker 进程直接读取
+        created_at: 数据的获取时间（开始请求上游的时间），默认为写入时间；
+            失效规则按它判断，请求期间登记的失效规则同样覆盖这次结果
     """
     if ttl_seconds <= 0:
         return
-    key = _cache_key(name, args, kwargs)
+    key = _cache_key(name, args, kwargs, schema)
     path = _cache_path(cache_dir, name, key)
+    now = time.time()
     entry = {
-        "expires_at": time.time() + ttl_seconds,
+        "expires_at": None if math.isinf(ttl_seconds) else now + ttl_seconds,
+        "created_at": now if created_at is None else created_at,
+        "schema": schema,
+        "partition": _partition(args, kwargs),
         "result": result,
     }
+    if shared:
+        shm_cache.put(cache_dir, key, entry)
+    writer = _write_behind
+    if writer is not None:
+        writer.submit(path, name, entry)
+        return
+    _write_entry(path, name, entry)
+
+
+def _pack_rows(result: Any) -> Optional[list]:
+    """data 中每条记录的键都与 columns 一致时，返回按列顺序排列的值数组列表，否则返回 None。"""
+    if not isinstance(result, dict):
+        return None
+    columns = result.get("columns")
+    data = result.get("data")
+    if not isinstance(columns, list) or not isinstance(data, list) or not data:
+        return None
+    width = len(columns)
+    packed = []
+    try:
+        for record in data:
+            if not isinstance(record, dict) or len(record) != width:
+                return None
+            packed.append([record[column] for column in columns])
+    except (KeyError, TypeError):
+        return None
+    return packed
+
+
+def _unpack_rows(columns: list, rows: list) -> list:
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def _serialize_entry(entry: dict) -> bytes:
+    """
+    序列化条目；data 较大时使用"头部 + 逐行记录"格式，否则为单个 JSON 对象。
+    记录与 columns 一致时按列式存储（列名只写一次），文件约小一半，解析也更快。
+    """
+    packed = _pack_rows(entry["result"])
+    if packed is not None:
+        entry = {**entry, "layout": _COLUMNAR_LAYOUT, "result": {**entry["result"], "data": packed}}
+    result = entry["result"]
+    data = result.get("data") if isinstance(result, dict) else None
+    if isinstance(data, list) and data:
+        rows = [json.dumps(row, ensure_ascii=False, default=str).encode("utf-8") for row in data]
+        if sum(len(row) for row in rows) >= LARGE_ENTRY_BYTES:
+            index = []
+            offset = 1  # 跳过数组开头的 "["
+            for i, row in enumerate(rows):
+                if i % _INDEX_STRIDE == 0:
+                    index.append(offset)
+                offset += len(row) + 2
+            header = {
+                **entry,
+                "format": _ROWS_FORMAT,
+                "result": {k: v for k, v in result.items() if k != "data"},
+                "total_rows": len(rows),
+                "index": index,
+            }
+            head = json.dumps(header, ensure_ascii=False, default=str).encode("utf-8")
+            return b"".join((head, b"\n[", b",\n".join(rows), b"]"))
+    return json.dumps(entry, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _load_header(path: Path) -> dict:
+    """读取条目头部：普通条目返回整个对象，大条目只读取首行头部。"""
+    with open(path, "rb") as f:
+        first = f.readline()
+    entry = json.loads(first)
+    if first.endswith(b"\n") and entry.get("format") != _ROWS_FORMAT:
+        raise ValueError("unknown cache entry format")
+    return entry
+
+
+def _write_entry(path: Path, name: str, entry: dict) -> None:
+    """序列化条目并原子写入（临时文件 + os.replace）。"""
+    started = time.perf_counter()
     try:
         path.parent.mkdir(parents=True, exist_ok=True)
-        raw = json.dumps(entry, ensure_ascii=False, default=str)
+        raw = _serialize_entry(entry)
         with tempfile.NamedTemporaryFile(
-            mode="w",
-            encoding="utf-8",
+            mode="wb",
             dir=path.parent,
             prefix=f"{path.stem}.",
             suffix=".tmp",
@@ -121,7 +498,8 @@ def set(
             f.write(raw)
             tmp_name = f.name
         os.replace(tmp_name, path)
-    except (OSError, TypeError) as e:
+        cache_stats.record(name, sets=1, set_seconds=time.perf_counter() - started, bytes_written=len(raw))
+    except (OSError, TypeError, ValueError) as e:
         logger.warning("file_cache set %s: %s", path, e)
         try:
             if "tmp_name" in locals():
@@ -130,9 +508,213 @@ def set(
             pass
 
 
+class _WriteBehindQueue:
+    """
+    写回队列：请求线程只入队，单个后台线程负责序列化与落盘。
+
+    队列有界：队列满时入队最多等待 put_timeout 秒，仍满则由调用方同步写入（背压）。
+    尚未落盘的条目保存在 pending 中，读取时优先命中，避免重复请求上游。
+    同一路径在 pending 中只保留最新的条目：已在队列中或正在写入的路径不再重复入队，
+    落盘时总是写入 pending 中的最新条目，较旧的结果不会覆盖较新的结果。
+    """
+
+    def __init__(self, max_pending: int, put_timeout: float = 0.05) -> None:
+        self._queue: "queue.Queue[Tuple[Path, str]]" = queue.Queue(maxsize=max(1, max_pending))
+        self._pending: dict = {}
+        self._lock = threading.Lock()
+        self._put_timeout = put_timeout
+        self._thread = threading.Thread(target=self._run, name="file-cache-writer", daemon=True)
+        self._thread.start()
+
+    def lookup(self, path: Path) -> Optional[dict]:
+        with self._lock:
+            return self._pending.get(path)
+
+    def submit(self, path: Path, name: str, entry: dict) -> None:
+        with self._lock:
+            # 路径已在 pending 中：负责该路径的写入者（后台线程或同步写入的调用方）会写入最新条目
+            queued = path in self._pending
+            self._pending[path] = entry
+        if queued:
+            return
+        try:
+            self._queue.put((path, name), timeout=self._put_timeout)
+        except queue.Full:
+            self._drain(path, name)
+
+    def _drain(self, path: Path, name: str) -> None:
+        """写入 path 在 pending 中的最新条目，直到写入期间没有更新的条目为止。"""
+        while True:
+            with self._lock:
+                entry = self._pending.get(path)
+            if entry is None:
+                return
+            _write_entry(path, name, entry)
+            with self._lock:
+                if self._pending.get(path) is entry:
+                    del self._pending[path]
+                    return
+
+    def _run(self) -> None:
+        while True:
+            path, name = self._queue.get()
+            try:
+                self._drain(path, name)
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def pending_count(self) -> int:
+        return self._queue.unfinished_tasks
+
+
+_write_behind: Optional[_WriteBehindQueue] = None
+
+
+def enable_write_behind(max_pending: int) -> None:
+    """
+    启用写回队列（进程内只需调用一次），并在进程退出时自动落盘。
+
+    Args:
+        max_pending: 队列中最多等待写入的条目数
+    """
+    global _write_behind
+    if _write_behind is not None:
+        return
+    _write_behind = _WriteBehindQueue(max_pending)
+    atexit.register(flush_write_behind)
+    logger.info("file_cache write-behind enabled: max %s pending entries", max_pending)
+
+
+def flush_write_behind(timeout: float = 30.0) -> bool:
+    """
+    等待写回队列全部落盘。
+
+    Returns:
+        是否在 timeout 内写完（未启用写回队列时返回 True）
+    """
+    writer = _write_behind
+    if writer is None:
+        return True
+    done = writer.flush(timeout)
+    if not done:
+        logger.warning("file_cache write-behind flush timed out: %s entries pending", writer.pending_count())
+    return done
+
+
+# 正在进行的交互式（非预取）上游请求数，供后台任务让路
+_inflight_lock = threading.Lock()
+_inflight = 0
+
+
+@contextmanager
+def _track_inflight():
+    global _inflight
+    with _inflight_lock:
+        _inflight += 1
+    try:
+        yield
+    finally:
+        with _inflight_lock:
+            _inflight -= 1
+
+
+def interactive_inflight() -> int:
+    """返回当前未命中缓存、正在请求上游的交互式调用数量。"""
+    return _inflight
+
+
+def call_upstream(name: str, f: Callable[..., dict], kwargs: dict, interactive: bool = True) -> dict:
+    """
+    执行未命中缓存的工具调用，并记录上游耗时与失败次数。
+
+    Args:
+        name: 工具名
+        f: 原始工具函数
+        kwargs: 完整参数
+        interactive: 是否为交互式调用（计入 interactive_inflight，预取应传 False）
+    """
+    tool_executor.require_upstream()
+    started = time.perf_counter()
+    result = None
+    try:
+        # 结果由调用方缓存，同名接口不再重复写入 DataFrame 缓存
+        with frame_cache.covered_by(name):
+            if interactive:
+                with _track_inflight():
+                    result = f(**kwargs)
+            else:
+                result = f(**kwargs)
+        return result
+    finally:
+        cache_stats.record(
+            name,
+            upstream_calls=1,
+            upstream_seconds=time.perf_counter() - started,
+            upstream_errors=not (result is not None and result.get("success") is True),
+        )
+
+
+def _clean_file(path: Path, now: float, name: str, rules: dict) -> bool:
+    """检查单个缓存文件，已过期、已失效、schema 过时或损坏则删除；返回是否删除。"""
+    try:
+        entry = _load_header(path)
+        current_schema = _schemas.get(name)
+        if (
+            "expires_at" not in entry
+            or cache_namespace.is_invalidated(rules, name, entry)
+            or (current_schema is not None and str(entry.get("schema", DEFAULT_SCHEMA)) != current_schema)
+        ):
+            path.unlink()
+            return True
+        expires_at = entry["expires_at"]
+        if expires_at is None:
+            return False
+        try:
+            expires_at = float(expires_at)
+        except (TypeError, ValueError):
+            path.unlink()
+            return True
+        if now > expires_at:
+            path.unlink()
+            return True
+        return False
+    except (json.JSONDecodeError, UnicodeDecodeError, OSError, TypeError, ValueError, AttributeError):
+        try:
+            path.unlink()
+            return True
+        except OSError:
+            return False
+
+
+def _iter_entry_files(tool_dir: Path):
+    """遍历工具目录下的缓存文件：分片子目录中的 .json，以及旧版未分片的 .json。"""
+    with os.scandir(tool_dir) as it:
+        children = list(it)
+    for child in children:
+        if child.is_dir():
+            try:
+                with os.scandir(child.path) as shard:
+                    for entry in shard:
+                        if entry.name.endswith(".json") and entry.is_file():
+                            yield Path(entry.path)
+            except OSError:
+                continue
+        elif child.name.endswith(".json") and child.is_file():
+            yield Path(child.path)
+
+
 def clean_expired(cache_dir: Path) -> int:
     """
     扫描缓存目录，删除已过期或损坏的缓存文件（不删除 .tmp 写入中文件）。
+    expires_at 为 null 的条目视为永不过期，予以保留；被失效规则覆盖或 schema 已过时的条目一并删除。
 
     Args:
         cache_dir: 缓存根目录，与 set/get 使用的一致。
@@ -145,69 +727,186 @@ def clean_expired(cache_dir: Path) -> int:
         return 0
     removed = 0
     now = time.time()
+    rules = cache_namespace.load_rules(cache_dir)
     try:
         for tool_dir in cache_dir.iterdir():
-            if not tool_dir.is_dir():
+            # 以下划线开头的目录属于其他缓存层（如 DataFrame 缓存），不是工具目录
+            if not tool_dir.is_dir() or tool_dir.name.startswith("_"):
                 continue
-            for path in tool_dir.iterdir():
-                if path.is_file() and path.suffix == ".json":
-                    try:
-                        with open(path, "r", encoding="utf-8") as f:
-                            entry = json.load(f)
-                        expires_at = entry.get("expires_at")
-                        if expires_at is None:
-                            path.unlink()
-                            removed += 1
-                            continue
-                        try:
-                            expires_at = float(expires_at)
-                        except (TypeError, ValueError):
-                            path.unlink()
-                            removed += 1
-                            continue
-                        if now > expires_at:
-                            path.unlink()
-                            removed += 1
-                    except (json.JSONDecodeError, OSError, TypeError, ValueError):
-                        try:
-                            path.unlink()
-                            removed += 1
-                        except OSError:
-                            pass
+            for path in _iter_entry_files(tool_dir):
+                if _clean_file(path, now, tool_dir.name, rules):
+                    removed += 1
     except OSError as e:
         logger.warning("file_cache clean_expired: %s", e)
     return removed
 
 
-def file_cached(ttl_seconds: float, cache_dir: Optional[Path] = None):
+def expires_at(
+    cache_dir: Path, name: str, args: tuple, kwargs: dict, schema: str = DEFAULT_SCHEMA
+) -> Optional[float]:
+    """
+    读取缓存条目的过期时间（不校验是否已过期）。
+
+    Returns:
+        过期时间戳；永不过期返回 math.inf；条目不存在或损坏返回 None
+    """
+    key = _cache_key(name, args, kwargs, schema)
+    path = _locate(cache_dir, name, key)
+    try:
+        entry = _load_header(path)
+        if cache_namespace.is_invalidated(cache_namespace.load_rules(cache_dir), name, entry):
+            return None
+        value = entry.get("expires_at")
+        return math.inf if value is None else float(value)
+    except (json.JSONDecodeError, OSError, TypeError, ValueError, AttributeError):
+        return None
+
+
+def _publish_shared(cache_dir: Path, name: str, kwargs: dict, schema: str, result: dict) -> None:
+    """文件缓存命中后把条目放入共享内存层（沿用文件中的过期与写入时间）。"""
+    key = _cache_key(name, tuple(), kwargs, schema)
+    try:
+        header = _load_header(_locate(cache_dir, name, key))
+    except (OSError, ValueError, AttributeError):
+        return
+    entry = {k: header.get(k) for k in ("expires_at", "created_at", "schema", "partition")}
+    entry["result"] = result
+    shm_cache.put(cache_dir, key, entry)
+
+
+def endpoint_result(cache_dir: Path, name: str, params: Optional[Dict[str, Any]]) -> Optional[dict]:
+    """
+    按 AKTools 接口参数读取同名工具的缓存结果（供 call_aktools_api 与 MCP 服务共用缓存）。
+
+    只有工具以相同参数调用上游时才算匹配：按工具签名补全默认参数、去掉值为 None 的参数后须与 params 完全相同，
+    否则（如 params 省略了工具有默认值的参数，上游会使用它自己的默认值）返回 None。
+
+    Returns:
+        缓存的成功结果，或 None
+    """
+    registered = _endpoint_tools.get(name)
+    if registered is None:
+        return None
+    signature, ttl_seconds, schema = registered
+    params = {k: v for k, v in (params or {}).items() if v is not None}
+    try:
+        bound = signature.bind(**params)
+    except TypeError:
+        return None
+    bound.apply_defaults()
+    kwargs = dict(bound.arguments)
+    if {k: v for k, v in kwargs.items() if v is not None} != params:
+        return None
+    result = get(cache_dir, name, tuple(), kwargs, ttl_seconds, schema)
+    return result if result is not None and result.get("success") is True else None
+
+
+def file_cached(
+    ttl_seconds: float,
+    cache_dir: Optional[Path] = None,
+    schema: str = DEFAULT_SCHEMA,
+    shared: bool = False,
+    endpoint: bool = False,
+):
     """
     装饰器：对工具函数的返回值做文件缓存（按 TTL）。
 
+    缓存 key 按函数签名补全默认参数后生成，因此省略默认参数与显式传入默认值
+    命中同一条缓存。返回结构变化时递增 schema，旧版本条目不再命中并由清理任务删除。
+    被装饰函数额外提供：
+    - cache_refresh(*args, **kwargs): 绕过缓存重新执行并写回（供预取使用）
+    - cache_expires_at(*args, **kwargs): 返回对应缓存条目的过期时间
+    - cache_slice(offset, limit, *args, **kwargs): 分页读取（命中时只解码所需记录，未命中时获取并写入后截取），
+      缓存未启用时返回 None
+    - cache_ttl: 缓存有效秒数
+
     Args:
         ttl_seconds: 缓存有效秒数
         cache_dir: 缓存根目录，为 None 时从 config 读取
+        schema: 结果结构版本
+        shared: 是否使用共享内存层（适合全市场快照等多个 worker 都频繁读取的大结果，需先 shm_cache.enable()）
+        endpoint: 结果是否为同名 AKTools 接口返回的 DataFrame 的直接转换；为 True 时直接调用该接口
+            （call_aktools_api）也可读取本缓存条目（见 endpoint_result）
     """
 
     def decorator(f: Callable[..., dict]) -> Callable[..., dict]:
-        @wraps(f)
-        def wrapper(*args: Any, **kwargs: Any) -> dict:
+        signature = inspect.signature(f)
+        name = f.__name__
+        _schemas[name] = schema
+        if endpoint:
+            _endpoint_tools[name] = (signature, ttl_seconds, schema)
+
+        def _root() -> Optional[Path]:
             from config import CACHE_DIR
 
-            root = cache_dir if cache_dir is not None else CACHE_DIR
+            return cache_dir if cache_dir is not None else CACHE_DIR
+
+        def _params(args: tuple, kwargs: dict) -> dict:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return dict(bound.arguments)
+
+        def _fetch(root: Path, params: dict, interactive: bool = True) -> dict:
+            fetched_at = time.time()
+            result = call_upstream(name, f, params, interactive=interactive)
+            if result is not None and result.get("success") is True:
+                set(root, name, tuple(), params, ttl_seconds, result, schema, shared=shared, created_at=fetched_at)
+            return result
+
+        @wraps(f)
+        def wrapper(*args: Any, **kwargs: Any) -> dict:
+            root = _root()
             if root is None or ttl_seconds <= 0:
                 return f(*args, **kwargs)
-            name = f.__name__
-            cached = get(root, name, args, kwargs, ttl_seconds)
+            params = _params(args, kwargs)
+            if shared and shm_cache.enabled():
+                cached = shm_cache.get(root, name, _cache_key(name, tuple(), params, schema))
+                if cached is not None:
+                    cache_stats.record(name, hits=1, shm_hits=1)
+                    return cached
+            cached = get(root, name, tuple(), params, ttl_seconds, schema)
             if cached is not None:
                 logger.debug("file_cache hit: %s", name)
+                if shared and shm_cache.enabled():
+                    _publish_shared(root, name, params, schema, cached)
                 return cached
-            result = f(*args, **kwargs)
-            if result is not None and result.get("success") is True:
-                set(root, name, args, kwargs, ttl_seconds, result)
-            return result
+            return _fetch(root, params)
+
+        def cache_refresh(*args: Any, **kwargs: Any) -> dict:
+            root = _root()
+            if root is None or ttl_seconds <= 0:
+                return f(*args, **kwargs)
+            return _fetch(root, _params(args, kwargs), interactive=False)
+
+        def cache_slice(offset: int, limit: Optional[int], *args: Any, **kwargs: Any) -> Optional[dict]:
+            root = _root()
+            if root is None or ttl_seconds <= 0:
+                return None
+            params = _params(args, kwargs)
+            window = (max(0, offset), limit)
+            if shared and shm_cache.enabled():
+                cached = shm_cache.get(root, name, _cache_key(name, tuple(), params, schema))
+                if cached is not None:
+                    cache_stats.record(name, hits=1, shm_hits=1)
+                    return _slice_result(cached, window)
+            cached = _get(root, name, tuple(), params, ttl_seconds, schema, window)
+            if cached is not None:
+                return cached
+            result = _fetch(root, params)
+            return None if result is None else _slice_result(result, window)
+
+        def cache_expires_at(*args: Any, **kwargs: Any) -> Optional[float]:
+            root = _root()
+            if root is None or ttl_seconds <= 0:
+                return None
+            return expires_at(root, name, tuple(), _params(args, kwargs), schema)
 
         # 保留原函数签名，供 FastMCP 解析工具参数
-        wrapper.__signature__ = inspect.signature(f)
+        wrapper.__signature__ = signature
+        wrapper.cache_refresh = cache_refresh
+        wrapper.cache_expires_at = cache_expires_at
+        wrapper.cache_slice = cache_slice
+        wrapper.cache_ttl = ttl_seconds
         return wrapper
 
     return decorator
@@ -221,5 +920,10 @@ if __name__ == "__main__":
         print("Usage: CACHE_DIR=/path/to/cache python -m file_cache", file=sys.stderr)
         sys.exit(1)
     root = Path(cache_dir_raw)
+    moved = migrate_layout(root)
+    if moved:
+        print(f"file_cache migrate_layout: {moved} files moved")
     n = clean_expired(root)
     print(f"file_cache clean_expired: {n} files removed")
+    n = frame_cache.clean_expired(root)
+    print(f"frame_cache clean_expired: {n} files removed")
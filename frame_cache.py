@@ -0,0 +1,286 @@
+# frame_cache.py
+"""
+DataFrame 缓存：在 call_aktools_api 层按"接口 + 参数"缓存 AKTools 返回的 DataFrame。
+
+akshare_api、stock_a_share_api_complete、examples 脚本与 MCP 服务都经由 call_aktools_api 访问上游，
+因此共用同一份缓存（与文件缓存同在 CACHE_DIR 下：CACHE_DIR/_frames/接口名/key 前两位/key.json）。
+
+文件格式：首行为 "AKF2 " + JSON 头部（expires_at / created_at / partition），其后为 JSON 正文
+{"columns": 列名, "data": 按列顺序排列的行数组}，读取时按与上游 JSON 相同的方式重建 DataFrame。
+缓存文件可能来自共享目录或快照导入，只使用 JSON，不使用 pickle 等可执行代码的格式；
+旧版 .pkl 文件从不读取，由清理任务直接删除。清理时只读取首行。
+
+经由文件缓存的 MCP 工具访问同名接口时（file_cache.call_upstream），结果已由文件缓存保存，不再重复写入 DataFrame 缓存；
+直接调用 call_aktools_api 时，DataFrame 缓存未命中会再读取该工具以相同参数写入的文件缓存条目（file_cache.endpoint_result）。
+
+TTL 按接口分档（见 _TIERS），且不长于 MCP 层对应工具的文件缓存 TTL，避免 MCP 层刷新时拿到旧数据：
+- micro：分时、盘口、逐笔等盘中数据，CACHE_TTL_MICRO
+- history：历史 K 线，CACHE_TTL_HISTORY_TAIL（MCP 层已按年份分段长期缓存，这里只需覆盖尾部）
+- static：个股资料等静态数据，CACHE_TTL_STATIC
+- realtime：其余接口（行情快照、榜单等），CACHE_TTL_REALTIME
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import pandas as pd
+
+import cache_namespace
+import cache_stats
+import metrics
+
+logger = logging.getLogger(__name__)
+
+FRAMES_DIR = "_frames"
+FRAME_SUFFIX = ".json"
+# 旧版 pickle 格式的后缀（只删除，不读取）
+LEGACY_SUFFIX = ".pkl"
+_MAGIC = b"AKF2 "
+_SHARD_WIDTH = 2
+
+# 当前正在经由文件缓存请求上游的 MCP 工具名
+_covering_tool: ContextVar[Optional[str]] = ContextVar("frame_cache_covering_tool", default=None)
+
+# (档位, 匹配接口名的正则)，按顺序匹配
+_TIERS = (
+    ("micro", re.compile(r"intraday|_min|minute|tick|bid_ask|pre_min|individual_spot_xq")),
+    ("history", re.compile(r"_hist|_daily$")),
+    ("static", re.compile(r"individual_info|basic_info|_info_|profile|name_code")),
+)
+
+
+def endpoint_name(endpoint: str) -> str:
+    """接口名：/api/public/stock_zh_a_hist -> stock_zh_a_hist"""
+    return endpoint.rstrip("/").rsplit("/", 1)[-1]
+
+
+def tier_of(name: str) -> str:
+    """返回接口所属的 TTL 档位。"""
+    for tier, pattern in _TIERS:
+        if pattern.search(name):
+            return tier
+    return "realtime"
+
+
+def ttl_for(name: str) -> float:
+    """接口的缓存秒数（<= 0 表示不缓存）。"""
+    import config
+
+    return {
+        "micro": config.CACHE_TTL_MICRO,
+        "history": config.CACHE_TTL_HISTORY_TAIL,
+        "static": config.CACHE_TTL_STATIC,
+        "realtime": config.CACHE_TTL_REALTIME,
+    }[tier_of(name)]
+
+
+def cache_root() -> Optional[Path]:
+    """DataFrame 缓存根目录；未设置 CACHE_DIR 或关闭 CACHE_FRAMES 时返回 None。"""
+    import config
+
+    if config.CACHE_DIR is None or not config.CACHE_FRAMES:
+        return None
+    return config.CACHE_DIR
+
+
+@contextmanager
+def covered_by(tool: str) -> Iterator[None]:
+    """在 with 块内，名为 tool 的接口结果由调用方的文件缓存保存，call_aktools_api 不再写入 DataFrame 缓存。"""
+    token = _covering_tool.set(tool)
+    try:
+        yield
+    finally:
+        _covering_tool.reset(token)
+
+
+def is_covered(endpoint: str) -> bool:
+    """该接口的结果是否已由当前调用的 MCP 工具文件缓存保存。"""
+    return _covering_tool.get() == endpoint_name(endpoint)
+
+
+def _normalize(params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    # requests 会丢弃值为 None 的参数，这里同样忽略，使两种写法命中同一条缓存
+    return {k: v for k, v in (params or {}).items() if v is not None}
+
+
+def _key(name: str, params: Dict[str, Any]) -> str:
+    raw = json.dumps({"n": name, "p": sorted(params.items())}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def _path(cache_dir: Path, name: str, key: str) -> Path:
+    return cache_dir / FRAMES_DIR / name / key[:_SHARD_WIDTH] / f"{key}{FRAME_SUFFIX}"
+
+
+def _partition(params: Dict[str, Any]) -> Optional[str]:
+    first = next(iter(params.values()), None)
+    return first if isinstance(first, str) else None
+
+
+def _read_header(f) -> Dict[str, Any]:
+    line = f.readline()
+    if not line.startswith(_MAGIC):
+        raise ValueError("invalid frame cache header")
+    return json.loads(line[len(_MAGIC) :])
+
+
+def _json_default(value: Any) -> Any:
+    # numpy 标量等转为 Python 原生值，其余（如时间戳）转为字符串
+    item = getattr(value, "item", None)
+    if callable(item):
+        return item()
+    return str(value)
+
+
+def _expired(header: Dict[str, Any], now: float) -> bool:
+    expires_at = header.get("expires_at")
+    return expires_at is not None and now > float(expires_at)
+
+
+def get(cache_dir: Path, endpoint: str, params: Optional[Dict[str, Any]]) -> Optional[pd.DataFrame]:
+    """
+    读取缓存的 DataFrame。不存在、已过期、已失效或损坏时返回 None。
+
+    Args:
+        cache_dir: 缓存根目录
+        endpoint: API 端点，如 "/api/public/stock_zh_a_spot_em"
+        params: 查询参数
+
+    Returns:
+        DataFrame（每次读取都是独立副本，可随意修改），或 None
+    """
+    name = endpoint_name(endpoint)
+    params = _normalize(params)
+    path = _path(cache_dir, name, _key(name, params))
+    stat_name = f"{FRAMES_DIR}/{name}"
+    started = time.perf_counter()
+    df = None
+    nbytes = 0
+    stale = False
+    try:
+        with open(path, "rb") as f:
+            header = _read_header(f)
+            rules = cache_namespace.load_rules(cache_dir)
+            stale = _expired(header, time.time()) or cache_namespace.is_invalidated(rules, name, header)
+            if not stale:
+                body = json.loads(f.read())
+                nbytes = f.tell()
+                df = pd.DataFrame(body["data"], columns=body["columns"])
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.debug("frame_cache get %s: %s", path, e)
+        stale = True
+        df = None
+    if stale:
+        path.unlink(missing_ok=True)
+    elapsed = time.perf_counter() - started
+    metrics.add_phase("decode", elapsed)
+    cache_stats.record(
+        stat_name,
+        gets=1,
+        get_seconds=elapsed,
+        bytes_read=nbytes,
+        hits=df is not None,
+        misses=df is None,
+        expired=stale,
+    )
+    return df
+
+
+def set(
+    cache_dir: Path,
+    endpoint: str,
+    params: Optional[Dict[str, Any]],
+    df: pd.DataFrame,
+    ttl_seconds: float,
+    created_at: Optional[float] = None,
+) -> None:
+    """
+    写入 DataFrame 缓存（临时文件 + os.replace 原子替换）。空 DataFrame 与列名不是字符串的 DataFrame 不缓存。
+
+    Args:
+        cache_dir: 缓存根目录
+        endpoint: API 端点
+        params: 查询参数
+        df: 要缓存的 DataFrame
+        ttl_seconds: 有效秒数
+        created_at: 开始请求上游的时间，默认为写入时间（失效规则按它判断）
+    """
+    if ttl_seconds <= 0 or df.empty or not all(isinstance(column, str) for column in df.columns):
+        return
+    name = endpoint_name(endpoint)
+    params = _normalize(params)
+    path = _path(cache_dir, name, _key(name, params))
+    now = time.time()
+    header = {
+        "expires_at": now + ttl_seconds,
+        "created_at": now if created_at is None else created_at,
+        "partition": _partition(params),
+    }
+    started = time.perf_counter()
+    tmp_name = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            mode="wb", dir=path.parent, prefix=f"{path.stem}.", suffix=".tmp", delete=False
+        ) as f:
+            tmp_name = f.name
+            f.write(_MAGIC + json.dumps(header).encode() + b"\n")
+            body = df.to_dict(orient="split", index=False)
+            f.write(json.dumps(body, ensure_ascii=False, default=_json_default).encode("utf-8"))
+            nbytes = f.tell()
+        os.replace(tmp_name, path)
+        cache_stats.record(
+            f"{FRAMES_DIR}/{name}", sets=1, set_seconds=time.perf_counter() - started, bytes_written=nbytes
+        )
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning("frame_cache set %s: %s", path, e)
+        if tmp_name is not None:
+            Path(tmp_name).unlink(missing_ok=True)
+
+
+def _clean_file(path: Path, now: float, name: str, rules: Dict[str, Any]) -> bool:
+    """检查单个 DataFrame 缓存文件，已过期、已失效、损坏或为旧版 pickle 格式则删除；返回是否删除。"""
+    try:
+        if path.suffix == LEGACY_SUFFIX:
+            raise ValueError("legacy pickle frame")
+        with open(path, "rb") as f:
+            header = _read_header(f)
+        stale = _expired(header, now) or cache_namespace.is_invalidated(rules, name, header)
+    except (OSError, ValueError):
+        stale = True
+    if not stale:
+        return False
+    try:
+        path.unlink()
+        return True
+    except OSError:
+        return False
+
+
+def clean_expired(cache_dir: Path) -> int:
+    """
+    删除已过期、已失效、损坏或为旧版 pickle 格式的 DataFrame 缓存文件（只读取首行头部）。
+
+    Returns:
+        删除的文件数量
+    """
+    root = cache_dir / FRAMES_DIR
+    if not root.is_dir():
+        return 0
+    removed = 0
+    now = time.time()
+    rules = cache_namespace.load_rules(cache_dir)
+    for path in [*root.glob(f"*/*/*{FRAME_SUFFIX}"), *root.glob(f"*/*/*{LEGACY_SUFFIX}")]:
+        if _clean_file(path, now, path.parent.parent.name, rules):
+            removed += 1
+    return removed
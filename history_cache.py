@@ -0,0 +1,356 @@
+# history_cache.py
+"""
+历史 K 线缓存：已收盘的历史日线不会再变化，按"不可变前缀 + 可变尾部"拆分缓存。
+
+一次 [start_date, end_date] 查询被拆成若干段分别缓存：
+- 按自然年切分的历史段：永不过期（前复权 qfq 例外，见 CACHE_TTL_HISTORY_QFQ）
+- 截至昨日的滚动段（当年 1 月 1 日至截止日前一天）：截止日每天后移，该段在次日零点过期
+- 尾部段（今日；复权数据为最近 N 天）：短 TTL，刷新时只重新拉取这一段
+
+冷查询有多个分段未命中时只请求一次上游（覆盖全部未命中分段的区间），再按日期把结果拆回各分段写入缓存。
+返回 "No data available" 的分段（如上市前的年份）按 empty_ttl_seconds 有限期缓存，
+不能永久缓存：上游网络错误时同样返回空结果。
+"""
+import inspect
+import logging
+import math
+import time
+from datetime import date, datetime, timedelta, timezone
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import file_cache
+
+logger = logging.getLogger(__name__)
+
+# A 股交易所所在时区（UTC+8，无夏令时）
+MARKET_TZ = timezone(timedelta(hours=8))
+
+_DATE_FMT = "%Y%m%d"
+# 只有这些复权方式返回按日期排列的 K 线，可以按日期区间拆分
+_SPLITTABLE_ADJUST = {"", "qfq", "hfq"}
+# 按日期把整段结果拆回各分段时识别的日期列（东方财富为"日期"，新浪、腾讯为 date）
+_DATE_COLUMNS = ("日期", "date")
+
+
+def _market_now() -> datetime:
+    return datetime.now(MARKET_TZ)
+
+
+def _parse_date(value: Any) -> Optional[date]:
+    if not isinstance(value, str) or len(value) != 8 or not value.isdigit():
+        return None
+    try:
+        return datetime.strptime(value, _DATE_FMT).date()
+    except ValueError:
+        return None
+
+
+def _seconds_until_tomorrow(now: datetime) -> float:
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=MARKET_TZ)
+    return max((tomorrow - now).total_seconds(), 1.0)
+
+
+def split_plan(
+    params: Dict[str, Any],
+    tail_ttl_seconds: float,
+    adjusted_tail_days: int,
+    qfq_ttl_seconds: float,
+    now: Optional[datetime] = None,
+) -> Optional[List[Tuple[Dict[str, Any], float]]]:
+    """
+    计算一次历史查询的分段缓存计划。
+
+    Args:
+        params: 完整参数（已补全默认值），需包含 start_date / end_date
+        tail_ttl_seconds: 尾部段 TTL
+        adjusted_tail_days: 复权数据的可变尾部天数
+        qfq_ttl_seconds: 前复权数据历史段的 TTL（除权会改写全部历史价格）
+        now: 当前时间，默认取交易所时区当前时间
+
+    Returns:
+        [(分段参数, TTL), ...]，按日期升序；参数不适合拆分时返回 None
+    """
+    if params.get("period", "daily") != "daily":
+        return None
+    adjust = params.get("adjust") or ""
+    if adjust not in _SPLITTABLE_ADJUST:
+        return None
+    start = _parse_date(params.get("start_date"))
+    end = _parse_date(params.get("end_date"))
+    if start is None or end is None or start > end:
+        return None
+
+    now = now or _market_now()
+    cutoff = _cutoff(adjust, now, adjusted_tail_days)
+    past_ttl = qfq_ttl_seconds if adjust == "qfq" else file_cache.TTL_FOREVER
+    rolling_ttl = min(past_ttl, _seconds_until_tomorrow(now))
+
+    plan: List[Tuple[Dict[str, Any], float]] = []
+    past_end = min(end, cutoff - timedelta(days=1))
+    year = start.year
+    while year <= past_end.year:
+        block_start = max(start, date(year, 1, 1))
+        block_end = min(past_end, date(year, 12, 31))
+        if block_start <= block_end:
+            # 止于截止日前一天且不是年末的段，其 key 每天变化，只保留到次日
+            rolling = block_end == cutoff - timedelta(days=1) and block_end != date(year, 12, 31)
+            plan.append((_with_range(params, block_start, block_end), rolling_ttl if rolling else past_ttl))
+        year += 1
+    if end >= cutoff:
+        plan.append((_with_range(params, max(start, cutoff), end), tail_ttl_seconds))
+    return plan
+
+
+def _cutoff(adjust: str, now: datetime, adjusted_tail_days: int) -> date:
+    """尾部段的起始日：今日；复权数据为最近 adjusted_tail_days 天。"""
+    return now.date() - timedelta(days=adjusted_tail_days) if adjust else now.date()
+
+
+def _with_range(params: Dict[str, Any], start: date, end: date) -> Dict[str, Any]:
+    part = dict(params)
+    part["start_date"] = start.strftime(_DATE_FMT)
+    part["end_date"] = end.strftime(_DATE_FMT)
+    return part
+
+
+def _merge(results: List[dict]) -> dict:
+    """按顺序合并各分段结果；任一分段出错则返回该错误，空分段跳过。"""
+    merged: Optional[dict] = None
+    for result in results:
+        if not result.get("success"):
+            if result.get("message") != "No data available":
+                return result
+            continue
+        if merged is None:
+            merged = {**result, "data": list(result.get("data") or [])}
+        else:
+            merged["data"].extend(result.get("data") or [])
+    if merged is None:
+        return results[-1]
+    merged["rows"] = len(merged["data"])
+    return merged
+
+
+def _is_empty(result: Optional[dict]) -> bool:
+    return result is not None and result.get("success") is False and result.get("message") == "No data available"
+
+
+def _store(
+    root: Path,
+    name: str,
+    kwargs: Dict[str, Any],
+    ttl_seconds: float,
+    empty_ttl_seconds: float,
+    result: Optional[dict],
+    fetched_at: float,
+) -> None:
+    if result is not None and result.get("success") is True:
+        file_cache.set(root, name, tuple(), kwargs, ttl_seconds, result, created_at=fetched_at)
+    elif _is_empty(result):
+        # 空分段：写入时取较短的 TTL，读取仍按 ttl_seconds 校验（条目自带 expires_at）
+        file_cache.set(root, name, tuple(), kwargs, min(ttl_seconds, empty_ttl_seconds), result, created_at=fetched_at)
+
+
+def _lookup(root: Path, name: str, kwargs: Dict[str, Any], ttl_seconds: float) -> Optional[dict]:
+    cached = file_cache.get(root, name, tuple(), kwargs, ttl_seconds)
+    if cached is not None:
+        logger.debug("history_cache hit: %s %s-%s", name, kwargs.get("start_date"), kwargs.get("end_date"))
+    return cached
+
+
+def _fetch(
+    root: Path,
+    f: Callable[..., dict],
+    kwargs: Dict[str, Any],
+    ttl_seconds: float,
+    empty_ttl_seconds: float = 0,
+    interactive: bool = True,
+) -> dict:
+    fetched_at = time.time()
+    result = file_cache.call_upstream(f.__name__, f, kwargs, interactive=interactive)
+    _store(root, f.__name__, kwargs, ttl_seconds, empty_ttl_seconds, result, fetched_at)
+    return result
+
+
+def _cached_call(
+    root: Path,
+    f: Callable[..., dict],
+    kwargs: Dict[str, Any],
+    ttl_seconds: float,
+    empty_ttl_seconds: float = 0,
+) -> dict:
+    cached = _lookup(root, f.__name__, kwargs, ttl_seconds)
+    if cached is not None:
+        return cached
+    return _fetch(root, f, kwargs, ttl_seconds, empty_ttl_seconds)
+
+
+def _row_date(row: Dict[str, Any]) -> Optional[date]:
+    for key in _DATE_COLUMNS:
+        value = row.get(key)
+        if value is None:
+            continue
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return _parse_date(str(value)[:10].replace("-", "").replace("/", ""))
+    return None
+
+
+def _split_rows(result: dict, parts: List[Dict[str, Any]]) -> Optional[List[dict]]:
+    """
+    按行的日期把整段结果拆成各分段的结果（没有行的分段为 "No data available"）。
+
+    Returns:
+        与 parts 一一对应的结果；有行缺少可识别的日期列时返回 None
+    """
+    bounds = [(_parse_date(part["start_date"]), _parse_date(part["end_date"])) for part in parts]
+    buckets: List[List[dict]] = [[] for _ in parts]
+    for row in result.get("data") or []:
+        day = _row_date(row)
+        if day is None:
+            return None
+        for bucket, (start, end) in zip(buckets, bounds):
+            if start <= day <= end:
+                bucket.append(row)
+                break
+    return [
+        {**result, "rows": len(rows), "data": rows}
+        if rows
+        else {"success": False, "message": "No data available", "rows": 0, "columns": [], "data": []}
+        for rows in buckets
+    ]
+
+
+def _cached_plan(
+    root: Path,
+    f: Callable[..., dict],
+    plan: List[Tuple[Dict[str, Any], float]],
+    empty_ttl_seconds: float,
+    refresh_from: Optional[date] = None,
+) -> dict:
+    """
+    按分段计划读取缓存；多个分段未命中时只请求一次上游（从第一个到最后一个未命中分段的整个区间），
+    再按日期把返回的行拆回各分段分别写入缓存。只有一个分段未命中，或结果无法按日期拆分时逐段请求。
+
+    refresh_from 不为 None 时（预取刷新），止于该日期及之后的分段不读缓存、直接重新获取，
+    上游请求不计为交互式请求。
+    """
+    name = f.__name__
+    interactive = refresh_from is None
+    results: List[Optional[dict]] = [
+        None if not interactive and _parse_date(part["end_date"]) >= refresh_from else _lookup(root, name, part, ttl)
+        for part, ttl in plan
+    ]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if len(missing) > 1:
+        span = dict(plan[missing[0]][0], end_date=plan[missing[-1]][0]["end_date"])
+        fetched_at = time.time()
+        whole = file_cache.call_upstream(name, f, span, interactive=interactive)
+        if whole is None or not (whole.get("success") is True or _is_empty(whole)):
+            return whole
+        split = _split_rows(whole, [plan[i][0] for i in missing])
+        if split is None:
+            logger.debug("history_cache: %s rows have no date column, fetching segments one by one", name)
+        else:
+            for i, part_result in zip(missing, split):
+                part, ttl = plan[i]
+                _store(root, name, part, ttl, empty_ttl_seconds, part_result, fetched_at)
+                results[i] = part_result
+            missing = []
+    for i in missing:
+        part, ttl = plan[i]
+        results[i] = _fetch(root, f, part, ttl, empty_ttl_seconds, interactive=interactive)
+    return _merge(results)
+
+
+def history_cached(
+    tail_ttl_seconds: float,
+    fallback_ttl_seconds: float,
+    adjusted_tail_days: int,
+    qfq_ttl_seconds: float,
+    cache_dir: Optional[Path] = None,
+    empty_ttl_seconds: float = 0,
+):
+    """
+    装饰器：对按日期区间查询的历史 K 线工具做分段文件缓存。
+
+    Args:
+        tail_ttl_seconds: 尾部段（今日 / 复权数据最近 N 天）的缓存秒数
+        fallback_ttl_seconds: 无法拆分（周线、月线、复权因子、非法日期）时整体缓存的秒数
+        adjusted_tail_days: 复权数据的可变尾部天数
+        qfq_ttl_seconds: 前复权历史段的缓存秒数
+        cache_dir: 缓存根目录，为 None 时从 config 读取
+        empty_ttl_seconds: 无数据分段（"No data available"）的缓存秒数，<= 0 表示不缓存
+
+    被装饰函数额外提供（供预取使用）：
+    - cache_refresh(*args, **kwargs): 只重新获取滚动段与尾部段（止于截止日前一天及之后的分段）并写回，
+      历史段仍从缓存读取；无法拆分的查询整体重新获取
+    - cache_expires_at(*args, **kwargs): 滚动段与尾部段中最早的过期时间
+    """
+
+    def decorator(f: Callable[..., dict]) -> Callable[..., dict]:
+        signature = inspect.signature(f)
+
+        def _root() -> Optional[Path]:
+            from config import CACHE_DIR
+
+            return cache_dir if cache_dir is not None else CACHE_DIR
+
+        def _params(args: tuple, kwargs: dict) -> dict:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return dict(bound.arguments)
+
+        def _mutable_from(params: Dict[str, Any], now: datetime) -> date:
+            # 滚动段止于截止日前一天，尾部段止于截止日之后
+            return _cutoff(params.get("adjust") or "", now, adjusted_tail_days) - timedelta(days=1)
+
+        @wraps(f)
+        def wrapper(*args: Any, **kwargs: Any) -> dict:
+            root = _root()
+            if root is None:
+                return f(*args, **kwargs)
+            params = _params(args, kwargs)
+            plan = split_plan(params, tail_ttl_seconds, adjusted_tail_days, qfq_ttl_seconds)
+            if plan is None:
+                return _cached_call(root, f, params, fallback_ttl_seconds, empty_ttl_seconds)
+            return _cached_plan(root, f, plan, empty_ttl_seconds)
+
+        def cache_refresh(*args: Any, **kwargs: Any) -> dict:
+            root = _root()
+            if root is None:
+                return f(*args, **kwargs)
+            params = _params(args, kwargs)
+            now = _market_now()
+            plan = split_plan(params, tail_ttl_seconds, adjusted_tail_days, qfq_ttl_seconds, now=now)
+            if plan is None:
+                return _fetch(root, f, params, fallback_ttl_seconds, empty_ttl_seconds, interactive=False)
+            return _cached_plan(root, f, plan, empty_ttl_seconds, refresh_from=_mutable_from(params, now))
+
+        def cache_expires_at(*args: Any, **kwargs: Any) -> Optional[float]:
+            root = _root()
+            if root is None:
+                return None
+            params = _params(args, kwargs)
+            now = _market_now()
+            plan = split_plan(params, tail_ttl_seconds, adjusted_tail_days, qfq_ttl_seconds, now=now)
+            if plan is None:
+                return file_cache.expires_at(root, f.__name__, tuple(), params)
+            mutable_from = _mutable_from(params, now)
+            parts = [part for part, _ in plan if _parse_date(part["end_date"]) >= mutable_from]
+            if not parts:
+                return math.inf
+            expiries = [file_cache.expires_at(root, f.__name__, tuple(), part) for part in parts]
+            return None if None in expiries else min(expiries)
+
+        # 保留原函数签名，供 FastMCP 解析工具参数
+        wrapper.__signature__ = signature
+        wrapper.cache_refresh = cache_refresh
+        wrapper.cache_expires_at = cache_expires_at
+        return wrapper
+
+    return decorator
@@ -8,28 +8,75 @@ import logging
 import os
 import re
 import sys
-import threading
+import tempfile
 import time
+import anyio
 import requests
+from starlette.requests import Request
+from starlette.background import BackgroundTask
+from starlette.responses import FileResponse, JSONResponse, PlainTextResponse
 
 # 导入配置
 from config import (
     AKTOOLS_BASE_URL,
+    CACHE_CLEAN_BATCH_SIZE,
+    CACHE_CLEAN_BUDGET_MS,
     CACHE_CLEAN_INTERVAL_SECONDS,
+    CACHE_CLEAN_TICK_SECONDS,
     CACHE_DIR,
-    CACHE_TTL_DAILY,
-    CACHE_TTL_REALTIME,
-    CACHE_TTL_STATIC,
+    CACHE_MAX_FINITE_TTL,
+    CACHE_MICRO_MAX_ENTRIES,
+    CACHE_PREFETCH_CONFIG,
+    CACHE_SHARED_MEMORY,
+    CACHE_SHARED_MEMORY_MAX_BYTES,
+    CACHE_SNAPSHOT_KEEP,
+    CACHE_TTL_MICRO,
+    CACHE_WRITE_BEHIND,
+    CACHE_WRITE_BEHIND_MAX_PENDING,
+    MCP_BATCH_BURST,
+    MCP_BATCH_CONCURRENCY,
+    MCP_BATCH_MAX_SYMBOLS,
+    MCP_BATCH_RATE_PER_SECOND,
+    MCP_CACHE_SNAPSHOT_HTTP,
+    MCP_CHUNK_ROWS,
+    MCP_ADMISSION_QUEUE,
+    MCP_ADMISSION_TIMEOUT_SECONDS,
+    MCP_CONCURRENCY_LIMITS,
+    MCP_FAST_WORKERS,
+    MCP_METRICS,
     MCP_SERVER_NAME,
     MCP_SERVER_VERSION,
+    MCP_SLOW_WORKERS,
+    MCP_SOURCE_CONCURRENCY,
+    MCP_TOOL_CONCURRENCY,
+    MCP_WORKERS,
     MCP_SERVER_PORT,
     MCP_SERVER_HOST,
     LOG_LEVEL
 )
 
 # 导入工具函数
-from mcp_utils import dataframe_to_mcp_result, format_error_response
-from file_cache import file_cached, clean_expired
+from mcp_utils import RECORDS, apply_view, dataframe_to_mcp_result, format_error_response, paginated, response_limits
+from admission import AdmissionController, parse_limits as parse_concurrency_limits
+from batch import BatchRunner
+from chunked import ChunkedFetch
+from cache_namespace import invalidate as invalidate_cache_namespace
+from cache_snapshot import SNAPSHOTS_DIR, export_snapshot, prune_snapshots
+from cache_stats import reset as reset_cache_stats, snapshot as cache_stats_snapshot
+from cache_cleaner import IncrementalCleaner
+import debug_timing
+import metrics
+import progress
+from file_cache import enable_write_behind, flush_write_behind
+from micro_cache import micro_cached
+import shm_cache
+from prefetch import PrefetchScheduler, load_config as load_prefetch_config
+from runtime_token import RuntimeToken
+from screening import ScreenError, screen
+from spot_views import BOARD_PREFIXES, board_spot
+from tool_executor import ToolExecutor
+from tool_registry import TOOLS, make_batch_tool, make_chunked_tool, make_tool
+import workers
 
 # 导入 AKShare 接口
 sys.path.append('.')
@@ -41,11 +88,17 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-RUNTIME_XQ_TOKEN = os.getenv("XQ_A_TOKEN", "").strip()
-_cache_cleaner_stop_event: threading.Event | None = None
+# 运行时更新的雪球 token：设置 CACHE_DIR 时保存在 CACHE_DIR/.xq_token，各 worker 共享
+XQ_TOKEN_FILE = ".xq_token"
+_xq_token = RuntimeToken(
+    CACHE_DIR / XQ_TOKEN_FILE if CACHE_DIR is not None else None, os.getenv("XQ_A_TOKEN", "").strip()
+)
+_cache_cleaner: IncrementalCleaner | None = None
+_prefetch_scheduler: PrefetchScheduler | None = None
 
 
-def _run_cache_cleanup_once() -> None:
+def _init_cache_cleaner() -> None:
+    global _cache_cleaner
     if CACHE_DIR is None:
         return
     try:
@@ -56,25 +109,44 @@ def _run_cache_cleanup_once() -> None:
     if not CACHE_DIR.is_dir():
         logger.warning("file_cache disabled: CACHE_DIR is not a directory (%s)", CACHE_DIR)
         return
-    n = clean_expired(CACHE_DIR)
-    logger.info("file_cache clean_expired: %s files removed", n)
+    if _cache_cleaner is None:
+        _cache_cleaner = IncrementalCleaner(
+            CACHE_DIR,
+            interval_seconds=CACHE_CLEAN_INTERVAL_SECONDS,
+            budget_seconds=CACHE_CLEAN_BUDGET_MS / 1000.0,
+            batch_size=CACHE_CLEAN_BATCH_SIZE,
+        )
 
 
 def _start_cache_cleaner(interval_seconds: int) -> None:
-    global _cache_cleaner_stop_event
-    if CACHE_DIR is None or interval_seconds <= 0:
+    if _cache_cleaner is None:
         return
-
-    stop_event = threading.Event()
-    _cache_cleaner_stop_event = stop_event
-
-    def _worker() -> None:
-        while not stop_event.wait(interval_seconds):
-            _run_cache_cleanup_once()
-
-    t = threading.Thread(target=_worker, name="file-cache-cleaner", daemon=True)
-    t.start()
-    logger.info("file_cache periodic cleaner started: every %ss", interval_seconds)
+    # 第一轮清理（含旧版未分片文件的迁移）同样在后台线程中按时间片执行，不阻塞启动
+    _cache_cleaner.start(tick_seconds=CACHE_CLEAN_TICK_SECONDS)
+    logger.info(
+        "file_cache incremental cleaner started: %s, %sms / %s files per %ss tick",
+        f"every {interval_seconds}s" if interval_seconds > 0 else "one pass",
+        CACHE_CLEAN_BUDGET_MS,
+        CACHE_CLEAN_BATCH_SIZE,
+        CACHE_CLEAN_TICK_SECONDS,
+    )
+
+
+def _start_prefetch_scheduler(config_path) -> None:
+    global _prefetch_scheduler
+    if config_path is None:
+        return
+    if CACHE_DIR is None:
+        logger.warning("prefetch disabled: CACHE_DIR is not set")
+        return
+    try:
+        config = load_prefetch_config(config_path)
+    except (OSError, ValueError) as e:
+        logger.warning("prefetch config %s invalid: %s", config_path, e)
+        return
+    scheduler = PrefetchScheduler(config, resolve_tool=lambda name: globals().get(name))
+    scheduler.start()
+    _prefetch_scheduler = scheduler
 
 
 def _mask_token(token: str) -> str:
@@ -125,6 +197,7 @@ def _xq_probe(symbol: str, timeout: float = 12.0, token: str | None = None) -> d
         "token_used": bool(token),
     }
 
+
 # 创建 FastMCP 服务器
 mcp = FastMCP(
     name=MCP_SERVER_NAME,
@@ -140,151 +213,144 @@ AKShare 股票数据接口 MCP 服务器 v{MCP_SERVER_VERSION}
 
 使用方法：直接调用对应的 tool，根据需要传入参数。
 返回格式：JSON 格式，包含 success, rows, columns, data 字段。
+数据类工具均支持 limit / offset / columns / sort_by 参数（如 limit=20, columns="代码,名称,最新价", sort_by="-涨跌幅"），
+在缓存结果上分页、排序与选列，返回的 total_rows 为分页前的记录总数。
+format="columnar" 返回紧凑格式：data 为与 columns 顺序对应的行数组，列名只出现一次。
+screen_spot 在服务端按条件筛选全市场行情（如 where="涨跌幅 > 5 and 换手率 > 10", sort_by="-涨跌幅", limit=20），
+比拉取整张行情表再筛选快得多。
+stock_individual_info_em_batch、stock_zh_valuation_comparison_em_batch、stock_zh_a_hist_batch 接受代码列表 symbols，
+一次返回多只股票的结果（按代码分组），比逐个调用少很多往返。
+stock_lhb_detail_em_chunked 按月分段查询长日期区间，每次返回一段结果，以 cursor=next_cursor 继续取下一段。
+批量与分段工具在请求带 progressToken 时发送进度通知。
+所有工具均支持 debug_timing=true：返回结果附带 _timings（各阶段耗时、缓存命中情况与上游请求状态），用于排查慢调用。
 """
 )
 
-# =============================================================================
-# MCP Tools - 55 个 AKShare 股票数据接口
-# =============================================================================
-
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_sse_summary() -> dict:
-    """
-    上海证券交易所-股票数据总貌
-    """
-    try:
-        from akshare_api import stock_sse_summary
-        df = stock_sse_summary()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_sse_summary 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_szse_summary() -> dict:
-    """
-    深圳证券交易所-市场总貌-证券类别统计
-    """
-    try:
-        from akshare_api import stock_szse_summary
-        df = stock_szse_summary()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_szse_summary 执行失败: {e}")
-        return format_error_response(e)
+# 工具执行器：FastMCP 调用异步处理函数，缓存命中在快速池返回，访问上游的调用在慢速池执行
+_tool_executor = ToolExecutor(fast_workers=MCP_FAST_WORKERS, slow_workers=MCP_SLOW_WORKERS)
 
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_szse_area_summary() -> dict:
-    """
-    深圳证券交易所-市场总貌-地区交易排序
-    """
-    try:
-        from akshare_api import stock_szse_area_summary
-        df = stock_szse_area_summary()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_szse_area_summary 执行失败: {e}")
-        return format_error_response(e)
+# 准入控制：进入慢速池前按工具与数据源分组限制并发，过载时返回 overloaded 错误
+_admission = AdmissionController(
+    tool_limit=MCP_TOOL_CONCURRENCY,
+    source_limit=MCP_SOURCE_CONCURRENCY,
+    max_queue=MCP_ADMISSION_QUEUE,
+    timeout=MCP_ADMISSION_TIMEOUT_SECONDS,
+    overrides=parse_concurrency_limits(MCP_CONCURRENCY_LIMITS),
+)
 
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_szse_sector_summary(symbol: str = "当年") -> dict:
-    """
-    深圳证券交易所-统计资料-股票行业成交数据
 
-    参数说明:
-    - symbol: str
-      symbol="当月"; choice of {"当月", "当年"}
+def tool(slow: bool = False, tags: set | None = None, source: str = "", reports_progress: bool = False):
     """
-    try:
-        from akshare_api import stock_szse_sector_summary
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_szse_sector_summary(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_szse_sector_summary 执行失败: {e}")
-        return format_error_response(e)
+    注册 MCP 工具：向 FastMCP 注册在 _tool_executor 中运行的异步处理函数，模块中仍保留同步函数供直接调用。
 
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_sse_deal_daily() -> dict:
-    """
-    上海证券交易所-数据-股票数据-成交概况-股票成交概况-每日股票情况
+    Args:
+        slow: 工具总是访问上游或耗时较长时为 True，直接在慢速池执行
+        tags: MCP 工具标签
+        source: 数据源分组，访问上游时同时受该分组的并发上限约束
+        reports_progress: 工具通过 progress.report() 发送进度通知
     """
-    try:
-        from akshare_api import stock_sse_deal_daily
-        df = stock_sse_deal_daily()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_sse_deal_daily 执行失败: {e}")
-        return format_error_response(e)
 
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_STATIC)
-def stock_individual_info_em(symbol: str) -> dict:
-    """
-    东方财富-个股-股票信息
+    def decorator(f):
+        gate = _admission.gate(f.__name__, source)
+        if MCP_METRICS:
+            handler = _tool_executor.wrap(metrics.phased(f), slow=slow, gate=gate)
+        else:
+            handler = _tool_executor.wrap(f, slow=slow, gate=gate)
+        if reports_progress:
+            handler = progress.reporting(handler)
+        if MCP_METRICS:
+            handler = metrics.instrumented(handler, f.__name__)
+        mcp.tool(tags=tags)(debug_timing.with_timings(handler))
+        return f
 
-    参数说明:
-    - symbol: str
-      symbol="603777"; 股票代码
-    """
-    try:
-        from akshare_api import stock_individual_info_em
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_individual_info_em(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_individual_info_em 执行失败: {e}")
-        return format_error_response(e)
+    return decorator
 
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_STATIC)
-def stock_individual_basic_info_xq(symbol: str) -> dict:
-    """
-    雪球财经-个股-公司概况-公司简介
 
-    参数说明:
-    - symbol: str
-      symbol="SH601127"; 股票代码
-    """
-    try:
-        from akshare_api import stock_individual_basic_info_xq
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_individual_basic_info_xq(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_individual_basic_info_xq 执行失败: {e}")
-        return format_error_response(e)
+# =============================================================================
+# MCP Tools - AKShare 股票数据接口
+# =============================================================================
 
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_REALTIME)
-def stock_zh_a_spot() -> dict:
-    """
-    新浪财经-沪深京 A 股数据, 重复运行本函数会被新浪暂时封 IP, 建议增加时间间隔
-    """
-    try:
-        from akshare_api import stock_zh_a_spot
-        df = stock_zh_a_spot()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_zh_a_spot 执行失败: {e}")
-        return format_error_response(e)
+# 批量工具（*_batch）的执行器：未命中缓存的代码并发访问上游，受令牌桶限流
+_batch_runner = BatchRunner(
+    max_symbols=MCP_BATCH_MAX_SYMBOLS,
+    concurrency=MCP_BATCH_CONCURRENCY,
+    rate_per_second=MCP_BATCH_RATE_PER_SECOND,
+    burst=MCP_BATCH_BURST,
+)
 
-@mcp.tool()
+# 分段工具（*_chunked）的执行器：长日期区间按月分段，每次调用返回一段结果与 next_cursor
+_chunked_fetch = ChunkedFetch(max_rows=MCP_CHUNK_ROWS)
+
+# 标准数据接口由 tool_registry.TOOLS 声明生成，同名函数保留在模块中供预取与直接调用
+for _spec in TOOLS:
+    globals()[_spec.name] = tool(tags=_spec.tags, source=_spec.source)(make_tool(_spec))
+    if _spec.batch:
+        # 逐个代码访问上游时取得单个查询工具的准入名额；批量工具本身只受自己的工具上限约束，
+        # 不占用数据源分组名额（否则会与自己发出的请求争抢同一分组）
+        _batch_tool = make_batch_tool(
+            _spec, globals()[_spec.name], _batch_runner, gate=_admission.gate(_spec.name, _spec.source)
+        )
+        globals()[_batch_tool.__name__] = tool(tags=_spec.tags | {"batch"}, reports_progress=True)(_batch_tool)
+    if _spec.chunked:
+        _chunked_tool = make_chunked_tool(_spec, globals()[_spec.name], _chunked_fetch)
+        globals()[_chunked_tool.__name__] = tool(
+            tags=_spec.tags | {"chunked"}, source=_spec.source, reports_progress=True
+        )(_chunked_tool)
+
+
+@tool(source="eastmoney")
+def screen_spot(
+    where: str = "",
+    sort_by: str = "",
+    limit: int = 50,
+    offset: int = 0,
+    columns: str = "",
+    format: str = RECORDS,
+    board: str = "",
+) -> dict:
+    """
+    在服务端筛选沪深京 A 股实时行情（东方财富全市场快照），只返回匹配的行
+
+    参数说明:
+    - where: str, 可选
+      筛选表达式，如 "涨跌幅 > 5 and 换手率 > 10"；支持 > >= < <= == !=、+ - * /、and / or / not、
+      startswith(代码, "300")、contains(名称, "银行")、abs(x)；含符号或以数字开头的列名用反引号，如 `60日涨跌幅` > 10
+    - sort_by: str, 可选
+      逗号分隔的排序列，列名前加 "-" 表示降序，如 "-涨跌幅,代码"
+    - limit: int, 可选, 默认 50
+      最多返回的行数（取排序后的前 N 条）
+    - offset: int, 可选, 默认 0
+      起始行下标
+    - columns: str, 可选
+      逗号分隔的返回列，如 "代码,名称,涨跌幅,换手率"
+    - format: str, 可选, 默认 "records"
+      "records" 或 "columnar"
+    - board: str, 可选
+      只筛选某个板块：sh / sz / bj / cy / kc，默认全市场
+    """
+    try:
+        if board and board not in BOARD_PREFIXES:
+            raise ScreenError(f"unknown board: {board}; choice of {{{', '.join(BOARD_PREFIXES)}}}")
+        from akshare_api import stock_zh_a_spot_em
+        df = board_spot(board) if board else stock_zh_a_spot_em()
+        if df.empty:
+            return dataframe_to_mcp_result(df)
+        page, total = screen(df, where, sort_by, limit, offset)
+        if page.empty:
+            result = {"success": True, "rows": 0, "columns": list(df.columns), "data": []}
+        else:
+            result = dataframe_to_mcp_result(page)
+        names = [name.strip() for name in columns.split(",") if name.strip()]
+        return apply_view(
+            {**result, "total_rows": total}, limit, offset, names, presliced=True, fmt=format, **response_limits()
+        )
+    except Exception as e:
+        logger.error(f"screen_spot 执行失败: {e}")
+        return format_error_response(e)
+
+@tool(source="xueqiu")
+@paginated()
+@micro_cached(ttl_seconds=CACHE_TTL_MICRO, max_entries=CACHE_MICRO_MAX_ENTRIES)
 def stock_individual_spot_xq(symbol: str, token: str = None) -> dict:
     """
     雪球-行情中心-个股
@@ -301,7 +367,7 @@ def stock_individual_spot_xq(symbol: str, token: str = None) -> dict:
         kwargs = {}
         if symbol is not None:
             kwargs["symbol"] = symbol
-        effective_token = token if token else RUNTIME_XQ_TOKEN
+        effective_token = token if token else _xq_token.get()
         if effective_token:
             kwargs["token"] = effective_token
         df = stock_individual_spot_xq(**kwargs)
@@ -311,7 +377,7 @@ def stock_individual_spot_xq(symbol: str, token: str = None) -> dict:
         return format_error_response(e)
 
 
-@mcp.tool()
+@tool(slow=True, source="xueqiu")
 def xq_token_health_check(symbol: str = "SH600000", timeout: float = 12.0) -> dict:
     """
     手动检测雪球 token 是否可用
@@ -323,10 +389,11 @@ def xq_token_health_check(symbol: str = "SH600000", timeout: float = 12.0) -> di
       参数格式: 请求超时秒数
     """
     try:
+        runtime_token = _xq_token.get()
         no_token_result = _xq_probe(symbol=symbol, timeout=timeout, token=None)
         runtime_result = None
-        if RUNTIME_XQ_TOKEN:
-            runtime_result = _xq_probe(symbol=symbol, timeout=timeout, token=RUNTIME_XQ_TOKEN)
+        if runtime_token:
+            runtime_result = _xq_probe(symbol=symbol, timeout=timeout, token=runtime_token)
 
         current_ok = runtime_result["ok"] if runtime_result is not None else no_token_result["ok"]
         message = "runtime token healthy" if current_ok else "token may be expired or invalid"
@@ -339,18 +406,19 @@ def xq_token_health_check(symbol: str = "SH600000", timeout: float = 12.0) -> di
                 {"probe": "without_runtime_token", **no_token_result},
                 *([{"probe": "with_runtime_token", **runtime_result}] if runtime_result else []),
             ],
-            "runtime_token_set": bool(RUNTIME_XQ_TOKEN),
-            "runtime_token_masked": _mask_token(RUNTIME_XQ_TOKEN) if RUNTIME_XQ_TOKEN else "",
+            "runtime_token_set": bool(runtime_token),
+            "runtime_token_masked": _mask_token(runtime_token) if runtime_token else "",
         }
     except Exception as e:
         logger.error(f"xq_token_health_check 执行失败: {e}")
         return format_error_response(e)
 
 
-@mcp.tool()
+@tool(slow=True, source="xueqiu")
 def xq_token_update(token: str = "", cookie: str = "", verify_symbol: str = "SH600000", timeout: float = 12.0) -> dict:
     """
-    手动更新运行时雪球 token（仅作用于当前 mcp 进程）
+    手动更新运行时雪球 token（设置 CACHE_DIR 时写入 CACHE_DIR/.xq_token，对全部 worker 生效，重启后仍保留；
+    未设置 CACHE_DIR 时仅作用于当前进程，多 worker 模式下拒绝更新）
 
     参数说明:
     - token: str, 可选
@@ -362,7 +430,14 @@ def xq_token_update(token: str = "", cookie: str = "", verify_symbol: str = "SH6
     - timeout: float, 可选, 默认12.0
       参数格式: 请求超时秒数
     """
-    global RUNTIME_XQ_TOKEN
+    if not _xq_token.shared and MCP_WORKERS > 1:
+        return {
+            "success": False,
+            "message": "多 worker 模式下需设置 CACHE_DIR 才能更新 token（否则只有处理本次请求的 worker 生效）",
+            "rows": 0,
+            "columns": [],
+            "data": [],
+        }
     try:
         new_token = token.strip() if token else ""
         if not new_token and cookie:
@@ -378,8 +453,8 @@ def xq_token_update(token: str = "", cookie: str = "", verify_symbol: str = "SH6
                 "data": [],
             }
 
-        RUNTIME_XQ_TOKEN = new_token
-        verify_result = _xq_probe(symbol=verify_symbol, timeout=timeout, token=RUNTIME_XQ_TOKEN)
+        _xq_token.set(new_token)
+        verify_result = _xq_probe(symbol=verify_symbol, timeout=timeout, token=new_token)
         return {
             "success": verify_result["ok"],
             "message": "runtime token updated",
@@ -393,947 +468,200 @@ def xq_token_update(token: str = "", cookie: str = "", verify_symbol: str = "SH6
                     "ok": verify_result["ok"],
                 }
             ],
-            "runtime_token_masked": _mask_token(RUNTIME_XQ_TOKEN),
+            "runtime_token_masked": _mask_token(new_token),
             "verify_preview": verify_result["message"],
         }
     except Exception as e:
         logger.error(f"xq_token_update 执行失败: {e}")
         return format_error_response(e)
 
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_zh_a_hist(symbol: str, period: str = "daily", start_date: str = "20210301", end_date: str = "20210616", adjust: str = "", timeout: str = None) -> dict:
-    """
-    东方财富-沪深京 A 股日频率数据; 历史数据按日频率更新, 当日收盘价请在收盘后获取
-
-    参数说明:
-    - symbol: str
-      symbol='603777'; 股票代码可以在 ak.stock_zh_a_spot_em() 中获取
-    - period: str
-      period='daily'; choice of {'daily', 'weekly', 'monthly'}
-    - start_date: str
-      start_date='20210301'; 开始查询的日期
-    - end_date: str
-      end_date='20210616'; 结束查询的日期
-    - adjust: str
-      默认返回不复权的数据; qfq: 返回前复权后的数据; hfq: 返回后复权后的数据
-    - timeout: float
-      timeout=None; 默认不设置超时参数
-    """
-    try:
-        from akshare_api import stock_zh_a_hist
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        if period is not None:
-            kwargs["period"] = period
-        if start_date is not None:
-            kwargs["start_date"] = start_date
-        if end_date is not None:
-            kwargs["end_date"] = end_date
-        if adjust is not None:
-            kwargs["adjust"] = adjust
-        if timeout is not None:
-            kwargs["timeout"] = timeout
-        df = stock_zh_a_hist(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_zh_a_hist 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_zh_a_daily(symbol: str, start_date: str = "20201103", end_date: str = "20201116", adjust: str = "") -> dict:
-    """
-    新浪财经-沪深京 A 股的数据, 历史数据按日频率更新; 注意其中的 sh689009 为 CDR, 请 通过 ak.stock_zh_a_cdr_daily 接口获取
-
-    参数说明:
-    - symbol: str
-      symbol='sh600000'; 股票代码可以在 ak.stock_zh_a_spot() 中获取
-    - start_date: str
-      start_date='20201103'; 开始查询的日期
-    - end_date: str
-      end_date='20201116'; 结束查询的日期
-    - adjust: str
-      默认返回不复权的数据; qfq: 返回前复权后的数据; hfq: 返回后复权后的数据; hfq-factor: 返回后复权因子; qfq-factor: 返回前复权因子
-    """
-    try:
-        from akshare_api import stock_zh_a_daily
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        if start_date is not None:
-            kwargs["start_date"] = start_date
-        if end_date is not None:
-            kwargs["end_date"] = end_date
-        if adjust is not None:
-            kwargs["adjust"] = adjust
-        df = stock_zh_a_daily(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_zh_a_daily 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_zh_a_hist_tx(symbol: str, start_date: str = "20201103", end_date: str = "20201116", adjust: str = "") -> dict:
-    """
-    腾讯证券-日频-股票历史数据; 历史数据按日频率更新, 当日收盘价请在收盘后获取
-
-    参数说明:
-    - symbol: str
-      symbol='sz000001'; 带市场标识
-    - start_date: str
-      start_date='19000101'; 开始查询的日期
-    - end_date: str
-      end_date='20500101'; 结束查询的日期
-    - adjust: str
-      默认返回不复权的数据; qfq: 返回前复权后的数据; hfq: 返回后复权后的数据
-    """
-    try:
-        from akshare_api import stock_zh_a_hist_tx
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        if start_date is not None:
-            kwargs["start_date"] = start_date
-        if end_date is not None:
-            kwargs["end_date"] = end_date
-        if adjust is not None:
-            kwargs["adjust"] = adjust
-        df = stock_zh_a_hist_tx(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_zh_a_hist_tx 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-def stock_zh_a_minute(symbol: str, period: str = "1", adjust: str = "") -> dict:
+@tool()
+def cache_stats(tool: str = "", reset: bool = False) -> dict:
     """
-    新浪财经-沪深京 A 股股票或者指数的分时数据，目前可以获取 1, 5, 15, 30, 60 分钟的数据频率, 可以指定是否复权
+    文件缓存统计：各工具的命中、未命中、过期次数，读写字节数，缓存读写与上游请求平均耗时
 
     参数说明:
-    - symbol: str
-      symbol='sh000300'; 同日频率数据接口
-    - period: str
-      period='1'; 获取 1, 5, 15, 30, 60 分钟的数据频率
-    - adjust: str
-      adjust=""; 默认为空: 返回不复权的数据; qfq: 返回前复权后的数据; hfq: 返回后复权后的数据;
-    """
-    try:
-        from akshare_api import stock_zh_a_minute
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        if period is not None:
-            kwargs["period"] = period
-        if adjust is not None:
-            kwargs["adjust"] = adjust
-        df = stock_zh_a_minute(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_zh_a_minute 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-def stock_intraday_em(symbol: str) -> dict:
-    """
-    东方财富-分时数据
-
-    参数说明:
-    - symbol: str
-      symbol="000001"; 股票代码
-    """
-    try:
-        from akshare_api import stock_intraday_em
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_intraday_em(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_intraday_em 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-def stock_zh_a_hist_pre_min_em(symbol: str) -> dict:
-    """
-    东方财富-股票行情-盘前数据
-
-    参数说明:
-    - symbol: str
-      symbol="000001"; 股票代码
-    """
-    try:
-        from akshare_api import stock_zh_a_hist_pre_min_em
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_zh_a_hist_pre_min_em(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_zh_a_hist_pre_min_em 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_STATIC)
-def stock_zh_growth_comparison_em(symbol: str) -> dict:
-    """
-    东方财富-行情中心-同行比较-成长性比较
-
-    参数说明:
-    - symbol: str
-      symbol="SZ000895"
+    - tool: str, 可选
+      参数格式: 工具名，如"stock_zh_a_spot"；为空返回全部工具及汇总
+    - reset: bool, 可选, 默认False
+      参数格式: 返回当前统计后清零
     """
     try:
-        from akshare_api import stock_zh_growth_comparison_em
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_zh_growth_comparison_em(**kwargs)
-        return dataframe_to_mcp_result(df)
+        stats = cache_stats_snapshot(tool)
+        if reset:
+            reset_cache_stats()
+        rows = [{"tool": name, **entry} for name, entry in stats["tools"].items()]
+        return {
+            "success": True,
+            "rows": len(rows),
+            "columns": list(rows[0].keys()) if rows else [],
+            "data": rows,
+            "total": stats["total"],
+            "since": stats["since"],
+            "cache_enabled": CACHE_DIR is not None,
+            "executor": _tool_executor.stats(),
+            "admission": _admission.stats(),
+        }
     except Exception as e:
-        logger.error(f"stock_zh_growth_comparison_em 执行失败: {e}")
+        logger.error(f"cache_stats 执行失败: {e}")
         return format_error_response(e)
 
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_STATIC)
-def stock_zh_valuation_comparison_em(symbol: str) -> dict:
-    """
-    东方财富-行情中心-同行比较-估值比较
-
-    参数说明:
-    - symbol: str
-      symbol="SZ000895"
-    """
-    try:
-        from akshare_api import stock_zh_valuation_comparison_em
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_zh_valuation_comparison_em(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_zh_valuation_comparison_em 执行失败: {e}")
-        return format_error_response(e)
 
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_STATIC)
-def stock_zh_dupont_comparison_em(symbol: str) -> dict:
+@tool()
+def cache_invalidate(tool: str = "", prefix: str = "", schema: str = "", everything: bool = False) -> dict:
     """
-    东方财富-行情中心-同行比较-杜邦分析比较
+    文件缓存批量失效（管理接口）：登记一条失效规则，匹配的已有缓存立即不再命中，旧文件由清理任务删除
 
     参数说明:
-    - symbol: str
-      symbol="SZ000895"
+    - tool: str, 可选
+      参数格式: 工具名，如"stock_zh_a_hist"；单独使用时使该工具全部缓存失效
+    - prefix: str, 可选
+      参数格式: 第一个参数的前缀，如股票代码"600519"、日期"202610"；可与 tool 组合
+    - schema: str, 可选
+      参数格式: schema 版本号，如"1"；使该版本写入的缓存失效，可与 tool 组合
+    - everything: bool, 可选, 默认False
+      参数格式: 为 True 时使全部缓存失效
     """
+    if CACHE_DIR is None:
+        return {
+            "success": False,
+            "message": "文件缓存未启用（CACHE_DIR 为空）",
+            "rows": 0,
+            "columns": [],
+            "data": [],
+        }
     try:
-        from akshare_api import stock_zh_dupont_comparison_em
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_zh_dupont_comparison_em(**kwargs)
-        return dataframe_to_mcp_result(df)
+        outcome = invalidate_cache_namespace(
+            CACHE_DIR, tool=tool, prefix=prefix, schema=schema, everything=everything, max_age=CACHE_MAX_FINITE_TTL
+        )
+        return {
+            "success": True,
+            "rows": 1,
+            "columns": ["rule", "invalidated_at"],
+            "data": [outcome],
+        }
     except Exception as e:
-        logger.error(f"stock_zh_dupont_comparison_em 执行失败: {e}")
+        logger.error(f"cache_invalidate 执行失败: {e}")
         return format_error_response(e)
 
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_STATIC)
-def stock_zh_scale_comparison_em(symbol: str) -> dict:
-    """
-    东方财富-行情中心-同行比较-公司规模
-
-    参数说明:
-    - symbol: str
-      symbol="SZ000895"
-    """
-    try:
-        from akshare_api import stock_zh_scale_comparison_em
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_zh_scale_comparison_em(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_zh_scale_comparison_em 执行失败: {e}")
-        return format_error_response(e)
 
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_STATIC)
-def stock_financial_abstract(symbol: str) -> dict:
-    """
-    新浪财经-财务报表-关键指标
+def _cache_disabled_response() -> dict:
+    return {
+        "success": False,
+        "message": "文件缓存未启用（CACHE_DIR 为空）",
+        "rows": 0,
+        "columns": [],
+        "data": [],
+    }
 
-    参数说明:
-    - symbol: str
-      symbol="600004"; 股票代码
-    """
-    try:
-        from akshare_api import stock_financial_abstract
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_financial_abstract(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_financial_abstract 执行失败: {e}")
-        return format_error_response(e)
 
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_yjbb_em(date: str = "20220331") -> dict:
+@tool(slow=True)
+def cache_export(include_frames: bool = False) -> dict:
     """
-    东方财富-数据中心-年报季报-业绩报表
+    导出缓存快照（管理接口）：将未过期的缓存条目打包为 tar.gz，写入 CACHE_DIR/_snapshots/cache-时间.tar.gz
+    （只保留最新的 CACHE_SNAPSHOT_KEEP 份），供新实例用命令行 python -m cache_snapshot import 导入以避免冷启动
 
     参数说明:
-    - date: str
-      date="20200331"; choice of {"XXXX0331", "XXXX0630", "XXXX0930", "XXXX1231"}; 从 20100331 开始
+    - include_frames: bool, 可选, 默认False
+      参数格式: 是否包含 DataFrame 缓存
     """
-    try:
-        from akshare_api import stock_yjbb_em
-        # 构建参数字典
-        kwargs = {}
-        if date is not None:
-            kwargs["date"] = date
-        df = stock_yjbb_em(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_yjbb_em 执行失败: {e}")
-        return format_error_response(e)
+    if CACHE_DIR is None:
+        return _cache_disabled_response()
+    try:
+        target = CACHE_DIR / SNAPSHOTS_DIR / time.strftime("cache-%Y%m%d-%H%M%S.tar.gz")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(target, "wb") as f:
+            outcome = export_snapshot(CACHE_DIR, f, include_frames=include_frames)
+        prune_snapshots(target.parent, CACHE_SNAPSHOT_KEEP)
+        row = {"path": str(target), **outcome, "archive_bytes": target.stat().st_size}
+        return {"success": True, "rows": 1, "columns": list(row.keys()), "data": [row]}
+    except Exception as e:
+        logger.error(f"cache_export 执行失败: {e}")
+        return format_error_response(e)
+
+
+if MCP_CACHE_SNAPSHOT_HTTP:
+    # 同一时间只生成一份快照，避免并发下载反复打包整个缓存目录
+    _snapshot_lock = anyio.Lock()
+
+    @mcp.custom_route("/cache/snapshot", methods=["GET"])
+    async def cache_snapshot_endpoint(request: Request):
+        """HTTP 缓存快照下载：GET /cache/snapshot，返回不含 DataFrame 缓存的 tar.gz"""
+        if CACHE_DIR is None:
+            return JSONResponse(_cache_disabled_response(), status_code=404)
+        if _snapshot_lock.locked():
+            return JSONResponse(
+                {"success": False, "message": "snapshot export already in progress"},
+                status_code=429,
+                headers={"Retry-After": "30"},
+            )
+        async with _snapshot_lock:
+            fd, tmp_name = tempfile.mkstemp(prefix="cache-snapshot-", suffix=".tar.gz")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    await anyio.to_thread.run_sync(lambda: export_snapshot(CACHE_DIR, f, include_frames=False))
+            except BaseException:
+                os.unlink(tmp_name)
+                raise
+        return FileResponse(
+            tmp_name,
+            media_type="application/gzip",
+            filename="cache-snapshot.tar.gz",
+            background=BackgroundTask(os.unlink, tmp_name),
+        )
+
+
+@mcp.custom_route("/cache/stats", methods=["GET"])
+async def cache_stats_endpoint(request: Request) -> JSONResponse:
+    """HTTP 缓存统计接口：GET /cache/stats[?tool=工具名]"""
+    return JSONResponse(cache_stats_snapshot(request.query_params.get("tool", "")))
+
+
+if MCP_METRICS:
+
+    @mcp.custom_route("/metrics", methods=["GET"])
+    async def metrics_endpoint(request: Request) -> PlainTextResponse:
+        """Prometheus 指标：GET /metrics"""
+        return PlainTextResponse(
+            metrics.render(_tool_executor.stats()), media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+
+def _start_background_jobs() -> None:
+    """缓存清理与预取：多 worker 部署时只在当选的 worker 中运行。"""
+    _init_cache_cleaner()
+    _start_cache_cleaner(CACHE_CLEAN_INTERVAL_SECONDS)
+    _start_prefetch_scheduler(CACHE_PREFETCH_CONFIG)
 
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_REALTIME)
-def stock_hsgt_fund_flow_summary_em() -> dict:
-    """
-    东方财富网-数据中心-资金流向-沪深港通资金流向
-    """
-    try:
-        from akshare_api import stock_hsgt_fund_flow_summary_em
-        df = stock_hsgt_fund_flow_summary_em()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_hsgt_fund_flow_summary_em 执行失败: {e}")
-        return format_error_response(e)
 
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_profit_forecast_em() -> dict:
-    """
-    东方财富网-数据中心-研究报告-盈利预测; 该数据源网页端返回数据有异常, 本接口已修复该异常
-    """
+# 启动服务器
+if __name__ == "__main__":
+    if MCP_WORKERS > 1 and workers.worker_id() is None:
+        sys.exit(
+            workers.Supervisor(
+                MCP_WORKERS, [os.path.abspath(__file__)], MCP_SERVER_HOST, MCP_SERVER_PORT
+            ).run()
+        )
+    if CACHE_DIR is not None and CACHE_SHARED_MEMORY:
+        shm_cache.enable(CACHE_SHARED_MEMORY_MAX_BYTES)
+    if CACHE_DIR is not None and CACHE_WRITE_BEHIND:
+        enable_write_behind(CACHE_WRITE_BEHIND_MAX_PENDING)
+    if CACHE_DIR is not None:
+        workers.LeaderElection(CACHE_DIR / workers.LEADER_LOCK_NAME, _start_background_jobs).start()
+    else:
+        _start_background_jobs()
+    run_options = {}
+    if workers.worker_id() is not None:
+        # 各 worker 之间不共享 MCP 会话，使用无状态 HTTP，请求可落到任一 worker
+        run_options = {
+            "sockets": [workers.listen_socket(MCP_SERVER_HOST, MCP_SERVER_PORT)],
+            "stateless_http": True,
+        }
+        logger.info(f"worker {workers.worker_id()} (pid {os.getpid()})")
+    logger.info(f"启动 {MCP_SERVER_NAME} v{MCP_SERVER_VERSION}")
+    logger.info(f"监听端口: {MCP_SERVER_PORT}")
+    logger.info(f"监听地址: {MCP_SERVER_HOST}:{MCP_SERVER_PORT}")
     try:
-        from akshare_api import stock_profit_forecast_em
-        df = stock_profit_forecast_em()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_profit_forecast_em 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_profit_forecast_ths() -> dict:
-    """
-    同花顺-盈利预测
-    """
-    try:
-        from akshare_api import stock_profit_forecast_ths
-        df = stock_profit_forecast_ths()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_profit_forecast_ths 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_STATIC)
-def stock_board_industry_name_ths() -> dict:
-    """
-    获取同花顺行业一览表
-    """
-    try:
-        from akshare_api import stock_board_industry_name_ths
-        df = stock_board_industry_name_ths()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_board_industry_name_ths 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_REALTIME)
-def stock_hot_rank_em() -> dict:
-    """
-    东方财富网站-股票热度
-    """
-    try:
-        from akshare_api import stock_hot_rank_em
-        df = stock_hot_rank_em()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_hot_rank_em 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_lhb_detail_em(start_date: str = "20230403", end_date: str = "20230417") -> dict:
-    """
-    东方财富网-数据中心-龙虎榜单-龙虎榜详情
-
-    参数说明:
-    - start_date: str
-      start_date="20220314"
-    - end_date: str
-      end_date="20220315"
-    """
-    try:
-        from akshare_api import stock_lhb_detail_em
-        # 构建参数字典
-        kwargs = {}
-        if start_date is not None:
-            kwargs["start_date"] = start_date
-        if end_date is not None:
-            kwargs["end_date"] = end_date
-        df = stock_lhb_detail_em(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_lhb_detail_em 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_lhb_stock_statistic_em() -> dict:
-    """
-    东方财富网-数据中心-龙虎榜单-个股上榜统计
-    """
-    try:
-        from akshare_api import stock_lhb_stock_statistic_em
-        df = stock_lhb_stock_statistic_em()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_lhb_stock_statistic_em 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_institute_hold_detail(stock: str, quarter: str) -> dict:
-    """
-    新浪财经-机构持股-机构持股详情
-
-    参数说明:
-    - stock: str
-      stock="300003"; 股票代码
-    - quarter: str
-      quarter="20201"; 从 2005 年开始, {"一季报":1, "中报":2 "三季报":3 "年报":4}, e.g., "20191", 其中的 1 表示一季报; "20193", 其中的 3 表示三季报;
-    """
-    try:
-        from akshare_api import stock_institute_hold_detail
-        # 构建参数字典
-        kwargs = {}
-        if stock is not None:
-            kwargs["stock"] = stock
-        if quarter is not None:
-            kwargs["quarter"] = quarter
-        df = stock_institute_hold_detail(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_institute_hold_detail 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_research_report_em(symbol: str) -> dict:
-    """
-    东方财富网-数据中心-研究报告-个股研报
-
-    参数说明:
-    - symbol: str
-      symbol="000001"
-    """
-    try:
-        from akshare_api import stock_research_report_em
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_research_report_em(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_research_report_em 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_info_cjzc_em() -> dict:
-    """
-    获取财经早餐
-    """
-    try:
-        from akshare_api import stock_info_cjzc_em
-        df = stock_info_cjzc_em()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_info_cjzc_em 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_REALTIME)
-def stock_info_global_em() -> dict:
-    """
-    获取全球财经快讯-东方财富
-    """
-    try:
-        from akshare_api import stock_info_global_em
-        df = stock_info_global_em()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_info_global_em 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_REALTIME)
-def stock_info_global_sina() -> dict:
-    """
-    获取全球财经快讯-新浪财经
-    """
-    try:
-        from akshare_api import stock_info_global_sina
-        df = stock_info_global_sina()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_info_global_sina 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_irm_cninfo(symbol: str) -> dict:
-    """
-    互动易-提问
-
-    参数说明:
-    - symbol: str
-      symbol="002594";
-    """
-    try:
-        from akshare_api import stock_irm_cninfo
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_irm_cninfo(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_irm_cninfo 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_irm_ans_cninfo(symbol: str) -> dict:
-    """
-    互动易-回答
-
-    参数说明:
-    - symbol: str
-      symbol="1495108801386602496"; 通过 ak.stock_irm_cninfo 来获取具体的提问者编号
-    """
-    try:
-        from akshare_api import stock_irm_ans_cninfo
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_irm_ans_cninfo(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_irm_ans_cninfo 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_REALTIME)
-def stock_zh_b_spot() -> dict:
-    """
-    B 股数据是从新浪财经获取的数据, 重复运行本函数会被新浪暂时封 IP, 建议增加时间间隔
-    """
-    try:
-        from akshare_api import stock_zh_b_spot
-        df = stock_zh_b_spot()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_zh_b_spot 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_zh_b_daily(symbol: str, start_date: str = "20201103", end_date: str = "20201116", adjust: str = "") -> dict:
-    """
-    B 股数据是从新浪财经获取的数据, 历史数据按日频率更新
-
-    参数说明:
-    - symbol: str
-      symbol='sh900901'; 股票代码可以在 ak.stock_zh_b_spot() 中获取
-    - start_date: str
-      start_date='20201103'; 开始查询的日期
-    - end_date: str
-      end_date='20201116'; 结束查询的日期
-    - adjust: str
-      默认返回不复权的数据; qfq: 返回前复权后的数据; hfq: 返回后复权后的数据; hfq-factor: 返回后复权因子; qfq-factor: 返回前复权因子
-    """
-    try:
-        from akshare_api import stock_zh_b_daily
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        if start_date is not None:
-            kwargs["start_date"] = start_date
-        if end_date is not None:
-            kwargs["end_date"] = end_date
-        if adjust is not None:
-            kwargs["adjust"] = adjust
-        df = stock_zh_b_daily(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_zh_b_daily 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_REALTIME)
-def stock_zh_b_minute(symbol: str, period: str = "1", adjust: str = "") -> dict:
-    """
-    新浪财经 B 股股票或者指数的分时数据，目前可以获取 1, 5, 15, 30, 60 分钟的数据频率, 可以指定是否复权
-
-    参数说明:
-    - symbol: str
-      symbol='sh900901'; 同日频率数据接口
-    - period: str
-      period='1'; 获取 1, 5, 15, 30, 60 分钟的数据频率
-    - adjust: str
-      adjust=""; 默认为空: 返回不复权的数据; qfq: 返回前复权后的数据; hfq: 返回后复权后的数据;
-    """
-    try:
-        from akshare_api import stock_zh_b_minute
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        if period is not None:
-            kwargs["period"] = period
-        if adjust is not None:
-            kwargs["adjust"] = adjust
-        df = stock_zh_b_minute(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_zh_b_minute 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_REALTIME)
-def stock_hk_spot() -> dict:
-    """
-    获取所有港股的实时行情数据 15 分钟延时
-    """
-    try:
-        from akshare_api import stock_hk_spot
-        df = stock_hk_spot()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_hk_spot 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_REALTIME)
-def stock_us_spot() -> dict:
-    """
-    新浪财经-美股; 获取的数据有 15 分钟延迟; 建议使用 ak.stock_us_spot_em() 来获取数据
-    """
-    try:
-        from akshare_api import stock_us_spot
-        df = stock_us_spot()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_us_spot 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_STATIC)
-def stock_zyjs_ths(symbol: str) -> dict:
-    """
-    同花顺-主营介绍
-
-    参数说明:
-    - symbol: str
-      symbol="000066"
-    """
-    try:
-        from akshare_api import stock_zyjs_ths
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_zyjs_ths(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_zyjs_ths 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_STATIC)
-def stock_zygc_em(symbol: str) -> dict:
-    """
-    东方财富网-个股-主营构成
-
-    参数说明:
-    - symbol: str
-      symbol="SH688041"
-    """
-    try:
-        from akshare_api import stock_zygc_em
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_zygc_em(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_zygc_em 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_gsrl_gsdt_em(date: str) -> dict:
-    """
-    东方财富网-数据中心-股市日历-公司动态
-
-    参数说明:
-    - date: str
-      date="20230808"; 交易日
-    """
-    try:
-        from akshare_api import stock_gsrl_gsdt_em
-        # 构建参数字典
-        kwargs = {}
-        if date is not None:
-            kwargs["date"] = date
-        df = stock_gsrl_gsdt_em(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_gsrl_gsdt_em 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_STATIC)
-def stock_dividend_cninfo(symbol: str) -> dict:
-    """
-    巨潮资讯-个股-历史分红
-
-    参数说明:
-    - symbol: str
-      symbol="600009"
-    """
-    try:
-        from akshare_api import stock_dividend_cninfo
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_dividend_cninfo(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_dividend_cninfo 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_REALTIME)
-def stock_news_em(symbol: str) -> dict:
-    """
-    东方财富指定个股的新闻资讯数据
-
-    参数说明:
-    - symbol: str
-      symbol="603777"; 股票代码或其他关键词
-    """
-    try:
-        from akshare_api import stock_news_em
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_news_em(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_news_em 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_REALTIME)
-def stock_news_main_cx() -> dict:
-    """
-    财新网-财新数据通-最新
-    """
-    try:
-        from akshare_api import stock_news_main_cx
-        df = stock_news_main_cx()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_news_main_cx 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_yjkb_em(date: str) -> dict:
-    """
-    东方财富-数据中心-年报季报-业绩快报
-
-    参数说明:
-    - date: str
-      date="20200331"; choice of {"XXXX0331", "XXXX0630", "XXXX0930", "XXXX1231"}; 从 20100331 开始
-    """
-    try:
-        from akshare_api import stock_yjkb_em
-        # 构建参数字典
-        kwargs = {}
-        if date is not None:
-            kwargs["date"] = date
-        df = stock_yjkb_em(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_yjkb_em 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_yjyg_em(date: str) -> dict:
-    """
-    东方财富-数据中心-年报季报-业绩预告
-
-    参数说明:
-    - date: str
-      date="20200331"; choice of {"XXXX0331", "XXXX0630", "XXXX0930", "XXXX1231"}; 从 20081231 开始
-    """
-    try:
-        from akshare_api import stock_yjyg_em
-        # 构建参数字典
-        kwargs = {}
-        if date is not None:
-            kwargs["date"] = date
-        df = stock_yjyg_em(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_yjyg_em 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_DAILY)
-def stock_yysj_em(symbol: str, date: str) -> dict:
-    """
-    东方财富-数据中心-年报季报-预约披露时间
-
-    参数说明:
-    - symbol: str
-      symbol="沪深A股"; choice of {'沪深A股', '沪市A股', '科创板', '深市A股', '创业板', '京市A股', 'ST板'}
-    - date: str
-      date="20200331"; choice of {"XXXX0331", "XXXX0630", "XXXX0930", "XXXX1231"}; 从 20081231 开始
-    """
-    try:
-        from akshare_api import stock_yysj_em
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        if date is not None:
-            kwargs["date"] = date
-        df = stock_yysj_em(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_yysj_em 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_REALTIME)
-def stock_hot_follow_xq(symbol: str) -> dict:
-    """
-    雪球-沪深股市-热度排行榜-关注排行榜
-
-    参数说明:
-    - symbol: str
-      symbol="最热门"; choice of {"本周新增", "最热门"}
-    """
-    try:
-        from akshare_api import stock_hot_follow_xq
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_hot_follow_xq(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_hot_follow_xq 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_REALTIME)
-def stock_hot_rank_detail_em(symbol: str) -> dict:
-    """
-    东方财富网-股票热度-历史趋势及粉丝特征
-
-    参数说明:
-    - symbol: str
-      symbol="SZ000665"
-    """
-    try:
-        from akshare_api import stock_hot_rank_detail_em
-        # 构建参数字典
-        kwargs = {}
-        if symbol is not None:
-            kwargs["symbol"] = symbol
-        df = stock_hot_rank_detail_em(**kwargs)
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_hot_rank_detail_em 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_REALTIME)
-def stock_hot_rank_latest_em() -> dict:
-    """
-    东方财富-个股人气榜-最新排名
-    """
-    try:
-        from akshare_api import stock_hot_rank_latest_em
-        df = stock_hot_rank_latest_em()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_hot_rank_latest_em 执行失败: {e}")
-        return format_error_response(e)
-
-@mcp.tool()
-@file_cached(ttl_seconds=CACHE_TTL_REALTIME)
-def stock_hot_keyword_em() -> dict:
-    """
-    东方财富-个股人气榜-热门关键词
-    """
-    try:
-        from akshare_api import stock_hot_keyword_em
-        df = stock_hot_keyword_em()
-        return dataframe_to_mcp_result(df)
-    except Exception as e:
-        logger.error(f"stock_hot_keyword_em 执行失败: {e}")
-        return format_error_response(e)
-
-# 启动服务器
-if __name__ == "__main__":
-    _run_cache_cleanup_once()
-    _start_cache_cleaner(CACHE_CLEAN_INTERVAL_SECONDS)
-    logger.info(f"启动 {MCP_SERVER_NAME} v{MCP_SERVER_VERSION}")
-    logger.info(f"监听端口: {MCP_SERVER_PORT}")
-    logger.info(f"监听地址: {MCP_SERVER_HOST}:{MCP_SERVER_PORT}")
-    mcp.run(transport="streamable-http", host=MCP_SERVER_HOST, port=MCP_SERVER_PORT)
+        mcp.run(transport="streamable-http", host=MCP_SERVER_HOST, port=MCP_SERVER_PORT, **run_options)
+    finally:
+        flush_write_behind()
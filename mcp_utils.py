@@ -2,12 +2,25 @@
 """
 MCP 工具函数 - DataFrame 转换为 MCP 友好格式
 """
+import inspect
+import json
 import pandas as pd
 import logging
-from typing import Any, Dict, List
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import debug_timing
+import metrics
 
 logger = logging.getLogger(__name__)
 
+# 返回格式：records 每条记录为 {列名: 值}；columnar 为与 columns 对应的行数组，列名只出现一次
+RECORDS = "records"
+COLUMNAR = "columnar"
+
+# 估算单行 JSON 大小时抽样的行数
+_SIZE_SAMPLE_ROWS = 64
+
 
 def dataframe_to_mcp_result(df: pd.DataFrame) -> Dict[str, Any]:
     """
@@ -31,13 +44,16 @@ def dataframe_to_mcp_result(df: pd.DataFrame) -> Dict[str, Any]:
 
     try:
         # 转换为字典列表格式
-        data_dict = df.to_dict(orient="records")
+        with metrics.timed_phase("serialize"):
+            with debug_timing.timed("to_records"):
+                data_dict = df.to_dict(orient="records")
 
-        # 处理 NaN 值（JSON 不支持 NaN）
-        for record in data_dict:
-            for key, value in record.items():
-                if pd.isna(value):
-                    record[key] = None
+            # 处理 NaN 值（JSON 不支持 NaN）
+            with debug_timing.timed("nan_cleanup"):
+                for record in data_dict:
+                    for key, value in record.items():
+                        if pd.isna(value):
+                            record[key] = None
 
         return {
             "success": True,
@@ -73,3 +89,266 @@ def format_error_response(error: Exception) -> Dict[str, Any]:
         "columns": [],
         "data": []
     }
+
+
+def _parse_names(raw: Any) -> List[str]:
+    """解析逗号分隔的列名（也接受列表）。"""
+    if not raw:
+        return []
+    items = raw.split(",") if isinstance(raw, str) else list(raw)
+    return [str(item).strip() for item in items if str(item).strip()]
+
+
+def _sort_records(data: List[dict], keys: List[str]) -> List[dict]:
+    """按多个列排序（列名前加 "-" 表示降序），空值始终排在最后。"""
+    for key in reversed(keys):
+        descending = key.startswith("-")
+        name = key[1:] if descending else key
+        present = [r for r in data if r.get(name) is not None]
+        missing = [r for r in data if r.get(name) is None]
+        try:
+            present.sort(key=lambda r: r[name], reverse=descending)
+        except TypeError:
+            # 同一列混有数字与字符串时按字符串比较
+            present.sort(key=lambda r: str(r[name]), reverse=descending)
+        data = present + missing
+    return data
+
+
+def _check_format(fmt: str) -> None:
+    if fmt not in (RECORDS, COLUMNAR):
+        raise ValueError(f"format must be '{RECORDS}' or '{COLUMNAR}', got {fmt!r}")
+
+
+def _check_window(limit: Optional[int], offset: int) -> None:
+    if limit is not None and limit < 0:
+        raise ValueError(f"limit must be >= 0, got {limit}")
+    if offset < 0:
+        raise ValueError(f"offset must be >= 0, got {offset}")
+
+
+def response_limits() -> Dict[str, int]:
+    """单次返回的行数与字节数上限（config.MCP_MAX_RESPONSE_ROWS / MCP_MAX_RESPONSE_BYTES，<= 0 表示不限制）。"""
+    import config
+
+    return {"max_rows": config.MCP_MAX_RESPONSE_ROWS, "max_bytes": config.MCP_MAX_RESPONSE_BYTES}
+
+
+def _plain(value: Any) -> Any:
+    # NumPy 标量转为 Python 类型，NaN 转为 None，浮点保留 4 位小数
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float):
+        return None if value != value else round(value, 4)
+    return value
+
+
+def summarize_records(records: List[dict], names: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    逐列汇总统计（向量化计算）：数值列给出 count / nulls / min / max / mean / median，
+    其他列给出 count / nulls / unique / top / top_count。
+
+    Args:
+        records: 记录列表
+        names: 需要汇总的列
+
+    Returns:
+        dict: 列名 -> 统计值
+    """
+    df = pd.DataFrame.from_records(records, columns=names)
+    counts = df.count()
+    summary: Dict[str, Dict[str, Any]] = {}
+    numeric = df.select_dtypes(include="number", exclude="bool")
+    if not numeric.empty:
+        stats = pd.DataFrame(
+            {
+                "min": numeric.min(),
+                "max": numeric.max(),
+                "mean": numeric.mean(),
+                "median": numeric.median(),
+            }
+        )
+        for name, row in stats.iterrows():
+            summary[name] = {"type": "number", **{k: _plain(v) for k, v in row.items()}}
+    for name in names:
+        entry = summary.setdefault(name, {"type": "text"})
+        entry["count"] = int(counts[name])
+        entry["nulls"] = len(df) - int(counts[name])
+        if entry["type"] == "text":
+            values = df[name].dropna().astype(str).value_counts()
+            entry["unique"] = int(len(values))
+            if len(values):
+                entry["top"] = values.index[0]
+                entry["top_count"] = int(values.iloc[0])
+    return {name: summary[name] for name in names}
+
+
+def _row_bytes(page: List[Any]) -> float:
+    # 按等距抽样的行估算每行的 JSON 字节数，不序列化全部数据
+    step = max(1, len(page) // _SIZE_SAMPLE_ROWS)
+    sample = page[::step][:_SIZE_SAMPLE_ROWS]
+    return len(json.dumps(sample, ensure_ascii=False, default=str).encode("utf-8")) / len(sample)
+
+
+def estimate_bytes(page: List[Any]) -> int:
+    """估算行列表的 JSON 字节数（按抽样的行估算）。"""
+    return int(_row_bytes(page) * len(page)) if page else 0
+
+
+def _fit_rows(page: List[Any], max_rows: Optional[int], max_bytes: Optional[int]) -> Tuple[int, int]:
+    """返回 (保留的行数, 估算的 JSON 字节数)；字节数按等距抽样的行估算，不序列化全部数据。"""
+    keep = len(page)
+    if max_rows and max_rows > 0:
+        keep = min(keep, max_rows)
+    if not page or not max_bytes or max_bytes <= 0:
+        return keep, 0
+    per_row = _row_bytes(page)
+    estimated = int(per_row * len(page))
+    return min(keep, max(1, int(max_bytes // max(per_row, 1.0)))), estimated
+
+
+def apply_view(
+    result: Dict[str, Any],
+    limit: Optional[int] = None,
+    offset: int = 0,
+    columns: Optional[List[str]] = None,
+    sort_by: Optional[List[str]] = None,
+    presliced: bool = False,
+    fmt: str = RECORDS,
+    max_rows: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    对工具结果做排序、分页与列投影（不修改传入的 result，缓存中的结果可直接传入）
+
+    Args:
+        result: dataframe_to_mcp_result 格式的结果
+        limit: 最多返回的记录数，None 表示不限制
+        offset: 起始记录下标
+        columns: 只返回这些列，为空表示全部列
+        sort_by: 排序列，列名前加 "-" 表示降序
+        presliced: result 的 data 已按 offset / limit 截取（附带 total_rows），只需做列投影
+        fmt: 返回格式，RECORDS 或 COLUMNAR（data 为与 columns 顺序对应的行数组，列名只出现一次）
+        max_rows: 单次最多返回的行数，None 或 <= 0 表示不限制
+        max_bytes: 单次返回 data 的字节数上限（按抽样估算），None 或 <= 0 表示不限制
+
+    Returns:
+        dict: 在原结构上附加 total_rows（分页前的记录总数）与 offset 的新字典。
+        超过 max_rows / max_bytes 时只返回前面的行，并附加 truncated、next_offset（下一页的 offset）
+        与 summary（本次请求全部行的逐列汇总统计）
+
+    Raises:
+        ValueError: 列名不存在或分页参数非法
+    """
+    data = result.get("data")
+    if not result.get("success") or not isinstance(data, list):
+        return result
+    _check_window(limit, offset)
+    _check_format(fmt)
+    known = list(result.get("columns") or [])
+    requested = list(columns or []) + [key.lstrip("-") for key in sort_by or []]
+    unknown = [name for name in requested if name not in known]
+    if unknown:
+        raise ValueError(f"unknown columns: {', '.join(unknown)}; available: {', '.join(known)}")
+
+    if presliced:
+        total = int(result.get("total_rows", len(data)))
+        page = data
+    else:
+        total = len(data)
+        if sort_by:
+            data = _sort_records(data, list(sort_by))
+        page = data[offset:] if limit is None else data[offset : offset + limit]
+    names = list(columns) if columns else known
+    records = page
+    if fmt == COLUMNAR:
+        page = [[record.get(name) for name in names] for record in page]
+    elif columns:
+        page = [{name: record.get(name) for name in names} for record in page]
+    keep, estimated = _fit_rows(page, max_rows, max_bytes)
+    truncated = keep < len(page)
+    if truncated:
+        logger.info("response truncated: %s of %s rows (~%s bytes)", keep, len(page), estimated)
+        summary = summarize_records(records, names)
+        page = page[:keep]
+    view = {
+        **result,
+        "rows": len(page),
+        "columns": names,
+        "data": page,
+        "total_rows": total,
+        "offset": offset,
+    }
+    if fmt == COLUMNAR:
+        view["format"] = COLUMNAR
+    if truncated:
+        next_offset = offset + keep
+        view["truncated"] = True
+        view["next_offset"] = next_offset
+        view["summary"] = summary
+        view["message"] = (
+            f"Result too large: returned the first {keep} of {len(records)} requested rows; "
+            f"summary covers all of them. Call again with offset={next_offset} for the next rows, "
+            "or narrow the result with limit / columns / sort_by."
+        )
+    return view
+
+
+def paginated():
+    """
+    装饰器：为 MCP 工具增加统一的 limit / offset / columns / sort_by / format 参数。
+
+    视图参数不参与缓存 key，排序、分页与列投影都作用于缓存中的完整结果，不会重新请求上游。
+    被装饰函数若提供 cache_slice（file_cached），且不需要排序，则直接从缓存读取所需记录，
+    大条目只解码对应的字节范围。
+    返回的行数或字节数超过 response_limits() 时截断为前若干行，附带逐列汇总统计与 next_offset。
+    """
+
+    def decorator(f: Callable[..., dict]) -> Callable[..., dict]:
+        signature = inspect.signature(f)
+        view_params = [
+            inspect.Parameter("limit", inspect.Parameter.KEYWORD_ONLY, default=None, annotation=Optional[int]),
+            inspect.Parameter("offset", inspect.Parameter.KEYWORD_ONLY, default=0, annotation=int),
+            inspect.Parameter("columns", inspect.Parameter.KEYWORD_ONLY, default="", annotation=str),
+            inspect.Parameter("sort_by", inspect.Parameter.KEYWORD_ONLY, default="", annotation=str),
+            inspect.Parameter("format", inspect.Parameter.KEYWORD_ONLY, default=RECORDS, annotation=str),
+        ]
+
+        @wraps(f)
+        def wrapper(
+            *args: Any,
+            limit: Optional[int] = None,
+            offset: int = 0,
+            columns: str = "",
+            sort_by: str = "",
+            format: str = RECORDS,
+            **kwargs: Any,
+        ) -> dict:
+            names = _parse_names(columns)
+            keys = _parse_names(sort_by)
+            offset = offset or 0
+            try:
+                _check_window(limit, offset)
+                _check_format(format)
+                limits = response_limits()
+                cache_slice = getattr(f, "cache_slice", None)
+                if cache_slice is not None and not keys and (limit is not None or offset):
+                    sliced = cache_slice(offset, limit, *args, **kwargs)
+                    if sliced is not None:
+                        with metrics.timed_phase("serialize"), debug_timing.timed("view"):
+                            return apply_view(sliced, limit, offset, names, presliced=True, fmt=format, **limits)
+                result = f(*args, **kwargs)
+                with metrics.timed_phase("serialize"), debug_timing.timed("view"):
+                    return apply_view(result, limit, offset, names, keys, fmt=format, **limits)
+            except ValueError as e:
+                return format_error_response(e)
+
+        # 原参数之后追加视图参数，供 FastMCP 解析
+        wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), *view_params])
+        wrapper.__annotations__ = {
+            **getattr(f, "__annotations__", {}),
+            **{p.name: p.annotation for p in view_params},
+        }
+        return wrapper
+
+    return decorator
@@ -0,0 +1,271 @@
+# metrics.py
+"""
+Prometheus 格式的服务指标（文本格式 0.0.4，不依赖 prometheus_client），由 GET /metrics 输出。
+
+- 工具：请求数、错误数、进行中的调用数，以及耗时直方图（total 与 upstream / decode / serialize 分阶段）
+- AKTools：按接口的请求耗时直方图与错误数
+- 缓存：命中 / 未命中计数与命中率（输出时从 cache_stats 读取，调用路径上没有额外开销）
+
+调用路径上的开销：每次调用几次 perf_counter 与三次加锁累加（约 5 微秒）。分阶段耗时由各处调用 add_phase 累加到
+当前调用的 ContextVar 中，调用结束时一次写入直方图；不在工具调用中（如预取、直接调用）时 add_phase 什么也不做。
+"""
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import cache_stats
+
+PREFIX = "akshare_mcp"
+
+# 耗时直方图的桶上界（秒）
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 分阶段耗时：upstream 为请求 AKTools，decode 为解析缓存条目与上游 JSON，serialize 为生成返回结果
+PHASES = ("upstream", "decode", "serialize")
+
+# 指标名 -> (类型, 说明)
+_FAMILIES: Dict[str, Tuple[str, str]] = {
+    "tool_requests_total": ("counter", "MCP tool calls."),
+    "tool_errors_total": ("counter", "MCP tool calls that raised or returned success=false."),
+    "tool_in_flight": ("gauge", "MCP tool calls currently running."),
+    "tool_duration_seconds": ("histogram", "MCP tool latency by phase (total includes queueing)."),
+    "aktools_request_seconds": ("histogram", "AKTools HTTP request latency by endpoint."),
+    "aktools_errors_total": ("counter", "AKTools requests that failed."),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, Labels], float] = {}
+_gauges: Dict[Tuple[str, Labels], float] = {}
+_histograms: Dict[Tuple[str, Labels], "Histogram"] = {}
+_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("metrics_phases", default=None)
+
+
+class Histogram:
+    """固定桶的累积直方图（调用方持有 _lock）。"""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _key(name: str, labels: Dict[str, str]) -> Tuple[str, Labels]:
+    return name, tuple(sorted(labels.items()))
+
+
+def _observe(key: Tuple[str, Labels], seconds: float) -> None:
+    # 调用方持有 _lock
+    histogram = _histograms.get(key)
+    if histogram is None:
+        histogram = _histograms[key] = Histogram()
+    histogram.observe(seconds)
+
+
+def inc(name: str, value: float = 1, **labels: str) -> None:
+    """计数器累加。"""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def add_gauge(name: str, delta: float, **labels: str) -> None:
+    """仪表值增减。"""
+    key = _key(name, labels)
+    with _lock:
+        _gauges[key] = _gauges.get(key, 0) + delta
+
+
+def observe(name: str, seconds: float, **labels: str) -> None:
+    """记录一次耗时。"""
+    key = _key(name, labels)
+    with _lock:
+        _observe(key, seconds)
+
+
+def add_phase(phase: str, seconds: float) -> None:
+    """把一段耗时累加到当前工具调用的 phase 阶段；不在工具调用中时忽略。"""
+    current = _phases.get()
+    if current is not None:
+        current[phase] = current.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed_phase(phase: str) -> Iterator[None]:
+    """计时一段代码并累加到当前工具调用的 phase 阶段。"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_phase(phase, time.perf_counter() - started)
+
+
+def phased(f: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    包装同步工具函数：收集本次执行中各处 add_phase 的耗时，正常结束或抛出 Exception 时写入直方图。
+
+    被放弃的执行（tool_executor 快速池探测抛出的 UpstreamRequired 等 BaseException）不记录，
+    改到慢速池重新执行时再记录，避免重复计数。
+    """
+    keys = {phase: _key("tool_duration_seconds", {"tool": f.__name__, "phase": phase}) for phase in PHASES}
+
+    def _flush(current: Dict[str, float]) -> None:
+        if current:
+            with _lock:
+                for phase, seconds in current.items():
+                    _observe(keys[phase], seconds)
+
+    @wraps(f)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        current: Dict[str, float] = {}
+        token = _phases.set(current)
+        try:
+            result = f(*args, **kwargs)
+        except Exception:
+            _flush(current)
+            raise
+        finally:
+            _phases.reset(token)
+        _flush(current)
+        return result
+
+    return wrapper
+
+
+def instrumented(handler: Callable[..., Any], name: str) -> Callable[..., Any]:
+    """
+    包装异步工具处理函数：记录请求数、错误数、进行中的调用数与总耗时（含线程池排队）。
+
+    Args:
+        handler: 异步处理函数（ToolExecutor.wrap 的返回值）
+        name: 工具名
+    """
+    # 标签键只在注册时生成一次
+    in_flight = _key("tool_in_flight", {"tool": name})
+    requests_total = _key("tool_requests_total", {"tool": name})
+    errors_total = _key("tool_errors_total", {"tool": name})
+    duration = _key("tool_duration_seconds", {"tool": name, "phase": "total"})
+
+    @wraps(handler)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with _lock:
+            _gauges[in_flight] = _gauges.get(in_flight, 0) + 1
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = await handler(*args, **kwargs)
+            failed = isinstance(result, dict) and result.get("success") is False
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            with _lock:
+                _observe(duration, elapsed)
+                _counters[requests_total] = _counters.get(requests_total, 0) + 1
+                if failed:
+                    _counters[errors_total] = _counters.get(errors_total, 0) + 1
+                _gauges[in_flight] -= 1
+
+    wrapper.__signature__ = inspect.signature(handler)
+    return wrapper
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _number(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _header(lines: List[str], name: str, kind: str, help_text: str) -> None:
+    lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+    lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+
+def _cache_lines(lines: List[str]) -> None:
+    tools = cache_stats.snapshot()["tools"]
+    families = (
+        ("cache_hits_total", "counter", "Cache hits.", "hits"),
+        ("cache_misses_total", "counter", "Cache misses.", "misses"),
+        ("cache_upstream_calls_total", "counter", "Upstream calls made on cache misses.", "upstream_calls"),
+        ("cache_hit_ratio", "gauge", "Cache hits / lookups since the last stats reset.", "hit_ratio"),
+    )
+    for name, kind, help_text, field in families:
+        _header(lines, name, kind, help_text)
+        for tool, entry in tools.items():
+            value = entry.get(field)
+            if value is not None:
+                lines.append(f"{PREFIX}_{name}{_labels((('tool', tool),))} {_number(value)}")
+
+
+def render(executor_stats: Optional[Dict[str, int]] = None) -> str:
+    """
+    输出 Prometheus 文本格式的全部指标。
+
+    Args:
+        executor_stats: ToolExecutor.stats()，提供时输出各线程池完成的调用数
+    """
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        histograms = {key: (list(h.counts), h.sum, h.count) for key, h in _histograms.items()}
+    lines: List[str] = []
+    for family, (kind, help_text) in _FAMILIES.items():
+        _header(lines, family, kind, help_text)
+        metric = f"{PREFIX}_{family}"
+        if kind == "histogram":
+            for (name, labels), (counts, total, count) in sorted(histograms.items()):
+                if name != family:
+                    continue
+                cumulative = 0
+                for bound, n in zip(BUCKETS, counts):
+                    cumulative += n
+                    lines.append(f"{metric}_bucket{_labels(labels, (('le', repr(bound)),))} {cumulative}")
+                lines.append(f"{metric}_bucket{_labels(labels, (('le', '+Inf'),))} {count}")
+                lines.append(f"{metric}_sum{_labels(labels)} {repr(total)}")
+                lines.append(f"{metric}_count{_labels(labels)} {count}")
+        else:
+            values = counters if kind == "counter" else gauges
+            for (name, labels), value in sorted(values.items()):
+                if name == family:
+                    lines.append(f"{metric}{_labels(labels)} {_number(value)}")
+    _cache_lines(lines)
+    if executor_stats is not None:
+        _header(lines, "executor_calls_total", "counter", "Tool calls completed per executor pool.")
+        for pool in ("fast", "slow"):
+            lines.append(f'{PREFIX}_executor_calls_total{{pool="{pool}"}} {executor_stats[pool]}')
+        _header(lines, "executor_fallbacks_total", "counter", "Fast-pool probes that fell back to the slow pool.")
+        lines.append(f"{PREFIX}_executor_fallbacks_total {executor_stats['fallbacks']}")
+        _header(lines, "executor_rejected_total", "counter", "Upstream calls rejected by admission control.")
+        lines.append(f"{PREFIX}_executor_rejected_total {executor_stats.get('rejected', 0)}")
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """清空全部指标（测试用）。"""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
@@ -0,0 +1,150 @@
+# micro_cache.py
+"""
+盘中高频接口的秒级内存缓存与请求合并。
+
+分时、盘前、个股实时快照等接口数据每秒都在变化，不适合落盘缓存；但大量客户端
+同时轮询同一代码时，几秒内的重复请求完全可以共享一次上游结果：
+- 秒级 TTL：成功结果只在进程内存中保留 ttl_seconds 秒（有条目数上限，按 LRU 淘汰）
+- 请求合并：同一参数的请求正在访问上游时，后到的请求等待并复用这次结果，不再重复请求
+"""
+import inspect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+import cache_stats
+import file_cache
+import tool_executor
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """一次进行中的上游请求，跟随者等待其结果。"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Optional[dict] = None
+        self.error: Optional[BaseException] = None
+
+
+class MicroCache:
+    """
+    进程内秒级缓存 + 单飞（single-flight）请求合并。
+
+    Args:
+        ttl_seconds: 成功结果保留秒数，<= 0 表示只合并并发请求、不保留结果
+        max_entries: 最多保留的条目数，超出按最近最少使用淘汰
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024) -> None:
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        # key -> (过期时间, 结果)，按最近使用排序
+        self._entries: OrderedDict = OrderedDict()
+        self._flights: Dict[str, _Flight] = {}
+
+    def _lookup(self, key: str, now: float) -> Optional[dict]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        if item[0] <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return item[1]
+
+    def _store(self, key: str, result: dict, now: float) -> None:
+        self._entries[key] = (now + self.ttl_seconds, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_call(self, name: str, key: str, call: Callable[[], dict]) -> dict:
+        """
+        返回缓存结果；未命中时只有第一个请求调用 call()，并发的相同请求等待并共享其结果。
+
+        Args:
+            name: 工具名（用于统计）
+            key: 缓存 key
+            call: 访问上游的函数
+
+        Returns:
+            工具结果字典（多个调用方共享同一对象，不应修改）
+        """
+        with self._lock:
+            cached = self._lookup(key, time.monotonic())
+            if cached is not None:
+                cache_stats.record(name, hits=1)
+                return cached
+            # 发起或等待上游请求都会阻塞，探测执行中交给慢速池
+            tool_executor.require_upstream()
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            cache_stats.record(name, hits=1, coalesced=1)
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        cache_stats.record(name, misses=1)
+        try:
+            flight.result = call()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                result = flight.result
+                if self.ttl_seconds > 0 and result is not None and result.get("success") is True:
+                    self._store(key, result, time.monotonic())
+                self._flights.pop(key, None)
+            flight.done.set()
+        return flight.result
+
+    def clear(self) -> None:
+        """清空已缓存的结果（进行中的请求不受影响）。"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def micro_cached(ttl_seconds: float, max_entries: int = 1024):
+    """
+    装饰器：对盘中高频工具做秒级内存缓存与并发请求合并（不写文件缓存）。
+
+    Args:
+        ttl_seconds: 成功结果在内存中保留的秒数，<= 0 表示只合并并发请求
+        max_entries: 每个工具最多保留的条目数
+    """
+
+    def decorator(f: Callable[..., dict]) -> Callable[..., dict]:
+        signature = inspect.signature(f)
+        name = f.__name__
+        cache = MicroCache(ttl_seconds, max_entries)
+
+        @wraps(f)
+        def wrapper(*args: Any, **kwargs: Any) -> dict:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            key = file_cache._cache_key(name, tuple(), params)
+            return cache.get_or_call(name, key, lambda: file_cache.call_upstream(name, f, params))
+
+        # 保留原函数签名，供 FastMCP 解析工具参数
+        wrapper.__signature__ = signature
+        wrapper.micro_cache = cache
+        return wrapper
+
+    return decorator
@@ -0,0 +1,263 @@
+# prefetch.py
+"""
+缓存预热与预取调度：按配置文件在缓存过期前重新执行指定工具，或在指定时刻（如交易日 15:05 后）刷新。
+
+配置文件为 JSON，例如：
+
+    {
+      "jitter_seconds": 10,
+      "rate_per_minute": 30,
+      "holidays": ["20261001", "20261002"],
+      "jobs": [
+        {"tool": "stock_zh_a_spot", "lead_seconds": 20},
+        {"tool": "stock_hsgt_fund_flow_summary_em"},
+        {"tool": "stock_lhb_detail_em",
+         "params": {"start_date": "{today}", "end_date": "{today}"},
+         "at": "15:05", "days": "trading"}
+      ]
+    }
+
+- 未指定 at 的任务为"过期前刷新"：在缓存条目过期前 lead_seconds 秒重新拉取
+- 指定 at 的任务为定时刷新：days 可选 daily / weekdays / trading（工作日且不在 holidays 中）
+- params 中的 {today} 会替换为交易所时区的当日日期（YYYYMMDD）
+
+预取线程优先级低于交互式调用：有交互式请求正在访问上游时会让路（最多 max_defer_seconds），
+并通过令牌桶限制预取请求速率。
+"""
+import json
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import file_cache
+from history_cache import MARKET_TZ
+from rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+_DAY_MODES = {"daily", "weekdays", "trading"}
+# 无缓存条目信息（如未启用文件缓存）时的重新检查间隔
+_RECHECK_SECONDS = 300.0
+# 预取失败后的重试间隔
+_RETRY_SECONDS = 60.0
+
+
+@dataclass
+class PrefetchJob:
+    """单个预取任务。"""
+
+    tool: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    lead_seconds: float = 30.0
+    at: Optional[str] = None
+    days: str = "trading"
+    next_run: float = 0.0
+
+    def describe(self) -> str:
+        return f"{self.tool}({self.params})" + (f" at {self.at}/{self.days}" if self.at else "")
+
+
+@dataclass
+class PrefetchConfig:
+    """预取调度配置。"""
+
+    jobs: List[PrefetchJob]
+    jitter_seconds: float = 10.0
+    rate_per_minute: float = 30.0
+    max_defer_seconds: float = 30.0
+    holidays: frozenset = frozenset()
+
+
+def load_config(path: Path) -> PrefetchConfig:
+    """
+    读取并校验预取配置文件。
+
+    Raises:
+        ValueError: 配置格式不合法
+        OSError: 文件无法读取
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    if not isinstance(raw, dict) or not isinstance(raw.get("jobs"), list):
+        raise ValueError("prefetch config must be an object with a 'jobs' list")
+    jobs = []
+    for item in raw["jobs"]:
+        if not isinstance(item, dict) or not isinstance(item.get("tool"), str):
+            raise ValueError(f"invalid prefetch job: {item!r}")
+        params = item.get("params") or {}
+        if not isinstance(params, dict):
+            raise ValueError(f"prefetch job params must be an object: {item!r}")
+        at = item.get("at")
+        if at is not None:
+            _parse_at(at)
+        days = item.get("days", "trading")
+        if days not in _DAY_MODES:
+            raise ValueError(f"prefetch job days must be one of {sorted(_DAY_MODES)}: {item!r}")
+        jobs.append(
+            PrefetchJob(
+                tool=item["tool"],
+                params=params,
+                lead_seconds=float(item.get("lead_seconds", 30)),
+                at=at,
+                days=days,
+            )
+        )
+    return PrefetchConfig(
+        jobs=jobs,
+        jitter_seconds=float(raw.get("jitter_seconds", 10)),
+        rate_per_minute=float(raw.get("rate_per_minute", 30)),
+        max_defer_seconds=float(raw.get("max_defer_seconds", 30)),
+        holidays=frozenset(str(d) for d in raw.get("holidays", [])),
+    )
+
+
+def _parse_at(value: Any) -> tuple:
+    try:
+        hour, minute = (int(x) for x in str(value).split(":"))
+    except ValueError:
+        raise ValueError(f"invalid prefetch time (expect HH:MM): {value!r}")
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"invalid prefetch time (expect HH:MM): {value!r}")
+    return hour, minute
+
+
+def is_trading_day(day: datetime, holidays: frozenset) -> bool:
+    """工作日且不在节假日列表中视为交易日。"""
+    return day.weekday() < 5 and day.strftime("%Y%m%d") not in holidays
+
+
+def next_at_run(job: PrefetchJob, now: datetime, holidays: frozenset) -> datetime:
+    """计算定时任务在 now 之后的下一次触发时间（交易所时区）。"""
+    hour, minute = _parse_at(job.at)
+    candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    for _ in range(366):
+        if job.days == "daily":
+            return candidate
+        if job.days == "weekdays" and candidate.weekday() < 5:
+            return candidate
+        if job.days == "trading" and is_trading_day(candidate, holidays):
+            return candidate
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def render_params(params: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    """替换参数中的 {today} 占位符。"""
+    today = now.strftime("%Y%m%d")
+    return {k: v.replace("{today}", today) if isinstance(v, str) else v for k, v in params.items()}
+
+
+class PrefetchScheduler:
+    """
+    后台预取调度线程。
+
+    Args:
+        config: 预取配置
+        resolve_tool: 根据工具名返回可调用的工具函数（找不到返回 None）
+    """
+
+    def __init__(self, config: PrefetchConfig, resolve_tool: Callable[[str], Optional[Callable[..., dict]]]) -> None:
+        self.config = config
+        self.resolve_tool = resolve_tool
+        self.bucket = TokenBucket(config.rate_per_minute / 60.0, burst=1)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _jitter(self) -> float:
+        return random.uniform(0, self.config.jitter_seconds) if self.config.jitter_seconds > 0 else 0.0
+
+    def _schedule(self, job: PrefetchJob, now: float) -> None:
+        if job.at:
+            market_now = datetime.fromtimestamp(now, MARKET_TZ)
+            job.next_run = next_at_run(job, market_now, self.config.holidays).timestamp() + self._jitter()
+            return
+        tool = self.resolve_tool(job.tool)
+        lookup = getattr(tool, "cache_expires_at", None)
+        expiry = lookup(**render_params(job.params, datetime.fromtimestamp(now, MARKET_TZ))) if lookup else None
+        if expiry is None:
+            job.next_run = now + (self._jitter() if lookup else _RECHECK_SECONDS)
+        elif expiry == float("inf"):
+            job.next_run = now + _RECHECK_SECONDS
+        else:
+            # 在过期前 lead_seconds 内随机提前，避免多个任务同时触发
+            job.next_run = max(now, expiry - job.lead_seconds - self._jitter())
+
+    def _wait_for_idle(self) -> None:
+        """有交互式上游请求时让路，最多等待 max_defer_seconds。"""
+        deadline = time.monotonic() + self.config.max_defer_seconds
+        while file_cache.interactive_inflight() > 0 and time.monotonic() < deadline:
+            if self._stop_event.wait(0.2):
+                return
+
+    def run_job(self, job: PrefetchJob) -> bool:
+        """执行一次预取任务，成功返回 True。"""
+        tool = self.resolve_tool(job.tool)
+        if tool is None:
+            logger.warning("prefetch: unknown tool %s", job.tool)
+            return False
+        params = render_params(job.params, datetime.now(MARKET_TZ))
+        refresh = getattr(tool, "cache_refresh", None)
+        if refresh is None:
+            # 没有 cache_refresh 的工具（如进程内短缓存）只能经缓存调用，命中时不会刷新
+            logger.warning("prefetch: %s has no cache_refresh, calling it through the cache", job.tool)
+            refresh = tool
+        try:
+            result = refresh(**params)
+        except Exception as e:
+            logger.warning("prefetch %s failed: %s", job.describe(), e)
+            return False
+        ok = bool(result and result.get("success"))
+        logger.info("prefetch %s: %s", job.describe(), "ok" if ok else result.get("message") if result else "empty")
+        return ok
+
+    def run_pending(self, now: Optional[float] = None) -> float:
+        """
+        执行所有到期任务。
+
+        Returns:
+            距离下一个任务到期的秒数
+        """
+        now = time.time() if now is None else now
+        for job in sorted(self.config.jobs, key=lambda j: j.next_run):
+            if self._stop_event.is_set():
+                break
+            if job.next_run > now:
+                continue
+            self._wait_for_idle()
+            if not self.bucket.acquire(stop_event=self._stop_event):
+                break
+            ok = self.run_job(job)
+            now = time.time()
+            if ok or job.at:
+                self._schedule(job, now)
+            else:
+                job.next_run = now + _RETRY_SECONDS
+        return max(0.0, min((j.next_run for j in self.config.jobs), default=now + _RECHECK_SECONDS) - time.time())
+
+    def start(self) -> None:
+        now = time.time()
+        for job in self.config.jobs:
+            self._schedule(job, now)
+
+        def _worker() -> None:
+            wait = 0.0
+            while not self._stop_event.wait(min(max(wait, 1.0), 60.0)):
+                try:
+                    wait = self.run_pending()
+                except Exception as e:
+                    logger.warning("prefetch scheduler error: %s", e)
+                    wait = _RETRY_SECONDS
+
+        self._thread = threading.Thread(target=_worker, name="file-cache-prefetch", daemon=True)
+        self._thread.start()
+        logger.info("prefetch scheduler started: %s jobs", len(self.config.jobs))
+
+    def stop(self) -> None:
+        self._stop_event.set()
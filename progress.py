@@ -0,0 +1,84 @@
+# progress.py
+"""
+工具执行进度：线程池中执行的同步工具函数通过 report() 向 MCP 客户端发送进度通知（notifications/progress）。
+
+- mcp_server.tool() 的异步处理函数在事件循环中取得当前请求的 FastMCP Context，以 ContextVar 传入工具线程
+  （ToolExecutor 在线程池中执行时复制调用方的 contextvars）
+- report() 把通知提交回事件循环并等待发出（最多 1 秒），通知先于工具结果到达客户端
+- 快速池中的探测执行不报告；客户端请求未带 progressToken、直接调用工具函数（预取、测试）或不在 MCP 请求中时 report() 什么也不做
+"""
+import asyncio
+import inspect
+import logging
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Optional
+
+import tool_executor
+
+logger = logging.getLogger(__name__)
+
+# 等待一次进度通知发出的最长秒数
+_SEND_TIMEOUT = 1.0
+
+Reporter = Callable[[float, Optional[float], Optional[str]], None]
+
+_reporter: ContextVar[Optional[Reporter]] = ContextVar("progress_reporter", default=None)
+
+
+def report(progress: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+    """
+    报告当前工具调用的进度。
+
+    Args:
+        progress: 已完成的数量
+        total: 总数，未知时为 None
+        message: 进度说明，如当前完成的日期区间或代码
+    """
+    reporter = _reporter.get()
+    # 快速池中的探测执行可能被放弃并在慢速池重新执行，只在实际执行中报告，保证进度单调递增
+    if reporter is not None and not tool_executor.probing():
+        reporter(progress, total, message)
+
+
+def _in_loop(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+def _context_reporter(ctx: Any, loop: asyncio.AbstractEventLoop) -> Reporter:
+    def send(progress: float, total: Optional[float], message: Optional[str]) -> None:
+        future = asyncio.run_coroutine_threadsafe(ctx.report_progress(progress, total, message), loop)
+        if _in_loop(loop):
+            # 在事件循环线程中调用时不能阻塞等待
+            return
+        try:
+            future.result(_SEND_TIMEOUT)
+        except Exception as e:
+            logger.debug("progress notification failed: %s", e)
+
+    return send
+
+
+def reporting(handler: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    包装异步工具处理函数：在 MCP 请求中执行时，把当前请求的进度通知通道交给工具函数中的 report()。
+    """
+    from fastmcp.server.dependencies import get_context
+
+    @wraps(handler)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        try:
+            ctx = get_context()
+        except RuntimeError:
+            return await handler(*args, **kwargs)
+        token = _reporter.set(_context_reporter(ctx, asyncio.get_running_loop()))
+        try:
+            return await handler(*args, **kwargs)
+        finally:
+            _reporter.reset(token)
+
+    wrapper.__signature__ = inspect.signature(handler)
+    return wrapper
@@ -0,0 +1,72 @@
+# rate_limit.py
+"""
+令牌桶限流：控制对 AKTools 上游的请求速率，避免触发数据源封 IP。
+"""
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶。
+
+    Args:
+        rate_per_second: 每秒补充的令牌数，<= 0 表示不限流
+        burst: 桶容量（允许的突发请求数），至少为 1
+    """
+
+    def __init__(self, rate_per_second: float, burst: int = 1) -> None:
+        self.rate = float(rate_per_second)
+        self.capacity = float(max(1, burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """立即尝试取一个令牌，成功返回 True。"""
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self, timeout: Optional[float] = None, stop_event: Optional[threading.Event] = None) -> bool:
+        """
+        阻塞直到取得一个令牌。
+
+        Args:
+            timeout: 最长等待秒数，None 表示一直等待
+            stop_event: 设置后立即放弃等待
+
+        Returns:
+            是否取得令牌
+        """
+        if self.rate <= 0:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            if stop_event is not None:
+                if stop_event.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
@@ -0,0 +1,80 @@
+# runtime_token.py
+"""
+运行时更新的令牌（如雪球 xq_a_token），在多 worker 之间共享。
+
+- 指定文件路径时（CACHE_DIR 下），更新写入该文件（临时文件 + os.replace 原子替换，权限 0600），
+  读取时按文件的 inode 与 mtime 判断是否变化，变化后重新加载，其他 worker 的更新随即生效
+- 文件存在时以文件为准（进程重启后仍使用最近一次更新的令牌）；不存在时使用初始值（环境变量）
+- 不指定文件路径时只保存在当前进程内
+"""
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RuntimeToken:
+    """
+    可在运行时更新的令牌。
+
+    Args:
+        path: 共享令牌的文件路径，为 None 表示只在当前进程内生效
+        initial: 文件不存在时使用的令牌
+    """
+
+    def __init__(self, path: Optional[Path], initial: str = "") -> None:
+        self.path = path
+        self._initial = initial
+        self._value = initial
+        self._version: tuple = ()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self) -> bool:
+        """更新是否对其他 worker 进程可见。"""
+        return self.path is not None
+
+    def get(self) -> str:
+        """当前令牌（文件有变化时重新加载）。"""
+        if self.path is None:
+            return self._value
+        try:
+            st = self.path.stat()
+        except OSError:
+            return self._initial
+        current = (st.st_ino, st.st_mtime_ns)
+        if current == self._version:
+            return self._value
+        try:
+            value = self.path.read_text(encoding="utf-8").strip()
+        except OSError as e:
+            logger.warning("runtime token file %s unreadable: %s", self.path, e)
+            return self._value
+        with self._lock:
+            self._value, self._version = value, current
+        return value
+
+    def set(self, token: str) -> None:
+        """
+        更新令牌。
+
+        Raises:
+            OSError: 写入令牌文件失败
+        """
+        if self.path is None:
+            self._value = token
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            mode="w", encoding="utf-8", dir=self.path.parent, prefix=f"{self.path.name}.", suffix=".tmp", delete=False
+        ) as f:
+            # 临时文件由 mkstemp 创建，权限即为 0600
+            f.write(token)
+            tmp_name = f.name
+        os.replace(tmp_name, self.path)
+        with self._lock:
+            self._value, self._version = token, ()
@@ -0,0 +1,284 @@
+# screening.py
+"""
+行情筛选：在服务端对实时行情快照做条件筛选、排序与取前 N 条，只返回匹配的行。
+
+筛选表达式语法（Python 表达式的一个安全子集，解析为 AST 后逐节点校验，不执行任意代码）：
+- 列名直接书写，如 涨跌幅、换手率；含运算符或以数字开头的列名用反引号，如 `60日涨跌幅`、`市盈率-动态`
+- 比较：> >= < <= == !=，支持链式比较，如 3 < 涨跌幅 <= 7
+- 算术：+ - * /，如 成交额 / 流通市值 > 0.05
+- 逻辑：and / or / not 与括号
+- 字符串：名称 == "平安银行"；函数 startswith(代码, "300")、contains(名称, "银行")、abs(涨跌幅)
+
+表达式编译为对整列的向量化运算（pandas / NumPy 布尔掩码），不逐行求值。空值参与比较时结果为 False。
+
+示例：涨跌幅 > 5 and 换手率 > 10 and not contains(名称, "ST")
+"""
+import ast
+import operator
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# 表达式最大长度与 AST 节点数，避免超长表达式拖慢服务
+MAX_EXPRESSION_LENGTH = 1000
+MAX_EXPRESSION_NODES = 200
+
+_BACKTICK = re.compile(r"`([^`]+)`")
+
+_COMPARE_OPS = {
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+_ARITH_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+
+# 编译后的表达式：输入行情 DataFrame，返回布尔掩码或数值 / 字符串列
+Evaluator = Callable[[pd.DataFrame], Any]
+
+
+class ScreenError(ValueError):
+    """筛选表达式或参数不合法。"""
+
+
+def _numeric(value: Any) -> Any:
+    if isinstance(value, pd.Series) and not pd.api.types.is_numeric_dtype(value):
+        return pd.to_numeric(value, errors="coerce")
+    return value
+
+
+def _as_mask(value: Any, df: pd.DataFrame) -> pd.Series:
+    if isinstance(value, pd.Series):
+        if pd.api.types.is_bool_dtype(value):
+            return value
+        raise ScreenError("filter expression must be a condition, e.g. 涨跌幅 > 5")
+    if isinstance(value, (bool, np.bool_)):
+        return pd.Series(bool(value), index=df.index)
+    raise ScreenError("filter expression must be a condition, e.g. 涨跌幅 > 5")
+
+
+def _compare(op: Callable, left: Any, right: Any) -> Any:
+    # 与字符串常量比较时按字符串比较，否则按数值比较（非数值视为空值）
+    if isinstance(left, str) or isinstance(right, str):
+        if op not in (operator.eq, operator.ne):
+            raise ScreenError("strings only support == and !=")
+        left = left.astype(str) if isinstance(left, pd.Series) else left
+        right = right.astype(str) if isinstance(right, pd.Series) else right
+        return op(left, right)
+    result = op(_numeric(left), _numeric(right))
+    return result.fillna(False).astype(bool) if isinstance(result, pd.Series) else result
+
+
+def _text_function(name: str) -> Callable[[pd.Series, str], pd.Series]:
+    def evaluate(column: pd.Series, text: str) -> pd.Series:
+        values = column.astype("string")
+        if name == "startswith":
+            matched = values.str.startswith(text)
+        else:
+            matched = values.str.contains(text, regex=False)
+        return matched.fillna(False).astype(bool)
+
+    return evaluate
+
+
+class _Compiler:
+    def __init__(self, aliases: Dict[str, str]) -> None:
+        self.aliases = aliases
+        self.columns: List[str] = []
+
+    def compile(self, node: ast.AST) -> Evaluator:
+        method = getattr(self, f"_{type(node).__name__}", None)
+        if method is None:
+            raise ScreenError(f"unsupported syntax: {type(node).__name__}")
+        return method(node)
+
+    def _Expression(self, node: ast.Expression) -> Evaluator:
+        return self.compile(node.body)
+
+    def _Name(self, node: ast.Name) -> Evaluator:
+        column = self.aliases.get(node.id, node.id)
+        if column not in self.columns:
+            self.columns.append(column)
+        return lambda df: df[column]
+
+    def _Constant(self, node: ast.Constant) -> Evaluator:
+        value = node.value
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ScreenError(f"unsupported literal: {value!r}")
+        return lambda df: value
+
+    def _UnaryOp(self, node: ast.UnaryOp) -> Evaluator:
+        operand = self.compile(node.operand)
+        if isinstance(node.op, ast.Not):
+            return lambda df: ~_as_mask(operand(df), df)
+        if isinstance(node.op, ast.USub):
+            return lambda df: -_numeric(operand(df))
+        if isinstance(node.op, ast.UAdd):
+            return lambda df: _numeric(operand(df))
+        raise ScreenError(f"unsupported operator: {type(node.op).__name__}")
+
+    def _BinOp(self, node: ast.BinOp) -> Evaluator:
+        op = _ARITH_OPS.get(type(node.op))
+        if op is None:
+            raise ScreenError(f"unsupported operator: {type(node.op).__name__}")
+        left, right = self.compile(node.left), self.compile(node.right)
+
+        def evaluate(df: pd.DataFrame) -> Any:
+            a, b = _numeric(left(df)), _numeric(right(df))
+            if isinstance(a, str) or isinstance(b, str):
+                raise ScreenError("arithmetic on strings is not supported")
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result = op(a, b)
+            # 除以 0 得到的 inf 视为空值
+            return result.replace([np.inf, -np.inf], np.nan) if isinstance(result, pd.Series) else result
+
+        return evaluate
+
+    def _BoolOp(self, node: ast.BoolOp) -> Evaluator:
+        parts = [self.compile(value) for value in node.values]
+        combine = operator.and_ if isinstance(node.op, ast.And) else operator.or_
+
+        def evaluate(df: pd.DataFrame) -> pd.Series:
+            mask = _as_mask(parts[0](df), df)
+            for part in parts[1:]:
+                mask = combine(mask, _as_mask(part(df), df))
+            return mask
+
+        return evaluate
+
+    def _Compare(self, node: ast.Compare) -> Evaluator:
+        ops = []
+        for op in node.ops:
+            fn = _COMPARE_OPS.get(type(op))
+            if fn is None:
+                raise ScreenError(f"unsupported comparison: {type(op).__name__}")
+            ops.append(fn)
+        operands = [self.compile(node.left)] + [self.compile(c) for c in node.comparators]
+
+        def evaluate(df: pd.DataFrame) -> pd.Series:
+            values = [operand(df) for operand in operands]
+            mask = None
+            for i, fn in enumerate(ops):
+                part = _as_mask(_compare(fn, values[i], values[i + 1]), df)
+                mask = part if mask is None else mask & part
+            return mask
+
+        return evaluate
+
+    def _Call(self, node: ast.Call) -> Evaluator:
+        name = node.func.id if isinstance(node.func, ast.Name) else None
+        if node.keywords or name not in ("abs", "startswith", "contains"):
+            raise ScreenError("supported functions: abs(x), startswith(column, text), contains(column, text)")
+        args = [self.compile(arg) for arg in node.args]
+        if name == "abs":
+            if len(args) != 1:
+                raise ScreenError("abs() takes exactly one argument")
+            return lambda df: abs(_numeric(args[0](df)))
+        if len(args) != 2 or not isinstance(node.args[1], ast.Constant) or not isinstance(node.args[1].value, str):
+            raise ScreenError(f"{name}() takes a column and a string, e.g. {name}(代码, \"300\")")
+        text = node.args[1].value
+        column, evaluate = args[0], _text_function(name)
+        return lambda df: evaluate(column(df), text)
+
+
+@lru_cache(maxsize=256)
+def compile_expression(expression: str) -> Tuple[Evaluator, Tuple[str, ...]]:
+    """
+    校验并编译筛选表达式（结果按表达式文本缓存）。
+
+    Args:
+        expression: 筛选表达式，见模块说明
+
+    Returns:
+        (求值函数, 表达式引用的列名)
+
+    Raises:
+        ScreenError: 表达式过长、语法错误或使用了不支持的语法
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ScreenError(f"expression longer than {MAX_EXPRESSION_LENGTH} characters")
+    aliases: Dict[str, str] = {}
+
+    def _alias(match: "re.Match[str]") -> str:
+        name = f"__col{len(aliases)}__"
+        aliases[name] = match.group(1)
+        return name
+
+    source = _BACKTICK.sub(_alias, expression.strip())
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as e:
+        raise ScreenError(f"invalid expression: {e.msg}") from None
+    if sum(1 for _ in ast.walk(tree)) > MAX_EXPRESSION_NODES:
+        raise ScreenError(f"expression has more than {MAX_EXPRESSION_NODES} nodes")
+    compiler = _Compiler(aliases)
+    evaluator = compiler.compile(tree)
+    return evaluator, tuple(compiler.columns)
+
+
+def _parse_sort(sort_by: Sequence[str], columns: Sequence[str]) -> Tuple[List[str], List[bool]]:
+    names, ascending = [], []
+    for key in sort_by:
+        descending = key.startswith("-")
+        name = key[1:] if descending else key
+        if name not in columns:
+            raise ScreenError(f"unknown sort column: {name}")
+        names.append(name)
+        ascending.append(not descending)
+    return names, ascending
+
+
+def screen(
+    df: pd.DataFrame,
+    where: str = "",
+    sort_by: Union[str, Sequence[str]] = (),
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> Tuple[pd.DataFrame, int]:
+    """
+    对行情快照做筛选、排序与分页（全部为向量化运算）。
+
+    Args:
+        df: 行情快照
+        where: 筛选表达式，为空表示不筛选
+        sort_by: 排序列（列表或逗号分隔的字符串），列名前加 "-" 表示降序；空值排在最后
+        limit: 最多返回的行数，None 表示不限制
+        offset: 起始行下标
+
+    Returns:
+        (本页 DataFrame, 匹配的总行数)
+
+    Raises:
+        ScreenError: 表达式不合法或引用了不存在的列
+    """
+    if limit is not None and limit < 0:
+        raise ScreenError(f"limit must be >= 0, got {limit}")
+    if offset < 0:
+        raise ScreenError(f"offset must be >= 0, got {offset}")
+    if isinstance(sort_by, str):
+        sort_by = [key.strip() for key in sort_by.split(",") if key.strip()]
+    if where.strip():
+        evaluate, referenced = compile_expression(where)
+        unknown = [name for name in referenced if name not in df.columns]
+        if unknown:
+            raise ScreenError(f"unknown columns: {', '.join(unknown)}; available: {', '.join(map(str, df.columns))}")
+        df = df.loc[_as_mask(evaluate(df), df).to_numpy()]
+    total = len(df)
+    if sort_by:
+        names, ascending = _parse_sort(sort_by, list(df.columns))
+        try:
+            df = df.sort_values(names, ascending=ascending, na_position="last", kind="stable")
+        except TypeError:
+            raise ScreenError(f"cannot sort by mixed-type columns: {', '.join(names)}") from None
+    stop = None if limit is None else offset + limit
+    return df.iloc[offset:stop], total
@@ -0,0 +1,273 @@
+# shm_cache.py
+"""
+共享内存缓存层：多个 MCP worker 进程共享热点结果（如全市场 A 股快照）。
+
+每个条目占用一个 POSIX 共享内存段（multiprocessing.shared_memory），段名由缓存目录与缓存 key 决定，
+内容为 32 字节头部（魔数、状态、过期时间、写入时间、长度）+ 序列化后的条目。
+- 写入：新建段并写完内容后才把状态置为 READY；同名旧段先标记为 STALE 再删除名字，
+  已映射旧段的进程看到 STALE 后重新打开
+- 读取：各进程保留段的映射，并按写入时间记住解码结果，同一版本在每个进程只解码一次，
+  之后的读取不再访问文件、不再复制或解析数据。共享的只是编码后的字节，解码结果由每个进程各自持有一份
+- 共享内存段不随进程退出删除（它是跨进程缓存），过期段由 sweep() 清理
+"""
+import hashlib
+import json
+import logging
+import math
+import struct
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import cache_namespace
+
+logger = logging.getLogger(__name__)
+
+# 魔数、状态、过期时间（inf 表示永不过期）、写入时间、内容长度
+_HEADER = struct.Struct("<4sIddQ")
+_MAGIC = b"AKS1"
+_WRITING, _READY, _STALE = 0, 1, 2
+_STATE_OFFSET = 4
+# 段名前缀；macOS 段名最长 31 字符，因此只取缓存目录与 key 的哈希前缀
+_PREFIX = "akmcp_"
+_SHM_DIR = Path("/dev/shm")
+# Python 3.13+ 可直接关闭 resource_tracker 跟踪，旧版本需手动取消登记
+_HAS_TRACK_PARAM = sys.version_info >= (3, 13)
+
+_lock = threading.Lock()
+_enabled = False
+_max_entry_bytes = 64 << 20
+# 段名 -> 已映射的共享内存段
+_handles: Dict[str, SharedMemory] = {}
+# 段名 -> (写入时间, 已解码的条目)
+_memo: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+
+def enable(max_entry_bytes: int = 64 << 20) -> None:
+    """
+    启用共享内存缓存层（需在各 worker 进程中分别调用）。
+
+    Args:
+        max_entry_bytes: 单个条目序列化后的最大字节数，超过则不放入共享内存
+    """
+    global _enabled, _max_entry_bytes
+    _enabled = True
+    _max_entry_bytes = int(max_entry_bytes)
+    logger.info("shm_cache enabled: max %s bytes per entry", _max_entry_bytes)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def _root_digest(cache_dir: Path) -> str:
+    return hashlib.sha256(str(Path(cache_dir).resolve()).encode()).hexdigest()[:8]
+
+
+def segment_name(cache_dir: Path, key: str) -> str:
+    """共享内存段名：前缀 + 缓存目录哈希 + key 前 16 位（共 31 字符）"""
+    return f"{_PREFIX}{_root_digest(cache_dir)}_{key[:16]}"
+
+
+def _open(name: str, create: bool = False, size: int = 0) -> SharedMemory:
+    """打开或创建共享内存段，且不交给 resource_tracker（否则进程退出时会删除其他进程仍在用的段）。"""
+    if _HAS_TRACK_PARAM:
+        return SharedMemory(name=name, create=create, size=size, track=False)
+    shm = SharedMemory(name=name, create=create, size=size)
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+def _unlink(shm: SharedMemory) -> None:
+    if not _HAS_TRACK_PARAM:
+        # unlink() 会向 resource_tracker 取消登记，先补登记以保持对称
+        resource_tracker.register(shm._name, "shared_memory")
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _close(name: str) -> None:
+    shm = _handles.pop(name, None)
+    _memo.pop(name, None)
+    if shm is not None:
+        try:
+            shm.close()
+        except BufferError:
+            pass
+
+
+def get(cache_dir: Path, tool: str, key: str) -> Optional[dict]:
+    """
+    从共享内存读取缓存结果。
+
+    Args:
+        cache_dir: 缓存根目录（决定段名空间）
+        tool: 工具名（用于失效规则）
+        key: 缓存 key
+
+    Returns:
+        缓存的 result 字典（同一进程内多次读取返回同一对象，不应修改），或 None
+    """
+    if not _enabled:
+        return None
+    name = segment_name(cache_dir, key)
+    raw = None
+    with _lock:
+        shm = _handles.get(name)
+        if shm is not None and struct.unpack_from("<I", shm.buf, _STATE_OFFSET)[0] != _READY:
+            _close(name)
+            shm = None
+        if shm is None:
+            try:
+                shm = _open(name)
+            except (FileNotFoundError, OSError, ValueError):
+                return None
+            _handles[name] = shm
+        try:
+            magic, state, expires_at, created_at, length = _HEADER.unpack_from(shm.buf, 0)
+        except struct.error:
+            _close(name)
+            return None
+        if magic != _MAGIC or state != _READY or time.time() > expires_at:
+            _close(name)
+            return None
+        memo = _memo.get(name)
+        if memo is None or memo[0] != created_at:
+            raw = bytes(shm.buf[_HEADER.size : _HEADER.size + length])
+        else:
+            entry = memo[1]
+    if raw is not None:
+        try:
+            entry = json.loads(raw)
+        except ValueError:
+            return None
+        with _lock:
+            _memo[name] = (created_at, entry)
+    if entry.get("key") != key:
+        return None
+    if cache_namespace.is_invalidated(cache_namespace.load_rules(cache_dir), tool, entry):
+        return None
+    return entry.get("result")
+
+
+def put(cache_dir: Path, key: str, entry: Dict[str, Any]) -> bool:
+    """
+    将缓存条目写入共享内存（替换同 key 的旧段）。
+
+    Args:
+        cache_dir: 缓存根目录
+        key: 缓存 key
+        entry: file_cache 条目（expires_at / created_at / schema / partition / result）
+
+    Returns:
+        是否写入成功
+    """
+    if not _enabled:
+        return False
+    stored = {**entry, "key": key}
+    try:
+        raw = json.dumps(stored, ensure_ascii=False, default=str).encode("utf-8")
+    except (TypeError, ValueError) as e:
+        logger.debug("shm_cache put %s: %s", key, e)
+        return False
+    if len(raw) > _max_entry_bytes:
+        return False
+    expires_at = entry.get("expires_at")
+    expires_at = math.inf if expires_at is None else float(expires_at)
+    created_at = float(entry.get("created_at") or time.time())
+    name = segment_name(cache_dir, key)
+    with _lock:
+        _close(name)
+        try:
+            old = _open(name)
+        except FileNotFoundError:
+            old = None
+        except (OSError, ValueError):
+            return False
+        if old is not None:
+            try:
+                struct.pack_into("<I", old.buf, _STATE_OFFSET, _STALE)
+            except struct.error:
+                pass
+            _unlink(old)
+            old.close()
+        try:
+            shm = _open(name, create=True, size=_HEADER.size + len(raw))
+        except FileExistsError:
+            # 其他进程同时写入同一条目，以对方为准
+            return False
+        except OSError as e:
+            logger.warning("shm_cache put %s: %s", name, e)
+            return False
+        _HEADER.pack_into(shm.buf, 0, _MAGIC, _WRITING, expires_at, created_at, len(raw))
+        shm.buf[_HEADER.size : _HEADER.size + len(raw)] = raw
+        struct.pack_into("<I", shm.buf, _STATE_OFFSET, _READY)
+        _handles[name] = shm
+        _memo[name] = (created_at, stored)
+    return True
+
+
+def sweep(cache_dir: Path) -> int:
+    """
+    删除属于该缓存目录的已过期或损坏的共享内存段（仅支持 /dev/shm 可列目录的系统）。
+
+    Returns:
+        删除的段数量
+    """
+    if not _SHM_DIR.is_dir():
+        return 0
+    prefix = f"{_PREFIX}{_root_digest(cache_dir)}_"
+    removed = 0
+    now = time.time()
+    for path in _SHM_DIR.iterdir():
+        if not path.name.startswith(prefix):
+            continue
+        try:
+            shm = _open(path.name)
+        except (FileNotFoundError, OSError, ValueError):
+            continue
+        try:
+            magic, state, expires_at, _, _ = _HEADER.unpack_from(shm.buf, 0)
+            stale = magic != _MAGIC or state == _STALE or now > expires_at
+        except struct.error:
+            stale = True
+        if stale:
+            with _lock:
+                _close(path.name)
+            try:
+                struct.pack_into("<I", shm.buf, _STATE_OFFSET, _STALE)
+            except struct.error:
+                pass
+            _unlink(shm)
+            removed += 1
+        shm.close()
+    return removed
+
+
+def clear(cache_dir: Path) -> int:
+    """删除属于该缓存目录的全部共享内存段（测试与停机清理用），返回删除数量。"""
+    if not _SHM_DIR.is_dir():
+        return 0
+    prefix = f"{_PREFIX}{_root_digest(cache_dir)}_"
+    removed = 0
+    for path in _SHM_DIR.iterdir():
+        if path.name.startswith(prefix):
+            with _lock:
+                _close(path.name)
+            try:
+                shm = _open(path.name)
+            except (FileNotFoundError, OSError, ValueError):
+                continue
+            _unlink(shm)
+            shm.close()
+            removed += 1
+    return removed
@@ -0,0 +1,75 @@
+# spot_views.py
+"""
+板块行情派生视图：沪A、深A、京A、创业板、科创板行情都是沪深京 A 股全市场快照的子集，
+可按股票代码前缀从同一份快照中筛选，不必分别请求上游。
+
+启用条件：设置 CACHE_DIR（全市场快照由 DataFrame 缓存保存）且 CACHE_DERIVED_SPOT_VIEWS 未关闭。
+一个刷新周期内多次查询不同板块只请求一次 stock_zh_a_spot_em。
+"""
+import re
+from typing import Dict
+
+import pandas as pd
+
+import frame_cache
+from akshare_client import call_aktools_api
+
+FULL_SPOT_ENDPOINT = "/api/public/stock_zh_a_spot_em"
+
+# 板块 -> 代码前缀（与东方财富各板块页面的市场划分一致）
+BOARD_PREFIXES: Dict[str, tuple] = {
+    "sh": ("600", "601", "603", "605", "688", "689"),
+    "sz": ("000", "001", "002", "003", "300", "301"),
+    "bj": ("43", "83", "87", "88", "92"),
+    "cy": ("300", "301"),
+    "kc": ("688", "689"),
+}
+
+_BOARD_PATTERNS = {
+    board: re.compile("^(?:" + "|".join(prefixes) + ")") for board, prefixes in BOARD_PREFIXES.items()
+}
+
+
+def derived_enabled() -> bool:
+    """是否从全市场快照派生板块行情。"""
+    import config
+
+    return config.CACHE_DERIVED_SPOT_VIEWS and frame_cache.cache_root() is not None
+
+
+def select_board(df: pd.DataFrame, board: str) -> pd.DataFrame:
+    """
+    从全市场快照中按代码前缀筛选板块行情（向量化），并重新编号"序号"列。
+
+    Args:
+        df: stock_zh_a_spot_em 返回的全市场快照
+        board: 板块，见 BOARD_PREFIXES
+
+    Returns:
+        板块行情 DataFrame（新对象，不影响 df）
+    """
+    mask = df["代码"].astype(str).str.match(_BOARD_PATTERNS[board])
+    view = df.loc[mask].reset_index(drop=True)
+    if "序号" in view.columns:
+        view["序号"] = range(1, len(view) + 1)
+    return view
+
+
+def board_spot(board: str) -> pd.DataFrame:
+    """
+    获取板块实时行情：启用派生视图时从（已缓存的）全市场快照筛选，否则请求板块专用接口。
+
+    Args:
+        board: 板块，可选 sh / sz / bj / cy / kc
+
+    Returns:
+        pandas.DataFrame: 板块实时行情
+    """
+    endpoint = f"/api/public/stock_{board}_a_spot_em"
+    if not derived_enabled():
+        return call_aktools_api(endpoint)
+    full = call_aktools_api(FULL_SPOT_ENDPOINT)
+    if full.empty or "代码" not in full.columns:
+        # 全市场快照不可用时退回板块接口
+        return call_aktools_api(endpoint)
+    return select_board(full, board)
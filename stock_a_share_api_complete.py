@@ -8,6 +8,7 @@ AKTools API调用 - A股数据接口完整汇总
 import requests
 import pandas as pd
 from akshare_client import call_aktools_api
+from spot_views import board_spot
 
 
 # =============================================================================
@@ -263,7 +264,7 @@ def stock_sh_a_spot_em():
     
     返回类型: pandas.DataFrame
     """
-    return call_aktools_api("/api/public/stock_sh_a_spot_em")
+    return board_spot("sh")
 
 
 def stock_sz_a_spot_em():
@@ -283,7 +284,7 @@ def stock_sz_a_spot_em():
     
     返回类型: pandas.DataFrame
     """
-    return call_aktools_api("/api/public/stock_sz_a_spot_em")
+    return board_spot("sz")
 
 
 def stock_bj_a_spot_em():
@@ -303,7 +304,7 @@ def stock_bj_a_spot_em():
     
     返回类型: pandas.DataFrame
     """
-    return call_aktools_api("/api/public/stock_bj_a_spot_em")
+    return board_spot("bj")
 
 
 def stock_new_a_spot_em():
@@ -343,7 +344,7 @@ def stock_cy_a_spot_em():
     
     返回类型: pandas.DataFrame
     """
-    return call_aktools_api("/api/public/stock_cy_a_spot_em")
+    return board_spot("cy")
 
 
 def stock_kc_a_spot_em():
@@ -363,7 +364,7 @@ def stock_kc_a_spot_em():
     
     返回类型: pandas.DataFrame
     """
-    return call_aktools_api("/api/public/stock_kc_a_spot_em")
+    return board_spot("kc")
 
 
 def stock_zh_ab_comparison_em():
@@ -471,7 +472,6 @@ def stock_zh_a_hist(symbol, period="daily", start_date="", end_date="", adjust="
     
     返回类型: pandas.DataFrame
     """
-    url = "http://127.0.0.1:8080/api/public/stock_zh_a_hist"
     params = {
         "symbol": symbol,
         "period": period,
@@ -481,15 +481,7 @@ def stock_zh_a_hist(symbol, period="daily", start_date="", end_date="", adjust="
     }
     if timeout is not None:
         params["timeout"] = timeout
-    
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        return pd.DataFrame(data)
-    except requests.exceptions.RequestException as e:
-        print(f"请求失败: {e}")
-        return pd.DataFrame()
+    return call_aktools_api("/api/public/stock_zh_a_hist", params=params)
 
 
 def stock_zh_a_daily(symbol, start_date, end_date, adjust=""):
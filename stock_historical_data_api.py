@@ -46,7 +46,6 @@ def stock_zh_a_hist(symbol, period="daily", start_date="", end_date="", adjust="
     
     返回类型: pandas.DataFrame
     """
-    url = "http://127.0.0.1:8080/api/public/stock_zh_a_hist"
     params = {
         "symbol": symbol,
         "period": period,
@@ -56,15 +55,7 @@ def stock_zh_a_hist(symbol, period="daily", start_date="", end_date="", adjust="
     }
     if timeout is not None:
         params["timeout"] = timeout
-    
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        return pd.DataFrame(data)
-    except requests.exceptions.RequestException as e:
-        print(f"请求失败: {e}")
-        return pd.DataFrame()
+    return call_aktools_api("/api/public/stock_zh_a_hist", params=params)
 
 
 def stock_zh_a_daily(symbol, start_date, end_date, adjust=""):
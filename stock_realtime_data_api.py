@@ -7,6 +7,7 @@ AKTools API调用 - 实时行情数据相关接口
 import requests
 import pandas as pd
 from akshare_client import call_aktools_api
+from spot_views import board_spot
 
 
 def stock_zh_a_spot_em():
@@ -70,7 +71,7 @@ def stock_sh_a_spot_em():
     
     返回类型: pandas.DataFrame
     """
-    return call_aktools_api("/api/public/stock_sh_a_spot_em")
+    return board_spot("sh")
 
 
 def stock_sz_a_spot_em():
@@ -90,7 +91,7 @@ def stock_sz_a_spot_em():
     
     返回类型: pandas.DataFrame
     """
-    return call_aktools_api("/api/public/stock_sz_a_spot_em")
+    return board_spot("sz")
 
 
 def stock_bj_a_spot_em():
@@ -110,7 +111,7 @@ def stock_bj_a_spot_em():
     
     返回类型: pandas.DataFrame
     """
-    return call_aktools_api("/api/public/stock_bj_a_spot_em")
+    return board_spot("bj")
 
 
 def stock_new_a_spot_em():
@@ -150,7 +151,7 @@ def stock_cy_a_spot_em():
     
     返回类型: pandas.DataFrame
     """
-    return call_aktools_api("/api/public/stock_cy_a_spot_em")
+    return board_spot("cy")
 
 
 def stock_kc_a_spot_em():
@@ -170,7 +171,7 @@ def stock_kc_a_spot_em():
     
     返回类型: pandas.DataFrame
     """
-    return call_aktools_api("/api/public/stock_kc_a_spot_em")
+    return board_spot("kc")
 
 
 def stock_zh_ab_comparison_em():
@@ -0,0 +1,173 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from admission import AdmissionController, Limiter, Overloaded, parse_limits
+from tool_executor import ToolExecutor, require_upstream
+
+
+class LimiterTests(unittest.TestCase):
+    def test_waiters_get_released_slots_in_order(self) -> None:
+        limiter = Limiter("tool:x", limit=1, max_queue=4)
+        order = []
+
+        async def scenario() -> None:
+            deadline = time.monotonic() + 5
+            await limiter.acquire(deadline)
+
+            async def waiter(i: int) -> None:
+                await limiter.acquire(deadline)
+                order.append(i)
+                limiter.release(0.01)
+
+            tasks = [asyncio.ensure_future(waiter(i)) for i in range(3)]
+            await asyncio.sleep(0.01)
+            self.assertEqual(limiter.stats()["waiting"], 3)
+            limiter.release(0.01)
+            await asyncio.gather(*tasks)
+
+        asyncio.run(scenario())
+        self.assertEqual(order, [0, 1, 2])
+        self.assertEqual((limiter.active, limiter.stats()["waiting"]), (0, 0))
+
+    def test_full_queue_is_rejected_immediately(self) -> None:
+        limiter = Limiter("tool:x", limit=1, max_queue=0)
+
+        async def scenario() -> Overloaded:
+            await limiter.acquire(time.monotonic() + 5)
+            started = time.monotonic()
+            with self.assertRaises(Overloaded) as ctx:
+                await limiter.acquire(time.monotonic() + 5)
+            self.assertLess(time.monotonic() - started, 0.1)
+            return ctx.exception
+
+        error = asyncio.run(scenario())
+        response = error.response()
+        self.assertEqual((response["success"], response["error"]), (False, "overloaded"))
+        self.assertGreaterEqual(response["retry_after"], 1)
+        self.assertEqual(limiter.rejected, 1)
+
+    def test_estimated_wait_beyond_deadline_is_rejected_without_waiting(self) -> None:
+        limiter = Limiter("source:eastmoney", limit=1, max_queue=10)
+        limiter.avg_hold = 8.0
+
+        async def scenario() -> Overloaded:
+            await limiter.acquire(time.monotonic() + 5)
+            with self.assertRaises(Overloaded) as ctx:
+                await limiter.acquire(time.monotonic() + 5)
+            return ctx.exception
+
+        error = asyncio.run(scenario())
+        self.assertEqual(error.retry_after, 8)
+        self.assertIn("estimated wait", str(error))
+
+    def test_wait_past_deadline_times_out_and_leaves_queue(self) -> None:
+        limiter = Limiter("tool:x", limit=1, max_queue=4)
+
+        async def scenario() -> None:
+            await limiter.acquire(time.monotonic() + 5)
+            with self.assertRaises(Overloaded):
+                await limiter.acquire(time.monotonic() + 0.05)
+            self.assertEqual(limiter.stats()["waiting"], 0)
+            limiter.release()
+
+        asyncio.run(scenario())
+        self.assertEqual(limiter.active, 0)
+
+
+class ControllerTests(unittest.TestCase):
+    def test_source_limit_is_shared_and_tool_slot_is_returned_on_rejection(self) -> None:
+        controller = AdmissionController(tool_limit=4, source_limit=1, max_queue=0, overrides={"b": 2})
+        first, second = controller.gate("a", "em"), controller.gate("b", "em")
+
+        async def scenario() -> None:
+            async with first.admit():
+                with self.assertRaises(Overloaded) as ctx:
+                    async with second.admit():
+                        pass
+                self.assertEqual(ctx.exception.limiter, "source:em")
+            self.assertEqual(second.limiters[0].active, 0)
+            self.assertEqual(second.limiters[0].limit, 2)
+
+        asyncio.run(scenario())
+        self.assertEqual(controller.stats()["source:em"]["rejected"], 1)
+
+    def test_parse_limits(self) -> None:
+        self.assertEqual(parse_limits("stock_zh_a_hist=2, eastmoney=6,"), {"stock_zh_a_hist": 2, "eastmoney": 6})
+        with self.assertRaises(ValueError):
+            parse_limits("eastmoney")
+
+
+class ExecutorAdmissionTests(unittest.TestCase):
+    def test_upstream_calls_are_shed_but_cache_hits_are_not(self) -> None:
+        executor = ToolExecutor(fast_workers=2, slow_workers=4)
+        gate = AdmissionController(tool_limit=1, max_queue=0).gate("hist")
+        release = threading.Event()
+
+        def hist(cached: bool = False) -> dict:
+            if not cached:
+                require_upstream()
+                release.wait(5)
+            return {"success": True, "cached": cached}
+
+        handler = executor.wrap(hist, gate=gate)
+
+        async def scenario() -> tuple:
+            slow = asyncio.ensure_future(handler())
+            await asyncio.sleep(0.05)
+            rejected = await handler()
+            hit = await handler(cached=True)
+            release.set()
+            return await slow, rejected, hit
+
+        try:
+            slow, rejected, hit = asyncio.run(scenario())
+        finally:
+            executor.shutdown()
+        self.assertEqual(slow, {"success": True, "cached": False})
+        self.assertEqual(rejected["error"], "overloaded")
+        self.assertEqual(hit, {"success": True, "cached": True})
+        self.assertEqual(executor.stats()["rejected"], 1)
+
+    def test_cancelled_call_keeps_its_slot_until_the_thread_finishes(self) -> None:
+        executor = ToolExecutor(fast_workers=1, slow_workers=2)
+        controller = AdmissionController(tool_limit=1, max_queue=0)
+        gate = controller.gate("hist")
+        started = threading.Event()
+        release = threading.Event()
+
+        def hist() -> dict:
+            require_upstream()
+            started.set()
+            release.wait(5)
+            return {"success": True}
+
+        handler = executor.wrap(hist, gate=gate)
+
+        async def scenario() -> tuple:
+            task = asyncio.ensure_future(handler())
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            # 调用方已取消，线程仍在执行：名额未归还，新调用被拒绝
+            during = (controller.stats()["tool:hist"]["active"], await handler())
+            release.set()
+            for _ in range(100):
+                if not controller.stats()["tool:hist"]["active"]:
+                    break
+                await asyncio.sleep(0.01)
+            return during, await handler()
+
+        try:
+            (active, rejected), after = asyncio.run(scenario())
+        finally:
+            executor.shutdown()
+        self.assertEqual(active, 1)
+        self.assertEqual(rejected["error"], "overloaded")
+        self.assertEqual(after, {"success": True})
+
+
+if __name__ == "__main__":
+    unittest.main()
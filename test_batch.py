@@ -0,0 +1,164 @@
+import asyncio
+import tempfile
+import threading
+import time
+import unittest
+from functools import partial
+from pathlib import Path
+from unittest.mock import patch
+
+import cache_stats
+from admission import AdmissionController
+from batch import BatchRunner, parse_symbols
+from file_cache import file_cached
+from tool_executor import ToolExecutor
+
+
+class ParseSymbolsTests(unittest.TestCase):
+    def test_dedupes_and_keeps_order(self) -> None:
+        self.assertEqual(parse_symbols(["600000", " 000001", "600000"], 10), ["600000", "000001"])
+        self.assertEqual(parse_symbols("600000,000001,", 10), ["600000", "000001"])
+
+    def test_rejects_empty_and_oversized_lists(self) -> None:
+        with self.assertRaises(ValueError):
+            parse_symbols([], 10)
+        with self.assertRaises(ValueError):
+            parse_symbols(["1", "2", "3"], 2)
+
+
+class BatchRunnerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        cache_stats.reset()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.calls = []
+        self.lock = threading.Lock()
+
+        @file_cached(ttl_seconds=60, cache_dir=Path(self._tmp.name))
+        def info_tool(symbol: str, period: str = "daily") -> dict:
+            with self.lock:
+                self.calls.append(symbol)
+            if symbol == "BAD":
+                return {"success": False, "message": "Error: no data", "rows": 0, "columns": [], "data": []}
+            return {"success": True, "rows": 1, "columns": ["代码"], "data": [{"代码": symbol, "周期": period}]}
+
+        self.info_tool = info_tool
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+        cache_stats.reset()
+
+    def test_hits_come_from_cache_and_errors_are_per_symbol(self) -> None:
+        self.info_tool("600000", period="weekly")
+        runner = BatchRunner(concurrency=2, rate_per_second=0)
+        result = runner.run(self.info_tool, ["600000", "000001", "BAD"], period="weekly")
+        self.assertTrue(result["success"])
+        self.assertEqual((result["symbols"], result["cached"]), (3, 1))
+        self.assertEqual(list(result["results"]), ["600000", "000001"])
+        self.assertEqual(result["results"]["000001"]["data"][0]["周期"], "weekly")
+        self.assertEqual(result["errors"], {"BAD": "Error: no data"})
+        self.assertEqual(sorted(self.calls), ["000001", "600000", "BAD"])
+
+    def test_reports_progress_for_each_fetched_symbol(self) -> None:
+        self.info_tool("600000")
+        reports = []
+        with patch("progress._reporter") as reporter:
+            reporter.get.return_value = lambda *args: reports.append(args)
+            BatchRunner(concurrency=1, rate_per_second=0).run(self.info_tool, ["600000", "000001", "000002"])
+        self.assertEqual([r[:2] for r in reports], [(1, 3), (2, 3), (3, 3)])
+        self.assertEqual({r[2] for r in reports[1:]}, {"000001", "000002"})
+
+    def test_upstream_calls_wait_for_rate_limiter(self) -> None:
+        runner = BatchRunner(concurrency=4, rate_per_second=0.001, burst=2, acquire_timeout=0)
+        result = runner.run(self.info_tool, ["1", "2", "3", "4"])
+        self.assertEqual(len(result["results"]), 2)
+        self.assertEqual(len(result["errors"]), 2)
+        self.assertEqual(len(self.calls), 2)
+        self.assertIn("rate limited", next(iter(result["errors"].values())))
+
+    def test_executor_serves_cached_batch_on_fast_pool_and_counts_stats_once(self) -> None:
+        self.info_tool("600000")
+        runner = BatchRunner(rate_per_second=0)
+        executor = ToolExecutor(fast_workers=1, slow_workers=1)
+        try:
+            hit = asyncio.run(executor.run(runner.run, self.info_tool, ["600000"]))
+            mixed = asyncio.run(executor.run(runner.run, self.info_tool, ["600000", "000001"]))
+        finally:
+            executor.shutdown()
+        self.assertEqual(hit["cached"], 1)
+        self.assertEqual(mixed["cached"], 1)
+        self.assertEqual(executor.stats()["fast"], 1)
+        self.assertEqual(executor.stats()["fallbacks"], 1)
+        stats = cache_stats.snapshot("info_tool")["tools"]["info_tool"]
+        # 预热 1 次未命中 + 两次批量各命中 600000 一次 + 000001 未命中一次；被放弃的快速池探测不计入
+        self.assertEqual((stats["hits"], stats["misses"], stats["upstream_calls"]), (2, 2, 2))
+
+    def test_aggregate_budget_returns_remaining_symbols_as_pending(self) -> None:
+        self.info_tool("000001")
+        runner = BatchRunner(concurrency=2, rate_per_second=0)
+        with patch("config.MCP_MAX_RESPONSE_ROWS", 2):
+            first = runner.run(self.info_tool, ["600000", "000001", "BAD", "000002", "000003"])
+            rest = runner.run(self.info_tool, first["pending"])
+        self.assertEqual(list(first["results"]), ["600000", "000001"])
+        self.assertEqual(first["pending"], ["000002", "000003"])
+        self.assertEqual(first["errors"], {"BAD": "Error: no data"})
+        self.assertTrue(first["truncated"])
+        # 未返回的代码已写入缓存，再次调用全部命中
+        self.assertEqual((rest["cached"], list(rest["results"])), (2, ["000002", "000003"]))
+        self.assertNotIn("pending", rest)
+
+    def test_misses_share_one_pool_and_take_the_single_tool_slot(self) -> None:
+        active = {"now": 0, "max": 0}
+        threads = set()
+
+        @file_cached(ttl_seconds=60, cache_dir=Path(self._tmp.name))
+        def slow_tool(symbol: str) -> dict:
+            with self.lock:
+                active["now"] += 1
+                active["max"] = max(active["max"], active["now"])
+                threads.add(threading.current_thread().name)
+            time.sleep(0.02)
+            with self.lock:
+                active["now"] -= 1
+            return {"success": True, "rows": 1, "columns": ["代码"], "data": [{"代码": symbol}]}
+
+        controller = AdmissionController(tool_limit=1, source_limit=8)
+        gate = controller.gate("slow_tool", "eastmoney")
+        runner = BatchRunner(concurrency=4, rate_per_second=0)
+        executor = ToolExecutor(fast_workers=1, slow_workers=2)
+        try:
+            first = asyncio.run(executor.run(partial(runner.run, gate=gate), slow_tool, ["1", "2", "3", "4"]))
+            second = asyncio.run(executor.run(partial(runner.run, gate=gate), slow_tool, ["5", "6"]))
+        finally:
+            executor.shutdown()
+        self.assertEqual((len(first["results"]), len(second["results"])), (4, 2))
+        # 批量线程池的 4 个线程共用单个查询工具的 1 个名额
+        self.assertEqual(active["max"], 1)
+        self.assertTrue(threads <= {f"mcp-batch_{i}" for i in range(4)})
+        stats = controller.stats()
+        self.assertEqual(stats["tool:slow_tool"]["active"], 0)
+        self.assertIsNotNone(stats["source:eastmoney"]["avg_hold_ms"])
+
+    def test_overloaded_symbols_are_reported_per_symbol(self) -> None:
+        controller = AdmissionController(tool_limit=1, max_queue=0)
+        gate = controller.gate("info_tool")
+
+        async def call() -> dict:
+            held = await gate.acquire()
+            try:
+                executor = ToolExecutor(fast_workers=1, slow_workers=1)
+                try:
+                    runner = BatchRunner(rate_per_second=0)
+                    return await executor.run(partial(runner.run, gate=gate), self.info_tool, ["1", "2"])
+                finally:
+                    executor.shutdown()
+            finally:
+                gate.release(held)
+
+        result = asyncio.run(call())
+        self.assertFalse(result["success"])
+        self.assertIn("overloaded", result["errors"]["1"])
+        self.assertEqual(self.calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+
+import frame_cache
+from cache_cleaner import IncrementalCleaner, iter_cache_files
+from file_cache import _cache_key, get, set
+
+
+class IncrementalCleanerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp.name)
+        with patch("file_cache.time.time", return_value=1000.0):
+            for i in range(5):
+                set(self.cache_dir, "tool_a", (f"s{i}",), {}, 10, {"success": True})
+        set(self.cache_dir, "tool_a", ("fresh",), {}, 3600, {"success": True})
+        with patch("frame_cache.time.time", return_value=1000.0):
+            frame_cache.set(self.cache_dir, "/api/public/stock_zh_a_spot_em", None, pd.DataFrame({"a": [1]}), 10)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _remaining(self) -> int:
+        return sum(1 for _ in iter_cache_files(self.cache_dir))
+
+    def test_ticks_resume_from_cursor_until_pass_completes(self) -> None:
+        cleaner = IncrementalCleaner(self.cache_dir, interval_seconds=3600, budget_seconds=60, batch_size=2)
+        removed = [cleaner.tick() for _ in range(5)]
+        self.assertLessEqual(max(removed), 2)
+        self.assertEqual(sum(removed), 6)
+        self.assertEqual(self._remaining(), 1)
+
+    def test_next_pass_waits_for_interval(self) -> None:
+        cleaner = IncrementalCleaner(self.cache_dir, interval_seconds=3600, budget_seconds=60, batch_size=100)
+        self.assertEqual(cleaner.run_pass(), 6)
+        with patch("file_cache.time.time", return_value=1000.0):
+            set(self.cache_dir, "tool_a", ("late",), {}, 10, {"success": True})
+        self.assertEqual(cleaner.tick(), 0)
+        # 一小时后的新一轮：新写入的过期条目与 TTL 一小时的条目都会被删除
+        self.assertEqual(cleaner.tick(now=cleaner._pass_started + 3601), 2)
+
+    def test_time_budget_limits_a_tick(self) -> None:
+        cleaner = IncrementalCleaner(self.cache_dir, interval_seconds=3600, budget_seconds=0, batch_size=100)
+        self.assertLessEqual(cleaner.tick(), 1)
+        self.assertEqual(cleaner._pass_scanned, 1)
+
+    def test_pass_migrates_legacy_flat_files_into_shards(self) -> None:
+        set(self.cache_dir, "tool_b", ("600519",), {}, 3600, {"success": True, "n": 1})
+        key = _cache_key("tool_b", ("600519",), {})
+        sharded = next((self.cache_dir / "tool_b").rglob(f"{key}.json"))
+        legacy = self.cache_dir / "tool_b" / f"{key}.json"
+        sharded.rename(legacy)
+        cleaner = IncrementalCleaner(self.cache_dir, interval_seconds=3600, budget_seconds=60, batch_size=100)
+        cleaner.run_pass()
+        self.assertFalse(legacy.exists())
+        self.assertTrue(sharded.exists())
+        self.assertEqual(get(self.cache_dir, "tool_b", ("600519",), {}, 3600), {"success": True, "n": 1})
+
+    def test_single_pass_mode_runs_in_background_and_stops(self) -> None:
+        cleaner = IncrementalCleaner(self.cache_dir, interval_seconds=0, budget_seconds=60, batch_size=2)
+        with patch("cache_cleaner._lower_thread_priority"):
+            cleaner.start(tick_seconds=0.01)
+            cleaner._thread.join(5)
+        self.assertFalse(cleaner._thread.is_alive())
+        self.assertEqual(cleaner.passes, 1)
+        self.assertEqual(self._remaining(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import cache_namespace
+from file_cache import _cache_key, clean_expired, file_cached, get, set
+
+
+class CacheNamespaceTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp.name)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _seed(self, name: str, symbol: str, created_at: float = 1000.0) -> None:
+        with patch("file_cache.time.time", return_value=created_at):
+            set(self.cache_dir, name, (symbol,), {}, 1e12, {"success": True, "symbol": symbol})
+
+    def test_tool_rule_invalidates_only_that_tool(self) -> None:
+        self._seed("tool_a", "600519")
+        self._seed("tool_b", "600519")
+        cache_namespace.invalidate(self.cache_dir, tool="tool_a")
+        self.assertIsNone(get(self.cache_dir, "tool_a", ("600519",), {}, 60))
+        self.assertIsNotNone(get(self.cache_dir, "tool_b", ("600519",), {}, 60))
+
+    def test_prefix_rule_invalidates_matching_partition(self) -> None:
+        self._seed("tool_a", "600519")
+        self._seed("tool_a", "000001")
+        outcome = cache_namespace.invalidate(self.cache_dir, tool="tool_a", prefix="6005")
+        self.assertEqual(outcome["rule"], "tool_prefix tool_a:6005")
+        self.assertIsNone(get(self.cache_dir, "tool_a", ("600519",), {}, 60))
+        self.assertIsNotNone(get(self.cache_dir, "tool_a", ("000001",), {}, 60))
+
+    def test_entry_written_after_rule_is_valid(self) -> None:
+        cache_namespace.invalidate(self.cache_dir, everything=True)
+        self._seed("tool_a", "600519", created_at=time.time() + 1)
+        self.assertIsNotNone(get(self.cache_dir, "tool_a", ("600519",), {}, 60))
+
+    def test_rule_registered_during_fetch_covers_its_result(self) -> None:
+        calls = {"n": 0}
+
+        @file_cached(ttl_seconds=60, cache_dir=self.cache_dir)
+        def tool_r(symbol: str) -> dict:
+            calls["n"] += 1
+            if calls["n"] == 1:
+                # 上游请求进行中登记失效，这次结果写入时间晚于规则
+                cache_namespace.invalidate(self.cache_dir, tool="tool_r")
+                time.sleep(0.01)
+            return {"success": True, "n": calls["n"]}
+
+        self.assertEqual(tool_r("600519")["n"], 1)
+        self.assertEqual(tool_r("600519")["n"], 2)
+        self.assertEqual(tool_r("600519")["n"], 2)
+
+    def test_schema_changes_key_but_default_key_is_stable(self) -> None:
+        self.assertEqual(_cache_key("t", (), {"a": 1}), _cache_key("t", (), {"a": 1}, "1"))
+        self.assertNotEqual(_cache_key("t", (), {"a": 1}), _cache_key("t", (), {"a": 1}, "2"))
+
+    def test_cleaner_removes_invalidated_and_outdated_schema_entries(self) -> None:
+        calls = {"n": 0}
+
+        @file_cached(ttl_seconds=60, cache_dir=self.cache_dir, schema="2")
+        def tool_s(symbol: str) -> dict:
+            calls["n"] += 1
+            return {"success": True, "n": calls["n"]}
+
+        self._seed("tool_s", "600519")  # 默认 schema "1" 写入的旧条目
+        tool_s("000001")
+        self._seed("tool_x", "600519")
+        cache_namespace.invalidate(self.cache_dir, prefix="6005")
+
+        self.assertEqual(clean_expired(self.cache_dir), 2)
+        self.assertEqual(len(list((self.cache_dir / "tool_s").glob("*/*.json"))), 1)
+        self.assertEqual(tool_s("000001"), {"success": True, "n": 1})
+
+    def test_old_rules_are_pruned_after_a_full_clean_pass(self) -> None:
+        with patch("cache_namespace.time.time", return_value=1000.0):
+            cache_namespace.invalidate(self.cache_dir, tool="tool_a", prefix="6005")
+            cache_namespace.invalidate(self.cache_dir, prefix="0000")
+        self._seed("tool_a", "600519", created_at=900.0)
+        # 清理扫描完成前，规则无论多旧都保留（永不过期的条目还在）
+        cache_namespace.invalidate(self.cache_dir, tool="tool_b", max_age=60)
+        self.assertIn("6005", cache_namespace.load_rules(self.cache_dir)["tool_prefixes"]["tool_a"])
+
+        with patch("cache_namespace.time.time", return_value=2000.0):
+            self.assertEqual(clean_expired(self.cache_dir), 1)
+            cache_namespace.mark_swept(self.cache_dir, 1061.0)
+            cache_namespace.invalidate(self.cache_dir, prefix="3000", max_age=60)
+        rules = cache_namespace.load_rules(self.cache_dir)
+        self.assertEqual(rules["tool_prefixes"], {})
+        self.assertEqual(rules["prefixes"], {"3000": 2000.0})
+
+    def test_prefix_rules_match_every_prefix_length(self) -> None:
+        cache_namespace.invalidate(self.cache_dir, prefix="6")
+        cache_namespace.invalidate(self.cache_dir, tool="tool_a", prefix="600519")
+        rules = cache_namespace.load_rules(self.cache_dir)
+        self.assertGreater(cache_namespace.invalidated_at(rules, "tool_b", "601000", "1"), 0)
+        self.assertGreater(
+            cache_namespace.invalidated_at(rules, "tool_a", "600519", "1"),
+            cache_namespace.invalidated_at(rules, "tool_b", "600519", "1"),
+        )
+        self.assertEqual(cache_namespace.invalidated_at(rules, "tool_b", "000001", "1"), 0)
+
+    def test_invalidate_requires_a_dimension(self) -> None:
+        with self.assertRaises(ValueError):
+            cache_namespace.invalidate(self.cache_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
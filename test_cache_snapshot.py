@@ -0,0 +1,122 @@
+import io
+import json
+import tarfile
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+
+import frame_cache
+from cache_cleaner import iter_cache_files
+from cache_snapshot import export_snapshot, import_snapshot
+from file_cache import expires_at, get, set
+
+
+class CacheSnapshotTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.src_tmp = tempfile.TemporaryDirectory()
+        self.dst_tmp = tempfile.TemporaryDirectory()
+        self.src = Path(self.src_tmp.name)
+        self.dst = Path(self.dst_tmp.name)
+        set(self.src, "tool_a", ("600519",), {}, 3600, {"success": True, "v": 1})
+        with patch("file_cache.time.time", return_value=1000.0):
+            set(self.src, "tool_a", ("000001",), {}, 10, {"success": True, "v": 2})
+        frame_cache.set(self.src, "/api/public/stock_zh_a_spot_em", None, pd.DataFrame({"a": [1]}), 3600)
+
+    def tearDown(self) -> None:
+        self.src_tmp.cleanup()
+        self.dst_tmp.cleanup()
+
+    def _archive(self, **kwargs) -> io.BytesIO:
+        buf = io.BytesIO()
+        export_snapshot(self.src, buf, **kwargs)
+        buf.seek(0)
+        return buf
+
+    def test_round_trip_keeps_live_entries_and_expiry(self) -> None:
+        outcome = import_snapshot(self.dst, self._archive(include_frames=True), include_frames=True)
+        self.assertEqual(outcome["imported"], 2)
+        self.assertEqual(get(self.dst, "tool_a", ("600519",), {}, 60), {"success": True, "v": 1})
+        self.assertIsNone(get(self.dst, "tool_a", ("000001",), {}, 60))
+        self.assertEqual(
+            expires_at(self.dst, "tool_a", ("600519",), {}), expires_at(self.src, "tool_a", ("600519",), {})
+        )
+        self.assertIsNotNone(frame_cache.get(self.dst, "/api/public/stock_zh_a_spot_em", None))
+
+    def test_frames_are_excluded_by_default(self) -> None:
+        outcome = import_snapshot(self.dst, self._archive())
+        self.assertEqual(outcome["imported"], 1)
+        self.assertFalse((self.dst / frame_cache.FRAMES_DIR).exists())
+        # 导出时包含 DataFrame 缓存，导入方默认仍然跳过
+        outcome = import_snapshot(self.dst, self._archive(include_frames=True))
+        self.assertEqual(outcome["skipped"], 2)
+        self.assertFalse((self.dst / frame_cache.FRAMES_DIR).exists())
+
+    def test_newer_local_entry_is_kept(self) -> None:
+        archive = self._archive()
+        set(self.dst, "tool_a", ("600519",), {}, 3600, {"success": True, "v": "local"})
+        import_snapshot(self.dst, archive)
+        self.assertEqual(get(self.dst, "tool_a", ("600519",), {}, 60), {"success": True, "v": "local"})
+
+    def test_unexpected_members_are_skipped(self) -> None:
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode="w|gz") as tar:
+            for name in ("../evil.json", "/abs/aa/" + "a" * 32 + ".json", "_frames/x/aa/bad.pkl"):
+                data = json.dumps({"expires_at": None, "result": {}}).encode()
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+        buf.seek(0)
+        outcome = import_snapshot(self.dst, buf)
+        self.assertEqual(outcome, {"imported": 0, "skipped": 3, "bytes": 0})
+        self.assertEqual(list(iter_cache_files(self.dst)), [])
+        self.assertFalse((self.dst.parent / "evil.json").exists())
+
+
+class ServerSnapshotTests(unittest.TestCase):
+    def test_import_is_not_an_mcp_tool_and_export_takes_no_path(self) -> None:
+        import asyncio
+
+        import mcp_server
+
+        tools = {tool.name: tool for tool in asyncio.run(mcp_server.mcp.list_tools())}
+        self.assertNotIn("cache_import", tools)
+        self.assertNotIn("path", tools["cache_export"].parameters["properties"])
+
+    def test_export_writes_only_under_snapshots_dir(self) -> None:
+        import mcp_server
+
+        with tempfile.TemporaryDirectory() as tmp, patch("mcp_server.CACHE_DIR", Path(tmp)):
+            set(Path(tmp), "tool_a", ("600519",), {}, 3600, {"success": True})
+            result = mcp_server.cache_export()
+            path = Path(result["data"][0]["path"])
+            self.assertEqual(path.parent, Path(tmp) / "_snapshots")
+            self.assertEqual(result["data"][0]["entries"], 1)
+
+    def test_export_keeps_only_newest_snapshots(self) -> None:
+        import mcp_server
+
+        with tempfile.TemporaryDirectory() as tmp, patch("mcp_server.CACHE_DIR", Path(tmp)), patch(
+            "mcp_server.CACHE_SNAPSHOT_KEEP", 2
+        ):
+            directory = Path(tmp) / "_snapshots"
+            directory.mkdir()
+            for name in ("cache-20240101-000000.tar.gz", "cache-20240102-000000.tar.gz"):
+                (directory / name).write_bytes(b"")
+            result = mcp_server.cache_export()
+            remaining = sorted(p.name for p in directory.iterdir())
+            self.assertEqual(remaining, ["cache-20240102-000000.tar.gz", Path(result["data"][0]["path"]).name])
+
+    def test_snapshot_route_is_opt_in(self) -> None:
+        import mcp_server
+
+        self.assertFalse(mcp_server.MCP_CACHE_SNAPSHOT_HTTP)
+        paths = {getattr(route, "path", None) for route in mcp_server.mcp._get_additional_http_routes()}
+        self.assertIn("/cache/stats", paths)
+        self.assertNotIn("/cache/snapshot", paths)
+
+
+if __name__ == "__main__":
+    unittest.main()
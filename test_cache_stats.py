@@ -0,0 +1,53 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import cache_stats
+from file_cache import file_cached
+
+
+class CacheStatsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp.name)
+        cache_stats.reset()
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+        cache_stats.reset()
+
+    def test_decorator_records_hits_misses_bytes_and_upstream(self) -> None:
+        @file_cached(ttl_seconds=60, cache_dir=self.cache_dir)
+        def stats_tool(symbol: str) -> dict:
+            return {"success": True, "symbol": symbol}
+
+        with patch("file_cache.time.time", return_value=1000.0):
+            stats_tool("000001")
+            stats_tool("000001")
+        with patch("file_cache.time.time", return_value=2000.0):
+            stats_tool("000001")
+
+        entry = cache_stats.snapshot("stats_tool")["tools"]["stats_tool"]
+        self.assertEqual(entry["hits"], 1)
+        self.assertEqual(entry["misses"], 2)
+        self.assertEqual(entry["expired"], 1)
+        self.assertEqual(entry["upstream_calls"], 2)
+        self.assertEqual(entry["sets"], 2)
+        self.assertGreater(entry["bytes_written"], 0)
+        self.assertGreater(entry["bytes_read"], 0)
+        self.assertAlmostEqual(entry["hit_ratio"], 1 / 3, places=3)
+
+    def test_failed_upstream_is_counted_as_error(self) -> None:
+        @file_cached(ttl_seconds=60, cache_dir=self.cache_dir)
+        def failing_tool() -> dict:
+            return {"success": False}
+
+        failing_tool()
+        total = cache_stats.snapshot()["total"]
+        self.assertEqual(total["upstream_errors"], 1)
+        self.assertEqual(total["sets"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
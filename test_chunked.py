@@ -0,0 +1,118 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+
+from chunked import ChunkedFetch, decode_cursor, encode_cursor, month_windows
+from mcp_utils import paginated
+
+
+def _lhb(start_date: str, end_date: str, kind: str = "all") -> dict:
+    # 窗口内每天一行；2024-02 的窗口失败
+    if start_date.startswith("202402"):
+        return {"success": False, "message": "Error: upstream down", "rows": 0, "columns": [], "data": []}
+    first, last = int(start_date[-2:]), int(end_date[-2:])
+    data = [{"日期": f"{start_date[:6]}{day:02d}", "类型": kind} for day in range(first, last + 1)]
+    return {"success": True, "rows": len(data), "columns": ["日期", "类型"], "data": data}
+
+
+class MonthWindowTests(unittest.TestCase):
+    def test_windows_are_month_aligned_and_clipped(self) -> None:
+        self.assertEqual(
+            month_windows("20231215", "20240210"),
+            [("20231215", "20231231"), ("20240101", "20240131"), ("20240201", "20240210")],
+        )
+        self.assertEqual(month_windows("20240229", "20240229"), [("20240229", "20240229")])
+
+    def test_invalid_ranges(self) -> None:
+        with self.assertRaises(ValueError):
+            month_windows("20240301", "20240201")
+        with self.assertRaises(ValueError):
+            month_windows("2024-03-01", "20240401")
+
+
+class CursorTests(unittest.TestCase):
+    def test_round_trip_and_tool_check(self) -> None:
+        cursor = encode_cursor({"tool": "a", "window": 2, "params": {"kind": "买入"}})
+        self.assertEqual(decode_cursor(cursor, "a")["params"], {"kind": "买入"})
+        with self.assertRaises(ValueError):
+            decode_cursor(cursor, "b")
+        with self.assertRaises(ValueError):
+            decode_cursor("not a cursor!", "a")
+
+
+class ChunkedFetchTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tool = paginated()(_lhb)
+
+    def _drain(self, fetcher: ChunkedFetch, **params) -> list:
+        pages = [fetcher.run(self.tool, "lhb", **params)]
+        while pages[-1]["next_cursor"]:
+            pages.append(fetcher.run(self.tool, "lhb", "", "", cursor=pages[-1]["next_cursor"]))
+        return pages
+
+    def test_pages_cover_the_range_once_and_split_inside_windows(self) -> None:
+        pages = self._drain(ChunkedFetch(max_rows=20), start_date="20240115", end_date="20240310", kind="买入")
+        dates = [row["日期"] for page in pages for row in page["data"]]
+        expected = [f"202401{d:02d}" for d in range(15, 32)] + [f"202403{d:02d}" for d in range(1, 11)]
+        self.assertEqual(dates, expected)
+        self.assertTrue(all(len(page["data"]) <= 20 for page in pages))
+        self.assertEqual({row["类型"] for page in pages for row in page["data"]}, {"买入"})
+        self.assertEqual(pages[-1]["progress"], {"done": 3, "total": 3})
+        errors = {label: message for page in pages for label, message in page["errors"].items()}
+        self.assertEqual(errors, {"20240201-20240229": "Error: upstream down"})
+        self.assertTrue(all(page["success"] for page in pages))
+
+    def test_reports_progress_per_window(self) -> None:
+        reports = []
+        with patch("progress._reporter") as reporter:
+            reporter.get.return_value = lambda *args: reports.append(args)
+            ChunkedFetch(max_rows=1000).run(self.tool, "lhb", "20240101", "20240331")
+        self.assertEqual([r[:2] for r in reports], [(1, 3), (2, 3), (3, 3)])
+        self.assertEqual(reports[0][2], "20240101-20240131")
+
+    def test_only_failures_is_an_error(self) -> None:
+        result = ChunkedFetch().run(self.tool, "lhb", "20240201", "20240229")
+        self.assertFalse(result["success"])
+        self.assertIn("upstream down", result["message"])
+
+    def test_cursor_out_of_range_is_rejected(self) -> None:
+        cursor = encode_cursor(
+            {"tool": "lhb", "start_date": "20240101", "end_date": "20240131", "params": {}, "window": 5, "offset": 0}
+        )
+        with self.assertRaises(ValueError):
+            ChunkedFetch().run(self.tool, "lhb", "", "", cursor=cursor)
+
+
+class ServerChunkedTests(unittest.TestCase):
+    def test_chunked_tool_sends_progress_notifications(self) -> None:
+        import mcp_server
+        from fastmcp import Client
+
+        def fake_get(url, params=None, **kwargs):
+            response = MagicMock()
+            response.json.return_value = [{"代码": "600000", "上榜日": params["start_date"]}]
+            return response
+
+        notifications = []
+
+        async def on_progress(progress, total, message) -> None:
+            notifications.append((progress, total, message))
+
+        async def call() -> dict:
+            async with Client(mcp_server.mcp) as client:
+                result = await client.call_tool(
+                    "stock_lhb_detail_em_chunked",
+                    {"start_date": "20240101", "end_date": "20240331"},
+                    progress_handler=on_progress,
+                )
+                return result.structured_content
+
+        with patch("akshare_client.requests.get", side_effect=fake_get), patch("config.CACHE_DIR", None):
+            result = asyncio.run(call())
+        self.assertEqual([row["上榜日"] for row in result["data"]], ["20240101", "20240201", "20240301"])
+        self.assertIsNone(result["next_cursor"])
+        self.assertEqual([(p, t) for p, t, _ in notifications], [(1, 3), (2, 3), (3, 3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
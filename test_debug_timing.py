@@ -0,0 +1,84 @@
+import asyncio
+import inspect
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import requests
+
+import debug_timing
+
+
+class WithTimingsTests(unittest.TestCase):
+    def test_flag_is_opt_in_and_cached_results_are_not_modified(self) -> None:
+        shared = {"success": True, "rows": 0, "columns": [], "data": []}
+
+        async def handler(symbol: str) -> dict:
+            with debug_timing.timed("view"):
+                debug_timing.add("upstream", 0.25)
+            debug_timing.annotate(pool="fast")
+            return shared
+
+        wrapped = debug_timing.with_timings(handler)
+        self.assertIn("debug_timing", inspect.signature(wrapped).parameters)
+        self.assertIs(asyncio.run(wrapped("600000")), shared)
+        result = asyncio.run(wrapped("600000", debug_timing=True))
+        self.assertNotIn("_timings", shared)
+        timings = result["_timings"]
+        self.assertEqual(timings["pool"], "fast")
+        self.assertEqual(list(timings["phases_ms"]), ["upstream", "view"])
+        self.assertEqual(timings["phases_ms"]["upstream"], 250.0)
+        self.assertGreaterEqual(timings["total_ms"], 0)
+
+    def test_helpers_are_no_ops_outside_a_timed_call(self) -> None:
+        with debug_timing.timed("view"):
+            debug_timing.add("upstream", 1.0)
+            debug_timing.cache_event("x", {"hits": 1})
+            debug_timing.upstream("/api/public/x", 200, 1.0)
+
+
+class ServerTimingTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _call(self, response: MagicMock, times: int) -> list:
+        import mcp_server
+        from fastmcp import Client
+
+        async def call() -> list:
+            async with Client(mcp_server.mcp) as client:
+                results = []
+                for _ in range(times):
+                    result = await client.call_tool("stock_sse_summary", {"debug_timing": True})
+                    results.append(result.structured_content["_timings"])
+                return results
+
+        with patch("akshare_client.requests.get", return_value=response), patch("config.CACHE_DIR", Path(self._tmp.name)):
+            return asyncio.run(call())
+
+    def test_miss_then_hit_breakdown(self) -> None:
+        response = MagicMock(status_code=200)
+        response.json.return_value = [{"项目": "股票", "数量": None}]
+        miss, hit = self._call(response, 2)
+        self.assertEqual((miss["pool"], miss["fallback"]), ("slow", True))
+        self.assertEqual(miss["upstream"][0]["endpoint"], "/api/public/stock_sse_summary")
+        self.assertEqual(miss["upstream"][0]["status"], 200)
+        for phase in ("probe", "upstream", "json_decode", "dataframe", "to_records", "nan_cleanup", "view"):
+            self.assertIn(phase, miss["phases_ms"])
+        self.assertEqual(miss["cache"]["stock_sse_summary"]["upstream_calls"], 1)
+        self.assertEqual((hit["pool"], hit["upstream"]), ("fast", []))
+        self.assertEqual(hit["cache"]["stock_sse_summary"], {"hits": 1})
+
+    def test_upstream_http_errors_report_status(self) -> None:
+        response = MagicMock(status_code=502)
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError("502 Bad Gateway")
+        (timings,) = self._call(response, 1)
+        self.assertEqual(timings["upstream"][0]["status"], 502)
+
+
+if __name__ == "__main__":
+    unittest.main()
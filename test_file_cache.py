@@ -1,10 +1,12 @@
 import json
 import tempfile
+import threading
 import unittest
 from pathlib import Path
 from unittest.mock import patch
 
-from file_cache import clean_expired, file_cached, get, set
+import file_cache
+from file_cache import TTL_FOREVER, clean_expired, file_cached, get, set
 
 
 class FileCacheTests(unittest.TestCase):
@@ -27,7 +29,7 @@ class FileCacheTests(unittest.TestCase):
             set(self.cache_dir, "tool_b", tuple(), {}, 1, result)
 
         tool_dir = self.cache_dir / "tool_b"
-        files = list(tool_dir.glob("*.json"))
+        files = list(tool_dir.glob("*/*.json"))
         self.assertEqual(len(files), 1)
         cache_file = files[0]
         self.assertTrue(cache_file.exists())
@@ -92,6 +94,57 @@ class FileCacheTests(unittest.TestCase):
         self.assertFalse(bad_tool("000002")["success"])
         self.assertEqual(call_counter["bad"], 2)
 
+    def test_forever_entry_never_expires_and_survives_cleaner(self) -> None:
+        result = {"success": True, "value": 1}
+        set(self.cache_dir, "tool_g", tuple(), {}, TTL_FOREVER, result)
+        with patch("file_cache.time.time", return_value=9999999999.0):
+            self.assertEqual(get(self.cache_dir, "tool_g", tuple(), {}, TTL_FOREVER), result)
+            self.assertEqual(clean_expired(self.cache_dir), 0)
+        self.assertEqual(len(list((self.cache_dir / "tool_g").glob("*/*.json"))), 1)
+
+    def test_decorator_key_includes_defaults_and_supports_refresh(self) -> None:
+        calls = []
+
+        @file_cached(ttl_seconds=60, cache_dir=self.cache_dir)
+        def tool(symbol: str, period: str = "daily") -> dict:
+            calls.append((symbol, period))
+            return {"success": True, "n": len(calls)}
+
+        tool("000001")
+        tool(symbol="000001", period="daily")
+        self.assertEqual(len(calls), 1)
+        self.assertIsNotNone(tool.cache_expires_at("000001"))
+        self.assertEqual(tool.cache_refresh("000001")["n"], 2)
+        self.assertEqual(tool("000001")["n"], 2)
+
+    def test_entries_are_sharded_by_key_prefix(self) -> None:
+        set(self.cache_dir, "tool_s", ("x",), {}, 60, {"success": True})
+        files = list((self.cache_dir / "tool_s").rglob("*.json"))
+        self.assertEqual(len(files), 1)
+        self.assertEqual(files[0].parent.name, files[0].stem[:2])
+
+    def test_legacy_flat_entry_is_migrated_on_read(self) -> None:
+        tool_dir = self.cache_dir / "tool_l"
+        tool_dir.mkdir(parents=True)
+        legacy = tool_dir / "abcdef.json"
+        legacy.write_text(json.dumps({"expires_at": 9999999999, "result": {"success": True}}), encoding="utf-8")
+
+        with patch("file_cache._cache_key", return_value="abcdef"):
+            cached = get(self.cache_dir, "tool_l", tuple(), {}, 60)
+        self.assertEqual(cached, {"success": True})
+        self.assertFalse(legacy.exists())
+        self.assertTrue((tool_dir / "ab" / "abcdef.json").exists())
+
+    def test_migrate_layout_moves_flat_files(self) -> None:
+        tool_dir = self.cache_dir / "tool_m"
+        tool_dir.mkdir(parents=True)
+        for key in ("aa11", "bb22"):
+            (tool_dir / f"{key}.json").write_text("{}", encoding="utf-8")
+        self.assertEqual(file_cache.migrate_layout(self.cache_dir), 2)
+        self.assertTrue((tool_dir / "aa" / "aa11.json").exists())
+        self.assertTrue((tool_dir / "bb" / "bb22.json").exists())
+        self.assertEqual(file_cache.migrate_layout(self.cache_dir), 0)
+
     def test_clean_expired_removes_expired_invalid_and_keeps_valid(self) -> None:
         tool_dir = self.cache_dir / "tool_f"
         tool_dir.mkdir(parents=True, exist_ok=True)
@@ -122,5 +175,117 @@ class FileCacheTests(unittest.TestCase):
         self.assertTrue(valid.exists())
 
 
+class LargeEntryTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp.name)
+        patcher = patch("file_cache.LARGE_ENTRY_BYTES", 256)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.rows = [{"代码": f"{i:06d}", "price": i * 1.5, "note": None} for i in range(300)]
+        self.result = {"success": True, "rows": 300, "columns": ["代码", "price", "note"], "data": self.rows}
+        set(self.cache_dir, "big_tool", ("x",), {}, 60, self.result)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_large_entry_uses_header_and_row_lines(self) -> None:
+        (path,) = (self.cache_dir / "big_tool").glob("*/*.json")
+        header = json.loads(path.read_bytes().split(b"\n", 1)[0])
+        self.assertEqual(header["format"], "rows")
+        self.assertEqual(header["total_rows"], 300)
+        self.assertNotIn("data", header["result"])
+        self.assertEqual(header["layout"], "columnar")
+        self.assertEqual(json.loads(path.read_bytes().split(b"\n", 2)[1][1:-1]), ["000000", 0.0, None])
+        self.assertEqual(get(self.cache_dir, "big_tool", ("x",), {}, 60), self.result)
+
+    def test_records_not_matching_columns_are_stored_as_is(self) -> None:
+        ragged = {"success": True, "columns": ["a", "b"], "data": [{"a": 1, "b": 2}, {"a": 3}]}
+        set(self.cache_dir, "ragged_tool", tuple(), {}, 60, ragged)
+        (path,) = (self.cache_dir / "ragged_tool").glob("*/*.json")
+        self.assertNotIn(b"columnar", path.read_bytes().split(b"\n", 1)[0])
+        self.assertEqual(get(self.cache_dir, "ragged_tool", tuple(), {}, 60), ragged)
+
+    def test_legacy_records_layout_is_still_readable(self) -> None:
+        with patch("file_cache._pack_rows", return_value=None):
+            set(self.cache_dir, "old_tool", ("x",), {}, 60, self.result)
+        self.assertEqual(get(self.cache_dir, "old_tool", ("x",), {}, 60), self.result)
+        sliced = file_cache.get_slice(self.cache_dir, "old_tool", ("x",), {}, 60, 100, 2)
+        self.assertEqual(sliced["data"], self.rows[100:102])
+
+    def test_get_slice_decodes_only_requested_rows(self) -> None:
+        for offset, limit in ((0, 10), (60, 10), (63, 2), (128, 64), (295, 10), (300, 5), (10, None)):
+            sliced = file_cache.get_slice(self.cache_dir, "big_tool", ("x",), {}, 60, offset, limit)
+            expected = self.rows[offset:] if limit is None else self.rows[offset : offset + limit]
+            self.assertEqual(sliced["data"], expected, (offset, limit))
+            self.assertEqual(sliced["total_rows"], 300)
+            self.assertEqual(sliced["columns"], self.result["columns"])
+
+    def test_cleaner_and_expires_at_read_header_only(self) -> None:
+        self.assertIsNotNone(file_cache.expires_at(self.cache_dir, "big_tool", ("x",), {}))
+        self.assertEqual(clean_expired(self.cache_dir), 0)
+        with patch("file_cache.time.time", return_value=9999999999.0):
+            self.assertEqual(clean_expired(self.cache_dir), 1)
+
+    def test_small_entry_slice_falls_back_to_full_decode(self) -> None:
+        set(self.cache_dir, "small_tool", tuple(), {}, 60, {"success": True, "data": [1, 2, 3]})
+        sliced = file_cache.get_slice(self.cache_dir, "small_tool", tuple(), {}, 60, 1, 1)
+        self.assertEqual(sliced["data"], [2])
+        self.assertEqual(sliced["total_rows"], 3)
+
+
+class WriteBehindTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp.name)
+        self.release = threading.Event()
+        real_write = file_cache._write_entry
+
+        def slow_write(*args, **kwargs):
+            if threading.current_thread().name == "file-cache-writer":
+                self.release.wait(5)
+            real_write(*args, **kwargs)
+
+        self.patcher = patch("file_cache._write_entry", side_effect=slow_write)
+        self.patcher.start()
+        file_cache._write_behind = file_cache._WriteBehindQueue(max_pending=1, put_timeout=0.01)
+
+    def tearDown(self) -> None:
+        self.release.set()
+        file_cache.flush_write_behind(5)
+        file_cache._write_behind = None
+        self.patcher.stop()
+        self.tmp.cleanup()
+
+    def test_pending_entry_is_served_before_flush(self) -> None:
+        result = {"success": True, "value": 1}
+        set(self.cache_dir, "tool_wb", tuple(), {}, 60, result)
+        self.assertEqual(get(self.cache_dir, "tool_wb", tuple(), {}, 60), result)
+        self.assertEqual(list(self.cache_dir.rglob("*.json")), [])
+
+        self.release.set()
+        self.assertTrue(file_cache.flush_write_behind(5))
+        self.assertEqual(len(list(self.cache_dir.rglob("*.json"))), 1)
+
+    def test_full_queue_falls_back_to_synchronous_write(self) -> None:
+        for i in range(3):
+            set(self.cache_dir, "tool_wb", (i,), {}, 60, {"success": True, "i": i})
+        self.release.set()
+        self.assertTrue(file_cache.flush_write_behind(5))
+        for i in range(3):
+            self.assertEqual(get(self.cache_dir, "tool_wb", (i,), {}, 60)["i"], i)
+
+    def test_full_queue_never_lets_an_older_entry_win(self) -> None:
+        # 后台线程阻塞在第一个条目上，同一个 key 的多个版本填满队列
+        set(self.cache_dir, "tool_wb", ("blocker",), {}, 60, {"success": True})
+        for version in range(5):
+            set(self.cache_dir, "tool_wb", ("same",), {}, 60, {"success": True, "version": version})
+        self.release.set()
+        self.assertTrue(file_cache.flush_write_behind(5))
+        self.assertEqual(file_cache._write_behind.lookup(file_cache._cache_path(
+            self.cache_dir, "tool_wb", file_cache._cache_key("tool_wb", ("same",), {}))), None)
+        self.assertEqual(get(self.cache_dir, "tool_wb", ("same",), {}, 60)["version"], 4)
+
+
 if __name__ == "__main__":
     unittest.main()
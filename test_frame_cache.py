@@ -0,0 +1,112 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+import cache_namespace
+import frame_cache
+from akshare_client import call_aktools_api
+from tool_registry import Param, ToolSpec, make_tool
+
+
+class FrameCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp.name)
+        self.df = pd.DataFrame({"代码": ["600519", "000001"], "最新价": [1500.0, 10.5]})
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_endpoint_tiers(self) -> None:
+        self.assertEqual(frame_cache.tier_of("stock_intraday_em"), "micro")
+        self.assertEqual(frame_cache.tier_of("stock_zh_a_hist_pre_min_em"), "micro")
+        self.assertEqual(frame_cache.tier_of("stock_zh_a_hist"), "history")
+        self.assertEqual(frame_cache.tier_of("stock_individual_info_em"), "static")
+        self.assertEqual(frame_cache.tier_of("stock_zh_a_spot_em"), "realtime")
+
+    def test_round_trip_ignores_none_params_and_returns_copies(self) -> None:
+        endpoint = "/api/public/stock_zh_a_hist"
+        frame_cache.set(self.cache_dir, endpoint, {"symbol": "600519", "timeout": None}, self.df, 60)
+        cached = frame_cache.get(self.cache_dir, endpoint, {"symbol": "600519"})
+        pd.testing.assert_frame_equal(cached, self.df)
+        cached.loc[0, "最新价"] = 0
+        pd.testing.assert_frame_equal(frame_cache.get(self.cache_dir, endpoint, {"symbol": "600519"}), self.df)
+        self.assertIsNone(frame_cache.get(self.cache_dir, endpoint, {"symbol": "000001"}))
+
+    def test_expired_invalidated_and_empty_frames(self) -> None:
+        endpoint = "/api/public/stock_zh_a_spot_em"
+        with patch("frame_cache.time.time", return_value=1000.0):
+            frame_cache.set(self.cache_dir, endpoint, None, self.df, 10)
+        self.assertEqual(frame_cache.clean_expired(self.cache_dir), 1)
+
+        frame_cache.set(self.cache_dir, endpoint, None, pd.DataFrame(), 60)
+        self.assertIsNone(frame_cache.get(self.cache_dir, endpoint, None))
+
+        frame_cache.set(self.cache_dir, endpoint, None, self.df, 60)
+        cache_namespace.invalidate(self.cache_dir, tool="stock_zh_a_spot_em")
+        self.assertIsNone(frame_cache.get(self.cache_dir, endpoint, None))
+
+    def test_legacy_pickle_files_are_never_loaded(self) -> None:
+        endpoint = "/api/public/stock_zh_a_spot_em"
+        frame_cache.set(self.cache_dir, endpoint, None, self.df, 60)
+        path = next((self.cache_dir / frame_cache.FRAMES_DIR).rglob("*.json"))
+        self.assertTrue(path.read_bytes().startswith(b"AKF2 "))
+        legacy = path.with_suffix(frame_cache.LEGACY_SUFFIX)
+        legacy.write_bytes(b"AKF1 {}\n" + b"not a pickle")
+        with patch("pickle.load") as fake_load:
+            pd.testing.assert_frame_equal(frame_cache.get(self.cache_dir, endpoint, None), self.df)
+        fake_load.assert_not_called()
+        self.assertEqual(frame_cache.clean_expired(self.cache_dir), 1)
+        self.assertFalse(legacy.exists())
+
+    def test_mcp_tool_fetch_is_not_cached_twice(self) -> None:
+        response = MagicMock()
+        response.json.return_value = self.df.to_dict(orient="records")
+        with patch("config.CACHE_DIR", self.cache_dir), patch("config.CACHE_FRAMES", True), patch(
+            "akshare_client.requests.get", return_value=response
+        ):
+            with frame_cache.covered_by("stock_zh_a_spot_em"):
+                call_aktools_api("/api/public/stock_zh_a_spot_em")
+                call_aktools_api("/api/public/stock_sh_a_spot_em")
+        self.assertIsNone(frame_cache.get(self.cache_dir, "/api/public/stock_zh_a_spot_em", None))
+        self.assertIsNotNone(frame_cache.get(self.cache_dir, "/api/public/stock_sh_a_spot_em", None))
+
+    def test_call_aktools_api_uses_shared_cache(self) -> None:
+        response = MagicMock()
+        response.json.return_value = self.df.to_dict(orient="records")
+        with patch("config.CACHE_DIR", self.cache_dir), patch("config.CACHE_FRAMES", True), patch(
+            "akshare_client.requests.get", return_value=response
+        ) as fake_get:
+            first = call_aktools_api("/api/public/stock_zh_a_spot_em")
+            second = call_aktools_api("/api/public/stock_zh_a_spot_em")
+        self.assertEqual(fake_get.call_count, 1)
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_library_read_after_mcp_fetch_uses_the_tool_cache(self) -> None:
+        spec = ToolSpec(
+            "stock_individual_info_em",
+            "个股信息",
+            params=(Param("symbol"), Param("timeout", None)),
+            tier="static",
+        )
+        tool = make_tool(spec)
+        response = MagicMock()
+        response.json.return_value = self.df.to_dict(orient="records")
+        with patch("config.CACHE_DIR", self.cache_dir), patch("config.CACHE_FRAMES", True), patch(
+            "akshare_client.requests.get", return_value=response
+        ) as fake_get:
+            self.assertTrue(tool("600519")["success"])
+            df = call_aktools_api("/api/public/stock_individual_info_em", {"symbol": "600519"})
+            self.assertEqual(fake_get.call_count, 1)
+            # 参数不同（上游会使用不同的取值）时不借用工具的缓存
+            call_aktools_api("/api/public/stock_individual_info_em", {"symbol": "600519", "timeout": "5"})
+            self.assertEqual(fake_get.call_count, 2)
+        pd.testing.assert_frame_equal(df, self.df)
+        self.assertIsNone(frame_cache.get(self.cache_dir, "/api/public/stock_individual_info_em", {"symbol": "600519"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
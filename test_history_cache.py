@@ -0,0 +1,150 @@
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+from file_cache import TTL_FOREVER
+from history_cache import MARKET_TZ, history_cached, split_plan
+
+
+def _now(ymd: str) -> datetime:
+    return datetime.strptime(ymd, "%Y%m%d").replace(hour=10, tzinfo=MARKET_TZ)
+
+
+class SplitPlanTests(unittest.TestCase):
+    def _ranges(self, plan):
+        return [(p["start_date"], p["end_date"], ttl) for p, ttl in plan]
+
+    def test_fully_past_range_is_split_by_year_and_never_expires(self) -> None:
+        params = {"symbol": "000001", "start_date": "20220601", "end_date": "20230315", "adjust": ""}
+        plan = split_plan(params, 60, 5, 3600, now=_now("20240610"))
+        self.assertEqual(
+            self._ranges(plan),
+            [("20220601", "20221231", TTL_FOREVER), ("20230101", "20230315", TTL_FOREVER)],
+        )
+
+    def test_range_up_to_today_has_rolling_block_and_short_tail(self) -> None:
+        params = {"symbol": "000001", "start_date": "20230101", "end_date": "20500101", "adjust": ""}
+        plan = split_plan(params, 60, 5, 3600, now=_now("20240610"))
+        ranges = self._ranges(plan)
+        self.assertEqual(ranges[0], ("20230101", "20231231", TTL_FOREVER))
+        self.assertEqual(ranges[1][:2], ("20240101", "20240609"))
+        self.assertLess(ranges[1][2], 86400)
+        self.assertEqual(ranges[2], ("20240610", "20500101", 60))
+
+    def test_adjusted_series_keeps_last_n_days_in_tail(self) -> None:
+        params = {"symbol": "000001", "start_date": "20240101", "end_date": "20240610", "adjust": "hfq"}
+        plan = split_plan(params, 60, 5, 3600, now=_now("20240610"))
+        self.assertEqual(self._ranges(plan)[-1], ("20240605", "20240610", 60))
+
+    def test_qfq_past_blocks_use_finite_ttl(self) -> None:
+        params = {"symbol": "000001", "start_date": "20200101", "end_date": "20201231", "adjust": "qfq"}
+        plan = split_plan(params, 60, 5, 3600, now=_now("20240610"))
+        self.assertEqual(self._ranges(plan), [("20200101", "20201231", 3600)])
+
+    def test_non_daily_or_invalid_dates_are_not_split(self) -> None:
+        now = _now("20240610")
+        self.assertIsNone(split_plan({"period": "weekly", "start_date": "20200101", "end_date": "20201231"}, 60, 5, 3600, now))
+        self.assertIsNone(split_plan({"start_date": "2020-01-01", "end_date": "20201231"}, 60, 5, 3600, now))
+        self.assertIsNone(split_plan({"start_date": "20200101", "end_date": "20201231", "adjust": "qfq-factor"}, 60, 5, 3600, now))
+
+
+class HistoryCachedTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp.name)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _hist(self, dates, calls, **kwargs):
+        # 上游返回 dates 中落在查询区间内的日线
+        @history_cached(tail_ttl_seconds=60, fallback_ttl_seconds=600, adjusted_tail_days=5,
+                        qfq_ttl_seconds=3600, cache_dir=self.cache_dir, **kwargs)
+        def hist(symbol: str, start_date: str = "20230101", end_date: str = "20500101", adjust: str = "") -> dict:
+            calls.append((start_date, end_date))
+            rows = [{"日期": f"{d[:4]}-{d[4:6]}-{d[6:]}", "收盘": 1.0} for d in dates if start_date <= d <= end_date]
+            if not rows:
+                return {"success": False, "message": "No data available", "rows": 0, "columns": [], "data": []}
+            return {"success": True, "rows": len(rows), "columns": ["日期", "收盘"], "data": rows}
+
+        return hist
+
+    def test_cold_query_fetches_once_and_refresh_only_refetches_tail(self) -> None:
+        calls = []
+        hist = self._hist(["20230103", "20240102", "20240610"], calls)
+
+        with patch("history_cache._market_now", return_value=_now("20240610")):
+            first = hist("000001")
+            self.assertEqual(first["rows"], 3)
+            self.assertEqual([r["日期"] for r in first["data"]], ["2023-01-03", "2024-01-02", "2024-06-10"])
+            self.assertEqual(calls, [("20230101", "20500101")])
+            self.assertEqual(hist("000001"), first)
+            self.assertEqual(len(calls), 1)
+
+        with patch("history_cache._market_now", return_value=_now("20240610")), \
+                patch("file_cache.time.time", return_value=datetime.now().timestamp() + 120):
+            self.assertEqual(hist("000001")["rows"], 3)
+        self.assertEqual(calls[1:], [("20240610", "20500101")])
+
+    def test_cache_refresh_refetches_only_rolling_and_tail_segments(self) -> None:
+        calls = []
+        hist = self._hist(["20230103", "20240102", "20240610"], calls)
+
+        with patch("history_cache._market_now", return_value=_now("20240610")):
+            hist("000001")
+            self.assertLess(hist.cache_expires_at("000001"), datetime.now().timestamp() + 61)
+            refreshed = hist.cache_refresh("000001")
+            self.assertEqual(hist.cache_expires_at("000001", end_date="20231231"), float("inf"))
+        self.assertEqual(refreshed["rows"], 3)
+        # 滚动段与尾部段合并为一次请求，2023 年的历史段仍从缓存读取
+        self.assertEqual(calls[1:], [("20240101", "20500101")])
+
+    def test_rows_without_date_column_fall_back_to_segment_fetches(self) -> None:
+        calls = []
+
+        @history_cached(tail_ttl_seconds=60, fallback_ttl_seconds=600, adjusted_tail_days=5,
+                        qfq_ttl_seconds=3600, cache_dir=self.cache_dir)
+        def hist(symbol: str, start_date: str = "20230101", end_date: str = "20500101", adjust: str = "") -> dict:
+            calls.append((start_date, end_date))
+            return {"success": True, "rows": 1, "columns": ["开盘"], "data": [{"开盘": start_date}]}
+
+        with patch("history_cache._market_now", return_value=_now("20240610")):
+            self.assertEqual(hist("000001")["rows"], 3)
+        self.assertEqual(
+            calls,
+            [("20230101", "20500101"), ("20230101", "20231231"), ("20240101", "20240609"), ("20240610", "20500101")],
+        )
+
+    def test_error_in_any_segment_is_returned(self) -> None:
+        @history_cached(tail_ttl_seconds=60, fallback_ttl_seconds=600, adjusted_tail_days=5,
+                        qfq_ttl_seconds=3600, cache_dir=self.cache_dir)
+        def hist(symbol: str, start_date: str = "20230101", end_date: str = "20500101", adjust: str = "") -> dict:
+            if end_date >= "20240610":
+                return {"success": False, "message": "Error: boom", "rows": 0, "columns": [], "data": []}
+            return {"success": True, "rows": 1, "columns": ["日期"], "data": [{"日期": start_date}]}
+
+        with patch("history_cache._market_now", return_value=_now("20240610")):
+            result = hist("000001")
+            self.assertEqual(hist("000001", end_date="20231231")["rows"], 1)
+        self.assertFalse(result["success"])
+        self.assertEqual(result["message"], "Error: boom")
+
+    def test_empty_closed_years_are_cached_with_bounded_ttl(self) -> None:
+        calls = []
+        hist = self._hist(["20220104"], calls, empty_ttl_seconds=600)
+
+        with patch("history_cache._market_now", return_value=_now("20240610")):
+            self.assertEqual(hist("000001", "20200101", "20221231")["rows"], 1)
+            self.assertEqual(hist("000001", "20200101", "20221231")["rows"], 1)
+        self.assertEqual(calls, [("20200101", "20221231")])
+
+        # 空分段到期后重新请求（两个相邻的空分段合并为一次请求），有数据的历史段仍然命中
+        with patch("history_cache._market_now", return_value=_now("20240610")), \
+                patch("file_cache.time.time", return_value=datetime.now().timestamp() + 601):
+            hist("000001", "20200101", "20221231")
+        self.assertEqual(calls[1:], [("20200101", "20211231")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+import inspect
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import cache_stats
+import file_cache
+from file_cache import file_cached
+from mcp_utils import COLUMNAR, apply_view, paginated, summarize_records
+
+
+def _spot_result(n: int) -> dict:
+    data = [{"代码": f"{i:06d}", "名称": f"股票{i}", "涨跌幅": (i * 7) % 11 - 5.0} for i in range(n)]
+    if n > 3:
+        data[3]["涨跌幅"] = None
+    return {"success": True, "rows": n, "columns": ["代码", "名称", "涨跌幅"], "data": data}
+
+
+class ApplyViewTests(unittest.TestCase):
+    def test_page_and_projection(self) -> None:
+        result = _spot_result(10)
+        view = apply_view(result, limit=3, offset=2, columns=["代码"])
+        self.assertEqual(view["data"], [{"代码": "000002"}, {"代码": "000003"}, {"代码": "000004"}])
+        self.assertEqual(view["rows"], 3)
+        self.assertEqual(view["total_rows"], 10)
+        self.assertEqual(view["offset"], 2)
+        self.assertEqual(view["columns"], ["代码"])
+        # 缓存中的原结果不被修改
+        self.assertEqual(len(result["data"]), 10)
+        self.assertIn("名称", result["data"][0])
+
+    def test_sort_descending_puts_missing_last(self) -> None:
+        view = apply_view(_spot_result(6), sort_by=["-涨跌幅", "代码"])
+        changes = [r["涨跌幅"] for r in view["data"]]
+        self.assertEqual(changes, [2.0, 1.0, -2.0, -3.0, -5.0, None])
+
+    def test_unknown_column_is_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            apply_view(_spot_result(3), columns=["市值"])
+        with self.assertRaises(ValueError):
+            apply_view(_spot_result(3), limit=-1)
+
+    def test_columnar_envelope(self) -> None:
+        view = apply_view(_spot_result(5), limit=2, columns=["名称", "代码"], fmt=COLUMNAR)
+        self.assertEqual(view["columns"], ["名称", "代码"])
+        self.assertEqual(view["data"], [["股票0", "000000"], ["股票1", "000001"]])
+        self.assertEqual(view["format"], "columnar")
+        full = apply_view(_spot_result(5), fmt=COLUMNAR)
+        self.assertEqual(full["data"][4], ["000004", "股票4", 1.0])
+        with self.assertRaises(ValueError):
+            apply_view(_spot_result(5), fmt="csv")
+
+    def test_oversized_result_returns_head_summary_and_next_offset(self) -> None:
+        view = apply_view(_spot_result(10), offset=2, max_rows=3)
+        self.assertTrue(view["truncated"])
+        self.assertEqual([r["代码"] for r in view["data"]], ["000002", "000003", "000004"])
+        self.assertEqual((view["rows"], view["total_rows"], view["next_offset"]), (3, 10, 5))
+        # 汇总覆盖请求的全部 8 行，而不只是返回的前 3 行
+        self.assertEqual(view["summary"]["代码"]["count"], 8)
+        self.assertEqual(view["summary"]["涨跌幅"]["nulls"], 1)
+        self.assertIn("offset=5", view["message"])
+        self.assertNotIn("truncated", apply_view(_spot_result(10), max_rows=10))
+
+    def test_byte_limit_uses_estimated_row_size(self) -> None:
+        result = _spot_result(1000)
+        full = apply_view(result, max_bytes=0)
+        self.assertEqual(full["rows"], 1000)
+        view = apply_view(result, columns=["代码"], fmt=COLUMNAR, max_bytes=1000)
+        self.assertTrue(view["truncated"])
+        self.assertLessEqual(len(json.dumps(view["data"]).encode("utf-8")), 1100)
+        self.assertEqual(view["next_offset"], view["rows"])
+        self.assertEqual(list(view["summary"]), ["代码"])
+
+    def test_summarize_records(self) -> None:
+        summary = summarize_records(_spot_result(6)["data"], ["名称", "涨跌幅"])
+        self.assertEqual(
+            summary["涨跌幅"],
+            {"type": "number", "min": -5.0, "max": 2.0, "mean": -1.4, "median": -2.0, "count": 5, "nulls": 1},
+        )
+        self.assertEqual(summary["名称"]["type"], "text")
+        self.assertEqual((summary["名称"]["unique"], summary["名称"]["top_count"]), (6, 1))
+
+    def test_failure_passes_through(self) -> None:
+        failure = {"success": False, "message": "Error: x", "rows": 0, "columns": [], "data": []}
+        self.assertIs(apply_view(failure, limit=1, columns=["代码"]), failure)
+
+
+class PaginatedTests(unittest.TestCase):
+    def setUp(self) -> None:
+        cache_stats.reset()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+        cache_stats.reset()
+
+    def test_signature_gains_view_parameters(self) -> None:
+        @paginated()
+        def tool(symbol: str, period: str = "daily") -> dict:
+            return _spot_result(1)
+
+        params = inspect.signature(tool).parameters
+        self.assertEqual(list(params), ["symbol", "period", "limit", "offset", "columns", "sort_by", "format"])
+        self.assertIn("limit", tool.__annotations__)
+
+    def test_view_parameters_do_not_refetch_or_change_cache_key(self) -> None:
+        calls = {"n": 0}
+
+        @paginated()
+        @file_cached(ttl_seconds=60, cache_dir=self.cache_dir)
+        def spot_tool() -> dict:
+            calls["n"] += 1
+            return _spot_result(200)
+
+        first = spot_tool(limit=5, columns="代码,名称")
+        self.assertEqual(first["rows"], 5)
+        self.assertEqual(first["total_rows"], 200)
+        self.assertEqual(list(first["data"][0]), ["代码", "名称"])
+        page = spot_tool(limit=5, offset=195)
+        self.assertEqual(page["data"][0]["代码"], "000195")
+        ranked = spot_tool(limit=1, sort_by="-涨跌幅")
+        self.assertEqual(ranked["data"][0]["涨跌幅"], 5.0)
+        full = spot_tool()
+        self.assertEqual(full["rows"], 200)
+        self.assertEqual(calls["n"], 1)
+
+    def test_large_entry_page_reads_only_window(self) -> None:
+        @paginated()
+        @file_cached(ttl_seconds=60, cache_dir=self.cache_dir)
+        def big_tool() -> dict:
+            return _spot_result(5000)
+
+        with patch("file_cache.LARGE_ENTRY_BYTES", 1024):
+            big_tool()
+            with patch("file_cache._decode_rows", wraps=file_cache._decode_rows) as decode:
+                page = big_tool(limit=2, offset=4000)
+        self.assertEqual([r["代码"] for r in page["data"]], ["004000", "004001"])
+        self.assertEqual(page["total_rows"], 5000)
+        self.assertEqual(decode.call_args.args[3], (4000, 2))
+        columnar = big_tool(limit=2, offset=4998, format="columnar")
+        self.assertEqual(columnar["data"], [["004998", "股票4998", 1.0], ["004999", "股票4999", -3.0]])
+
+    def test_configured_limits_apply_and_next_offset_continues(self) -> None:
+        @paginated()
+        @file_cached(ttl_seconds=60, cache_dir=self.cache_dir)
+        def big_tool() -> dict:
+            return _spot_result(50)
+
+        with patch("config.MCP_MAX_RESPONSE_ROWS", 20):
+            first = big_tool()
+            second = big_tool(offset=first["next_offset"])
+            last = big_tool(offset=second["next_offset"])
+        self.assertEqual((first["rows"], first["next_offset"]), (20, 20))
+        self.assertEqual(second["data"][0]["代码"], "000020")
+        self.assertEqual(last["rows"], 10)
+        self.assertNotIn("truncated", last)
+
+    def test_bad_column_returns_error_envelope(self) -> None:
+        @paginated()
+        def tool() -> dict:
+            return _spot_result(3)
+
+        result = tool(columns="不存在")
+        self.assertFalse(result["success"])
+        self.assertIn("unknown columns", result["message"])
+
+
+if __name__ == "__main__":
+    unittest.main()
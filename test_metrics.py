@@ -0,0 +1,110 @@
+import asyncio
+import re
+import unittest
+from unittest.mock import MagicMock, patch
+
+import metrics
+from tool_executor import UpstreamRequired
+
+
+def _sample(text: str, line_prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{line_prefix} not found in metrics output")
+
+
+class RenderTests(unittest.TestCase):
+    def setUp(self) -> None:
+        metrics.reset()
+
+    def tearDown(self) -> None:
+        metrics.reset()
+
+    def test_histogram_buckets_are_cumulative(self) -> None:
+        for seconds in (0.0005, 0.003, 0.003, 120.0):
+            metrics.observe("aktools_request_seconds", seconds, endpoint="/api/public/x")
+        text = metrics.render()
+        prefix = 'akshare_mcp_aktools_request_seconds_bucket{endpoint="/api/public/x",le='
+        self.assertEqual(_sample(text, prefix + '"0.001"}'), 1)
+        self.assertEqual(_sample(text, prefix + '"0.005"}'), 3)
+        self.assertEqual(_sample(text, prefix + '"60.0"}'), 3)
+        self.assertEqual(_sample(text, prefix + '"+Inf"}'), 4)
+        self.assertEqual(_sample(text, 'akshare_mcp_aktools_request_seconds_count{endpoint="/api/public/x"}'), 4)
+        self.assertIn("# TYPE akshare_mcp_aktools_request_seconds histogram", text)
+
+    def test_label_values_are_escaped(self) -> None:
+        metrics.inc("tool_errors_total", tool='a"b\\c')
+        self.assertIn('akshare_mcp_tool_errors_total{tool="a\\"b\\\\c"} 1', metrics.render())
+
+    def test_executor_stats(self) -> None:
+        text = metrics.render({"fast": 3, "slow": 1, "fallbacks": 1})
+        self.assertIn('akshare_mcp_executor_calls_total{pool="fast"} 3', text)
+        self.assertIn("akshare_mcp_executor_fallbacks_total 1", text)
+
+
+class InstrumentationTests(unittest.TestCase):
+    def setUp(self) -> None:
+        metrics.reset()
+
+    def tearDown(self) -> None:
+        metrics.reset()
+
+    def test_phases_are_recorded_once_and_abandoned_probes_are_skipped(self) -> None:
+        def tool(abandon: bool = False) -> dict:
+            metrics.add_phase("decode", 0.002)
+            metrics.add_phase("decode", 0.002)
+            if abandon:
+                raise UpstreamRequired()
+            return {"success": True}
+
+        wrapped = metrics.phased(tool)
+        self.assertEqual(wrapped(), {"success": True})
+        with self.assertRaises(UpstreamRequired):
+            wrapped(abandon=True)
+        metrics.add_phase("decode", 1.0)  # 不在工具调用中：忽略
+        text = metrics.render()
+        labels = '{phase="decode",tool="tool"}'
+        self.assertEqual(_sample(text, f"akshare_mcp_tool_duration_seconds_count{labels}"), 1)
+        self.assertAlmostEqual(_sample(text, f"akshare_mcp_tool_duration_seconds_sum{labels}"), 0.004)
+
+    def test_instrumented_counts_requests_errors_and_in_flight(self) -> None:
+        async def handler(ok: bool) -> dict:
+            text = metrics.render()
+            self.assertEqual(_sample(text, 'akshare_mcp_tool_in_flight{tool="demo"}'), 1)
+            return {"success": ok}
+
+        wrapped = metrics.instrumented(handler, "demo")
+        asyncio.run(wrapped(True))
+        asyncio.run(wrapped(ok=False))
+        text = metrics.render()
+        self.assertEqual(_sample(text, 'akshare_mcp_tool_requests_total{tool="demo"}'), 2)
+        self.assertEqual(_sample(text, 'akshare_mcp_tool_errors_total{tool="demo"}'), 1)
+        self.assertEqual(_sample(text, 'akshare_mcp_tool_in_flight{tool="demo"}'), 0)
+        self.assertEqual(_sample(text, 'akshare_mcp_tool_duration_seconds_count{phase="total",tool="demo"}'), 2)
+
+    def test_server_records_upstream_decode_and_serialize_phases(self) -> None:
+        import mcp_server
+        from fastmcp import Client
+
+        response = MagicMock()
+        response.json.return_value = [{"项目": "股票", "数量": 2300}]
+
+        async def call() -> None:
+            async with Client(mcp_server.mcp) as client:
+                await client.call_tool("stock_sse_summary", {})
+
+        with patch("akshare_client.requests.get", return_value=response), patch("config.CACHE_DIR", None):
+            asyncio.run(call())
+        text = metrics.render()
+        for phase in ("total", "upstream", "decode", "serialize"):
+            labels = f'{{phase="{phase}",tool="stock_sse_summary"}}'
+            self.assertEqual(_sample(text, f"akshare_mcp_tool_duration_seconds_count{labels}"), 1, phase)
+        self.assertEqual(
+            _sample(text, 'akshare_mcp_aktools_request_seconds_count{endpoint="/api/public/stock_sse_summary"}'), 1
+        )
+        self.assertTrue(re.search(r'^akshare_mcp_tool_requests_total\{tool="stock_sse_summary"\} 1$', text, re.M))
+
+
+if __name__ == "__main__":
+    unittest.main()
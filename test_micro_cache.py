@@ -0,0 +1,78 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import cache_stats
+from micro_cache import micro_cached
+
+
+class MicroCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        cache_stats.reset()
+
+    def tearDown(self) -> None:
+        cache_stats.reset()
+
+    def test_success_is_served_from_memory_until_ttl(self) -> None:
+        calls = {"n": 0}
+
+        @micro_cached(ttl_seconds=2)
+        def intraday_tool(symbol: str, period: str = "1") -> dict:
+            calls["n"] += 1
+            return {"success": True, "n": calls["n"]}
+
+        with patch("micro_cache.time.monotonic", return_value=100.0):
+            self.assertEqual(intraday_tool("000001"), {"success": True, "n": 1})
+            self.assertEqual(intraday_tool("000001", period="1"), {"success": True, "n": 1})
+            self.assertEqual(intraday_tool("000002"), {"success": True, "n": 2})
+        with patch("micro_cache.time.monotonic", return_value=102.5):
+            self.assertEqual(intraday_tool("000001"), {"success": True, "n": 3})
+
+    def test_failure_is_not_retained(self) -> None:
+        calls = {"n": 0}
+
+        @micro_cached(ttl_seconds=60)
+        def flaky_tool(symbol: str) -> dict:
+            calls["n"] += 1
+            return {"success": False, "message": "Error: upstream"}
+
+        flaky_tool("000001")
+        flaky_tool("000001")
+        self.assertEqual(calls["n"], 2)
+
+    def test_concurrent_requests_are_coalesced(self) -> None:
+        started = threading.Event()
+        release = threading.Event()
+        calls = {"n": 0}
+
+        @micro_cached(ttl_seconds=0)
+        def slow_tool(symbol: str) -> dict:
+            calls["n"] += 1
+            started.set()
+            release.wait(5)
+            return {"success": True, "symbol": symbol}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(slow_tool("000001")))
+        leader.start()
+        self.assertTrue(started.wait(5))
+        followers = [threading.Thread(target=lambda: results.append(slow_tool("000001"))) for _ in range(4)]
+        for t in followers:
+            t.start()
+        # 让跟随者进入等待状态后再放行上游请求
+        time.sleep(0.1)
+        release.set()
+        for t in [leader, *followers]:
+            t.join(5)
+
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(r == {"success": True, "symbol": "000001"} for r in results))
+        entry = cache_stats.snapshot("slow_tool")["tools"]["slow_tool"]
+        self.assertGreaterEqual(entry["coalesced"], 1)
+        self.assertEqual(calls["n"] + entry["coalesced"], 5)
+        self.assertEqual(entry["upstream_calls"], calls["n"])
+
+
+if __name__ == "__main__":
+    unittest.main()
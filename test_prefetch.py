@@ -0,0 +1,97 @@
+import json
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+from file_cache import file_cached
+from history_cache import MARKET_TZ
+from prefetch import PrefetchConfig, PrefetchJob, PrefetchScheduler, load_config, next_at_run, render_params
+
+
+class PrefetchConfigTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _write(self, payload) -> Path:
+        path = self.root / "prefetch.json"
+        path.write_text(json.dumps(payload), encoding="utf-8")
+        return path
+
+    def test_load_config(self) -> None:
+        path = self._write({
+            "jitter_seconds": 5,
+            "holidays": ["20261001"],
+            "jobs": [
+                {"tool": "stock_zh_a_spot", "lead_seconds": 20},
+                {"tool": "stock_lhb_detail_em", "params": {"start_date": "{today}"}, "at": "15:05", "days": "trading"},
+            ],
+        })
+        config = load_config(path)
+        self.assertEqual(len(config.jobs), 2)
+        self.assertEqual(config.jobs[0].lead_seconds, 20)
+        self.assertEqual(config.jobs[1].at, "15:05")
+        self.assertIn("20261001", config.holidays)
+
+    def test_load_config_rejects_bad_time_and_days(self) -> None:
+        with self.assertRaises(ValueError):
+            load_config(self._write({"jobs": [{"tool": "x", "at": "25:00"}]}))
+        with self.assertRaises(ValueError):
+            load_config(self._write({"jobs": [{"tool": "x", "at": "15:05", "days": "sometimes"}]}))
+
+    def test_next_at_run_skips_weekend_and_holidays(self) -> None:
+        job = PrefetchJob(tool="x", at="15:05", days="trading")
+        # 2026-10-02 是周五（节假日），下一交易日为 2026-10-05 周一
+        friday = datetime(2026, 10, 2, 16, 0, tzinfo=MARKET_TZ)
+        run = next_at_run(job, friday, frozenset({"20261002"}))
+        self.assertEqual((run.month, run.day, run.hour, run.minute), (10, 5, 15, 5))
+        same_day = next_at_run(job, datetime(2026, 10, 5, 9, 0, tzinfo=MARKET_TZ), frozenset())
+        self.assertEqual((same_day.day, same_day.hour), (5, 15))
+
+    def test_render_params(self) -> None:
+        now = datetime(2026, 10, 19, 15, 6, tzinfo=MARKET_TZ)
+        self.assertEqual(render_params({"start_date": "{today}", "n": 1}, now), {"start_date": "20261019", "n": 1})
+
+
+class PrefetchSchedulerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp.name)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_refresh_ahead_schedules_before_expiry_and_bypasses_cache(self) -> None:
+        calls = []
+
+        @file_cached(ttl_seconds=100, cache_dir=self.cache_dir)
+        def spot() -> dict:
+            calls.append(1)
+            return {"success": True, "data": [len(calls)]}
+
+        with patch("file_cache.time.time", return_value=1000.0):
+            spot()
+        config = PrefetchConfig(jobs=[PrefetchJob(tool="spot", lead_seconds=10)], jitter_seconds=0, rate_per_minute=0)
+        scheduler = PrefetchScheduler(config, resolve_tool={"spot": spot}.get)
+        scheduler._schedule(config.jobs[0], now=1000.0)
+        self.assertEqual(config.jobs[0].next_run, 1090.0)
+
+        with patch("prefetch.time.time", return_value=1095.0):
+            scheduler.run_pending(now=1095.0)
+        self.assertEqual(len(calls), 2)
+        with patch("file_cache.time.time", return_value=1050.0):
+            self.assertEqual(spot()["data"], [2])
+
+    def test_unknown_tool_is_retried_later(self) -> None:
+        config = PrefetchConfig(jobs=[PrefetchJob(tool="missing")], jitter_seconds=0, rate_per_minute=0)
+        scheduler = PrefetchScheduler(config, resolve_tool=lambda name: None)
+        self.assertFalse(scheduler.run_job(config.jobs[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from runtime_token import RuntimeToken
+
+
+class RuntimeTokenTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / ".xq_token"
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_update_is_visible_to_other_workers(self) -> None:
+        # 两个实例模拟共用 CACHE_DIR 的两个 worker 进程
+        first = RuntimeToken(self.path, initial="env")
+        second = RuntimeToken(self.path, initial="env")
+        self.assertEqual(second.get(), "env")
+        first.set("abc")
+        self.assertEqual(second.get(), "abc")
+        second.set("def")
+        self.assertEqual(first.get(), "def")
+        self.assertEqual(self.path.stat().st_mode & 0o777, 0o600)
+        self.assertEqual([p.name for p in self.path.parent.iterdir()], [".xq_token"])
+
+    def test_persisted_token_survives_restart_until_removed(self) -> None:
+        RuntimeToken(self.path, initial="env").set("abc")
+        restarted = RuntimeToken(self.path, initial="env")
+        self.assertEqual(restarted.get(), "abc")
+        os.unlink(self.path)
+        self.assertEqual(restarted.get(), "env")
+
+    def test_without_path_token_stays_in_process(self) -> None:
+        token = RuntimeToken(None, initial="env")
+        self.assertFalse(token.shared)
+        token.set("abc")
+        self.assertEqual(token.get(), "abc")
+
+
+if __name__ == "__main__":
+    unittest.main()
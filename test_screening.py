@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+from screening import ScreenError, compile_expression, screen
+
+
+def _spot() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "代码": ["600000", "300001", "000002", "688001", "830001"],
+            "名称": ["浦发银行", "特锐德", "ST万科", "华兴源创", "北交样本"],
+            "涨跌幅": [6.0, None, -3.0, 8.5, 5.5],
+            "换手率": [12.0, 20.0, 3.0, 11.0, 9.0],
+            "成交额": [1e9, 2e9, 5e8, 3e9, 1e7],
+            "流通市值": [2e10, 1e10, 0.0, 3e10, 1e9],
+            "60日涨跌幅": [1.0, 2.0, 3.0, 4.0, 5.0],
+        }
+    )
+
+
+class ScreenTests(unittest.TestCase):
+    def test_filter_sort_and_top_n(self) -> None:
+        page, total = screen(_spot(), "涨跌幅 > 5 and 换手率 > 10", "-涨跌幅", limit=1)
+        self.assertEqual(total, 2)
+        self.assertEqual(page["代码"].tolist(), ["688001"])
+
+    def test_arithmetic_functions_and_backticks(self) -> None:
+        page, _ = screen(_spot(), "成交额 / 流通市值 > 0.05 and not contains(名称, 'ST')")
+        # 流通市值为 0 的行除法结果视为空值，不匹配
+        self.assertEqual(page["代码"].tolist(), ["300001", "688001"])
+        page, _ = screen(_spot(), "startswith(代码, '6') or `60日涨跌幅` >= 5", "代码")
+        self.assertEqual(page["代码"].tolist(), ["600000", "688001", "830001"])
+        page, _ = screen(_spot(), "abs(涨跌幅) < 4 or 名称 == '特锐德'")
+        self.assertEqual(page["代码"].tolist(), ["300001", "000002"])
+
+    def test_chained_comparison_and_missing_values(self) -> None:
+        page, total = screen(_spot(), "5 < 涨跌幅 <= 8.5")
+        self.assertEqual(page["代码"].tolist(), ["600000", "688001", "830001"])
+        page, total = screen(_spot(), "not 涨跌幅 > 0")
+        self.assertEqual(page["代码"].tolist(), ["300001", "000002"])
+        page, _ = screen(_spot(), "", "-涨跌幅", limit=5)
+        self.assertEqual(page["代码"].tolist()[-1], "300001")
+
+    def test_offset_pages_through_matches(self) -> None:
+        page, total = screen(_spot(), "换手率 > 0", "代码", limit=2, offset=2)
+        self.assertEqual(total, 5)
+        self.assertEqual(page["代码"].tolist(), ["600000", "688001"])
+
+    def test_rejects_unsafe_or_invalid_expressions(self) -> None:
+        for expression in (
+            "__import__('os').system('id')",
+            "涨跌幅.__class__",
+            "[x for x in 涨跌幅]",
+            "涨跌幅 ** 2 > 1",
+            "涨跌幅",
+            "涨跌幅 > '5'",
+            "lambda: 1",
+            "涨跌幅 >",
+            "x" * 2000,
+        ):
+            with self.assertRaises(ScreenError, msg=expression):
+                screen(_spot(), expression)
+        with self.assertRaisesRegex(ScreenError, "unknown columns: 市值"):
+            screen(_spot(), "市值 > 1")
+        with self.assertRaises(ScreenError):
+            screen(_spot(), sort_by="-市值")
+
+    def test_compiled_expressions_are_cached(self) -> None:
+        first = compile_expression("涨跌幅 > 1")
+        self.assertIs(compile_expression("涨跌幅 > 1"), first)
+        self.assertEqual(first[1], ("涨跌幅",))
+
+
+class ScreenSpotToolTests(unittest.TestCase):
+    def test_tool_returns_only_matching_rows(self) -> None:
+        import mcp_server
+
+        with patch("akshare_api.stock_zh_a_spot_em", return_value=_spot()):
+            result = mcp_server.screen_spot(
+                where="涨跌幅 > 5", sort_by="-换手率", limit=2, columns="代码,换手率", format="columnar"
+            )
+            empty = mcp_server.screen_spot(where="涨跌幅 > 50")
+            error = mcp_server.screen_spot(where="open('x')")
+        self.assertEqual(result["data"], [["600000", 12.0], ["688001", 11.0]])
+        self.assertEqual(result["total_rows"], 3)
+        self.assertTrue(empty["success"])
+        self.assertEqual(empty["rows"], 0)
+        self.assertFalse(error["success"])
+
+
+if __name__ == "__main__":
+    unittest.main()
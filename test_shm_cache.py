@@ -0,0 +1,76 @@
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import cache_stats
+import shm_cache
+from file_cache import _cache_key, file_cached
+
+
+class ShmCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp.name)
+        patcher = patch("shm_cache._enabled", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cache_stats.reset()
+
+    def tearDown(self) -> None:
+        shm_cache.clear(self.cache_dir)
+        self.tmp.cleanup()
+        cache_stats.reset()
+
+    def _entry(self, value: int, expires_at: float = 9999999999.0, created_at: float = 1.0) -> dict:
+        return {"expires_at": expires_at, "created_at": created_at, "result": {"success": True, "v": value}}
+
+    def test_put_then_get_is_memoised_per_process(self) -> None:
+        key = "a" * 32
+        self.assertTrue(shm_cache.put(self.cache_dir, key, self._entry(1)))
+        first = shm_cache.get(self.cache_dir, "tool", key)
+        self.assertEqual(first, {"success": True, "v": 1})
+        self.assertIs(shm_cache.get(self.cache_dir, "tool", key), first)
+
+    def test_other_process_reads_segment_and_sees_replacement(self) -> None:
+        key = "b" * 32
+        shm_cache.put(self.cache_dir, key, self._entry(1))
+        script = (
+            "import shm_cache, sys, pathlib; shm_cache.enable();"
+            f"print(shm_cache.get(pathlib.Path({str(self.cache_dir)!r}), 'tool', {key!r}))"
+        )
+        out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, cwd=Path(__file__).parent)
+        self.assertIn("'v': 1", out.stdout)
+        shm_cache.put(self.cache_dir, key, self._entry(2, created_at=2.0))
+        out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, cwd=Path(__file__).parent)
+        self.assertIn("'v': 2", out.stdout)
+        self.assertEqual(shm_cache.get(self.cache_dir, "tool", key), {"success": True, "v": 2})
+
+    def test_expired_segment_is_missed_and_swept(self) -> None:
+        key = "c" * 32
+        shm_cache.put(self.cache_dir, key, self._entry(1, expires_at=1.0))
+        self.assertIsNone(shm_cache.get(self.cache_dir, "tool", key))
+        self.assertEqual(shm_cache.sweep(self.cache_dir), 1)
+        self.assertEqual(shm_cache.sweep(self.cache_dir), 0)
+
+    def test_decorator_serves_shared_entries_from_memory(self) -> None:
+        calls = {"n": 0}
+
+        @file_cached(ttl_seconds=60, cache_dir=self.cache_dir, shared=True)
+        def spot_tool() -> dict:
+            calls["n"] += 1
+            return {"success": True, "n": calls["n"]}
+
+        self.assertEqual(spot_tool(), {"success": True, "n": 1})
+        self.assertEqual(spot_tool(), {"success": True, "n": 1})
+        key = _cache_key("spot_tool", tuple(), {})
+        self.assertIsNotNone(shm_cache.get(self.cache_dir, "spot_tool", key))
+        entry = cache_stats.snapshot("spot_tool")["tools"]["spot_tool"]
+        self.assertEqual(entry["shm_hits"], 1)
+        self.assertEqual(calls["n"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
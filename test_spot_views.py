@@ -0,0 +1,51 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from spot_views import board_spot, select_board
+
+_CODES = ["600519", "688981", "000001", "300750", "301236", "830799", "920002", "002594", "689009", "430047"]
+
+
+def _full_snapshot() -> pd.DataFrame:
+    return pd.DataFrame({"序号": range(1, len(_CODES) + 1), "代码": _CODES, "涨跌幅": range(len(_CODES), 0, -1)})
+
+
+class SpotViewsTests(unittest.TestCase):
+    def test_select_board_by_code_prefix(self) -> None:
+        df = _full_snapshot()
+        self.assertEqual(list(select_board(df, "sh")["代码"]), ["600519", "688981", "689009"])
+        self.assertEqual(list(select_board(df, "sz")["代码"]), ["000001", "300750", "301236", "002594"])
+        self.assertEqual(list(select_board(df, "bj")["代码"]), ["830799", "920002", "430047"])
+        self.assertEqual(list(select_board(df, "cy")["代码"]), ["300750", "301236"])
+        kc = select_board(df, "kc")
+        self.assertEqual(list(kc["代码"]), ["688981", "689009"])
+        self.assertEqual(list(kc["序号"]), [1, 2])
+        self.assertEqual(list(df["序号"]), list(range(1, len(_CODES) + 1)))
+
+    def test_boards_share_one_upstream_snapshot(self) -> None:
+        response = MagicMock()
+        response.json.return_value = _full_snapshot().to_dict(orient="records")
+        with tempfile.TemporaryDirectory() as tmp, patch("config.CACHE_DIR", Path(tmp)), patch(
+            "config.CACHE_FRAMES", True
+        ), patch("config.CACHE_DERIVED_SPOT_VIEWS", True), patch(
+            "akshare_client.requests.get", return_value=response
+        ) as fake_get:
+            sizes = {board: len(board_spot(board)) for board in ("sh", "sz", "bj", "cy", "kc")}
+        self.assertEqual(fake_get.call_count, 1)
+        self.assertTrue(fake_get.call_args[0][0].endswith("/api/public/stock_zh_a_spot_em"))
+        self.assertEqual(sizes, {"sh": 3, "sz": 4, "bj": 3, "cy": 2, "kc": 2})
+
+    def test_without_cache_uses_board_endpoint(self) -> None:
+        response = MagicMock()
+        response.json.return_value = [{"代码": "300750"}]
+        with patch("config.CACHE_DIR", None), patch("akshare_client.requests.get", return_value=response) as fake_get:
+            board_spot("cy")
+        self.assertTrue(fake_get.call_args[0][0].endswith("/api/public/stock_cy_a_spot_em"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import asyncio
+import inspect
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import cache_stats
+from file_cache import file_cached
+from micro_cache import micro_cached
+from tool_executor import ToolExecutor, UpstreamRequired, probe, require_upstream
+
+
+class ProbeTests(unittest.TestCase):
+    def setUp(self) -> None:
+        cache_stats.reset()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp.name)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+        cache_stats.reset()
+
+    def test_upstream_signal_is_not_swallowed_by_tool_error_handling(self) -> None:
+        def tool() -> dict:
+            try:
+                require_upstream()
+                return {"success": True}
+            except Exception as e:
+                return {"success": False, "message": str(e)}
+
+        with self.assertRaises(UpstreamRequired):
+            probe(tool)
+        self.assertEqual(tool(), {"success": True})
+
+    def test_probe_serves_hits_and_discards_stats_of_abandoned_misses(self) -> None:
+        calls = {"n": 0}
+
+        @file_cached(ttl_seconds=60, cache_dir=self.cache_dir)
+        def cached_tool(symbol: str) -> dict:
+            calls["n"] += 1
+            return {"success": True, "data": [symbol]}
+
+        with self.assertRaises(UpstreamRequired):
+            probe(cached_tool, "000001")
+        self.assertEqual(calls["n"], 0)
+        self.assertEqual(cache_stats.snapshot()["tools"], {})
+        cached_tool("000001")
+        self.assertEqual(probe(cached_tool, "000001"), {"success": True, "data": ["000001"]})
+        stats = cache_stats.snapshot("cached_tool")["tools"]["cached_tool"]
+        self.assertEqual((stats["hits"], stats["misses"], stats["upstream_calls"]), (1, 1, 1))
+
+    def test_probe_does_not_join_micro_cache_flights(self) -> None:
+        @micro_cached(ttl_seconds=5)
+        def intraday_tool(symbol: str) -> dict:
+            return {"success": True, "symbol": symbol}
+
+        with self.assertRaises(UpstreamRequired):
+            probe(intraday_tool, "000001")
+        intraday_tool("000001")
+        self.assertEqual(probe(intraday_tool, "000001"), {"success": True, "symbol": "000001"})
+
+
+class ToolExecutorTests(unittest.TestCase):
+    def test_slow_upstream_calls_do_not_starve_cache_hits(self) -> None:
+        executor = ToolExecutor(fast_workers=2, slow_workers=1)
+        release = threading.Event()
+        threads = {}
+
+        def slow_tool() -> dict:
+            require_upstream()
+            threads["slow"] = threading.current_thread().name
+            release.wait(5)
+            return {"success": True}
+
+        def hit_tool() -> dict:
+            threads["hit"] = threading.current_thread().name
+            return {"success": True, "hit": True}
+
+        async def scenario() -> float:
+            pending = [asyncio.ensure_future(executor.run(slow_tool)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            started = time.perf_counter()
+            self.assertEqual(await executor.run(hit_tool), {"success": True, "hit": True})
+            elapsed = time.perf_counter() - started
+            release.set()
+            await asyncio.gather(*pending)
+            return elapsed
+
+        try:
+            elapsed = asyncio.run(scenario())
+        finally:
+            executor.shutdown()
+        self.assertLess(elapsed, 1.0)
+        self.assertTrue(threads["hit"].startswith("mcp-fast"))
+        self.assertTrue(threads["slow"].startswith("mcp-slow"))
+        self.assertEqual(executor.stats()["fallbacks"], 3)
+        self.assertEqual(executor.stats()["slow"], 3)
+
+    def test_wrap_exposes_async_handler_with_tool_signature(self) -> None:
+        executor = ToolExecutor(fast_workers=1, slow_workers=1)
+
+        def tool(symbol: str, period: str = "daily") -> dict:
+            return {"success": True, "args": [symbol, period]}
+
+        handler = executor.wrap(tool, slow=True)
+        try:
+            self.assertTrue(inspect.iscoroutinefunction(handler))
+            self.assertEqual(list(inspect.signature(handler).parameters), ["symbol", "period"])
+            self.assertEqual(asyncio.run(handler("000001", period="weekly"))["args"], ["000001", "weekly"])
+            self.assertEqual(executor.stats()["fast"], 0)
+        finally:
+            executor.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
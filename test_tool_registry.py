@@ -0,0 +1,156 @@
+import asyncio
+import inspect
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+
+import akshare_api
+import cache_stats
+from batch import BatchRunner
+from tool_registry import TOOLS, Param, ToolSpec, make_batch_tool, make_tool
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame({"代码": ["000001", "600000"], "最新价": [10.5, 7.2]})
+
+
+class ToolSpecTests(unittest.TestCase):
+    def test_registry_entries_are_unique_and_resolve_to_upstream(self) -> None:
+        names = [spec.name for spec in TOOLS]
+        self.assertEqual(len(names), len(set(names)))
+        for spec in TOOLS:
+            self.assertTrue(callable(getattr(akshare_api, spec.name, None)), spec.name)
+            self.assertTrue(spec.source, spec.name)
+
+    def test_invalid_tier_is_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            ToolSpec("stock_x", "x", tier="hourly")
+        with self.assertRaises(ValueError):
+            ToolSpec("stock_x", "x", tier="micro", shared=True)
+        with self.assertRaises(ValueError):
+            ToolSpec("stock_x", "x", tier="history", schema="2")
+
+    def test_tags(self) -> None:
+        spec = ToolSpec("stock_hk_spot", "x", tier="realtime", source="sina", market="hk")
+        self.assertEqual(spec.tags, {"source:sina", "market:hk", "tier:realtime"})
+
+
+class MakeToolTests(unittest.TestCase):
+    def setUp(self) -> None:
+        cache_stats.reset()
+        self._tmp = tempfile.TemporaryDirectory()
+        self._patch = patch("config.CACHE_DIR", Path(self._tmp.name))
+        self._patch.start()
+
+    def tearDown(self) -> None:
+        self._patch.stop()
+        self._tmp.cleanup()
+        cache_stats.reset()
+
+    def test_generated_tool_matches_hand_written_signature(self) -> None:
+        spec = ToolSpec(
+            "stock_demo_em",
+            """
+            演示接口
+
+            参数说明:
+            - symbol: str
+            """,
+            params=(Param("symbol"), Param("period", "daily"), Param("timeout", None)),
+        )
+        fn = make_tool(spec, fetch=lambda **kwargs: _frame())
+        self.assertEqual(fn.__name__, "stock_demo_em")
+        self.assertEqual(fn.__doc__, "演示接口\n\n参数说明:\n- symbol: str")
+        params = inspect.signature(fn).parameters
+        self.assertEqual(list(params)[:3], ["symbol", "period", "timeout"])
+        self.assertIs(params["symbol"].default, inspect.Parameter.empty)
+        self.assertEqual(params["period"].default, "daily")
+        self.assertIn("limit", params)
+        self.assertIs(fn.__annotations__["symbol"], str)
+
+    def test_calls_upstream_once_and_drops_none_params(self) -> None:
+        calls = []
+
+        def fetch(**kwargs):
+            calls.append(kwargs)
+            return _frame()
+
+        spec = ToolSpec("stock_demo_em", "演示接口", params=(Param("symbol"), Param("timeout", None)))
+        fn = make_tool(spec, fetch=fetch)
+        first = fn("000001")
+        page = fn(symbol="000001", limit=1, columns="代码")
+        self.assertEqual(first["rows"], 2)
+        self.assertEqual(page["data"], [{"代码": "000001"}])
+        self.assertEqual(calls, [{"symbol": "000001"}])
+        stats = cache_stats.snapshot("stock_demo_em")["tools"]["stock_demo_em"]
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_changing_schema_misses_the_cache(self) -> None:
+        calls = []
+
+        def fetch(**kwargs):
+            calls.append(kwargs)
+            return _frame()
+
+        params = (Param("symbol"),)
+        make_tool(ToolSpec("stock_demo_em", "演示接口", params=params), fetch=fetch)("000001")
+        make_tool(ToolSpec("stock_demo_em", "演示接口", params=params), fetch=fetch)("000001")
+        self.assertEqual(len(calls), 1)
+        make_tool(ToolSpec("stock_demo_em", "演示接口", params=params, schema="2"), fetch=fetch)("000001")
+        self.assertEqual(len(calls), 2)
+        make_tool(ToolSpec("stock_demo_em", "演示接口", params=params, schema="2"), fetch=fetch)("000001")
+        self.assertEqual(len(calls), 2)
+
+    def test_upstream_error_returns_error_envelope(self) -> None:
+        def fetch(**kwargs):
+            raise RuntimeError("upstream down")
+
+        fn = make_tool(ToolSpec("stock_demo_em", "演示接口", tier="micro"), fetch=fetch)
+        result = fn()
+        self.assertFalse(result["success"])
+        self.assertIn("upstream down", result["message"])
+
+    def test_batch_tool_replaces_symbol_with_symbols(self) -> None:
+        spec = ToolSpec(
+            "stock_demo_em",
+            """
+            演示接口
+
+            参数说明:
+            - symbol: str
+              股票代码
+            - period: str
+              period="daily"
+            """,
+            params=(Param("symbol"), Param("period", "daily")),
+            batch=True,
+        )
+        fn = make_tool(spec, fetch=lambda **kwargs: _frame().assign(周期=kwargs["period"]))
+        batch_fn = make_batch_tool(spec, fn, BatchRunner(max_symbols=2, rate_per_second=0))
+        self.assertEqual(batch_fn.__name__, "stock_demo_em_batch")
+        self.assertEqual(list(inspect.signature(batch_fn).parameters), ["symbols", "period"])
+        self.assertIn('- period: str\n  period="daily"', batch_fn.__doc__)
+        self.assertNotIn("- symbol:", batch_fn.__doc__)
+        result = batch_fn(["000001", "600000"], period="weekly")
+        self.assertEqual(list(result["results"]), ["000001", "600000"])
+        self.assertEqual(result["results"]["600000"]["data"][0]["周期"], "weekly")
+        self.assertFalse(batch_fn(["1", "2", "3"])["success"])
+        with self.assertRaises(ValueError):
+            ToolSpec("stock_x", "x", params=(Param("date"),), batch=True)
+
+    def test_server_registers_registry_tools_with_tags(self) -> None:
+        import mcp_server
+
+        registered = asyncio.run(mcp_server.mcp.get_tool("stock_zh_a_hist"))
+        self.assertEqual(registered.tags, {"source:eastmoney", "market:a", "tier:history"})
+        self.assertEqual(mcp_server.stock_zh_a_hist.__name__, "stock_zh_a_hist")
+        self.assertTrue(callable(mcp_server.stock_zh_a_spot.cache_slice))
+        batch_tool = asyncio.run(mcp_server.mcp.get_tool("stock_zh_a_hist_batch"))
+        self.assertIn("batch", batch_tool.tags)
+
+
+if __name__ == "__main__":
+    unittest.main()
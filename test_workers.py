@@ -0,0 +1,92 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import workers
+from workers import LeaderElection, Supervisor
+
+
+def _wait_until(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+class LeaderElectionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "cache" / workers.LEADER_LOCK_NAME
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_only_one_holder_and_follower_takes_over(self) -> None:
+        elected = []
+        leader = LeaderElection(self.path, lambda: elected.append("leader"))
+        follower = LeaderElection(self.path, lambda: elected.append("follower"), retry_seconds=0.05)
+        try:
+            self.assertTrue(leader.start())
+            self.assertFalse(follower.start())
+            self.assertEqual(self.path.read_text().strip(), str(os.getpid()))
+            time.sleep(0.15)
+            self.assertEqual(elected, ["leader"])
+            leader.stop()
+            self.assertTrue(_wait_until(lambda: follower.is_leader))
+            self.assertEqual(elected, ["leader", "follower"])
+        finally:
+            leader.stop()
+            follower.stop()
+
+
+class SocketTests(unittest.TestCase):
+    @unittest.skipUnless(workers.HAS_REUSEPORT, "SO_REUSEPORT not supported")
+    def test_workers_can_bind_the_same_port(self) -> None:
+        first = workers.bind_socket("127.0.0.1", 0, reuse_port=True)
+        try:
+            port = first.getsockname()[1]
+            with patch.dict(os.environ, {workers.LISTEN_FD_ENV: ""}):
+                second = workers.listen_socket("127.0.0.1", port)
+            second.close()
+        finally:
+            first.close()
+
+    def test_worker_id(self) -> None:
+        with patch.dict(os.environ, {workers.WORKER_ID_ENV: "2"}):
+            self.assertEqual(workers.worker_id(), 2)
+        with patch.dict(os.environ, {workers.WORKER_ID_ENV: ""}):
+            self.assertIsNone(workers.worker_id())
+
+
+class SupervisorTests(unittest.TestCase):
+    def test_restarts_exited_workers_and_stops_all(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            script = (
+                "import os, sys, time\n"
+                f"path = os.path.join({tmp!r}, os.environ[{workers.WORKER_ID_ENV!r}])\n"
+                "open(path, 'a').write('x')\n"
+                f"time.sleep(0.1 if os.environ[{workers.WORKER_ID_ENV!r}] == '0' else 30)\n"
+            )
+            supervisor = Supervisor(2, ["-c", script], "127.0.0.1", 0, restart_delay=0.05, stop_timeout=5)
+            thread = threading.Thread(target=supervisor.run, kwargs={"poll_seconds": 0.05})
+            thread.start()
+            try:
+                restarted = Path(tmp, "0")
+                self.assertTrue(_wait_until(lambda: restarted.exists() and len(restarted.read_text()) >= 3))
+                self.assertTrue(_wait_until(lambda: Path(tmp, "1").exists()))
+            finally:
+                supervisor._stopping.set()
+                thread.join(10)
+            self.assertFalse(thread.is_alive())
+            self.assertEqual(Path(tmp, "1").read_text(), "x")
+            self.assertTrue(all(proc.poll() is not None for proc in supervisor._procs.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
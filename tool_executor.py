@@ -0,0 +1,164 @@
+# tool_executor.py
+"""
+工具执行线程池：MCP 工具以异步处理函数注册，同步的工具函数在专用线程池中执行。
+
+- 快速池：先以"探测"方式执行工具，只允许读取缓存；一旦需要访问上游（缓存未命中），
+  在发起请求前抛出 UpstreamRequired，放弃本次执行
+- 慢速池：探测未命中的调用改到慢速池重新执行，正常访问上游并写入缓存
+
+两个池大小分别配置，上游变慢时慢速池排队，缓存命中仍由快速池及时返回，不会被慢请求占满。
+进入慢速池前可经过准入控制（admission.Gate）：按工具与数据源分组限制并发，过载时返回 overloaded 错误。
+需要访问上游的位置（file_cache.call_upstream、micro_cache、call_aktools_api 等）调用 require_upstream() 声明。
+线程池中的执行带上调用方的 contextvars（如 progress 的进度通知通道）。
+"""
+import asyncio
+import inspect
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar, copy_context
+from functools import partial, wraps
+from typing import Any, Callable, Dict, Optional
+
+import admission
+import cache_stats
+import debug_timing
+from admission import Gate, Overloaded
+
+logger = logging.getLogger(__name__)
+
+_probing: ContextVar[bool] = ContextVar("tool_executor_probing", default=False)
+
+
+class UpstreamRequired(BaseException):
+    """
+    探测执行中需要访问上游。
+
+    继承 BaseException 而非 Exception：工具函数内部普遍以 except Exception 兜底返回错误结果，
+    不能把这个控制流信号吞掉。
+    """
+
+
+def probing() -> bool:
+    """当前是否处于只读缓存的探测执行中。"""
+    return _probing.get()
+
+
+def require_upstream() -> None:
+    """在访问上游之前调用：探测执行中抛出 UpstreamRequired，否则什么也不做。"""
+    if _probing.get():
+        raise UpstreamRequired()
+
+
+def probe(f: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    以探测方式执行 f：只允许读取缓存，需要访问上游时抛出 UpstreamRequired。
+    探测期间的缓存统计先暂存，成功返回后才计入，被放弃的探测不重复计数。
+    """
+    token = _probing.set(True)
+    try:
+        with cache_stats.deferred() as pending:
+            try:
+                return f(*args, **kwargs)
+            except UpstreamRequired:
+                pending.clear()
+                raise
+    finally:
+        # 退出 deferred() 后再提交：嵌套在外层探测中时并入外层暂存，随外层一起计入或放弃
+        cache_stats.commit(pending)
+        _probing.reset(token)
+
+
+class ToolExecutor:
+    """
+    快速池 + 慢速池的工具执行器。
+
+    Args:
+        fast_workers: 快速池线程数（缓存命中）
+        slow_workers: 慢速池线程数（访问上游）
+    """
+
+    def __init__(self, fast_workers: int = 16, slow_workers: int = 8) -> None:
+        self.fast_workers = max(1, int(fast_workers))
+        self.slow_workers = max(1, int(slow_workers))
+        self._fast = ThreadPoolExecutor(self.fast_workers, thread_name_prefix="mcp-fast")
+        self._slow = ThreadPoolExecutor(self.slow_workers, thread_name_prefix="mcp-slow")
+        self._counts: Dict[str, int] = {"fast": 0, "slow": 0, "fallbacks": 0, "rejected": 0}
+
+    async def run(
+        self, f: Callable[..., Any], *args: Any, slow: bool = False, gate: Optional[Gate] = None, **kwargs: Any
+    ) -> Any:
+        """
+        在线程池中执行同步函数 f。
+
+        Args:
+            f: 同步工具函数
+            slow: 为 True 时直接在慢速池执行（总是访问上游或耗时较长的工具）
+            gate: 进入慢速池前的准入门，为 None 表示不限制
+
+        Raises:
+            Overloaded: 准入控制拒绝了慢速池中的执行
+        """
+        loop = asyncio.get_running_loop()
+        if not slow:
+            started = time.perf_counter()
+            try:
+                result = await loop.run_in_executor(self._fast, partial(copy_context().run, probe, f, *args, **kwargs))
+                self._counts["fast"] += 1
+                debug_timing.annotate(pool="fast", fallback=False)
+                return result
+            except UpstreamRequired:
+                self._counts["fallbacks"] += 1
+                debug_timing.add("probe", time.perf_counter() - started)
+        debug_timing.annotate(pool="slow", fallback=not slow)
+        # 慢速池中的工具可经 Gate.hold() 为其内部的上游请求取得准入名额（如批量工具逐个代码的请求）
+        with admission.loop_bound(loop):
+            call = partial(copy_context().run, f, *args, **kwargs)
+        if gate is None:
+            result = await loop.run_in_executor(self._slow, call)
+        else:
+            waiting = time.perf_counter()
+            try:
+                held = await gate.acquire()
+            except Overloaded:
+                self._counts["rejected"] += 1
+                raise
+            debug_timing.add("admission_wait", time.perf_counter() - waiting)
+            started = time.monotonic()
+            future = self._slow.submit(call)
+            # 名额随线程中的执行一起归还：调用方取消时线程仍在运行，名额不能提前释放
+            future.add_done_callback(
+                lambda _: loop.call_soon_threadsafe(Gate.release, held, time.monotonic() - started)
+            )
+            result = await asyncio.wrap_future(future)
+        self._counts["slow"] += 1
+        return result
+
+    def wrap(self, f: Callable[..., Any], slow: bool = False, gate: Optional[Gate] = None) -> Callable[..., Any]:
+        """
+        返回在本执行器中运行 f 的异步处理函数（参数签名与 f 相同，供 FastMCP 注册）。
+
+        Args:
+            f: 同步工具函数
+            slow: 是否直接在慢速池执行
+            gate: 进入慢速池前的准入门；被拒绝时处理函数返回 overloaded 错误
+        """
+
+        @wraps(f)
+        async def handler(*args: Any, **kwargs: Any) -> Any:
+            try:
+                return await self.run(f, *args, slow=slow, gate=gate, **kwargs)
+            except Overloaded as e:
+                logger.warning("%s rejected: %s", f.__name__, e)
+                return e.response()
+
+        handler.__signature__ = inspect.signature(f)
+        return handler
+
+    def stats(self) -> Dict[str, int]:
+        """各池完成的调用数、快速池探测未命中改到慢速池的次数，以及被准入控制拒绝的次数。"""
+        return {"fast_workers": self.fast_workers, "slow_workers": self.slow_workers, **self._counts}
+
+    def shutdown(self) -> None:
+        self._fast.shutdown(wait=False, cancel_futures=True)
+        self._slow.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,964 @@
+# tool_registry.py
+"""
+工具注册表：以声明方式描述 AKShare 数据接口（名称、参数、缓存层级、数据源、市场），
+服务启动时由 make_tool 按同一条代码路径生成 MCP 工具，不再逐个手写包装函数。
+
+新增接口只需在 TOOLS 中追加一条 ToolSpec；缓存、分页视图等横切逻辑都在 make_tool 中装配，
+修改一处即对全部工具生效。参数需要特殊处理的接口（如 stock_individual_spot_xq 的 token 回退）
+仍在 mcp_server.py 中手写。
+"""
+import inspect
+import logging
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+import akshare_api
+from cache_namespace import DEFAULT_SCHEMA
+from file_cache import file_cached
+from history_cache import history_cached
+from mcp_utils import dataframe_to_mcp_result, format_error_response, paginated
+from micro_cache import micro_cached
+
+if TYPE_CHECKING:
+    from admission import Gate
+    from batch import BatchRunner
+    from chunked import ChunkedFetch
+
+logger = logging.getLogger(__name__)
+
+# 缓存层级：daily / static / realtime 为文件缓存（对应 CACHE_TTL_* 配置），
+# history 为历史 K 线分段缓存，micro 为分时数据的进程内短缓存
+TIERS = ("daily", "static", "realtime", "history", "micro")
+MARKETS = ("a", "b", "hk", "us")
+
+# 必填参数的默认值占位（None 是合法的可选参数默认值）
+REQUIRED = inspect.Parameter.empty
+
+
+@dataclass(frozen=True)
+class Param:
+    """
+    工具参数。上游接口的参数均为字符串；default 为 REQUIRED 表示必填，为 None 表示可选且默认不传给上游。
+    """
+
+    name: str
+    default: Any = REQUIRED
+    annotation: type = str
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """
+    一个 AKShare 数据接口的声明。
+
+    Args:
+        name: 工具名，与 akshare_api 中的函数同名（也是缓存键与统计使用的名称）
+        doc: 工具说明（MCP 工具描述），含参数说明
+        params: 参数列表，顺序即工具签名中的顺序
+        tier: 缓存层级，见 TIERS
+        source: 数据源分组（sse / szse / eastmoney / sina / xueqiu / ths / tencent / cninfo / caixin）
+        market: 市场（a / b / hk / us）
+        shared: 文件缓存是否使用共享内存层（全市场快照等大结果）
+        schema: 文件缓存的结果结构版本，返回结构变化时修改，旧条目不再命中；为 None 时使用默认版本
+        batch: 是否同时生成按代码列表批量查询的 <name>_batch 工具（第一个参数须为 symbol）
+        chunked: 是否同时生成按月分段、以游标续查的 <name>_chunked 工具（须有 start_date / end_date 参数）
+    """
+
+    name: str
+    doc: str
+    params: Tuple[Param, ...] = ()
+    tier: str = "daily"
+    source: str = ""
+    market: str = "a"
+    shared: bool = False
+    schema: Optional[str] = None
+    batch: bool = False
+    chunked: bool = False
+
+    def __post_init__(self) -> None:
+        if self.tier not in TIERS:
+            raise ValueError(f"{self.name}: unknown tier {self.tier!r}; choice of {TIERS}")
+        if self.market not in MARKETS:
+            raise ValueError(f"{self.name}: unknown market {self.market!r}; choice of {MARKETS}")
+        if self.shared and self.tier not in ("daily", "static", "realtime"):
+            raise ValueError(f"{self.name}: shared is only supported by file cache tiers")
+        if self.schema is not None and self.tier not in ("daily", "static", "realtime"):
+            raise ValueError(f"{self.name}: schema is only supported by file cache tiers")
+        if self.batch and (not self.params or self.params[0].name != "symbol"):
+            raise ValueError(f"{self.name}: batch tools need symbol as the first parameter")
+        if self.chunked and not {"start_date", "end_date"} <= {p.name for p in self.params}:
+            raise ValueError(f"{self.name}: chunked tools need start_date and end_date parameters")
+
+    @property
+    def tags(self) -> set:
+        """MCP 工具标签，供客户端按数据源、市场、缓存层级过滤。"""
+        return {f"source:{self.source}", f"market:{self.market}", f"tier:{self.tier}"}
+
+    def signature(self) -> inspect.Signature:
+        parameters = [
+            inspect.Parameter(p.name, inspect.Parameter.POSITIONAL_OR_KEYWORD, default=p.default, annotation=p.annotation)
+            for p in self.params
+        ]
+        return inspect.Signature(parameters, return_annotation=dict)
+
+
+def _cache_decorator(spec: ToolSpec) -> Callable[[Callable[..., dict]], Callable[..., dict]]:
+    import config
+
+    if spec.tier == "history":
+        # 历史段永久缓存，仅尾部按短 TTL 刷新
+        return history_cached(
+            tail_ttl_seconds=config.CACHE_TTL_HISTORY_TAIL,
+            fallback_ttl_seconds=config.CACHE_TTL_DAILY,
+            adjusted_tail_days=config.CACHE_HISTORY_ADJUSTED_TAIL_DAYS,
+            qfq_ttl_seconds=config.CACHE_TTL_HISTORY_QFQ,
+            empty_ttl_seconds=config.CACHE_TTL_DAILY,
+        )
+    if spec.tier == "micro":
+        return micro_cached(ttl_seconds=config.CACHE_TTL_MICRO, max_entries=config.CACHE_MICRO_MAX_ENTRIES)
+    ttl = {
+        "daily": config.CACHE_TTL_DAILY,
+        "static": config.CACHE_TTL_STATIC,
+        "realtime": config.CACHE_TTL_REALTIME,
+    }[spec.tier]
+    # 生成的工具直接转换同名接口的 DataFrame，直接调用该接口时可读取同一条缓存
+    schema = DEFAULT_SCHEMA if spec.schema is None else spec.schema
+    return file_cached(ttl_seconds=ttl, schema=schema, shared=spec.shared, endpoint=True)
+
+
+def make_tool(spec: ToolSpec, fetch: Optional[Callable[..., Any]] = None) -> Callable[..., dict]:
+    """
+    按声明生成工具函数：调用上游接口并转换为 MCP 返回格式，外层依次套上缓存与分页视图。
+
+    生成的函数与原手写版本同名、同签名，缓存键与统计名称保持不变。
+
+    Args:
+        spec: 接口声明
+        fetch: 上游调用函数，默认为 akshare_api 中的同名函数（注册时解析一次，调用时不再导入）
+
+    Returns:
+        同步工具函数，交给 mcp_server.tool() 注册
+    """
+    if fetch is None:
+        fetch = getattr(akshare_api, spec.name)
+    name = spec.name
+    signature = spec.signature()
+
+    def handler(*args: Any, **kwargs: Any) -> dict:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        # 值为 None 的可选参数不传给上游，使用上游自身的默认值
+        params = {k: v for k, v in bound.arguments.items() if v is not None}
+        try:
+            df = fetch(**params)
+            return dataframe_to_mcp_result(df)
+        except Exception as e:
+            logger.error(f"{name} 执行失败: {e}")
+            return format_error_response(e)
+
+    handler.__name__ = handler.__qualname__ = name
+    handler.__doc__ = inspect.cleandoc(spec.doc)
+    handler.__signature__ = signature
+    handler.__annotations__ = {**{p.name: p.annotation for p in spec.params}, "return": dict}
+    return paginated()(_cache_decorator(spec)(handler))
+
+
+_PARAM_DOC = re.compile(r"^- (\w+):")
+
+
+def _param_docs(doc: str) -> Dict[str, str]:
+    # 从"参数说明"中按参数名切出各条说明（"- name: type" 及其后的缩进行）
+    docs: Dict[str, List[str]] = {}
+    current = None
+    for line in inspect.cleandoc(doc).splitlines():
+        match = _PARAM_DOC.match(line)
+        if match:
+            current = match.group(1)
+            docs[current] = [line]
+        elif current is not None and line.startswith(" "):
+            docs[current].append(line)
+        else:
+            current = None
+    return {name: "\n".join(lines) for name, lines in docs.items()}
+
+
+def make_batch_tool(
+    spec: ToolSpec, f: Callable[..., dict], runner: "BatchRunner", gate: Optional["Gate"] = None
+) -> Callable[..., dict]:
+    """
+    按声明生成批量工具 <name>_batch：symbols（代码列表）替换 symbol，其余参数与单个查询相同。
+
+    Args:
+        spec: 接口声明（batch=True）
+        f: make_tool 生成的单个查询工具，每个代码经它读写各自的缓存条目
+        runner: 批量执行器（并发数与上游限流）
+        gate: 单个查询工具的准入门，每个未命中的代码访问上游前取得名额
+
+    Returns:
+        同步工具函数，交给 mcp_server.tool() 注册
+    """
+    name = f"{spec.name}_batch"
+    single = spec.signature()
+    rest = [p for p in single.parameters.values() if p.name != "symbol"]
+    symbols = inspect.Parameter("symbols", inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=List[str])
+    signature = single.replace(parameters=[symbols, *rest])
+
+    def handler(*args: Any, **kwargs: Any) -> dict:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        params = dict(bound.arguments)
+        try:
+            return runner.run(f, params.pop("symbols"), gate=gate, **params)
+        except Exception as e:
+            logger.error(f"{name} 执行失败: {e}")
+            return format_error_response(e)
+
+    summary = inspect.cleandoc(spec.doc).splitlines()[0]
+    param_docs = _param_docs(spec.doc)
+    lines = [
+        f"{summary}（批量）",
+        "",
+        f"一次查询多个股票代码，每个代码的结果与 {spec.name} 相同，results 按代码返回，失败的代码及原因在 errors 中。",
+        "",
+        "参数说明:",
+        "- symbols: list[str]",
+        f"  股票代码列表，最多 {runner.max_symbols} 个",
+    ]
+    lines += [param_docs[p.name] for p in rest if p.name in param_docs]
+    handler.__name__ = handler.__qualname__ = name
+    handler.__doc__ = "\n".join(lines)
+    handler.__signature__ = signature
+    handler.__annotations__ = {"symbols": List[str], **{p.name: p.annotation for p in rest}, "return": dict}
+    return handler
+
+
+def make_chunked_tool(spec: ToolSpec, f: Callable[..., dict], fetcher: "ChunkedFetch") -> Callable[..., dict]:
+    """
+    按声明生成分段工具 <name>_chunked：参数与单个查询相同，另加 cursor（上次返回的 next_cursor）。
+
+    Args:
+        spec: 接口声明（chunked=True）
+        f: make_tool 生成的单个查询工具，每个月份窗口经它读写各自的缓存条目
+        fetcher: 分段查询执行器（单次返回的行数上限）
+
+    Returns:
+        同步工具函数，交给 mcp_server.tool() 注册
+    """
+    name = f"{spec.name}_chunked"
+    single = spec.signature()
+    cursor = inspect.Parameter(
+        "cursor", inspect.Parameter.POSITIONAL_OR_KEYWORD, default=None, annotation=Optional[str]
+    )
+    signature = single.replace(parameters=[*single.parameters.values(), cursor])
+
+    def handler(*args: Any, **kwargs: Any) -> dict:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        params = {k: v for k, v in bound.arguments.items() if v is not None}
+        try:
+            return fetcher.run(f, spec.name, **params)
+        except Exception as e:
+            logger.error(f"{name} 执行失败: {e}")
+            return format_error_response(e)
+
+    summary = inspect.cleandoc(spec.doc).splitlines()[0]
+    param_docs = _param_docs(spec.doc)
+    lines = [
+        f"{summary}（分段）",
+        "",
+        f"长日期区间按自然月分段查询，每次最多返回 {fetcher.max_rows} 行；结果与 {spec.name} 相同，"
+        "next_cursor 不为空时以 cursor=next_cursor 再次调用取下一段，progress 为已完成 / 全部月份数，"
+        "失败的月份及原因在 errors 中。",
+        "",
+        "参数说明:",
+    ]
+    lines += [param_docs[p.name] for p in spec.params if p.name in param_docs]
+    lines += ["- cursor: str", "  上次调用返回的 next_cursor；提供时忽略其他参数"]
+    handler.__name__ = handler.__qualname__ = name
+    handler.__doc__ = "\n".join(lines)
+    handler.__signature__ = signature
+    handler.__annotations__ = {
+        **{p.name: p.annotation for p in spec.params},
+        "cursor": Optional[str],
+        "return": dict,
+    }
+    return handler
+
+
+# =============================================================================
+# AKShare 股票数据接口
+# =============================================================================
+
+TOOLS: Tuple[ToolSpec, ...] = (
+    ToolSpec(
+        "stock_sse_summary",
+        """
+        上海证券交易所-股票数据总貌
+        """,
+        tier="daily",
+        source="sse",
+    ),
+    ToolSpec(
+        "stock_szse_summary",
+        """
+        深圳证券交易所-市场总貌-证券类别统计
+        """,
+        tier="daily",
+        source="szse",
+    ),
+    ToolSpec(
+        "stock_szse_area_summary",
+        """
+        深圳证券交易所-市场总貌-地区交易排序
+        """,
+        tier="daily",
+        source="szse",
+    ),
+    ToolSpec(
+        "stock_szse_sector_summary",
+        """
+        深圳证券交易所-统计资料-股票行业成交数据
+
+        参数说明:
+        - symbol: str
+          symbol="当月"; choice of {"当月", "当年"}
+        """,
+        params=(Param("symbol", "当年"),),
+        tier="daily",
+        source="szse",
+    ),
+    ToolSpec(
+        "stock_sse_deal_daily",
+        """
+        上海证券交易所-数据-股票数据-成交概况-股票成交概况-每日股票情况
+        """,
+        tier="daily",
+        source="sse",
+    ),
+    ToolSpec(
+        "stock_individual_info_em",
+        """
+        东方财富-个股-股票信息
+
+        参数说明:
+        - symbol: str
+          symbol="603777"; 股票代码
+        """,
+        params=(Param("symbol"),),
+        tier="static",
+        batch=True,
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_individual_basic_info_xq",
+        """
+        雪球财经-个股-公司概况-公司简介
+
+        参数说明:
+        - symbol: str
+          symbol="SH601127"; 股票代码
+        """,
+        params=(Param("symbol"),),
+        tier="static",
+        source="xueqiu",
+    ),
+    ToolSpec(
+        "stock_zh_a_spot",
+        """
+        新浪财经-沪深京 A 股数据, 重复运行本函数会被新浪暂时封 IP, 建议增加时间间隔
+        """,
+        tier="realtime",
+        shared=True,
+        source="sina",
+    ),
+    ToolSpec(
+        "stock_zh_a_hist",
+        """
+        东方财富-沪深京 A 股日频率数据; 历史数据按日频率更新, 当日收盘价请在收盘后获取
+
+        参数说明:
+        - symbol: str
+          symbol='603777'; 股票代码可以在 ak.stock_zh_a_spot_em() 中获取
+        - period: str
+          period='daily'; choice of {'daily', 'weekly', 'monthly'}
+        - start_date: str
+          start_date='20210301'; 开始查询的日期
+        - end_date: str
+          end_date='20210616'; 结束查询的日期
+        - adjust: str
+          默认返回不复权的数据; qfq: 返回前复权后的数据; hfq: 返回后复权后的数据
+        - timeout: float
+          timeout=None; 默认不设置超时参数
+        """,
+        params=(
+            Param("symbol"),
+            Param("period", "daily"),
+            Param("start_date", "20210301"),
+            Param("end_date", "20210616"),
+            Param("adjust", ""),
+            Param("timeout", None),
+        ),
+        tier="history",
+        batch=True,
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_zh_a_daily",
+        """
+        新浪财经-沪深京 A 股的数据, 历史数据按日频率更新; 注意其中的 sh689009 为 CDR, 请 通过 ak.stock_zh_a_cdr_daily 接口获取
+
+        参数说明:
+        - symbol: str
+          symbol='sh600000'; 股票代码可以在 ak.stock_zh_a_spot() 中获取
+        - start_date: str
+          start_date='20201103'; 开始查询的日期
+        - end_date: str
+          end_date='20201116'; 结束查询的日期
+        - adjust: str
+          默认返回不复权的数据; qfq: 返回前复权后的数据; hfq: 返回后复权后的数据; hfq-factor: 返回后复权因子; qfq-factor: 返回前复权因子
+        """,
+        params=(
+            Param("symbol"),
+            Param("start_date", "20201103"),
+            Param("end_date", "20201116"),
+            Param("adjust", ""),
+        ),
+        tier="history",
+        source="sina",
+    ),
+    ToolSpec(
+        "stock_zh_a_hist_tx",
+        """
+        腾讯证券-日频-股票历史数据; 历史数据按日频率更新, 当日收盘价请在收盘后获取
+
+        参数说明:
+        - symbol: str
+          symbol='sz000001'; 带市场标识
+        - start_date: str
+          start_date='19000101'; 开始查询的日期
+        - end_date: str
+          end_date='20500101'; 结束查询的日期
+        - adjust: str
+          默认返回不复权的数据; qfq: 返回前复权后的数据; hfq: 返回后复权后的数据
+        """,
+        params=(
+            Param("symbol"),
+            Param("start_date", "20201103"),
+            Param("end_date", "20201116"),
+            Param("adjust", ""),
+        ),
+        tier="history",
+        source="tencent",
+    ),
+    ToolSpec(
+        "stock_zh_a_minute",
+        """
+        新浪财经-沪深京 A 股股票或者指数的分时数据，目前可以获取 1, 5, 15, 30, 60 分钟的数据频率, 可以指定是否复权
+
+        参数说明:
+        - symbol: str
+          symbol='sh000300'; 同日频率数据接口
+        - period: str
+          period='1'; 获取 1, 5, 15, 30, 60 分钟的数据频率
+        - adjust: str
+          adjust=""; 默认为空: 返回不复权的数据; qfq: 返回前复权后的数据; hfq: 返回后复权后的数据;
+        """,
+        params=(
+            Param("symbol"),
+            Param("period", "1"),
+            Param("adjust", ""),
+        ),
+        tier="micro",
+        source="sina",
+    ),
+    ToolSpec(
+        "stock_intraday_em",
+        """
+        东方财富-分时数据
+
+        参数说明:
+        - symbol: str
+          symbol="000001"; 股票代码
+        """,
+        params=(Param("symbol"),),
+        tier="micro",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_zh_a_hist_pre_min_em",
+        """
+        东方财富-股票行情-盘前数据
+
+        参数说明:
+        - symbol: str
+          symbol="000001"; 股票代码
+        """,
+        params=(Param("symbol"),),
+        tier="micro",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_zh_growth_comparison_em",
+        """
+        东方财富-行情中心-同行比较-成长性比较
+
+        参数说明:
+        - symbol: str
+          symbol="SZ000895"
+        """,
+        params=(Param("symbol"),),
+        tier="static",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_zh_valuation_comparison_em",
+        """
+        东方财富-行情中心-同行比较-估值比较
+
+        参数说明:
+        - symbol: str
+          symbol="SZ000895"
+        """,
+        params=(Param("symbol"),),
+        tier="static",
+        batch=True,
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_zh_dupont_comparison_em",
+        """
+        东方财富-行情中心-同行比较-杜邦分析比较
+
+        参数说明:
+        - symbol: str
+          symbol="SZ000895"
+        """,
+        params=(Param("symbol"),),
+        tier="static",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_zh_scale_comparison_em",
+        """
+        东方财富-行情中心-同行比较-公司规模
+
+        参数说明:
+        - symbol: str
+          symbol="SZ000895"
+        """,
+        params=(Param("symbol"),),
+        tier="static",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_financial_abstract",
+        """
+        新浪财经-财务报表-关键指标
+
+        参数说明:
+        - symbol: str
+          symbol="600004"; 股票代码
+        """,
+        params=(Param("symbol"),),
+        tier="static",
+        source="sina",
+    ),
+    ToolSpec(
+        "stock_yjbb_em",
+        """
+        东方财富-数据中心-年报季报-业绩报表
+
+        参数说明:
+        - date: str
+          date="20200331"; choice of {"XXXX0331", "XXXX0630", "XXXX0930", "XXXX1231"}; 从 20100331 开始
+        """,
+        params=(Param("date", "20220331"),),
+        tier="daily",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_hsgt_fund_flow_summary_em",
+        """
+        东方财富网-数据中心-资金流向-沪深港通资金流向
+        """,
+        tier="realtime",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_profit_forecast_em",
+        """
+        东方财富网-数据中心-研究报告-盈利预测; 该数据源网页端返回数据有异常, 本接口已修复该异常
+        """,
+        tier="daily",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_profit_forecast_ths",
+        """
+        同花顺-盈利预测
+        """,
+        tier="daily",
+        source="ths",
+    ),
+    ToolSpec(
+        "stock_board_industry_name_ths",
+        """
+        获取同花顺行业一览表
+        """,
+        tier="static",
+        source="ths",
+    ),
+    ToolSpec(
+        "stock_hot_rank_em",
+        """
+        东方财富网站-股票热度
+        """,
+        tier="realtime",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_lhb_detail_em",
+        """
+        东方财富网-数据中心-龙虎榜单-龙虎榜详情
+
+        参数说明:
+        - start_date: str
+          start_date="20220314"
+        - end_date: str
+          end_date="20220315"
+        """,
+        params=(
+            Param("start_date", "20230403"),
+            Param("end_date", "20230417"),
+        ),
+        tier="daily",
+        chunked=True,
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_lhb_stock_statistic_em",
+        """
+        东方财富网-数据中心-龙虎榜单-个股上榜统计
+        """,
+        tier="daily",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_institute_hold_detail",
+        """
+        新浪财经-机构持股-机构持股详情
+
+        参数说明:
+        - stock: str
+          stock="300003"; 股票代码
+        - quarter: str
+          quarter="20201"; 从 2005 年开始, {"一季报":1, "中报":2 "三季报":3 "年报":4}, e.g., "20191", 其中的 1 表示一季报; "20193", 其中的 3 表示三季报;
+        """,
+        params=(
+            Param("stock"),
+            Param("quarter"),
+        ),
+        tier="daily",
+        source="sina",
+    ),
+    ToolSpec(
+        "stock_research_report_em",
+        """
+        东方财富网-数据中心-研究报告-个股研报
+
+        参数说明:
+        - symbol: str
+          symbol="000001"
+        """,
+        params=(Param("symbol"),),
+        tier="daily",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_info_cjzc_em",
+        """
+        获取财经早餐
+        """,
+        tier="daily",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_info_global_em",
+        """
+        获取全球财经快讯-东方财富
+        """,
+        tier="realtime",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_info_global_sina",
+        """
+        获取全球财经快讯-新浪财经
+        """,
+        tier="realtime",
+        source="sina",
+    ),
+    ToolSpec(
+        "stock_irm_cninfo",
+        """
+        互动易-提问
+
+        参数说明:
+        - symbol: str
+          symbol="002594";
+        """,
+        params=(Param("symbol"),),
+        tier="daily",
+        source="cninfo",
+    ),
+    ToolSpec(
+        "stock_irm_ans_cninfo",
+        """
+        互动易-回答
+
+        参数说明:
+        - symbol: str
+          symbol="1495108801386602496"; 通过 ak.stock_irm_cninfo 来获取具体的提问者编号
+        """,
+        params=(Param("symbol"),),
+        tier="daily",
+        source="cninfo",
+    ),
+    ToolSpec(
+        "stock_zh_b_spot",
+        """
+        B 股数据是从新浪财经获取的数据, 重复运行本函数会被新浪暂时封 IP, 建议增加时间间隔
+        """,
+        tier="realtime",
+        shared=True,
+        source="sina",
+        market="b",
+    ),
+    ToolSpec(
+        "stock_zh_b_daily",
+        """
+        B 股数据是从新浪财经获取的数据, 历史数据按日频率更新
+
+        参数说明:
+        - symbol: str
+          symbol='sh900901'; 股票代码可以在 ak.stock_zh_b_spot() 中获取
+        - start_date: str
+          start_date='20201103'; 开始查询的日期
+        - end_date: str
+          end_date='20201116'; 结束查询的日期
+        - adjust: str
+          默认返回不复权的数据; qfq: 返回前复权后的数据; hfq: 返回后复权后的数据; hfq-factor: 返回后复权因子; qfq-factor: 返回前复权因子
+        """,
+        params=(
+            Param("symbol"),
+            Param("start_date", "20201103"),
+            Param("end_date", "20201116"),
+            Param("adjust", ""),
+        ),
+        tier="history",
+        source="sina",
+        market="b",
+    ),
+    ToolSpec(
+        "stock_zh_b_minute",
+        """
+        新浪财经 B 股股票或者指数的分时数据，目前可以获取 1, 5, 15, 30, 60 分钟的数据频率, 可以指定是否复权
+
+        参数说明:
+        - symbol: str
+          symbol='sh900901'; 同日频率数据接口
+        - period: str
+          period='1'; 获取 1, 5, 15, 30, 60 分钟的数据频率
+        - adjust: str
+          adjust=""; 默认为空: 返回不复权的数据; qfq: 返回前复权后的数据; hfq: 返回后复权后的数据;
+        """,
+        params=(
+            Param("symbol"),
+            Param("period", "1"),
+            Param("adjust", ""),
+        ),
+        tier="realtime",
+        source="sina",
+        market="b",
+    ),
+    ToolSpec(
+        "stock_hk_spot",
+        """
+        获取所有港股的实时行情数据 15 分钟延时
+        """,
+        tier="realtime",
+        shared=True,
+        source="sina",
+        market="hk",
+    ),
+    ToolSpec(
+        "stock_us_spot",
+        """
+        新浪财经-美股; 获取的数据有 15 分钟延迟; 建议使用 ak.stock_us_spot_em() 来获取数据
+        """,
+        tier="realtime",
+        shared=True,
+        source="sina",
+        market="us",
+    ),
+    ToolSpec(
+        "stock_zyjs_ths",
+        """
+        同花顺-主营介绍
+
+        参数说明:
+        - symbol: str
+          symbol="000066"
+        """,
+        params=(Param("symbol"),),
+        tier="static",
+        source="ths",
+    ),
+    ToolSpec(
+        "stock_zygc_em",
+        """
+        东方财富网-个股-主营构成
+
+        参数说明:
+        - symbol: str
+          symbol="SH688041"
+        """,
+        params=(Param("symbol"),),
+        tier="static",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_gsrl_gsdt_em",
+        """
+        东方财富网-数据中心-股市日历-公司动态
+
+        参数说明:
+        - date: str
+          date="20230808"; 交易日
+        """,
+        params=(Param("date"),),
+        tier="daily",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_dividend_cninfo",
+        """
+        巨潮资讯-个股-历史分红
+
+        参数说明:
+        - symbol: str
+          symbol="600009"
+        """,
+        params=(Param("symbol"),),
+        tier="static",
+        source="cninfo",
+    ),
+    ToolSpec(
+        "stock_news_em",
+        """
+        东方财富指定个股的新闻资讯数据
+
+        参数说明:
+        - symbol: str
+          symbol="603777"; 股票代码或其他关键词
+        """,
+        params=(Param("symbol"),),
+        tier="realtime",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_news_main_cx",
+        """
+        财新网-财新数据通-最新
+        """,
+        tier="realtime",
+        source="caixin",
+    ),
+    ToolSpec(
+        "stock_yjkb_em",
+        """
+        东方财富-数据中心-年报季报-业绩快报
+
+        参数说明:
+        - date: str
+          date="20200331"; choice of {"XXXX0331", "XXXX0630", "XXXX0930", "XXXX1231"}; 从 20100331 开始
+        """,
+        params=(Param("date"),),
+        tier="daily",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_yjyg_em",
+        """
+        东方财富-数据中心-年报季报-业绩预告
+
+        参数说明:
+        - date: str
+          date="20200331"; choice of {"XXXX0331", "XXXX0630", "XXXX0930", "XXXX1231"}; 从 20081231 开始
+        """,
+        params=(Param("date"),),
+        tier="daily",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_yysj_em",
+        """
+        东方财富-数据中心-年报季报-预约披露时间
+
+        参数说明:
+        - symbol: str
+          symbol="沪深A股"; choice of {'沪深A股', '沪市A股', '科创板', '深市A股', '创业板', '京市A股', 'ST板'}
+        - date: str
+          date="20200331"; choice of {"XXXX0331", "XXXX0630", "XXXX0930", "XXXX1231"}; 从 20081231 开始
+        """,
+        params=(
+            Param("symbol"),
+            Param("date"),
+        ),
+        tier="daily",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_hot_follow_xq",
+        """
+        雪球-沪深股市-热度排行榜-关注排行榜
+
+        参数说明:
+        - symbol: str
+          symbol="最热门"; choice of {"本周新增", "最热门"}
+        """,
+        params=(Param("symbol"),),
+        tier="realtime",
+        source="xueqiu",
+    ),
+    ToolSpec(
+        "stock_hot_rank_detail_em",
+        """
+        东方财富网-股票热度-历史趋势及粉丝特征
+
+        参数说明:
+        - symbol: str
+          symbol="SZ000665"
+        """,
+        params=(Param("symbol"),),
+        tier="realtime",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_hot_rank_latest_em",
+        """
+        东方财富-个股人气榜-最新排名
+        """,
+        tier="realtime",
+        source="eastmoney",
+    ),
+    ToolSpec(
+        "stock_hot_keyword_em",
+        """
+        东方财富-个股人气榜-热门关键词
+        """,
+        tier="realtime",
+        source="eastmoney",
+    ),
+)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+对比 records 与 columnar 两种返回格式的体积与序列化耗时，以及文件缓存按列式存储前后的文件大小与读取耗时。
+
+使用模拟的沪深京 A 股实时行情（23 列、约 5500 行，与 stock_zh_a_spot_em 结构一致），不访问网络：
+
+    python tools/bench_envelope.py [行数]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import file_cache  # noqa: E402
+from mcp_utils import COLUMNAR, apply_view  # noqa: E402
+
+SPOT_COLUMNS = [
+    "序号", "代码", "名称", "最新价", "涨跌幅", "涨跌额", "成交量", "成交额", "振幅", "最高", "最低", "今开",
+    "昨收", "量比", "换手率", "市盈率-动态", "市净率", "总市值", "流通市值", "涨速", "5分钟涨跌", "60日涨跌幅",
+    "年初至今涨跌幅",
+]
+
+
+def make_spot_result(rows: int) -> dict:
+    rng = random.Random(42)
+    data = []
+    for i in range(rows):
+        record = {column: round(rng.uniform(-10, 100), 2) for column in SPOT_COLUMNS}
+        record["序号"] = i + 1
+        record["代码"] = f"{600000 + i:06d}"
+        record["名称"] = f"股票{i}"
+        record["成交量"] = rng.randint(1000, 10**8)
+        record["总市值"] = rng.randint(10**8, 10**12)
+        data.append(record)
+    return {"success": True, "rows": rows, "columns": SPOT_COLUMNS, "data": data}
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5500
+    result = make_spot_result(rows)
+    columnar = apply_view(result, fmt=COLUMNAR)
+
+    print(f"模拟行情：{rows} 行 x {len(SPOT_COLUMNS)} 列")
+    print("\n[返回信封]")
+    for label, payload in (("records", result), ("columnar", columnar)):
+        raw = json.dumps(payload, ensure_ascii=False)
+        seconds = timed(lambda: json.dumps(payload, ensure_ascii=False))
+        print(f"  {label:<9} {len(raw.encode('utf-8')):>10,} bytes  json.dumps {seconds * 1000:7.1f} ms")
+    seconds = timed(lambda: apply_view(result, fmt=COLUMNAR))
+    print(f"  records -> columnar 转换 {seconds * 1000:.1f} ms")
+
+    print("\n[文件缓存]")
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        for label, packer in (("records", lambda r: None), ("columnar", file_cache._pack_rows)):
+            with patch("file_cache._pack_rows", packer):
+                file_cache.set(root, "bench", (), {"layout": label}, 60, result)
+            path = file_cache._cache_path(root, "bench", file_cache._cache_key("bench", (), {"layout": label}))
+            read = timed(lambda: file_cache.get(root, "bench", (), {"layout": label}, 60))
+            page = timed(lambda: file_cache.get_slice(root, "bench", (), {"layout": label}, 60, 2000, 20))
+            print(
+                f"  {label:<9} {path.stat().st_size:>10,} bytes  全量读取 {read * 1000:7.1f} ms"
+                f"  分页读取 20 行 {page * 1000:5.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 # tools/generate_tools.py
 """
-自动生成 MCP tools 装饰器的脚本
-分析 akshare-api.py 中的函数，生成 @mcp.tool() 装饰器代码
+自动生成工具注册表条目的脚本
+分析 akshare-api.py 中的函数，生成 tool_registry.TOOLS 中的 ToolSpec 条目
 """
 import re
 from pathlib import Path
@@ -15,64 +15,57 @@ pattern = r'^def (stock_\w+)\((.*?)\):\s*"""(.*?)"""'
 matches = re.findall(pattern, content, re.MULTILINE | re.DOTALL)
 
 print(f"找到 {len(matches)} 个函数")
-print("\n生成 MCP tools 代码：\n")
+print("\n生成 ToolSpec 条目（确认 tier 后追加到 tool_registry.TOOLS）：\n")
+
+# 函数名后缀 -> 数据源分组
+SOURCE_SUFFIXES = {
+    "_em": "eastmoney",
+    "_sina": "sina",
+    "_xq": "xueqiu",
+    "_ths": "ths",
+    "_tx": "tencent",
+    "_cninfo": "cninfo",
+    "_cx": "caixin",
+}
+
+
+def guess_source(func_name):
+    if func_name.startswith("stock_sse_"):
+        return "sse"
+    if func_name.startswith("stock_szse_"):
+        return "szse"
+    for suffix, source in SOURCE_SUFFIXES.items():
+        if func_name.endswith(suffix):
+            return source
+    return ""
+
+
+def guess_market(func_name):
+    for prefix, market in (("stock_zh_b_", "b"), ("stock_hk_", "hk"), ("stock_us_", "us")):
+        if func_name.startswith(prefix):
+            return market
+    return "a"
+
 
 for func_name, params, docstring in matches:
-    # 解析参数
+    print('    ToolSpec(')
+    print(f'        "{func_name}",')
+    print('        """')
+    print(f'        {docstring.strip()}')
+    print('        """,')
     if params.strip():
-        # 有参数的函数
-        param_list = [p.strip() for p in params.split(',')]
-        param_defs = []
-        for param in param_list:
+        print('        params=(')
+        for param in [p.strip() for p in params.split(',')]:
+            name = param.split('=')[0].split(':')[0].strip()
             if '=' in param:
-                name, default = param.split('=', 1)
-                # 推断类型
-                if isinstance(default, str) and default.strip().startswith('"'):
-                    param_type = 'str'
-                elif isinstance(default, str) and default.strip().isdigit():
-                    param_type = 'int'
-                elif isinstance(default, str) and default.strip() in ['True', 'False']:
-                    param_type = 'bool'
-                else:
-                    param_type = 'str'
-                param_defs.append(f'{name.strip()}: {param_type} = {default.strip()}')
+                print(f'            Param("{name}", {param.split("=", 1)[1].strip()}),')
             else:
-                parts = param.split(':')
-                param_defs.append(f'{parts[0].strip()}: str')
-
-        params_str = ', '.join(param_defs)
-
-        print(f'@mcp.tool()')
-        print(f'def {func_name}({params_str}) -> dict:')
-        print(f'    """')
-        print(f'    {docstring.strip()}')
-        print(f'    """')
-        print(f'    try:')
-        print(f'        from akshare_api import {func_name}')
-        print(f'        # 构建参数字典')
-        print(f'        kwargs = {{}}')
-        for param in param_list:
-            name = param.split('=')[0].split(':')[0].strip()
-            print(f'        if {name} is not None:')
-            print(f'            kwargs["{name}"] = {name}')
-        print(f'        df = {func_name}(**kwargs)')
-        print(f'        return dataframe_to_mcp_result(df)')
-        print(f'    except Exception as e:')
-        print(f'        logger.error(f"{func_name} 执行失败: {{e}}")')
-        print(f'        return format_error_response(e)')
-        print()
-    else:
-        # 无参数的函数
-        print(f'@mcp.tool()')
-        print(f'def {func_name}() -> dict:')
-        print(f'    """')
-        print(f'    {docstring.strip()}')
-        print(f'    """')
-        print(f'    try:')
-        print(f'        from akshare_api import {func_name}')
-        print(f'        df = {func_name}()')
-        print(f'        return dataframe_to_mcp_result(df)')
-        print(f'    except Exception as e:')
-        print(f'        logger.error(f"{func_name} 执行失败: {{e}}")')
-        print(f'        return format_error_response(e)')
-        print()
+                print(f'            Param("{name}"),')
+        print('        ),')
+    # 缓存层级需按数据更新频率人工确认：daily / static / realtime / history / micro
+    print('        tier="daily",')
+    print(f'        source="{guess_source(func_name)}",')
+    market = guess_market(func_name)
+    if market != "a":
+        print(f'        market="{market}",')
+    print('    ),')
@@ -0,0 +1,262 @@
+# workers.py
+"""
+多 worker 部署：监督进程启动 N 个 worker 进程共用同一端口与 CACHE_DIR，由其中一个当选的 worker 运行后台任务。
+
+- 端口：Linux 上各 worker 以 SO_REUSEPORT 各自绑定同一端口，由内核在 worker 间均衡分发连接；
+  其他平台（macOS / BSD 的 SO_REUSEPORT 不做均衡）由监督进程绑定监听 socket，worker 继承文件描述符后共用
+- 选主：各 worker 以非阻塞 fcntl.flock 抢占 CACHE_DIR/.leader.lock，抢到的 worker 运行缓存清理与预取；
+  其余 worker 定期重试，当前 leader 退出（锁随进程释放）后由其中一个接替
+- 监督进程转发 SIGTERM / SIGINT，worker 意外退出时自动重启
+"""
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 监督进程传给 worker 的环境变量：worker 编号与继承的监听 socket 文件描述符
+WORKER_ID_ENV = "MCP_WORKER_ID"
+LISTEN_FD_ENV = "MCP_LISTEN_FD"
+
+LEADER_LOCK_NAME = ".leader.lock"
+
+# 只有 Linux 的 SO_REUSEPORT 会在绑定同一端口的进程间均衡分发连接
+HAS_REUSEPORT = sys.platform.startswith("linux") and hasattr(socket, "SO_REUSEPORT")
+
+
+def worker_id() -> Optional[int]:
+    """当前进程的 worker 编号；不是由监督进程启动时为 None。"""
+    raw = os.environ.get(WORKER_ID_ENV, "").strip()
+    return int(raw) if raw else None
+
+
+def bind_socket(host: str, port: int, reuse_port: bool = False) -> socket.socket:
+    """
+    绑定 TCP 监听 socket。
+
+    Args:
+        host: 监听地址（IPv4 或 IPv6）
+        port: 端口
+        reuse_port: 是否设置 SO_REUSEPORT，使多个进程可分别绑定同一端口
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((host, port))
+        sock.listen(2048)
+    except OSError:
+        sock.close()
+        raise
+    sock.set_inheritable(False)
+    return sock
+
+
+def listen_socket(host: str, port: int) -> socket.socket:
+    """worker 的监听 socket：继承监督进程的文件描述符，或以 SO_REUSEPORT 自行绑定。"""
+    raw = os.environ.get(LISTEN_FD_ENV, "").strip()
+    if raw:
+        return socket.socket(fileno=int(raw))
+    return bind_socket(host, port, reuse_port=True)
+
+
+class LeaderElection:
+    """
+    基于文件锁的选主：同一 CACHE_DIR 下同时只有一个进程持有锁，锁随进程退出自动释放。
+
+    Args:
+        path: 锁文件路径（CACHE_DIR/.leader.lock）
+        on_elected: 当选时调用一次（在当选的线程中执行）
+        retry_seconds: 未当选时重试的间隔秒数
+    """
+
+    def __init__(self, path: Path, on_elected: Callable[[], None], retry_seconds: float = 5.0) -> None:
+        self.path = Path(path)
+        self.on_elected = on_elected
+        self.retry_seconds = retry_seconds
+        self._fd: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """非阻塞地尝试取得锁；取得后在锁文件中写入当前进程号。"""
+        if self._fd is not None:
+            return True
+        if fcntl is None:
+            # 不支持 flock 的平台只有单进程部署，总是当选
+            self._fd = -1
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        return True
+
+    def _elected(self) -> None:
+        logger.info("leader elected (pid %s): running background jobs", os.getpid())
+        try:
+            self.on_elected()
+        except Exception as e:
+            logger.warning("leader background jobs failed to start: %s", e)
+
+    def start(self) -> bool:
+        """
+        尝试当选；未当选时启动后台线程定期重试。
+
+        Returns:
+            是否立即当选
+        """
+        try:
+            acquired = self.try_acquire()
+        except OSError as e:
+            logger.warning("leader lock %s unavailable, background jobs disabled: %s", self.path, e)
+            return False
+        if acquired:
+            self._elected()
+            return True
+        logger.info("another worker holds %s; retrying every %ss", self.path, self.retry_seconds)
+
+        def _worker() -> None:
+            while not self._stop.wait(self.retry_seconds):
+                try:
+                    acquired = self.try_acquire()
+                except OSError as e:
+                    logger.warning("leader lock %s: %s", self.path, e)
+                    continue
+                if acquired:
+                    self._elected()
+                    return
+
+        self._thread = threading.Thread(target=_worker, name="leader-election", daemon=True)
+        self._thread.start()
+        return False
+
+    def stop(self) -> None:
+        """停止重试并释放锁。"""
+        self._stop.set()
+        if self._fd is not None and self._fd >= 0:
+            os.close(self._fd)
+        self._fd = None
+
+
+class Supervisor:
+    """
+    启动并看护 N 个 worker 进程。
+
+    Args:
+        workers: worker 进程数
+        argv: worker 的命令行参数（不含解释器），如 ["mcp_server.py"]
+        host: 监听地址
+        port: 监听端口
+        restart_delay: worker 意外退出后重启前等待的秒数
+        stop_timeout: 停止时等待 worker 退出的秒数，超时后强制结束
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        argv: List[str],
+        host: str,
+        port: int,
+        restart_delay: float = 1.0,
+        stop_timeout: float = 10.0,
+    ) -> None:
+        self.workers = max(1, int(workers))
+        self.argv = list(argv)
+        self.host = host
+        self.port = port
+        self.restart_delay = restart_delay
+        self.stop_timeout = stop_timeout
+        self._procs: Dict[int, subprocess.Popen] = {}
+        self._stopping = threading.Event()
+        self._socket: Optional[socket.socket] = None
+
+    def _spawn(self, index: int) -> None:
+        env = {**os.environ, WORKER_ID_ENV: str(index)}
+        pass_fds = ()
+        if self._socket is not None:
+            env[LISTEN_FD_ENV] = str(self._socket.fileno())
+            pass_fds = (self._socket.fileno(),)
+        proc = subprocess.Popen([sys.executable, *self.argv], env=env, pass_fds=pass_fds)
+        self._procs[index] = proc
+        logger.info("worker %s started (pid %s)", index, proc.pid)
+
+    def _signal(self, signum: int, frame) -> None:
+        self._stopping.set()
+
+    def stop(self) -> None:
+        """向全部 worker 发送 SIGTERM，超时后强制结束。"""
+        self._stopping.set()
+        for proc in self._procs.values():
+            if proc.poll() is None:
+                proc.terminate()
+        deadline = time.monotonic() + self.stop_timeout
+        for proc in self._procs.values():
+            try:
+                proc.wait(max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                logger.warning("worker pid %s did not exit in %ss, killing", proc.pid, self.stop_timeout)
+                proc.kill()
+                proc.wait()
+
+    def run(self, poll_seconds: float = 0.5) -> int:
+        """
+        启动全部 worker 并阻塞到收到 SIGTERM / SIGINT。
+
+        Returns:
+            进程退出码
+        """
+        if not HAS_REUSEPORT:
+            self._socket = bind_socket(self.host, self.port)
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self._signal)
+            signal.signal(signal.SIGINT, self._signal)
+        logger.info(
+            "supervisor (pid %s): %s workers on %s:%s (%s)",
+            os.getpid(),
+            self.workers,
+            self.host,
+            self.port,
+            "SO_REUSEPORT" if self._socket is None else "shared socket",
+        )
+        try:
+            for index in range(self.workers):
+                self._spawn(index)
+            while not self._stopping.wait(poll_seconds):
+                for index, proc in list(self._procs.items()):
+                    code = proc.poll()
+                    if code is None:
+                        continue
+                    logger.warning("worker %s (pid %s) exited with %s, restarting", index, proc.pid, code)
+                    if self._stopping.wait(self.restart_delay):
+                        break
+                    self._spawn(index)
+        finally:
+            self.stop()
+            if self._socket is not None:
+                self._socket.close()
+        return 0